@@ -164,4 +164,23 @@ export const getRefreshToken = (): string | null => localStorage.getItem('refres
 export const getCurrentUser = (): User | null => {
   const user = localStorage.getItem('user');
   return user ? JSON.parse(user) : null;
-};
\ No newline at end of file
+};
+/**
+ * @brief Genera un id para correlacionar varias peticiones de una misma operación.
+ * @details
+ * Se envía en el encabezado `X-Request-ID` (ver `conRequestId`). Los servicios lo
+ * registran en sus trazas, así las llamadas de un mismo pedido (crear, consumir
+ * stock, cobrar) pueden verse juntas.
+ * @return {string} Id aleatorio.
+ */
+export const nuevoRequestId = (): string =>
+  typeof crypto !== 'undefined' && 'randomUUID' in crypto
+    ? crypto.randomUUID()
+    : `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}`;
+
+/**
+ * @brief Opciones de Axios con el encabezado `X-Request-ID`, si se indicó un id.
+ * @param requestId Id generado con `nuevoRequestId`.
+ */
+export const conRequestId = (requestId?: string) =>
+  requestId ? { headers: { 'X-Request-ID': requestId } } : undefined;
@@ -5,7 +5,8 @@ import modalStyles from '../../../styles/modalStyles.module.css';
 import { createPedido, getPedidosByDate } from '../../../services/pedido_service';
 import type { Producto, PedidoItem, PedidoInput, Cliente } from '../../../types/models.d.ts';
 import { buscarClientesPorCoincidencia, createCliente, getClientes } from '../../../services/client_service';
-import { consumirStock } from '../../../services/product_service.ts';
+import { consumirStockPedido } from '../../../services/product_service.ts';
+import { nuevoRequestId } from '../../../api/apiClient';
 
 interface CrearPedidoModalProps {
   isOpen: boolean;
@@ -316,14 +317,15 @@ const CrearPedidoModal: React.FC<CrearPedidoModalProps> = ({ isOpen, onClose, pr
 
 
       console.log("Payload a enviar al backend:", pedidoData);
-      await createPedido(pedidoData);
+      // Mismo id para la creación y el consumo de stock: permite seguir el pedido en las trazas
+      const requestId = nuevoRequestId();
+      await createPedido(pedidoData, requestId);
 
       try {
-          const actualizaciones = pedidoItems.map(item => 
-              consumirStock(item.id, item.cantidad)
+          await consumirStockPedido(
+              pedidoItems.map(item => ({ productoId: item.id, cantidad: item.cantidad })),
+              requestId
           );
-          
-          await Promise.all(actualizaciones);
           console.log("Stock actualizado correctamente para todos los productos.");
           
       } catch (stockError) {
@@ -5,7 +5,7 @@ import styles from './CrearPedidoModal.module.css'; // Usamos los mismos estilos
 import modalStyles from '../../../styles/modalStyles.module.css';
 import { editarPedido } from '../../../services/pedido_service.ts';
 import type { Producto, Pedido, PedidoInput, PedidoItem } from '../../../types/models.ts';
-import { consumirStock } from '../../../services/product_service.ts';
+import { consumirStockPedido } from '../../../services/product_service.ts';
 
 interface EditarPedidoModalProps {
   isOpen: boolean;
@@ -189,7 +189,7 @@ const EditarPedidoModal: React.FC<EditarPedidoModalProps> = ({ isOpen, onClose,
         payload
       );
       try {
-          const stockUpdates = editingPedidoItems.map(newItem => {
+          const stockUpdates = editingPedidoItems.flatMap(newItem => {
               const originalItem = editingPedido.productos_detalle.find(
                   oldItem => oldItem.id_producto === newItem.id
               );
@@ -202,12 +202,14 @@ const EditarPedidoModal: React.FC<EditarPedidoModalProps> = ({ isOpen, onClose,
               // Solo consumimos stock si el delta es positivo 
               if (delta > 0) {
                   console.log(`Descontando stock extra para ${newItem.nombre}: ${delta}u`);
-                  return consumirStock(newItem.id, delta);
+                  return [{ productoId: newItem.id, cantidad: delta }];
               }
-              return Promise.resolve();
+              return [];
           });
 
-          await Promise.all(stockUpdates);
+          if (stockUpdates.length > 0) {
+              await consumirStockPedido(stockUpdates);
+          }
           
       } catch (stockErr) {
           console.error("Error actualizando stock al editar:", stockErr);
@@ -0,0 +1,43 @@
+import { useEffect, useRef } from 'react';
+
+/**
+ * @brief Cambios del catálogo que envía el servicio de productos por `/api/productos/ws/catalogo/`.
+ * @details Sólo viaja lo que cambió. `completo: true` indica que cambió una parte no detallada
+ * y hay que volver a pedir el listado.
+ */
+export type CambioCatalogo =
+    | {
+        tipo: 'producto';
+        version: number;
+        completo: boolean;
+        productos: { id: number; nombre: string; precio_unitario: string; disponible: boolean }[];
+        eliminados: number[];
+    }
+    | { tipo: 'categoria'; categorias: { id: number; nombre: string }[]; eliminadas: number[] }
+    | { tipo: 'disponibilidad'; productos: Record<number, number | null> }
+    | { tipo: 'receta'; recetas?: number[]; eliminadas?: number[]; completo?: boolean };
+
+export const useCatalogoSocket = (
+    onCambio: (cambio: CambioCatalogo) => void
+) => {
+    const socket = useRef<WebSocket | null>(null);
+    const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+
+    useEffect(() => {
+        const socketURL = `ws://${API_BASE_URL.slice(7)}/api/productos/ws/catalogo/`;
+
+        socket.current = new WebSocket(socketURL);
+
+        socket.current.onmessage = (event) => {
+            onCambio(JSON.parse(event.data));
+        };
+
+        socket.current.onerror = (error) => {
+            console.error("Error en WebSocket del catálogo:", error);
+        };
+
+        return () => {
+            socket.current?.close();
+        };
+    }, [onCambio, API_BASE_URL]);
+};
@@ -22,7 +22,12 @@ export const usePedidosSocket = (
         };
 
         socket.current.onmessage = (event) => {
-            const data: MessagePayload = JSON.parse(event.data);
+            const data = JSON.parse(event.data);
+            // Latido del servidor: si no se responde, cierra la conexión
+            if (data.tipo === 'ping') {
+                socket.current?.send(JSON.stringify({ tipo: 'pong' }));
+                return;
+            }
             console.log('Mensaje recibido del WebSocket:', data);
             onMessageReceived(data);
         };
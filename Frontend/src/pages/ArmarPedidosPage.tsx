@@ -12,14 +12,17 @@ import React, { useState, useEffect, useMemo, useCallback } from 'react';
 import type { ChangeEvent } from 'react';
 import styles from '../styles/crearPedidoPage.module.css';
 import { getClientes } from '../services/client_service';
-import { getProductos } from '../services/product_service';
+import { getProductos, getDisponibilidad } from '../services/product_service';
 import { createPedido, getPedidosByDate } from '../services/pedido_service';
 import type { PedidoItem, PedidoInput, Producto, Cliente } from '../types/models.d.ts';
 import { useNavigate } from 'react-router-dom'; 
+import { useCatalogoSocket } from '../hooks/useCatalogoSocket';
+import type { CambioCatalogo } from '../hooks/useCatalogoSocket';
 
 const CrearPedidoPage: React.FC = () => {
   const [clientes, setClientes] = useState<Cliente[]>([]);
   const [productos, setProductos] = useState<Producto[]>([]);
+  const [maximos, setMaximos] = useState<Record<number, number | null>>({});
 
   const [clienteSeleccionado, setClienteSeleccionado] = useState<Cliente | null>(null);
   const [categoriaSeleccionada, setCategoriaSeleccionada] = useState<string>('');
@@ -58,6 +61,53 @@ const CrearPedidoPage: React.FC = () => {
     fetchInitialData();
   }, [fetchInitialData]);
 
+  /**
+   * @brief Carga cuántas unidades de cada producto alcanzan con el stock y la refresca cada 30 segundos.
+   * @details Si el servicio no responde se conservan los últimos valores (o ningún límite).
+   */
+  useEffect(() => {
+    const cargarMaximos = () => getDisponibilidad().then(setMaximos).catch(err => console.error(err));
+    cargarMaximos();
+    const intervalo = setInterval(cargarMaximos, 30000);
+    return () => clearInterval(intervalo);
+  }, []);
+
+  /**
+   * @brief Aplica a la lista local los cambios del catálogo que llegan por WebSocket.
+   * @details Precios, disponibilidad y unidades restantes se actualizan sin volver a pedir
+   * el listado; si el cambio no viene detallado o trae un producto desconocido, se recarga.
+   */
+  const aplicarCambioCatalogo = useCallback((cambio: CambioCatalogo) => {
+    if (cambio.tipo === 'disponibilidad') {
+      setMaximos(prev => ({ ...prev, ...cambio.productos }));
+    } else if (cambio.tipo === 'producto') {
+      setProductos(prev => {
+        const conocidos = new Set(prev.map(p => p.id));
+        if (cambio.completo || cambio.productos.some(p => !conocidos.has(p.id))) {
+          getProductos().then(setProductos).catch(err => console.error(err));
+          return prev;
+        }
+        const cambios = new Map(cambio.productos.map(p => [p.id, p]));
+        return prev
+          .filter(p => !cambio.eliminados.includes(p.id))
+          .map(p => {
+            const nuevo = cambios.get(p.id);
+            return nuevo ? { ...p, ...nuevo, precio_unitario: Number(nuevo.precio_unitario) } : p;
+          });
+      });
+    } else if (cambio.tipo === 'categoria') {
+      getProductos().then(setProductos).catch(err => console.error(err));
+    }
+  }, []);
+
+  useCatalogoSocket(aplicarCambioCatalogo);
+
+  /** @brief Devuelve true si ya no se pueden agregar más unidades del producto al pedido. */
+  const alcanzoMaximo = useCallback((productoId: number, cantidad: number) => {
+    const maximo = maximos[productoId];
+    return maximo !== undefined && maximo !== null && cantidad >= maximo;
+  }, [maximos]);
+
   /** @brief Filtra la lista de clientes basándose en el término de búsqueda. */
   const clientesFiltrados = useMemo(() => {
     if (!clienteSearchTerm) {
@@ -97,6 +147,9 @@ const CrearPedidoPage: React.FC = () => {
       eliminarItemDelPedido(productoId);
       return;
     }
+    if (alcanzoMaximo(productoId, cantidad - 1)) {
+      return;
+    }
     setPedidoItems(prevItems =>
       prevItems.map(item =>
         item.id === productoId
@@ -104,12 +157,15 @@ const CrearPedidoPage: React.FC = () => {
           : item
       )
     );
-  }, [eliminarItemDelPedido]);
+  }, [eliminarItemDelPedido, alcanzoMaximo]);
 
   /** @brief Añade un producto al pedido o incrementa su cantidad si ya existe. */
   const agregarProductoAlPedido = useCallback((producto: Producto) => {
     setPedidoItems(prevItems => {
       const existingItem = prevItems.find(item => item.id === producto.id);
+      if (alcanzoMaximo(producto.id, existingItem?.cantidad ?? 0)) {
+        return prevItems;
+      }
       const precioUnitario = Number(producto.precio_unitario) || 0;
       
       if (existingItem) {
@@ -136,7 +192,7 @@ const CrearPedidoPage: React.FC = () => {
         ];
       }
     });
-  }, []);
+  }, [alcanzoMaximo]);
 
   const handleSeleccionarCliente = (cliente: Cliente) => {
     setClienteSeleccionado(cliente);
@@ -253,10 +309,14 @@ const CrearPedidoPage: React.FC = () => {
                   <div className={styles.productInfo}>
                     <strong>{producto.nombre}</strong>
                     <span>${(producto.precio_unitario || 0)}</span>
+                    {maximos[producto.id] != null && (
+                      <span>Quedan {maximos[producto.id]}</span>
+                    )}
                   </div>
                   <button
                     onClick={() => agregarProductoAlPedido(producto)}
                     className={styles.addButtonSmall}
+                    disabled={alcanzoMaximo(producto.id, pedidoItems.find(item => item.id === producto.id)?.cantidad ?? 0)}
                   >
                     Añadir
                   </button>
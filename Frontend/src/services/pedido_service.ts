@@ -6,8 +6,9 @@
  * Proporciona un conjunto de funciones para las operaciones CRUD sobre los pedidos,
  *  utilizando una instancia de Axios dedicada y configurada para este servicio.
  */
-import createAuthApiClient from '../api/apiClient';
+import createAuthApiClient, { conRequestId } from '../api/apiClient';
 import type { PedidoInput, Pedido } from '../types/models.d.ts';
+import type { PedidoEstado } from '../types/types';
 
 /**
  * @brief URL base del microservicio de pedidos.
@@ -27,11 +28,12 @@ const pedidoAPICLient = createAuthApiClient(PEDIDOS_API_BASE_URL);
  * @brief Envía la petición para crear un nuevo pedido al backend.
  * @details Realiza una petición POST al endpoint `/pedidos/crear/`.
  * @param {PedidoInput} pedidoData El objeto completo del pedido a crear, siguiendo la interfaz `PedidoInput`.
+ * @param {string} [requestId] Id para correlacionar esta petición con las siguientes del mismo pedido.
  * @returns {Promise<any>} Una promesa que se resuelve con la respuesta del backend tras la creación.
  * @throws {Error} Relanza el error si la petición a la API falla.
  */
-export const createPedido = async (pedidoData: PedidoInput): Promise<any> => {
-  const response = await pedidoAPICLient.post('/api/pedidos/crear/', pedidoData);
+export const createPedido = async (pedidoData: PedidoInput, requestId?: string): Promise<any> => {
+  const response = await pedidoAPICLient.post('/api/pedidos/crear/', pedidoData, conRequestId(requestId));
   return response.data;
 };
 
@@ -100,4 +102,49 @@ export const printPedido = async ({ fecha, numero }: { fecha: string; numero: nu
 export const getSaldoPendientePedido = async ({fecha, numero}: {fecha: string, numero: number}): Promise<any[]> => {
   const response = await pedidoAPICLient.get(`/api/pedidos/saldo_pendiente/?fecha=${fecha}&numero=${numero}`);
   return response.data;
-};
\ No newline at end of file
+};
+
+/**
+ * @brief Filtros de la búsqueda de pedidos.
+ * @details `desde` es obligatoria; sin `hasta` se busca sólo ese día. Las fechas van en formato "YYYY-MM-DD".
+ */
+export interface FiltrosBusquedaPedidos {
+  desde: string;
+  hasta?: string;
+  estado?: PedidoEstado[];
+  pagado?: boolean;
+  cliente?: string;
+  id_cliente?: number;
+  numero?: number;
+  producto?: number;
+  limite?: number;
+}
+
+/**
+ * @brief Página de resultados de la búsqueda de pedidos (paginación por cursor).
+ */
+export interface PaginaPedidos {
+  next: string | null;
+  previous: string | null;
+  results: Pedido[];
+}
+
+/**
+ * @brief Busca pedidos en un rango de fechas con filtros, resueltos en el servidor.
+ * @details Realiza una petición GET al endpoint `/pedidos/busqueda/`. Para la página
+ * siguiente se pasa la URL `next` de la respuesta anterior.
+ * @param {FiltrosBusquedaPedidos} filtros Filtros de la búsqueda.
+ * @param {string | null} [siguiente] URL `next` devuelta por la página anterior.
+ * @returns {Promise<PaginaPedidos>} Una promesa que se resuelve con la página de pedidos.
+ * @throws {Error} Relanza el error si la petición a la API falla.
+ */
+export const buscarPedidos = async (filtros: FiltrosBusquedaPedidos, siguiente?: string | null): Promise<PaginaPedidos> => {
+  if (siguiente) {
+    const response = await pedidoAPICLient.get<PaginaPedidos>(siguiente);
+    return response.data;
+  }
+  const { estado, ...resto } = filtros;
+  const params = { ...resto, ...(estado && estado.length ? { estado: estado.join(',') } : {}) };
+  const response = await pedidoAPICLient.get<PaginaPedidos>('/api/pedidos/busqueda/', { params });
+  return response.data;
+};
@@ -7,7 +7,7 @@
  * Utiliza una instancia de Axios dedicada, creada a partir de la factoría `createAuthApiClient`.
  */
 
-import createAuthApiClient from '../api/apiClient';
+import createAuthApiClient, { conRequestId } from '../api/apiClient';
 import type { Producto, ProductoInput } from '../types/models.d.ts';
 
 /**
@@ -93,11 +93,36 @@ export const cambiarDisponibilidad = async (producto: Producto): Promise<Product
  * @details Llama al endpoint '/api/productos/consumir-stock/' que maneja la lógica recursiva (recetas/insumos).
  * @param {number} productoId El ID del producto vendido.
  * @param {number} cantidad La cantidad vendida.
+ * @param {string} [requestId] Id del pedido que originó la venta, para correlacionar las trazas.
  */
-export const consumirStock = async (productoId: number, cantidad: number): Promise<any> => {
+export const consumirStock = async (productoId: number, cantidad: number, requestId?: string): Promise<any> => {
     const response = await productAPIClient.post('/api/productos/consumir-stock/', {
         producto_id: productoId,
         cantidad: cantidad
-    });
+    }, conRequestId(requestId));
     return response.data;
-};
\ No newline at end of file
+};
+
+/**
+ * @brief Descuenta el stock de todas las líneas de un pedido con una sola llamada.
+ * @details Llama a '/api/productos/consumir-stock/' con `lineas`: productos carga una sola vez
+ * las recetas de todo el pedido y descuenta todo en una transacción.
+ * @param {{ productoId: number, cantidad: number }[]} lineas Productos vendidos y sus cantidades.
+ * @param {string} [requestId] Id del pedido que originó la venta, para correlacionar las trazas.
+ */
+export const consumirStockPedido = async (lineas: { productoId: number, cantidad: number }[], requestId?: string): Promise<any> => {
+    const response = await productAPIClient.post('/api/productos/consumir-stock/', {
+        lineas: lineas.map(linea => ({ producto_id: linea.productoId, cantidad: linea.cantidad }))
+    }, conRequestId(requestId));
+    return response.data;
+};
+/**
+ * @brief Obtiene cuántas unidades de cada producto se pueden vender con el stock actual.
+ * @details Llama a '/api/productos/disponibilidad/'. Para los productos con receta es lo que
+ * alcanza con el stock de sus insumos; `null` indica que el producto no tiene límite.
+ * @returns {Promise<Record<number, number | null>>} Máximo vendible por id de producto.
+ */
+export const getDisponibilidad = async (): Promise<Record<number, number | null>> => {
+    const response = await productAPIClient.get<{ productos: Record<number, number | null> }>('/api/productos/disponibilidad/');
+    return response.data.productos;
+};
@@ -21,6 +21,20 @@ export interface Cliente {
   nombre: string;
   telefono?: string;
   direccion?: string;
+  estadisticas?: EstadisticaCliente | null;
+}
+
+/**
+ * @interface EstadisticaCliente
+ * @brief Estadísticas de pedidos de un cliente que calcula el servicio de clientes.
+ * @details Los montos llegan como texto decimal ("2000.00"). Es null si el cliente no tiene pedidos registrados.
+ */
+export interface EstadisticaCliente {
+  pedidos: number;
+  total: string;
+  ticket_promedio: string;
+  ultimo_pedido: string | null;
+  favoritos: { id_producto: number; nombre: string; cantidad: number }[];
 }
 
 /**
@@ -0,0 +1,251 @@
+"""!
+@file escenario.py
+@brief Flujos que simulan un pico de servicio (hora de la cena) contra los microservicios.
+@details
+    Cada usuario virtual reproduce lo que hace el frontend al tomar un pedido:
+
+    1. Inicia sesión (`UserLoginView`).
+    2. Carga el catálogo de productos y busca al cliente por nombre.
+    3. Crea el pedido con N productos (`CrearPedidoView`).
+    4. Consume el stock de cada producto, como `CrearPedidoModal`.
+    5. Registra el cobro del pedido.
+    6. Refresca el tablero de pedidos del día.
+
+    En paralelo, M oyentes WebSocket quedan suscriptos a las notificaciones de
+    pedidos y se mide cuánto tarda en llegarles el aviso de cada pedido creado.
+"""
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+PONG = json.dumps({'tipo': 'pong'})
+
+class Registro:
+    """!
+    @brief Acumula las latencias (en segundos) y errores observados por endpoint.
+    """
+
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, nombre, duracion, ok=True):
+        with self._lock:
+            self.latencias.setdefault(nombre, []).append(duracion)
+            if not ok:
+                self.errores[nombre] = self.errores.get(nombre, 0) + 1
+
+
+class UsuarioVirtual:
+    """!
+    @brief Un usuario (recepcionista) que toma pedidos durante la prueba.
+    """
+
+    def __init__(self, indice, urls, registro, numeros_pedido, envios_pedido, semilla, lineas, credenciales):
+        self.urls = urls
+        self.registro = registro
+        self.numeros_pedido = numeros_pedido
+        self.envios_pedido = envios_pedido
+        self.random = random.Random(semilla + indice)
+        self.lineas = lineas
+        self.credenciales = credenciales
+        self.session = requests.Session()
+
+    def _llamar(self, nombre, metodo, url, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.session.request(metodo, url, timeout=30, **kwargs)
+            ok = respuesta.status_code < 400
+        except requests.exceptions.RequestException:
+            respuesta, ok = None, False
+        self.registro.agregar(nombre, time.perf_counter() - inicio, ok)
+        return respuesta if ok else None
+
+    def login(self):
+        respuesta = self._llamar('usuarios:login', 'POST', f"{self.urls['usuarios']}/api/usuarios/login/", json=self.credenciales)
+        if respuesta is None:
+            raise RuntimeError('No se pudo iniciar sesión con las credenciales de la prueba')
+        self.session.headers['Authorization'] = f"Bearer {respuesta.json()['access']}"
+
+    def tomar_pedido(self):
+        catalogo = self._llamar('productos:listar', 'GET', f"{self.urls['productos']}/api/productos/listar/")
+        productos = [p for p in (catalogo.json() if catalogo is not None else []) if p.get('disponible', True)]
+        if not productos:
+            return
+
+        clientes = self._llamar(
+            'clientes:coincidencias', 'GET', f"{self.urls['clientes']}/api/clientes/buscar/coincidencias/",
+            params={'nombre': self.random.choice('aeiou')},
+        )
+        cliente = clientes.json()[0] if clientes is not None and clientes.json() else None
+
+        elegidos = self.random.sample(productos, min(self.lineas, len(productos)))
+        pedido = {
+            'numero_pedido': next(self.numeros_pedido),
+            'fecha_pedido': datetime.now().isoformat(timespec='seconds'),
+            'cliente': cliente['nombre'] if cliente else 'Carga',
+            'id_cliente': cliente['id'] if cliente else None,
+            'para_hora': '21:30:00',
+            'productos': [
+                {
+                    'id_producto': p['id'],
+                    'nombre_producto': p['nombre'],
+                    'cantidad_producto': self.random.randint(1, 3),
+                    'precio_unitario': p['precio_unitario'],
+                    'aclaraciones': '',
+                }
+                for p in elegidos
+            ],
+        }
+        # La notificación puede llegar antes que la respuesta del POST,
+        # por eso el envío se registra por número de pedido antes de llamar.
+        self.envios_pedido[pedido['numero_pedido']] = time.monotonic()
+        creado = self._llamar('pedidos:crear', 'POST', f"{self.urls['pedidos']}/api/pedidos/crear/", json=pedido)
+        if creado is None:
+            return
+        creado = creado.json()
+
+        self._llamar(
+            'productos:consumir_stock', 'POST', f"{self.urls['productos']}/api/productos/consumir-stock/",
+            json={'lineas': [
+                {'producto_id': linea['id_producto'], 'cantidad': linea['cantidad_producto']}
+                for linea in pedido['productos']
+            ]},
+        )
+
+        self._llamar(
+            'pedidos:cobro', 'POST', f"{self.urls['pedidos']}/api/pedidos/cobros/",
+            json={'pedido': creado['id'], 'tipo': 'efectivo', 'monto': creado['total'] or 1},
+        )
+
+        self._llamar(
+            'pedidos:tablero', 'GET', f"{self.urls['pedidos']}/api/pedidos/buscar/",
+            params={'fecha': datetime.now().strftime('%Y-%m-%d')},
+        )
+
+    def correr(self, iteraciones):
+        self.login()
+        for _ in range(iteraciones):
+            self.tomar_pedido()
+
+
+class OyentesWebSocket:
+    """!
+    @brief M clientes WebSocket suscriptos a las notificaciones de pedidos.
+    @details
+        Corre un event loop propio en un hilo. Por cada notificación de creación
+        registra la demora entre el envío del POST y la llegada del aviso.
+    """
+
+    def __init__(self, url, cantidad, registro, envios_pedido):
+        self.url = url
+        self.cantidad = cantidad
+        self.registro = registro
+        self.envios_pedido = envios_pedido
+        self.conectados = 0
+        self.mensajes = 0
+        self._listos = threading.Event()
+        self._loop = None
+        self._hilo = None
+        self._detener = None
+
+    async def _oyente(self):
+        import websockets
+
+        try:
+            async with websockets.connect(self.url, open_timeout=30) as ws:
+                self.conectados += 1
+                if self.conectados == self.cantidad:
+                    self._listos.set()
+                while not self._detener.is_set():
+                    try:
+                        texto = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    llegada = time.monotonic()
+                    mensaje = json.loads(texto)
+                    if mensaje.get('tipo') == 'ping':
+                        # Como el frontend: sin respuesta el servidor cierra la conexión
+                        await ws.send(PONG)
+                        continue
+                    self.mensajes += 1
+                    if mensaje.get('action') == 'create':
+                        enviado = self.envios_pedido.get(mensaje.get('pedido', {}).get('numero_pedido'))
+                        if enviado is not None:
+                            self.registro.agregar('ws:notificacion_pedido', llegada - enviado)
+        except Exception:
+            self.registro.agregar('ws:conexion', 0.0, ok=False)
+
+    async def _principal(self):
+        self._detener = asyncio.Event()
+        self._tareas = [asyncio.ensure_future(self._oyente()) for _ in range(self.cantidad)]
+        await asyncio.gather(*self._tareas)
+
+    def iniciar(self, timeout=30.0):
+        if not self.cantidad:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._loop.run_until_complete, args=(self._principal(),), daemon=True)
+        self._hilo.start()
+        self._listos.wait(timeout)
+
+    def detener(self):
+        if not self._hilo:
+            return
+        # Margen para que lleguen las últimas notificaciones
+        time.sleep(1.0)
+        self._loop.call_soon_threadsafe(self._detener.set)
+        self._hilo.join(timeout=10)
+
+
+def correr_escenario(urls, usuarios=10, iteraciones=20, lineas=3, oyentes_ws=20, semilla=42,
+                     credenciales=None, log=print):
+    """!
+    @brief Ejecuta el escenario completo y devuelve las mediciones.
+    @param urls: URL base de cada servicio ({'usuarios': ..., 'clientes': ..., 'productos': ..., 'pedidos': ...}).
+    @param usuarios: Usuarios virtuales concurrentes.
+    @param iteraciones: Pedidos que toma cada usuario virtual.
+    @param lineas: Productos por pedido.
+    @param oyentes_ws: Clientes WebSocket escuchando notificaciones.
+    @param semilla: Semilla para que la elección de productos sea reproducible.
+    @return tuple: (Registro, duración en segundos, datos de los oyentes WebSocket)
+    """
+    credenciales = credenciales or {'email': 'admin@admin.com', 'password': 'admin'}
+    registro = Registro()
+    envios_pedido = {}
+    # Números de pedido altos para no chocar con los pedidos que ya existan en el día
+    numeros_pedido = itertools.count(10000)
+
+    ws_url = urls['pedidos'].replace('http://', 'ws://').replace('https://', 'wss://') + '/api/pedidos/ws/notifications/'
+    oyentes = OyentesWebSocket(ws_url, oyentes_ws, registro, envios_pedido)
+    oyentes.iniciar()
+    log(f"{oyentes.conectados} oyentes WebSocket conectados")
+
+    virtuales = [
+        UsuarioVirtual(i, urls, registro, numeros_pedido, envios_pedido, semilla, lineas, credenciales)
+        for i in range(usuarios)
+    ]
+    hilos = [threading.Thread(target=v.correr, args=(iteraciones,)) for v in virtuales]
+
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    oyentes.detener()
+    datos_ws = {
+        'oyentes': oyentes_ws,
+        'conectados': oyentes.conectados,
+        'mensajes_recibidos': oyentes.mensajes,
+        'pedidos_enviados': len(envios_pedido),
+    }
+    return registro, duracion, datos_ws
@@ -0,0 +1,86 @@
+"""!
+@file reporte.py
+@brief Cálculo de percentiles, reporte JSON y comparación entre corridas.
+"""
+import json
+import math
+
+
+def percentil(valores_ordenados, p):
+    """!
+    @brief Percentil por el método del rango más cercano.
+    @param valores_ordenados: Lista ordenada de valores.
+    @param p: Percentil entre 0 y 100.
+    """
+    if not valores_ordenados:
+        return 0.0
+    rango = max(1, math.ceil(p / 100 * len(valores_ordenados)))
+    return valores_ordenados[rango - 1]
+
+
+def resumir(registro, duracion, datos_ws, configuracion):
+    """!
+    @brief Arma el reporte de la corrida.
+    @return dict: Configuración, duración y, por endpoint, cantidad de llamadas,
+        errores, throughput (llamadas/s) y latencias en milisegundos.
+    """
+    endpoints = {}
+    for nombre, latencias in sorted(registro.latencias.items()):
+        ordenadas = sorted(latencias)
+        endpoints[nombre] = {
+            'llamadas': len(ordenadas),
+            'errores': registro.errores.get(nombre, 0),
+            'throughput': round(len(ordenadas) / duracion, 2) if duracion else 0.0,
+            'p50_ms': round(percentil(ordenadas, 50) * 1000, 2),
+            'p95_ms': round(percentil(ordenadas, 95) * 1000, 2),
+            'p99_ms': round(percentil(ordenadas, 99) * 1000, 2),
+            'max_ms': round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0,
+            'media_ms': round(sum(ordenadas) / len(ordenadas) * 1000, 2) if ordenadas else 0.0,
+        }
+    return {
+        'configuracion': configuracion,
+        'duracion_s': round(duracion, 3),
+        'endpoints': endpoints,
+        'websocket': datos_ws,
+    }
+
+
+def imprimir(reporte, salida=print):
+    salida(f"Duración: {reporte['duracion_s']} s")
+    salida(f"{'endpoint':32} {'n':>6} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for nombre, datos in reporte['endpoints'].items():
+        salida(
+            f"{nombre:32} {datos['llamadas']:>6} {datos['errores']:>5} {datos['throughput']:>8} "
+            f"{datos['p50_ms']:>9} {datos['p95_ms']:>9} {datos['p99_ms']:>9}"
+        )
+    ws = reporte['websocket']
+    salida(f"WebSocket: {ws['conectados']}/{ws['oyentes']} conectados, {ws['mensajes_recibidos']} mensajes recibidos")
+
+
+def comparar(anterior, actual, salida=print):
+    """!
+    @brief Imprime la variación porcentual de throughput y p95/p99 respecto de otra corrida.
+    """
+    salida(f"{'endpoint':32} {'rps':>10} {'p95':>10} {'p99':>10}")
+    for nombre, datos in actual['endpoints'].items():
+        previo = anterior['endpoints'].get(nombre)
+        if not previo:
+            salida(f"{nombre:32} {'(nuevo)':>10}")
+            continue
+        columnas = []
+        for clave in ('throughput', 'p95_ms', 'p99_ms'):
+            if previo[clave]:
+                columnas.append(f"{(datos[clave] - previo[clave]) / previo[clave] * 100:+.1f}%")
+            else:
+                columnas.append('-')
+        salida(f"{nombre:32} {columnas[0]:>10} {columnas[1]:>10} {columnas[2]:>10}")
+
+
+def guardar(reporte, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+
+
+def cargar(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
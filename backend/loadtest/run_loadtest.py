@@ -0,0 +1,91 @@
+"""!
+@file run_loadtest.py
+@brief Prueba de carga reproducible que simula la hora pico sobre los cuatro servicios.
+@details
+    Por defecto levanta los servicios en local con SQLite y la capa de channels
+    en memoria (ver servicios.py), corre el escenario (ver escenario.py) e
+    imprime throughput y latencias p50/p95/p99 por endpoint.
+
+    Uso:
+        pip install -r loadtest/requirements.txt
+        python loadtest/run_loadtest.py --usuarios 10 --iteraciones 20 --lineas 3 --ws 20 \\
+            --salida base.json
+        # ...cambios...
+        python loadtest/run_loadtest.py --salida nuevo.json --comparar base.json
+
+    Con `--sin-levantar` se usan servicios ya corriendo (por ejemplo detrás de
+    docker compose), indicando sus URLs con `--url-usuarios`, `--url-pedidos`, etc.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from escenario import correr_escenario  # noqa: E402
+from reporte import resumir, imprimir, comparar, guardar, cargar  # noqa: E402
+from servicios import Servicios, SERVICIOS  # noqa: E402
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga de hora pico sobre los microservicios.')
+    parser.add_argument('--usuarios', type=int, default=10, help='Usuarios virtuales concurrentes.')
+    parser.add_argument('--iteraciones', type=int, default=20, help='Pedidos que toma cada usuario virtual.')
+    parser.add_argument('--lineas', type=int, default=3, help='Productos por pedido.')
+    parser.add_argument('--ws', type=int, default=20, help='Oyentes WebSocket de notificaciones.')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla para la elección de productos.')
+    parser.add_argument('--email', default='admin@admin.com')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el reporte.')
+    parser.add_argument('--comparar', help='Reporte JSON de una corrida anterior para comparar.')
+    parser.add_argument('--dir-trabajo', help='Directorio para las bases SQLite y los logs (por defecto uno temporal).')
+    parser.add_argument('--sin-levantar', action='store_true', help='No levantar servicios, usar los que ya estén corriendo.')
+    for nombre, conf in SERVICIOS.items():
+        parser.add_argument(f'--url-{nombre}', default=f"http://127.0.0.1:{conf['puerto']}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    configuracion = {
+        'usuarios': args.usuarios,
+        'iteraciones': args.iteraciones,
+        'lineas': args.lineas,
+        'oyentes_ws': args.ws,
+        'semilla': args.semilla,
+    }
+    parametros = dict(
+        usuarios=args.usuarios,
+        iteraciones=args.iteraciones,
+        lineas=args.lineas,
+        oyentes_ws=args.ws,
+        semilla=args.semilla,
+        credenciales={'email': args.email, 'password': args.password},
+    )
+
+    if args.sin_levantar:
+        urls = {nombre: getattr(args, f'url_{nombre}') for nombre in SERVICIOS}
+        registro, duracion, datos_ws = correr_escenario(urls, **parametros)
+    else:
+        dir_trabajo = args.dir_trabajo or tempfile.mkdtemp(prefix='loadtest-')
+        print(f"Directorio de trabajo: {dir_trabajo}")
+        with Servicios(dir_trabajo) as servicios:
+            registro, duracion, datos_ws = correr_escenario(servicios.urls(), **parametros)
+
+    reporte = resumir(registro, duracion, datos_ws, configuracion)
+    imprimir(reporte)
+
+    if args.salida:
+        guardar(reporte, args.salida)
+        print(f"Reporte guardado en {args.salida}")
+    if args.comparar:
+        print(f"\nVariación respecto de {args.comparar}:")
+        comparar(cargar(args.comparar), reporte)
+
+    errores = sum(datos['errores'] for datos in reporte['endpoints'].values())
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
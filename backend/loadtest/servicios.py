@@ -0,0 +1,158 @@
+"""!
+@file servicios.py
+@brief Levanta los cuatro microservicios en local para las pruebas de carga.
+@details
+    Cada servicio corre como un subproceso con SQLite (`USE_SQLITE=True`) y la
+    capa de channels en memoria (`CHANNEL_LAYER=memory`), sobre un directorio de
+    trabajo descartable. Antes de levantarlos se aplican las migraciones y se
+    cargan los datos iniciales (usuario administrador, catálogo y clientes).
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+## Configuración de cada servicio: directorio, puerto y datos iniciales.
+SERVICIOS = {
+    'usuarios': {
+        'dir': 'service_usuarios',
+        'puerto': 8001,
+        'seed': [['seed_usuarios']],
+    },
+    'clientes': {
+        'dir': 'service_clientes',
+        'puerto': 8002,
+        'seed': [['loaddata', 'apps/clientes/fixture/clientes_iniciales.json']],
+    },
+    'productos': {
+        'dir': 'service_productos',
+        'puerto': 8003,
+        'seed': [['loaddata',
+                  'apps/categorias/fixture/categorias_iniciales.json',
+                  'apps/insumos/fixture/insumos_iniciales.json',
+                  'apps/productos/fixture/productos_iniciales.json']],
+    },
+    'pedidos': {
+        'dir': 'service_pedidos',
+        'puerto': 8004,
+        'seed': [],
+        # Igual que en el Dockerfile: daphne sirve HTTP y WebSocket
+        'comando': [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', '{puerto}', 'orders.asgi:application'],
+    },
+}
+
+
+def _entorno(nombre, dir_trabajo):
+    entorno = dict(os.environ)
+    entorno.update({
+        'USE_SQLITE': 'True',
+        'SQLITE_PATH': str(Path(dir_trabajo) / f'{nombre}.sqlite3'),
+        'CHANNEL_LAYER': 'memory',
+        'DJANGO_SECRET_KEY': 'loadtest',
+        'JWT_SIGNING_KEY': entorno.get('JWT_SIGNING_KEY', 'loadtest-signing-key'),
+        'DEBUG': 'False',
+        'ALLOWED_HOSTS': '127.0.0.1,localhost',
+        'IP_IMPRESORA': '127.0.0.1',
+        'PYTHONUNBUFFERED': '1',
+    })
+    return entorno
+
+
+def _esperar_puerto(puerto, timeout=60.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"El puerto {puerto} no respondió en {timeout} segundos")
+
+
+class Servicios:
+    """!
+    @brief Administra el ciclo de vida de los servicios levantados para la prueba.
+    @details
+        Se usa como context manager: al entrar prepara las bases y levanta los
+        servicios; al salir los detiene.
+    """
+
+    def __init__(self, dir_trabajo, log=print):
+        self.dir_trabajo = Path(dir_trabajo)
+        self.log = log
+        self.procesos = {}
+        self._logs = []
+
+    def urls(self):
+        """!
+        @brief URL base de cada servicio.
+        """
+        return {nombre: f"http://127.0.0.1:{conf['puerto']}" for nombre, conf in SERVICIOS.items()}
+
+    def _manage(self, nombre, *args):
+        conf = SERVICIOS[nombre]
+        subprocess.run(
+            [sys.executable, 'manage.py', *args],
+            cwd=BACKEND_DIR / conf['dir'],
+            env=_entorno(nombre, self.dir_trabajo),
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def preparar(self):
+        """!
+        @brief Aplica migraciones y carga los datos iniciales de cada servicio.
+        """
+        self.dir_trabajo.mkdir(parents=True, exist_ok=True)
+        for nombre, conf in SERVICIOS.items():
+            self.log(f"Preparando base de {nombre}...")
+            self._manage(nombre, 'migrate', '--noinput')
+            for comando in conf['seed']:
+                self._manage(nombre, *comando)
+
+    def levantar(self):
+        for nombre, conf in SERVICIOS.items():
+            puerto = conf['puerto']
+            comando = conf.get('comando') or [sys.executable, 'manage.py', 'runserver', '127.0.0.1:{puerto}', '--noreload']
+            comando = [parte.format(puerto=puerto) for parte in comando]
+            log_file = open(self.dir_trabajo / f'{nombre}.log', 'w')
+            self._logs.append(log_file)
+            self.procesos[nombre] = subprocess.Popen(
+                comando,
+                cwd=BACKEND_DIR / conf['dir'],
+                env=_entorno(nombre, self.dir_trabajo),
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+            )
+        for nombre, conf in SERVICIOS.items():
+            _esperar_puerto(conf['puerto'])
+            self.log(f"{nombre} escuchando en el puerto {conf['puerto']}")
+
+    def detener(self):
+        for proceso in self.procesos.values():
+            proceso.terminate()
+        for proceso in self.procesos.values():
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+        for log_file in self._logs:
+            log_file.close()
+        self.procesos = {}
+        self._logs = []
+
+    def __enter__(self):
+        self.preparar()
+        try:
+            self.levantar()
+        except Exception:
+            self.detener()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Cliente, EstadisticaCliente, PedidoContabilizado
+
+
+def contribucion(pedido):
+    """!
+    @brief Lo que un pedido suma a las estadísticas de su cliente.
+    @param pedido: Pedido tal como viaja en los eventos (`PedidoSerializer` del servicio de pedidos).
+    @return dict: {'id_cliente', 'fecha', 'total', 'productos'}, con `productos`
+        como {"<id_producto>": {"nombre", "cantidad"}}.
+    """
+    productos = {}
+    for linea in pedido.get('productos_detalle') or []:
+        if linea.get('id_producto') is None:
+            continue
+        producto = productos.setdefault(str(linea['id_producto']), {'nombre': linea.get('nombre_producto') or '', 'cantidad': 0})
+        producto['cantidad'] = round(producto['cantidad'] + float(linea.get('cantidad_producto') or 0), 2)
+    return {
+        'id_cliente': pedido.get('id_cliente'),
+        'fecha': parse_datetime(pedido['fecha_pedido']) if pedido.get('fecha_pedido') else None,
+        'total': Decimal(str(pedido.get('total') or 0)).quantize(Decimal('0.01')),
+        'productos': productos,
+    }
+
+
+def _valores(registro):
+    return {
+        'id_cliente': registro.id_cliente,
+        'fecha': registro.fecha,
+        'total': registro.total,
+        'productos': registro.productos,
+    }
+
+
+def _sumar(valores, signo):
+    """!
+    @brief Suma (signo 1) o descuenta (signo -1) la contribución de un pedido a las estadísticas del cliente.
+    @details
+        La fila del cliente se bloquea mientras se actualiza, así dos consumidores
+        que procesan pedidos del mismo cliente no pisan sus cambios. Los
+        pedidos de clientes que no existen en este servicio no suman.
+    """
+    id_cliente = valores['id_cliente']
+    if id_cliente is None:
+        return
+    estadistica = EstadisticaCliente.objects.select_for_update().filter(cliente_id=id_cliente).first()
+    if estadistica is None:
+        if signo < 0 or not Cliente.objects.filter(pk=id_cliente).exists():
+            return
+        EstadisticaCliente.objects.get_or_create(cliente_id=id_cliente)
+        estadistica = EstadisticaCliente.objects.select_for_update().get(cliente_id=id_cliente)
+
+    estadistica.pedidos = max(estadistica.pedidos + signo, 0)
+    estadistica.total += signo * valores['total']
+    for id_producto, producto in valores['productos'].items():
+        acumulado = estadistica.productos.setdefault(id_producto, {'nombre': producto['nombre'], 'cantidad': 0})
+        acumulado['cantidad'] = round(acumulado['cantidad'] + signo * producto['cantidad'], 2)
+        if signo > 0:
+            acumulado['nombre'] = producto['nombre']
+        if acumulado['cantidad'] <= 0:
+            del estadistica.productos[id_producto]
+
+    fecha = valores['fecha']
+    if signo > 0 and fecha and (estadistica.ultimo_pedido is None or fecha > estadistica.ultimo_pedido):
+        estadistica.ultimo_pedido = fecha
+    elif signo < 0 and fecha and fecha == estadistica.ultimo_pedido:
+        # Se quitó el último pedido: el anterior sale del registro (ya actualizado)
+        estadistica.ultimo_pedido = PedidoContabilizado.objects.filter(
+            id_cliente=id_cliente, eliminado=False,
+        ).aggregate(ultimo=Max('fecha'))['ultimo']
+    estadistica.save()
+
+
+@transaction.atomic
+def registrar_pedido(pedido, fecha_evento=None):
+    """!
+    @brief Aplica un pedido creado o editado a las estadísticas de su cliente.
+    @details
+        Si el pedido ya se había contabilizado se descuenta lo anterior y se
+        suma lo nuevo (también si cambió de cliente). Un evento repetido, uno
+        atrasado de un pedido ya eliminado, o uno publicado antes que el último
+        aplicado (por ejemplo, un `pedido_creado` reintentado después de un
+        `pedido_editado`) no cambia nada.
+    @param fecha_evento: Fecha de publicación del evento (`fecha` del bus); sin ella no se compara el orden.
+    @return bool: True si las estadísticas cambiaron.
+    """
+    nuevo = contribucion(pedido)
+    registro = PedidoContabilizado.objects.select_for_update().filter(id_pedido=pedido['id']).first()
+    anterior = None
+    if registro is None:
+        registro = PedidoContabilizado(id_pedido=pedido['id'])
+    elif registro.eliminado or (fecha_evento and registro.evento and fecha_evento < registro.evento):
+        return False
+    elif _valores(registro) == nuevo:
+        if fecha_evento and (registro.evento is None or fecha_evento > registro.evento):
+            registro.evento = fecha_evento
+            registro.save(update_fields=['evento'])
+        return False
+    else:
+        anterior = _valores(registro)
+
+    for campo, valor in nuevo.items():
+        setattr(registro, campo, valor)
+    registro.evento = fecha_evento or registro.evento
+    registro.save()
+    if anterior is not None:
+        _sumar(anterior, -1)
+    _sumar(nuevo, 1)
+    return True
+
+
+@transaction.atomic
+def eliminar_pedido(id_pedido, id_cliente=None):
+    """!
+    @brief Descuenta un pedido eliminado de las estadísticas de su cliente.
+    @details
+        Si el alta todavía no llegó, el pedido queda marcado como eliminado para
+        que no sume cuando llegue.
+    @return bool: True si las estadísticas cambiaron.
+    """
+    registro = PedidoContabilizado.objects.select_for_update().filter(id_pedido=id_pedido).first()
+    if registro is None:
+        PedidoContabilizado.objects.create(id_pedido=id_pedido, id_cliente=id_cliente, eliminado=True)
+        return False
+    if registro.eliminado:
+        return False
+
+    anterior = _valores(registro)
+    registro.eliminado = True
+    registro.save(update_fields=['eliminado'])
+    _sumar(anterior, -1)
+    return True
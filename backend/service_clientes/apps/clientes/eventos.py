@@ -0,0 +1,18 @@
+from django.utils.dateparse import parse_datetime
+
+from utils.event_bus import manejador
+from .estadisticas import registrar_pedido, eliminar_pedido
+
+
+@manejador('pedido_creado', 'pedido_editado', 'cobro_registrado')
+def actualizar_estadisticas(evento):
+    """!
+    @brief Suma el pedido del evento a las estadísticas de su cliente (o corrige lo que había sumado).
+    """
+    registrar_pedido(evento['datos']['pedido'], parse_datetime(evento.get('fecha') or ''))
+
+
+@manejador('pedido_eliminado')
+def descontar_pedido(evento):
+    datos = evento['datos']
+    eliminar_pedido(datos['id'], datos.get('id_cliente'))
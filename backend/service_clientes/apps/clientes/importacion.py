@@ -0,0 +1,32 @@
+from utils.importacion import ImportadorCSV
+from .models import Cliente
+from .logic import normalizar_telefono, publicar_cliente
+
+
+class ImportadorClientes(ImportadorCSV):
+    """!
+    @brief Importa clientes desde un CSV con columnas nombre, telefono y direccion.
+    @details
+        Un cliente existente se reconoce por su teléfono normalizado, así
+        "011 15 1234-5678" y "+54 9 11 1234 5678" son el mismo cliente. Los
+        clientes sin teléfono siempre se crean. Por cada cliente modificado se
+        publica `cliente_actualizado`; los nuevos todavía no tienen pedidos.
+    """
+    modelo = Cliente
+    columnas = ('nombre', 'telefono', 'direccion')
+    obligatorias = ('nombre',)
+    campo_clave = 'telefono'
+
+    def clave(self, datos):
+        return normalizar_telefono(datos.get('telefono'))
+
+    def existentes(self, claves):
+        return {cliente.telefono_normalizado: cliente for cliente in Cliente.objects.filter(telefono_normalizado__in=claves)}
+
+    def antes_de_guardar(self, instancias):
+        for cliente in instancias:
+            cliente.telefono_normalizado = normalizar_telefono(cliente.telefono)
+
+    def despues_de_guardar(self, nuevos, modificados):
+        for cliente in modificados:
+            publicar_cliente(cliente)
@@ -0,0 +1,89 @@
+import re
+from django.conf import settings
+
+from utils.event_bus import publicar
+
+## Largo de un número argentino completo (código de área + número local), sin prefijos.
+LARGO_NUMERO_NACIONAL = 10
+
+
+def _codigo_area_default():
+    """!
+    @brief Devuelve el código de área que se asume para números cargados sin él.
+    @return str: Dígitos del código de área (por defecto '11', AMBA).
+    """
+    return str(getattr(settings, 'CODIGO_AREA_DEFAULT', '11'))
+
+
+def normalizar_telefono(telefono, codigo_area=None):
+    """!
+    @brief Convierte un teléfono tal como fue tipeado a su forma canónica argentina.
+    @details
+        La forma canónica son los 10 dígitos nacionales (código de área + número
+        local), sin prefijo internacional, sin el '9' de celulares, sin el '0'
+        troncal y sin el '15' de celulares. Así "+54 9 11 1234-5678",
+        "011 15 1234-5678" y "15 1234 5678" (con área por defecto 11) quedan
+        todos como "1112345678".
+
+        Pasos:
+        - Se descartan todos los caracteres que no sean dígitos.
+        - Se quita el prefijo internacional '00' y el código de país '54'
+          (junto con el '9' de celulares que le sigue).
+        - Se quita el '0' troncal.
+        - Si el número tiene 12 dígitos se busca el '15' luego de un código de
+          área de 2 a 4 dígitos y se elimina.
+        - Si el número es local (sin código de área) se antepone el código de
+          área por defecto, quitando antes el '15' si lo tuviera.
+
+        Los números que no siguen ninguno de estos formatos se devuelven con
+        sus dígitos tal cual, para no perder información.
+
+    @param telefono: Teléfono en cualquier formato (puede ser None o vacío).
+    @param codigo_area: Código de área a asumir para números locales. Si es None
+        se usa `settings.CODIGO_AREA_DEFAULT`.
+    @return str: Los dígitos normalizados o cadena vacía si no hay dígitos.
+    """
+    digitos = re.sub(r'\D', '', telefono or '')
+    if not digitos:
+        return ''
+
+    if digitos.startswith('00'):
+        digitos = digitos[2:]
+
+    if digitos.startswith('54') and len(digitos) > LARGO_NUMERO_NACIONAL:
+        digitos = digitos[2:]
+        if digitos.startswith('9') and len(digitos) > LARGO_NUMERO_NACIONAL:
+            digitos = digitos[1:]
+
+    if digitos.startswith('0'):
+        digitos = digitos[1:]
+
+    if len(digitos) == LARGO_NUMERO_NACIONAL + 2:
+        for largo_area in (2, 3, 4):
+            if digitos[largo_area:largo_area + 2] == '15':
+                digitos = digitos[:largo_area] + digitos[largo_area + 2:]
+                break
+
+    area = codigo_area or _codigo_area_default()
+    largo_local = LARGO_NUMERO_NACIONAL - len(area)
+    if digitos.startswith('15') and len(digitos) == largo_local + 2:
+        digitos = area + digitos[2:]
+    elif len(digitos) == largo_local:
+        digitos = area + digitos
+
+    return digitos
+
+
+def publicar_cliente(cliente):
+    """!
+    @brief Publica `cliente_actualizado` con los datos que los otros servicios copian del cliente.
+    @details
+        Pedidos guarda el nombre del cliente en cada pedido; con este evento
+        actualiza los que todavía no se entregaron.
+    """
+    publicar('cliente_actualizado', {
+        'id': cliente.id,
+        'nombre': cliente.nombre,
+        'telefono': cliente.telefono,
+        'direccion': cliente.direccion,
+    })
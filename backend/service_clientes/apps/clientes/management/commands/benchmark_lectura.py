@@ -0,0 +1,8 @@
+from apps.clientes.views import ClienteListarView
+from utils.benchmark_lectura import BenchmarkLecturaCommand
+
+
+class Command(BenchmarkLecturaCommand):
+    vistas = {
+        'ClienteListarView': (ClienteListarView, '/api/clientes/listar/'),
+    }
@@ -0,0 +1,46 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from utils.event_bus import Consumidor, cargar_manejadores
+
+
+class Command(BaseCommand):
+    help = (
+        "Consume los eventos de dominio del bus (Redis Streams) con los manejadores de "
+        "EVENTOS_MANEJADORES. Pensado para correr como un proceso aparte del servidor web."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Procesar los eventos disponibles y terminar.')
+        parser.add_argument('--lote', type=int, default=20, help='Eventos leídos por vez.')
+        parser.add_argument('--bloqueo', type=int, default=5000, help='Milisegundos de espera por eventos nuevos.')
+
+    def handle(self, *args, **options):
+        manejadores = cargar_manejadores()
+        if not manejadores:
+            self.stdout.write("No hay manejadores de eventos registrados en este servicio.")
+            return
+
+        consumidor = Consumidor(manejadores, lote=options['lote'], bloqueo_ms=options['bloqueo'])
+        consumidor.preparar()
+        self.stdout.write(
+            f"Consumiendo {', '.join(sorted(manejadores))} con el grupo {consumidor.grupo} ({consumidor.nombre})."
+        )
+
+        if options['una_vez']:
+            total = 0
+            while True:
+                procesados = consumidor.ejecutar_una_vez(bloqueo_ms=0)
+                if not procesados:
+                    break
+                total += procesados
+            self.stdout.write(self.style.SUCCESS(f"Procesados {total} eventos."))
+            return
+
+        detener = threading.Event()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(senal, lambda *_: detener.set())
+        consumidor.ejecutar(detener)
+        self.stdout.write("Consumidor detenido.")
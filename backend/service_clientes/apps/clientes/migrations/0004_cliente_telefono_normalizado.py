@@ -0,0 +1,79 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:53
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+LARGO_NUMERO_NACIONAL = 10
+
+
+def normalizar_telefono(telefono):
+    """!
+    @brief Copia de `apps.clientes.logic.normalizar_telefono` al crear esta migración.
+    @details
+        Las migraciones no importan código de la aplicación: si la función
+        cambia, esta migración tiene que seguir completando la columna igual.
+    """
+    digitos = re.sub(r'\D', '', telefono or '')
+    if not digitos:
+        return ''
+
+    if digitos.startswith('00'):
+        digitos = digitos[2:]
+
+    if digitos.startswith('54') and len(digitos) > LARGO_NUMERO_NACIONAL:
+        digitos = digitos[2:]
+        if digitos.startswith('9') and len(digitos) > LARGO_NUMERO_NACIONAL:
+            digitos = digitos[1:]
+
+    if digitos.startswith('0'):
+        digitos = digitos[1:]
+
+    if len(digitos) == LARGO_NUMERO_NACIONAL + 2:
+        for largo_area in (2, 3, 4):
+            if digitos[largo_area:largo_area + 2] == '15':
+                digitos = digitos[:largo_area] + digitos[largo_area + 2:]
+                break
+
+    area = str(getattr(settings, 'CODIGO_AREA_DEFAULT', '11'))
+    largo_local = LARGO_NUMERO_NACIONAL - len(area)
+    if digitos.startswith('15') and len(digitos) == largo_local + 2:
+        digitos = area + digitos[2:]
+    elif len(digitos) == largo_local:
+        digitos = area + digitos
+
+    return digitos
+
+
+def completar_telefonos_normalizados(apps, schema_editor):
+    Cliente = apps.get_model('clientes', 'Cliente')
+    pendientes = []
+    for cliente in Cliente.objects.only('id', 'telefono').iterator(chunk_size=1000):
+        cliente.telefono_normalizado = normalizar_telefono(cliente.telefono)
+        pendientes.append(cliente)
+        if len(pendientes) >= 1000:
+            Cliente.objects.bulk_update(pendientes, ['telefono_normalizado'])
+            pendientes = []
+    if pendientes:
+        Cliente.objects.bulk_update(pendientes, ['telefono_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_alter_cliente_direccion_alter_cliente_telefono'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='telefono_normalizado',
+            field=models.CharField(blank=True, db_column='telefono_normalizado_cliente', default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(completar_telefonos_normalizados, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefono_normalizado'], name='cliente_tel_norm_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_cliente_telefono_normalizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaCliente',
+            fields=[
+                ('cliente', models.OneToOneField(db_column='id_cliente', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica', serialize=False, to='clientes.cliente')),
+                ('pedidos', models.PositiveIntegerField(db_column='pedidos_estadistica', default=0)),
+                ('total', models.DecimalField(db_column='total_estadistica', decimal_places=2, default=0, max_digits=14)),
+                ('ultimo_pedido', models.DateTimeField(blank=True, db_column='ultimo_pedido_estadistica', null=True)),
+                ('productos', models.JSONField(db_column='productos_estadistica', default=dict)),
+                ('actualizado', models.DateTimeField(auto_now=True, db_column='actualizado_estadistica')),
+            ],
+            options={
+                'db_table': 'estadistica_cliente',
+            },
+        ),
+        migrations.CreateModel(
+            name='PedidoContabilizado',
+            fields=[
+                ('id_pedido', models.IntegerField(db_column='id_pedido', primary_key=True, serialize=False)),
+                ('id_cliente', models.IntegerField(blank=True, db_column='id_cliente', null=True)),
+                ('fecha', models.DateTimeField(blank=True, db_column='fecha_pedido', null=True)),
+                ('total', models.DecimalField(db_column='total_pedido', decimal_places=2, default=0, max_digits=12)),
+                ('productos', models.JSONField(db_column='productos_pedido', default=dict)),
+                ('eliminado', models.BooleanField(db_column='eliminado_pedido', default=False)),
+            ],
+            options={
+                'db_table': 'pedido_contabilizado',
+                'indexes': [models.Index(fields=['id_cliente', 'fecha'], name='contabilizado_cliente_idx')],
+            },
+        ),
+    ]
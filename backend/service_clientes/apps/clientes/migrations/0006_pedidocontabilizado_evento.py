@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_estadisticas_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidocontabilizado',
+            name='evento',
+            field=models.DateTimeField(blank=True, db_column='evento_pedido', null=True),
+        ),
+    ]
@@ -1,4 +1,26 @@
+from decimal import Decimal
 from django.db import models
+from .logic import normalizar_telefono
+
+def ticket_promedio(total, pedidos):
+    """!
+    @brief Total / pedidos redondeado a centavos (0.00 si no hay pedidos).
+    """
+    if not pedidos:
+        return Decimal('0.00')
+    return (total / pedidos).quantize(Decimal('0.01'))
+
+
+def favoritos(productos, cantidad=3):
+    """!
+    @brief Los `cantidad` productos más pedidos de `EstadisticaCliente.productos`.
+    """
+    productos = sorted(productos.items(), key=lambda item: (-item[1]['cantidad'], int(item[0])))
+    return [
+        {'id_producto': int(id_producto), 'nombre': producto['nombre'], 'cantidad': producto['cantidad']}
+        for id_producto, producto in productos[:cantidad]
+    ]
+
 
 class Cliente(models.Model):
     """!
@@ -7,12 +29,90 @@ class Cliente(models.Model):
         Este modelo hereda de models.Model de Django, lo que le proporciona
         funcionalidades ORM para interactuar con la base de datos.
         Cada instancia de esta clase representa una fila en la tabla 'cliente'.
+
+        El campo `telefono` guarda el número tal como fue ingresado, mientras que
+        `telefono_normalizado` guarda su forma canónica (ver `normalizar_telefono`)
+        y está indexado para poder resolver un número entrante con una sola consulta.
     """
 
     id = models.AutoField(primary_key=True, db_column='id_cliente')
     nombre = models.CharField(max_length=100, db_column='nombre_cliente')
     telefono = models.CharField(max_length=20, db_column='telefono_cliente', blank=True)
     direccion = models.TextField(db_column='direccion_cliente', blank=True)
+    telefono_normalizado = models.CharField(max_length=20, db_column='telefono_normalizado_cliente', blank=True, default='', editable=False)
+
+    class Meta:
+        db_table = 'cliente'
+        indexes = [
+            models.Index(fields=['telefono_normalizado'], name='cliente_tel_norm_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """!
+        @brief Guarda el cliente recalculando el teléfono normalizado.
+        """
+        self.telefono_normalizado = normalizar_telefono(self.telefono)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'telefono' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'telefono_normalizado'}
+        super().save(*args, **kwargs)
+
+
+class EstadisticaCliente(models.Model):
+    """!
+    @brief Estadísticas de pedidos de un cliente, mantenidas a partir de los eventos de pedidos.
+    @details
+        Se actualizan de a un pedido por vez (ver `apps/clientes/estadisticas.py`),
+        así consultarlas es leer una fila y no recorrer los pedidos del otro
+        servicio. `productos` acumula las cantidades pedidas por producto:
+        {"<id_producto>": {"nombre": ..., "cantidad": ...}}.
+    """
+
+    cliente = models.OneToOneField(
+        Cliente, primary_key=True, on_delete=models.CASCADE, related_name='estadistica', db_column='id_cliente',
+    )
+    pedidos = models.PositiveIntegerField(default=0, db_column='pedidos_estadistica')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='total_estadistica')
+    ultimo_pedido = models.DateTimeField(null=True, blank=True, db_column='ultimo_pedido_estadistica')
+    productos = models.JSONField(default=dict, db_column='productos_estadistica')
+    actualizado = models.DateTimeField(auto_now=True, db_column='actualizado_estadistica')
+
+    class Meta:
+        db_table = 'estadistica_cliente'
+
+    @property
+    def ticket_promedio(self):
+        return ticket_promedio(self.total, self.pedidos)
+
+    def favoritos(self, cantidad=3):
+        """!
+        @brief Los `cantidad` productos más pedidos: [{'id_producto', 'nombre', 'cantidad'}].
+        """
+        return favoritos(self.productos, cantidad)
+
+
+class PedidoContabilizado(models.Model):
+    """!
+    @brief Registro de lo que cada pedido sumó a las estadísticas de su cliente.
+    @details
+        Permite aplicar los eventos de pedidos de forma idempotente: si un
+        evento llega repetido no cambia nada, y si el pedido se edita o se
+        elimina se descuenta exactamente lo que se había sumado. Los pedidos
+        eliminados quedan marcados para ignorar eventos atrasados, y `evento`
+        guarda la fecha del último evento aplicado para ignorar los anteriores
+        que lleguen tarde (un reintento del alta después de una edición).
+    """
+
+    id_pedido = models.IntegerField(primary_key=True, db_column='id_pedido')
+    id_cliente = models.IntegerField(null=True, blank=True, db_column='id_cliente')
+    fecha = models.DateTimeField(null=True, blank=True, db_column='fecha_pedido')
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, db_column='total_pedido')
+    productos = models.JSONField(default=dict, db_column='productos_pedido')
+    eliminado = models.BooleanField(default=False, db_column='eliminado_pedido')
+    evento = models.DateTimeField(null=True, blank=True, db_column='evento_pedido')
 
     class Meta:
-        db_table = 'cliente'
\ No newline at end of file
+        db_table = 'pedido_contabilizado'
+        indexes = [
+            models.Index(fields=['id_cliente', 'fecha'], name='contabilizado_cliente_idx'),
+        ]
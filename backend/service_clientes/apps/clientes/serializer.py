@@ -1,7 +1,21 @@
 from rest_framework import serializers
-from .models import Cliente
+from .models import Cliente, EstadisticaCliente
+from utils.sparse_fields import CamposDinamicosSerializerMixin
 
-class ClienteSerializer(serializers.ModelSerializer):
+class EstadisticaClienteSerializer(serializers.ModelSerializer):
+    """!
+    @brief Estadísticas de pedidos del cliente: cantidad, total, ticket promedio, último pedido y favoritos.
+    """
+    ticket_promedio = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    favoritos = serializers.ListField(read_only=True)
+
+    class Meta:
+        model = EstadisticaCliente
+        fields = ['pedidos', 'total', 'ticket_promedio', 'ultimo_pedido', 'favoritos']
+        read_only_fields = fields
+
+
+class ClienteSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """!
     @brief Serializador para el modelo Cliente.
     @details
@@ -9,8 +23,14 @@ class ClienteSerializer(serializers.ModelSerializer):
         Convierte instancias del modelo Cliente a representaciones JSON y viceversa.
         Define qué campos del modelo Cliente se incluirán en su representación serializada
         y se utilizarán para la validación de datos de entrada.
+
+        `estadisticas` es de sólo lectura y vale null para los clientes que
+        todavía no tienen pedidos registrados. Los listados deben usar
+        `select_related('estadistica')` para leerlas en la misma consulta.
     """
+    estadisticas = EstadisticaClienteSerializer(source='estadistica', read_only=True)
 
     class Meta:
         model = Cliente
-        fields = ['id', 'nombre', 'telefono', 'direccion']
\ No newline at end of file
+        fields = ['id', 'nombre', 'telefono', 'direccion', 'telefono_normalizado', 'estadisticas']
+        read_only_fields = ['telefono_normalizado']
\ No newline at end of file
@@ -1,3 +1,427 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.clientes.models import Cliente
+from apps.clientes.logic import normalizar_telefono
+from utils.query_budget import QueryBudgetTestMixin
+from utils.event_bus import obtener_backend, nombre_stream, publicar, cargar_manejadores, Consumidor
+from apps.clientes.models import EstadisticaCliente
+from apps.clientes.estadisticas import registrar_pedido, eliminar_pedido
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+import time
+import io
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import importlib
+
+User = get_user_model()
+
+
+@override_settings(CODIGO_AREA_DEFAULT='11')
+class NormalizarTelefonoTestCase(TestCase):
+
+    def test_formatos_equivalentes_mismo_resultado(self):
+        formatos = [
+            "+54 9 11 1234-5678",
+            "+54 11 1234 5678",
+            "0054 9 11 12345678",
+            "011 15 1234-5678",
+            "011-1234-5678",
+            "15 1234 5678",
+            "1234-5678",
+        ]
+        for telefono in formatos:
+            self.assertEqual(normalizar_telefono(telefono), "1112345678", telefono)
+
+    def test_codigo_area_de_tres_digitos(self):
+        self.assertEqual(normalizar_telefono("0351 15 123-4567"), "3511234567")
+        self.assertEqual(normalizar_telefono("+54 9 351 123 4567"), "3511234567")
+        self.assertEqual(normalizar_telefono("15 123 4567", codigo_area="351"), "3511234567")
+
+    def test_valores_vacios_o_sin_formato(self):
+        self.assertEqual(normalizar_telefono(None), "")
+        self.assertEqual(normalizar_telefono("sin numero"), "")
+        self.assertEqual(normalizar_telefono("123456789"), "123456789")
+
+    @override_settings(CODIGO_AREA_DEFAULT='11')
+    def test_copia_de_la_migracion_0004(self):
+        # La migración no importa la aplicación: su copia debe coincidir con la función de entonces
+        migracion = importlib.import_module('apps.clientes.migrations.0004_cliente_telefono_normalizado')
+        for telefono in ("+54 9 11 1234-5678", "011 15 1234-5678", "15 1234 5678", "0351 15 123-4567", "123456789", None):
+            self.assertEqual(migracion.normalizar_telefono(telefono), normalizar_telefono(telefono), telefono)
+
+
+@override_settings(CODIGO_AREA_DEFAULT='11')
+class ClienteTelefonoViewsTestCase(TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(
+            username="Recepcionista",
+            email="recep@test.com",
+            password="1234",
+        )
+        self.recepcionista.rol = "Recepcionista"
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+
+        self.cliente = Cliente.objects.create(
+            nombre="Juan Perez",
+            telefono="+54 9 11 1234-5678",
+            direccion="Calle Falsa 123",
+        )
+        Cliente.objects.create(nombre="Maria Lopez", telefono="0351 15 123-4567")
+
+    def test_save_calcula_telefono_normalizado(self):
+        self.assertEqual(self.cliente.telefono_normalizado, "1112345678")
+
+        self.cliente.telefono = "011 15 8765-4321"
+        self.cliente.save(update_fields=['telefono'])
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.telefono_normalizado, "1187654321")
+
+    def test_buscar_por_telefono_resuelve_con_una_consulta(self):
+        url = reverse('buscar_cliente_telefono')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'telefono': '15-1234-5678'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], self.cliente.id)
+        self.assertEqual(len(queries), 1)
+
+    def test_buscar_por_telefono_sin_coincidencias(self):
+        response = self.client.get(reverse('buscar_cliente_telefono'), {'telefono': '1199999999'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_buscar_por_telefono_sin_parametro(self):
+        response = self.client.get(reverse('buscar_cliente_telefono'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_buscar_nombre_y_telefono_en_otro_formato(self):
+        response = self.client.get(reverse('cliente_buscar'), {
+            'nombre': 'Juan Perez',
+            'telefono': '011 15 1234 5678',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_buscar_solo_por_nombre_no_filtra_telefono(self):
+        response = self.client.get(reverse('cliente_buscar'), {'nombre': 'Juan Perez'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in response.data], [self.cliente.id])
+
+    def test_editar_cliente_recalcula_telefono_normalizado(self):
+        response = self.client.put(
+            f"{reverse('cliente_editar')}?id={self.cliente.id}",
+            {'nombre': 'Juan Perez', 'telefono': '+54 11 4444 5555', 'direccion': ''},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.telefono_normalizado, "1144445555")
+
+
+class ClienteListarPaginacionTestCase(TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(
+            username="Recepcionista",
+            email="recep@test.com",
+            password="1234",
+        )
+        self.recepcionista.rol = "Recepcionista"
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+
+        for i in range(5):
+            Cliente.objects.create(nombre=f"Cliente {i}", telefono=f"1100000{i:03d}", direccion="Calle 1")
+
+    def test_listar_sin_parametros_devuelve_lista_completa(self):
+        response = self.client.get(reverse('cliente_listar'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_listar_paginado_por_cursor(self):
+        response = self.client.get(reverse('cliente_listar'), {'limite': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+        nombres = [c['nombre'] for c in response.data['results']]
+        siguiente = response.data['next']
+        while siguiente:
+            response = self.client.get(siguiente)
+            nombres += [c['nombre'] for c in response.data['results']]
+            siguiente = response.data['next']
+        self.assertEqual(nombres, [f"Cliente {i}" for i in range(5)])
+
+    def test_listar_campos_limita_serializacion_y_columnas(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('cliente_listar'), {'fields': 'id,nombre'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0].keys()), {'id', 'nombre'})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('nombre_cliente', sql)
+        self.assertNotIn('direccion_cliente', sql)
+
+    def test_lectura_rapida_misma_respuesta_byte_a_byte(self):
+        cliente = Cliente.objects.create(nombre="Ana \u2028 \"Ñandú\"", telefono="11 5555-0000", direccion="Calle\n2")
+        EstadisticaCliente.objects.create(
+            cliente=cliente, pedidos=3, total=Decimal('1000'), ultimo_pedido=timezone.now(),
+            productos={'7': {'nombre': 'Muzza', 'cantidad': 4}, '2': {'nombre': 'Coca', 'cantidad': 4}, '9': {'nombre': 'Flan', 'cantidad': 1}},
+        )
+        for parametros in ({}, {'fields': 'id,estadisticas'}, {'fields': 'nombre,telefono_normalizado'}):
+            respuestas = []
+            for rapida in (False, True):
+                with override_settings(LECTURA_RAPIDA=rapida):
+                    response = self.client.get(reverse('cliente_listar'), parametros)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                respuestas.append(response.content)
+            self.assertEqual(respuestas[1], respuestas[0], parametros)
+
+    def test_comando_benchmark_lectura(self):
+        salida = io.StringIO()
+        call_command('benchmark_lectura', repeticiones=2, stdout=salida)
+        self.assertTrue(salida.getvalue().splitlines()[1].endswith('sí'))
+
+
+class ClientePresupuestoConsultasTestCase(QueryBudgetTestMixin, TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(
+            username="Recepcionista",
+            email="recep@test.com",
+            password="1234",
+        )
+        self.recepcionista.rol = "Recepcionista"
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+
+    def generar_clientes(self, n):
+        for i in range(Cliente.objects.count(), n):
+            Cliente.objects.create(nombre=f"Cliente {i}", telefono=f"1100000{i:03d}", direccion="Calle 1")
+
+    def test_listar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('cliente_listar'), self.generar_clientes)
+
+    def test_coincidencias_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('buscar_cliente_coincidencias') + "?nombre=cliente", self.generar_clientes)
+
+
+@override_settings(CODIGO_AREA_DEFAULT='11')
+class ClienteImportarTestCase(TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.recepcionista.rol = "Recepcionista"
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+        Cliente.objects.create(nombre="Juan Perez", telefono="+54 9 11 1234-5678", direccion="Calle Falsa 123")
+
+    def importar(self, contenido, **params):
+        archivo = SimpleUploadedFile('clientes.csv', contenido.encode('utf-8'), content_type='text/csv')
+        url = reverse('cliente_importar')
+        if params:
+            url += '?' + '&'.join(f'{clave}={valor}' for clave, valor in params.items())
+        return self.client.post(url, {'archivo': archivo}, format='multipart')
+
+    def test_importa_y_reporta_errores_por_fila(self):
+        contenido = (
+            "nombre,telefono,direccion\n"
+            "Ana Gomez,011 15 2222-3333,Av. Siempreviva 742\n"
+            ",1144445555,Sin nombre\n"
+            "Juan P.,11 1234 5678,Otra dirección\n"
+            "Luis Diaz,,\n"
+            "Ana G.,+54 9 11 2222 3333,Repetida\n"
+        )
+        response = self.importar(contenido)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['creados'], 2)
+        self.assertEqual(response.data['actualizados'], 0)
+        errores = {e['fila']: e['errores'] for e in response.data['errores']}
+        self.assertEqual(set(errores), {3, 4, 6})
+        self.assertIn('nombre', errores[3])
+        self.assertIn('Ya existe', errores[4]['telefono'])
+        self.assertIn('fila 2', errores[6]['telefono'])
+
+        ana = Cliente.objects.get(nombre="Ana Gomez")
+        self.assertEqual(ana.telefono_normalizado, "1122223333")
+        self.assertTrue(Cliente.objects.filter(nombre="Luis Diaz", telefono="").exists())
+
+    def test_actualizar_modifica_el_existente(self):
+        response = self.importar("nombre,telefono,direccion\nJuan Perez,11-1234-5678,Nueva 456\n", actualizar=1)
+        self.assertEqual(response.data['actualizados'], 1)
+        self.assertEqual(Cliente.objects.count(), 1)
+        self.assertEqual(Cliente.objects.get().direccion, "Nueva 456")
+
+    def test_simular_no_escribe(self):
+        response = self.importar("nombre,telefono\nAna,1122223333\n", simular=1)
+        self.assertEqual(response.data['creados'], 1)
+        self.assertTrue(response.data['simulado'])
+        self.assertEqual(Cliente.objects.count(), 1)
+
+    def test_archivo_invalido(self):
+        self.assertEqual(self.client.post(reverse('cliente_importar'), {}, format='multipart').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.importar("telefono,direccion\n1122223333,X\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('nombre', response.data['detail'])
+
+    def test_diez_mil_clientes_en_lotes(self):
+        filas = "".join(f"Cliente {i},11{i:08d},Calle {i}\n" for i in range(10000))
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = self.importar("nombre,telefono,direccion\n" + filas)
+            duracion = time.perf_counter() - inicio
+        self.assertEqual(response.data['creados'], 10000)
+        self.assertEqual(response.data['errores'], [])
+        self.assertEqual(Cliente.objects.count(), 10001)
+        # Las consultas crecen con los lotes (20 de 500), no con las filas
+        self.assertLessEqual(len(consultas), 20 * 6)
+        self.assertLess(duracion, 10)
+
+
+class ClienteEventosTestCase(TestCase):
+
+    def setUp(self):
+        self.enterContext(override_settings(EVENTOS_BACKEND='memoria'))
+        self.recepcionista = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.recepcionista.rol = "Recepcionista"
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+        self.cliente = Cliente.objects.create(nombre="Juan Perez", telefono="+54 9 11 1234-5678")
+
+    def eventos(self):
+        return [evento['datos'] for evento in obtener_backend().mensajes(nombre_stream('cliente_actualizado'))]
+
+    def test_editar_publica_cliente_actualizado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f"{reverse('cliente_editar')}?id={self.cliente.id}",
+                {'nombre': "Juan Pérez", 'telefono': "011 15 1234-5678", 'direccion': ""}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.eventos(), [{'id': self.cliente.id, 'nombre': "Juan Pérez", 'telefono': "011 15 1234-5678", 'direccion': ""}])
+
+    def test_importar_publica_solo_los_modificados(self):
+        contenido = "nombre,telefono\nJuan P. Perez,011 15 1234-5678\nAna Gomez,011 15 2222-3333\n"
+        archivo = SimpleUploadedFile('clientes.csv', contenido.encode('utf-8'), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{reverse('cliente_importar')}?actualizar=1", {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.data['actualizados'], 1)
+        self.assertEqual([(evento['id'], evento['nombre']) for evento in self.eventos()], [(self.cliente.id, "Juan P. Perez")])
+
+
+class EstadisticasClienteTestCase(TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.recepcionista.rol = "Recepcionista"
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+        self.ana = Cliente.objects.create(nombre="Ana Gomez", telefono="011 15 2222-3333")
+        self.anabel = Cliente.objects.create(nombre="Anabel Diaz", telefono="011 15 4444-5555")
+
+    def pedido(self, id, cliente, fecha, lineas):
+        return {
+            'id': id,
+            'id_cliente': cliente.id,
+            'fecha_pedido': fecha,
+            'total': sum(cantidad * precio for _, _, cantidad, precio in lineas),
+            'productos_detalle': [
+                {'id_producto': producto, 'nombre_producto': nombre, 'cantidad_producto': f"{cantidad:.2f}", 'precio_unitario': f"{precio:.2f}"}
+                for producto, nombre, cantidad, precio in lineas
+            ],
+        }
+
+    def estadistica(self, cliente):
+        return EstadisticaCliente.objects.get(cliente=cliente)
+
+    def test_registra_de_forma_idempotente(self):
+        primero = self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 2, 1000), (2, "Coca Cola", 1, 500)])
+        self.assertTrue(registrar_pedido(primero))
+        self.assertFalse(registrar_pedido(primero))
+        registrar_pedido(self.pedido(2, self.ana, "2026-10-05T21:00:00-03:00", [(2, "Coca Cola", 3, 500)]))
+
+        estadistica = self.estadistica(self.ana)
+        self.assertEqual(estadistica.pedidos, 2)
+        self.assertEqual(estadistica.total, Decimal('4000'))
+        self.assertEqual(estadistica.ticket_promedio, Decimal('2000.00'))
+        self.assertEqual(estadistica.ultimo_pedido.isoformat(), "2026-10-06T00:00:00+00:00")
+        self.assertEqual([f['nombre'] for f in estadistica.favoritos()], ["Coca Cola", "Muzzarella"])
+
+    def test_editar_descuenta_lo_anterior_y_puede_cambiar_de_cliente(self):
+        registrar_pedido(self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 2, 1000)]))
+        registrar_pedido(self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)]))
+        estadistica = self.estadistica(self.ana)
+        self.assertEqual((estadistica.pedidos, estadistica.total), (1, Decimal('1000')))
+        self.assertEqual(estadistica.productos, {'1': {'nombre': "Muzzarella", 'cantidad': 1.0}})
+
+        registrar_pedido(self.pedido(1, self.anabel, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)]))
+        estadistica = self.estadistica(self.ana)
+        self.assertEqual((estadistica.pedidos, estadistica.total, estadistica.productos, estadistica.ultimo_pedido), (0, Decimal('0'), {}, None))
+        self.assertEqual(self.estadistica(self.anabel).pedidos, 1)
+
+    def test_eliminar_recalcula_el_ultimo_pedido_e_ignora_altas_atrasadas(self):
+        registrar_pedido(self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)]))
+        registrar_pedido(self.pedido(2, self.ana, "2026-10-05T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)]))
+        self.assertTrue(eliminar_pedido(2, self.ana.id))
+        self.assertFalse(eliminar_pedido(2, self.ana.id))
+        estadistica = self.estadistica(self.ana)
+        self.assertEqual(estadistica.pedidos, 1)
+        self.assertEqual(estadistica.ultimo_pedido.isoformat(), "2026-10-01T23:00:00+00:00")
+
+        # El alta del pedido 3 llega después de su baja
+        self.assertFalse(eliminar_pedido(3, self.ana.id))
+        self.assertFalse(registrar_pedido(self.pedido(3, self.ana, "2026-10-07T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)])))
+        self.assertEqual(self.estadistica(self.ana).pedidos, 1)
+
+    def test_ignora_eventos_anteriores_al_ultimo_aplicado(self):
+        creado = self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 2, 1000)])
+        editado = self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 1, 1000)])
+        self.assertTrue(registrar_pedido(creado, parse_datetime("2026-10-01T20:00:01-03:00")))
+        self.assertTrue(registrar_pedido(editado, parse_datetime("2026-10-01T20:05:00-03:00")))
+
+        # El alta reintentada llega después de la edición
+        self.assertFalse(registrar_pedido(creado, parse_datetime("2026-10-01T20:00:01-03:00")))
+        estadistica = self.estadistica(self.ana)
+        self.assertEqual((estadistica.pedidos, estadistica.total), (1, Decimal('1000')))
+
+        # Un evento más nuevo con los mismos datos sólo adelanta la marca
+        self.assertFalse(registrar_pedido(editado, parse_datetime("2026-10-01T20:10:00-03:00")))
+        self.assertFalse(registrar_pedido(creado, parse_datetime("2026-10-01T20:07:00-03:00")))
+        self.assertEqual(self.estadistica(self.ana).total, Decimal('1000'))
+
+    def test_consume_eventos_de_pedidos(self):
+        self.enterContext(override_settings(EVENTOS_BACKEND='memoria'))
+        consumidor = Consumidor(cargar_manejadores(), grupo='clientes', nombre='prueba')
+        consumidor.preparar()
+        pedido = self.pedido(1, self.ana, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 2, 1000)])
+        with self.captureOnCommitCallbacks(execute=True):
+            publicar('pedido_creado', {'pedido': pedido})
+            publicar('cobro_registrado', {'cobro': {}, 'pedido': pedido})
+            publicar('pedido_eliminado', {'id': 1, 'id_cliente': self.ana.id})
+
+        self.assertEqual(consumidor.ejecutar_una_vez(bloqueo_ms=0), 3)
+        self.assertEqual(self.estadistica(self.ana).pedidos, 0)
+
+    def test_serializer_y_orden_de_coincidencias(self):
+        registrar_pedido(self.pedido(1, self.anabel, "2026-10-01T20:00:00-03:00", [(1, "Muzzarella", 2, 1000)]))
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('buscar_cliente_coincidencias'), {'nombre': 'ana'})
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual([c['nombre'] for c in response.data], ["Anabel Diaz", "Ana Gomez"])
+        self.assertEqual(response.data[0]['estadisticas']['pedidos'], 1)
+        self.assertEqual(response.data[0]['estadisticas']['ticket_promedio'], '2000.00')
+        self.assertEqual(response.data[0]['estadisticas']['favoritos'], [{'id_producto': 1, 'nombre': "Muzzarella", 'cantidad': 2.0}])
+        self.assertIsNone(response.data[1]['estadisticas'])
 
-# Create your tests here.
@@ -2,12 +2,18 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Cliente
-from .serializer import ClienteSerializer
+from .models import Cliente, favoritos, ticket_promedio
+from .serializer import ClienteSerializer, EstadisticaClienteSerializer
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AdminRecepcionista
 from rest_framework.generics import ListAPIView
-from django.db.models import Q
+from django.db.models import F, Q
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
+from utils.fast_read import LecturaRapida, LecturaRapidaViewMixin
+from .logic import normalizar_telefono, publicar_cliente
+from .importacion import ImportadorClientes
+from utils.importacion import ImportarCSVView
 
 class ClienteCrearView(APIView):
     """!
@@ -34,7 +40,7 @@ class ClienteCrearView(APIView):
         """
         serializer = ClienteSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            publicar_cliente(serializer.save())
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -79,7 +85,7 @@ class ClienteEditarView(APIView):
             clienteSerializer = ClienteSerializer(cliente, data=request.data)
 
             if clienteSerializer.is_valid():
-                clienteSerializer.save()
+                publicar_cliente(clienteSerializer.save())
                 return Response({'detail':'Cliente editado exitosamente'}, status=status.HTTP_200_OK)
             else:
                 return Response(clienteSerializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -123,31 +129,30 @@ class ClienteEliminarView(APIView):
         except:
             return Response({'detail':'Cliente a eliminar no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-class ClienteListarView(APIView):
+class ClienteListarView(CamposDinamicosViewMixin, LecturaRapidaViewMixin, ListAPIView):
     """!
     @brief Vista para listar todos los clientes.
     @details
         Permite obtener una lista de todos los clientes registrados mediante una
         solicitud GET.
+        Admite paginación por cursor (`?limite=` / `?cursor=`) y limitar los
+        campos devueltos con `?fields=id,nombre`.
+        Sin paginación, la respuesta se arma con `LecturaRapida` (ver `utils/fast_read.py`).
         Requiere que el usuario esté autenticado. 
         No requiere privilegios de superusuario.
     """
 
+    queryset = Cliente.objects.select_related('estadistica')
+    serializer_class = ClienteSerializer
+    lectura_rapida = LecturaRapida(ClienteSerializer, anidados={
+        'estadisticas': LecturaRapida(EstadisticaClienteSerializer, calculados={
+            'ticket_promedio': (('total', 'pedidos'), ticket_promedio),
+            'favoritos': (('productos',), favoritos),
+        }),
+    })
+    pagination_class = CursorPaginacionOpcional
     permission_classes = [IsAuthenticated, AdminRecepcionista]
-
-    def get(self, request):
-        """!
-        @brief Maneja las solicitudes GET para listar todos los clientes.
-        @details
-            Obtiene todos los objetos Cliente de la base de datos, los serializa
-            utilizando ClienteSerializer y los devuelve en una respuesta HTTP 200 OK.
-        @param request: El objeto de la solicitud HTTP.
-        @return: Respuesta HTTP 200 OK con la lista de clientes serializados.
-        """
-
-        clientes = Cliente.objects.all()
-        serializer = ClienteSerializer(clientes, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    query_budget = 5
 
 class ClienteBuscarView(ListAPIView):
     """!
@@ -174,7 +179,9 @@ class ClienteBuscarView(ListAPIView):
 
             La lógica de filtrado es:
             - Si se proporciona 'id', filtra por 'id'.
-            - Si se proporciona 'nombre' y 'telefono', filtra por la combinación de estos.
+            - Si se proporciona 'nombre', filtra por nombre y, si también llega 'telefono', por teléfono.
+              El teléfono se compara en su forma normalizada, por lo que
+              "011 15 1234-5678" encuentra a un cliente cargado como "+54 9 11 1234 5678".
 
         @return: Un queryset de objetos Cliente filtrados, o un queryset vacío.
         """
@@ -188,20 +195,55 @@ class ClienteBuscarView(ListAPIView):
 
         try:
             if not id:
-                cliente = Cliente.objects.filter(nombre=nombre, telefono=telefono)
+                cliente = Cliente.objects.select_related('estadistica').filter(nombre=nombre)
+                if telefono:
+                    cliente = cliente.filter(telefono_normalizado=normalizar_telefono(telefono))
                 return cliente
             else:
-                cliente = Cliente.objects.filter(id=id)
+                cliente = Cliente.objects.select_related('estadistica').filter(id=id)
                 return cliente
         except:
             return Cliente.objects.none()
 
+class ClienteBuscarPorTelefonoView(ListAPIView):
+    """!
+    @brief Vista para resolver un número de teléfono entrante a sus clientes.
+    @details
+        Pensada para la identificación de llamadas al tomar un pedido telefónico.
+        Recibe el parámetro 'telefono' tal como llega (con o sin +54, 9, 0, 15,
+        guiones o espacios), lo normaliza y busca por la columna indexada
+        `telefono_normalizado`, resolviendo la búsqueda con una única consulta.
+    """
+    serializer_class = ClienteSerializer
+    permission_classes = [IsAuthenticated, AdminRecepcionista]
+
+    def list(self, request, *args, **kwargs):
+        """!
+        @brief Valida el parámetro 'telefono' antes de listar.
+        @return:
+            - HTTP 400 BAD REQUEST si no se envía un teléfono con dígitos.
+            - HTTP 200 OK con la lista (posiblemente vacía) de clientes que coinciden.
+        """
+        if not normalizar_telefono(request.query_params.get('telefono')):
+            return Response({'detail':'Falta proporcionar un telefono válido a buscar'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """!
+        @brief Filtra los clientes cuyo teléfono normalizado coincide con el recibido.
+        @return QuerySet: Clientes que comparten el número, ordenados por id.
+        """
+        telefono = normalizar_telefono(self.request.query_params.get('telefono'))
+        return Cliente.objects.select_related('estadistica').filter(telefono_normalizado=telefono).order_by('id')
+
 class ClienteBuscarCoincidenciasView(ListAPIView):
     """!
     @brief Vista para buscar clientes por coincidencias parciales (fuzzy search) de nombre.
     @details
         Recibe un parámetro de consulta 'nombre' y devuelve los 3 clientes cuyos nombres
-        o apellidos contengan ese texto (ignorando mayúsculas/minúsculas).
+        o apellidos contengan ese texto (ignorando mayúsculas/minúsculas). Primero
+        van los clientes con más pedidos y, entre ellos, los que pidieron más
+        recientemente (ver `EstadisticaCliente`).
     """
     serializer_class = ClienteSerializer
     permission_classes = [IsAuthenticated]
@@ -211,7 +253,11 @@ class ClienteBuscarCoincidenciasView(ListAPIView):
         @brief Filtra los clientes basándose en el parámetro de consulta 'nombre'.
         @return QuerySet: Los 3 clientes que mejor coinciden o un queryset vacío.
         """
-        queryset = Cliente.objects.all()
+        queryset = Cliente.objects.select_related('estadistica').order_by(
+            F('estadistica__pedidos').desc(nulls_last=True),
+            F('estadistica__ultimo_pedido').desc(nulls_last=True),
+            'id',
+        )
         query = self.request.query_params.get('nombre', None) 
 
         if query:
@@ -221,4 +267,16 @@ class ClienteBuscarCoincidenciasView(ListAPIView):
             # Devuelve las mejores 3 coincidencias
             return queryset[:3] 
         else:
-            return Cliente.objects.none()
\ No newline at end of file
+            return Cliente.objects.none()
+
+
+class ClienteImportarView(ImportarCSVView):
+    """!
+    @brief Vista para dar de alta (o actualizar) muchos clientes desde un CSV.
+    @details
+        Recibe el archivo en el campo `archivo` con las columnas nombre
+        (obligatoria), telefono y direccion. Ver `ImportadorClientes` e
+        `ImportarCSVView` para el formato de la respuesta.
+    """
+    permission_classes = [IsAuthenticated, AdminRecepcionista]
+    importador_class = ImportadorClientes
@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import timedelta
 from decouple import config 
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -13,6 +14,9 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
 CORS_ALLOW_ALL_ORIGINS = True
+# El frontend envía X-Request-ID para correlacionar las llamadas de un mismo pedido
+CORS_ALLOW_HEADERS = (*default_headers, 'x-request-id')
+CORS_EXPOSE_HEADERS = ['X-Request-ID']
 
 # Aplicaciones instaladas
 INSTALLED_APPS = [
@@ -47,6 +51,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',
+    'utils.tracing.TracingMiddleware',
+    'utils.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,16 +85,26 @@ TEMPLATES = [
 WSGI_APPLICATION = 'clients.wsgi.application'
 
 # Config BDD
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': config('CLIENTES_DB_NAME'),
-        'USER': config('CLIENTES_DB_USER'),
-        'PASSWORD': config('CLIENTES_DB_PASSWORD'),
-        'HOST': config('CLIENTES_DB_HOST'),
-        'PORT': config('CLIENTES_DB_PORT', cast=int),
+# USE_SQLITE=True permite levantar el servicio sin MySQL (pruebas de carga locales)
+if config('USE_SQLITE', default=False, cast=bool):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': config('CLIENTES_DB_NAME'),
+            'USER': config('CLIENTES_DB_USER'),
+            'PASSWORD': config('CLIENTES_DB_PASSWORD'),
+            'HOST': config('CLIENTES_DB_HOST'),
+            'PORT': config('CLIENTES_DB_PORT', cast=int),
+        }
     }
-}
 
 
 
@@ -107,13 +124,63 @@ STATIC_URL = 'static/'
 # ID por defecto
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Código de área asumido al normalizar teléfonos cargados sin él
+CODIGO_AREA_DEFAULT = config('CODIGO_AREA_DEFAULT', default='11')
+
 ASGI_APPLICATION = 'clients.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("redis", 6379)],
+# CHANNEL_LAYER=memory usa la capa en memoria (un solo proceso, sin Redis)
+if config('CHANNEL_LAYER', default='redis') == 'memory':
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [(config('REDIS_HOST', default='redis'), config('REDIS_PORT', default=6379, cast=int))],
+            },
+        },
+    }
+
+# Listados de sólo lectura armados con .values() y codificados con orjson si
+# está instalado (ver utils/fast_read.py). False vuelve a los serializadores.
+LECTURA_RAPIDA = config('LECTURA_RAPIDA', default=True, cast=bool)
+
+# Presupuesto de consultas SQL por solicitud (ver utils/query_budget.py).
+# Las vistas pueden declarar el suyo con el atributo `query_budget`.
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=50, cast=int)
+# True: superar el presupuesto lanza una excepción en lugar de sólo registrarlo
+QUERY_BUDGET_ESTRICTO = config('QUERY_BUDGET_ESTRICTO', default=False, cast=bool)
+
+# Si se define, /metrics exige el encabezado "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Sonda de salud en segundo plano (ver utils/health.py): cada cuántos segundos
+# verifica la base y Redis, y cuánto espera cada chequeo
+HEALTH_INTERVALO = config('HEALTH_INTERVALO', default=5.0, cast=float)
+HEALTH_TIMEOUT = config('HEALTH_TIMEOUT', default=2.0, cast=float)
+
+# Trazas por solicitud (ver utils/tracing.py y el endpoint trazas/)
+TRACING_SERVICIO = 'clientes'
+TRACING_ARCHIVO = config('TRACING_ARCHIVO', default='')
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=5000, cast=int)
+TRACING_CONSULTAS = config('TRACING_CONSULTAS', default=False, cast=bool)
+
+# Bus de eventos entre servicios (ver utils/event_bus.py y el comando consumir_eventos).
+# 'memoria' reemplaza a Redis en las pruebas y en desarrollo
+EVENTOS_BACKEND = config('EVENTOS_BACKEND', default='redis')
+EVENTOS_REDIS_URL = config(
+    'EVENTOS_REDIS_URL',
+    default=f"redis://{config('REDIS_HOST', default='redis')}:{config('REDIS_PORT', default=6379, cast=int)}/0",
+)
+# Eventos que se conservan por stream, entregas antes de descartar un evento y
+# milisegundos sin confirmar tras los que otro consumidor lo reintenta
+EVENTOS_MAXIMO = config('EVENTOS_MAXIMO', default=100000, cast=int)
+EVENTOS_REINTENTOS = config('EVENTOS_REINTENTOS', default=5, cast=int)
+EVENTOS_INACTIVO_MS = config('EVENTOS_INACTIVO_MS', default=30000, cast=int)
+# Módulos con los manejadores (@manejador) de los eventos que consume este servicio
+EVENTOS_MANEJADORES = ['apps.clientes.eventos']
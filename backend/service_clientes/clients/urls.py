@@ -6,13 +6,25 @@ from apps.clientes.views import (
     ClienteListarView,
     ClienteBuscarView,
     ClienteBuscarCoincidenciasView,
+    ClienteBuscarPorTelefonoView,
+    ClienteImportarView,
 )
+from utils.metrics import metrics_view
+from utils.tracing import trazas_view
+from apps.healthcheck.views import HealthCheckView, LivenessView
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+    path('trazas/', trazas_view, name='trazas'),
+    path('healthcheck/', HealthCheckView.as_view(), name='healthcheck'),
+    path('healthz/', LivenessView.as_view(), name='healthz'),
+    path('readyz/', HealthCheckView.as_view(), name='readyz'),
     path('api/clientes/crear/', ClienteCrearView.as_view(), name='cliente_crear'),
     path('api/clientes/editar/', ClienteEditarView.as_view(), name='cliente_editar'),
     path('api/clientes/eliminar/', ClienteEliminarView.as_view(), name='cliente_eliminar'),
     path('api/clientes/listar/', ClienteListarView.as_view(), name='cliente_listar'),
     path('api/clientes/buscar/', ClienteBuscarView.as_view(), name='cliente_buscar'), 
     path('api/clientes/buscar/coincidencias/', ClienteBuscarCoincidenciasView.as_view(), name='buscar_cliente_coincidencias'),
+    path('api/clientes/buscar/telefono/', ClienteBuscarPorTelefonoView.as_view(), name='buscar_cliente_telefono'),
+    path('api/clientes/importar/', ClienteImportarView.as_view(), name='cliente_importar'),
 ]
@@ -0,0 +1,189 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa el JSONRenderer de DRF
+    orjson = None
+
+# Campos cuyo to_representation devuelve el mismo valor que trae la base
+IDENTIDAD = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField, serializers.SerializerMethodField,
+)
+
+
+class LecturaRapida:
+    """!
+    @brief Serializa listados de sólo lectura a partir de filas de `.values()`, con el formato exacto del serializador.
+    @details
+        Con un `ModelSerializer` cada fila cuesta instanciar el modelo y
+        recorrer los campos del serializador uno por uno. Acá las columnas y
+        las conversiones se deducen una sola vez del serializador (mismos
+        campos, mismo orden) y cada fila se arma con un diccionario:
+
+        - Texto, enteros, booleanos y claves foráneas pasan tal cual vienen de
+          la base.
+        - El resto (decimales, fechas, choices) usa el `to_representation`
+          del campo del serializador, así el resultado es idéntico.
+        - Los serializadores anidados se leen por la relación
+          (`categoria__nombre`) y valen null si no hay fila relacionada.
+        - Los `SerializerMethodField` y los campos que no son columnas se
+          declaran en `calculados`: {campo: (columnas, función)}; la función
+          recibe los valores de esas columnas en orden. Las columnas listadas
+          en `agregados` no se piden a la base: las agrega a cada fila quien
+          llama a `mapear` (por ejemplo, datos de otra tabla).
+
+        Los mapeadores se compilan la primera vez que se piden y se guardan
+        por combinación de campos (`?fields=`).
+
+    @example
+        LecturaRapida(ProductoSerializer).serializar(Producto.objects.all())
+    """
+
+    def __init__(self, serializer_class, calculados=None, anidados=None, agregados=()):
+        self.serializer_class = serializer_class
+        self.calculados = calculados or {}
+        self.anidados = anidados or {}
+        self.agregados = set(agregados)
+        self._mapeadores = {}
+
+    def mapeador(self, campos=None, prefijo=''):
+        """!
+        @brief Columnas a pedir con `.values()` y función que convierte una fila en la representación del serializador.
+        @param campos: Campos a incluir (`?fields=`); por defecto todos los de lectura.
+        @param prefijo: Camino de la relación para serializadores anidados (`'categoria__'`).
+        @return tuple: (columnas, mapear(fila) -> dict)
+        """
+        clave = (tuple(campos) if campos else None, prefijo)
+        if clave not in self._mapeadores:
+            self._mapeadores[clave] = self._compilar(campos, prefijo)
+        return self._mapeadores[clave]
+
+    def _compilar(self, campos, prefijo):
+        columnas, claves, obtenedores = [], [], []
+        for nombre, campo in self.serializer_class().fields.items():
+            if campo.write_only or (campos and nombre not in campos):
+                continue
+            if nombre in self.calculados:
+                requeridas, funcion = self.calculados[nombre]
+                requeridas = [prefijo + columna for columna in requeridas]
+                obtener = self._calculado(requeridas, funcion)
+            elif isinstance(campo, serializers.BaseSerializer) and not isinstance(campo, serializers.ListSerializer):
+                anidado = self.anidados.get(nombre) or LecturaRapida(type(campo))
+                ruta = prefijo + campo.source.replace('.', '__') + '__'
+                sub_columnas, sub_mapear = anidado.mapeador(prefijo=ruta)
+                requeridas = [ruta + 'pk', *sub_columnas]
+                obtener = self._anidado(ruta + 'pk', sub_mapear)
+            elif isinstance(campo, (serializers.ListSerializer, serializers.SerializerMethodField)) or campo.source == '*':
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{nombre} no es una columna: declararlo en `calculados`."
+                )
+            else:
+                requeridas = [prefijo + campo.source.replace('.', '__')]
+                obtener = itemgetter(requeridas[0])
+            if not isinstance(campo, IDENTIDAD) and not isinstance(campo, serializers.BaseSerializer):
+                obtener = self._convertido(obtener, campo.to_representation)
+            columnas.extend(columna for columna in requeridas if columna not in columnas)
+            claves.append(nombre)
+            obtenedores.append(obtener)
+
+        claves, obtenedores = tuple(claves), tuple(obtenedores)
+
+        def mapear(fila):
+            return dict(zip(claves, [obtener(fila) for obtener in obtenedores]))
+
+        columnas = [columna for columna in columnas if columna.removeprefix(prefijo) not in self.agregados]
+        return columnas, mapear
+
+    @staticmethod
+    def _calculado(requeridas, funcion):
+        leer = itemgetter(*requeridas)
+        if len(requeridas) == 1:
+            return lambda fila: funcion(leer(fila))
+        return lambda fila: funcion(*leer(fila))
+
+    @staticmethod
+    def _anidado(pk, sub_mapear):
+        return lambda fila: None if fila[pk] is None else sub_mapear(fila)
+
+    @staticmethod
+    def _convertido(obtener, convertir):
+        # Como Serializer.to_representation: los None no pasan por el campo
+        def obtener_convertido(fila):
+            valor = obtener(fila)
+            return None if valor is None else convertir(valor)
+        return obtener_convertido
+
+    def serializar(self, queryset, campos=None):
+        """!
+        @brief Lista con la representación de cada fila del queryset, en una consulta.
+        @details Los `prefetch_related` del queryset se descartan: `.values()` no los admite.
+        """
+        columnas, mapear = self.mapeador(campos)
+        return [mapear(fila) for fila in queryset.prefetch_related(None).values(*columnas)]
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """!
+    @brief JSONRenderer que codifica con orjson si está instalado, con la misma salida byte a byte.
+    @details
+        orjson produce el mismo JSON compacto y en UTF-8 que DRF con la
+        configuración por defecto. Las fechas, los decimales y demás tipos que
+        orjson codificaría distinto pasan por el encoder de DRF. Como DRF, se
+        escapan U+2028 y U+2029. Se usa el renderer de DRF si el cliente pide
+        indentación, con `LECTURA_RAPIDA=False`, si se cambiaron `COMPACT_JSON`
+        o `UNICODE_JSON`, o si orjson no puede codificar algo (enteros de más
+        de 64 bits).
+
+        La única diferencia conocida son los float con exponente (≥ 1e16 o
+        < 1e-4), que orjson escribe `1e16` y Python `1e+16`. Los importes que
+        devuelven estas vistas no llegan a esos valores.
+    """
+    OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not settings.LECTURA_RAPIDA
+            or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenido = orjson.dumps(data, default=self.encoder_class().default, option=self.OPCIONES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return contenido.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class LecturaRapidaViewMixin:
+    """!
+    @brief Mixin de vistas de listado que responde con `LecturaRapida` y `JSONRapidoRenderer`.
+    @details
+        La vista declara `lectura_rapida`. Con `LECTURA_RAPIDA=False` o si el
+        cliente pide paginación por cursor se usa el camino normal del
+        serializador. Respeta `?fields=` si la vista usa `CamposDinamicosViewMixin`
+        (que debe ir antes en la herencia).
+    """
+    lectura_rapida = None
+    renderer_classes = (JSONRapidoRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.LECTURA_RAPIDA or self.lectura_rapida is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_queryset()
+        if not isinstance(queryset, QuerySet):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        campos = self.get_campos() if hasattr(self, 'get_campos') else None
+        return Response(self.lectura_rapida.serializar(queryset, campos))
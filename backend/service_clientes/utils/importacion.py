@@ -0,0 +1,272 @@
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+_VERDADEROS = {'1', 'si', 'sí', 's', 'true', 't', 'verdadero', 'x'}
+_FALSOS = {'0', 'no', 'n', 'false', 'f', 'falso'}
+
+
+class ErrorFila(Exception):
+    """!
+    @brief Errores de validación de una fila: {columna: mensaje}.
+    """
+
+    def __init__(self, errores):
+        super().__init__(errores)
+        self.errores = errores
+
+
+def convertir_valor(campo, valor):
+    """!
+    @brief Convierte el texto de una celda al tipo del campo del modelo y lo valida.
+    @details
+        Acepta coma decimal en los números y si/no, 1/0 o true/false en los
+        booleanos. Los mensajes de error están en castellano para el reporte.
+    @raise ErrorFila con el mensaje para la columna.
+    """
+    if isinstance(campo, models.BooleanField):
+        texto = valor.lower()
+        if texto in _VERDADEROS:
+            return True
+        if texto in _FALSOS:
+            return False
+        raise ErrorFila(f"Valor inválido: «{valor}». Use si o no.")
+    if isinstance(campo, (models.DecimalField, models.FloatField)):
+        valor = valor.replace(',', '.')
+
+    try:
+        convertido = campo.to_python(valor)
+    except ValidationError:
+        raise ErrorFila(f"Valor inválido: «{valor}».")
+    if getattr(campo, 'max_length', None) and len(convertido) > campo.max_length:
+        raise ErrorFila(f"Supera el máximo de {campo.max_length} caracteres.")
+    try:
+        campo.run_validators(convertido)
+    except ValidationError:
+        raise ErrorFila(f"Valor fuera de rango: «{valor}».")
+    return convertido
+
+
+def buscar_referencias(modelo, valores):
+    """!
+    @brief Resuelve con una consulta las referencias de un lote a `modelo`, por id o por nombre.
+    @param modelo: Modelo con campo `nombre` (Categoria, Receta, Insumo...).
+    @param valores: Textos de la columna, por ejemplo ['Bebidas', '3'].
+    @return dict: {texto: instancia} con los valores encontrados.
+    """
+    valores = {valor.strip() for valor in valores if valor and valor.strip()}
+    if not valores:
+        return {}
+    ids = [int(valor) for valor in valores if valor.isdigit()]
+    nombres = [valor for valor in valores if not valor.isdigit()]
+    encontrados = {}
+    for instancia in modelo.objects.filter(Q(pk__in=ids) | Q(nombre__in=nombres)):
+        encontrados[str(instancia.pk)] = instancia
+        encontrados[instancia.nombre] = instancia
+    return {valor: encontrados[valor] for valor in valores if valor in encontrados}
+
+
+class ImportadorCSV:
+    """!
+    @brief Importación masiva desde CSV: valida por fila, guarda por lotes y reporta los errores.
+    @details
+        El archivo se lee fila a fila (no se carga entero) y se procesa en lotes
+        de `tamanio_lote` filas. Por cada lote:
+
+        - `preparar_lote()` resuelve las claves foráneas de todas sus filas con
+          una consulta por relación;
+        - cada fila se convierte con los campos del modelo (`columnas`) y
+          `validar_fila()`; las que fallan quedan en `errores` con su número;
+        - las filas cuya `clave()` ya existe se actualizan (con `actualizar=True`)
+          o se reportan, y el resto se crea, con un `bulk_create` y un
+          `bulk_update` en una transacción.
+
+        Con `simular=True` se valida y se cuenta sin escribir nada.
+
+        Las subclases definen `modelo`, `columnas`, `obligatorias` y, si
+        corresponde, `campo_clave` (columna que identifica una fila existente).
+    """
+    modelo = None
+    ## Columnas del CSV que corresponden a campos del modelo con el mismo nombre.
+    columnas = ()
+    obligatorias = ()
+    ## Campo que identifica un registro existente (None: siempre se crea).
+    campo_clave = None
+    tamanio_lote = 500
+
+    def __init__(self, actualizar=False, simular=False):
+        self.actualizar = actualizar
+        self.simular = simular
+        self.creados = 0
+        self.actualizados = 0
+        self.errores = []
+        self._claves_vistas = {}
+
+    def importar(self, lineas):
+        """!
+        @brief Importa un CSV con encabezado.
+        @param lineas: Archivo de texto o iterable de líneas.
+        @return dict: Resultado (ver `resultado()`).
+        @raise ValueError si faltan columnas obligatorias en el encabezado.
+        """
+        lector = csv.DictReader(lineas)
+        encabezado = [columna.strip() for columna in (lector.fieldnames or [])]
+        faltantes = [columna for columna in self.obligatorias if columna not in encabezado]
+        if faltantes:
+            raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}.")
+        lector.fieldnames = encabezado
+
+        lote = []
+        for fila in lector:
+            lote.append((lector.line_num, fila))
+            if len(lote) >= self.tamanio_lote:
+                self._procesar_lote(lote)
+                lote = []
+        if lote:
+            self._procesar_lote(lote)
+        return self.resultado()
+
+    def resultado(self):
+        return {
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'errores': self.errores,
+            'simulado': self.simular,
+        }
+
+    def preparar_lote(self, filas):
+        """!
+        @brief Carga lo que necesitan las filas del lote (claves foráneas). Devuelve un contexto.
+        """
+        return {}
+
+    def validar_fila(self, datos, fila, contexto):
+        """!
+        @brief Validaciones y conversiones propias del importador. Modifica `datos`.
+        @raise ErrorFila
+        """
+
+    def clave(self, datos):
+        return datos.get(self.campo_clave) if self.campo_clave else None
+
+    def existentes(self, claves):
+        """!
+        @brief Registros existentes para las claves del lote: {clave: instancia}. Una consulta.
+        """
+        if not self.campo_clave or not claves:
+            return {}
+        filtro = {f'{self.campo_clave}__in': claves}
+        return {getattr(instancia, self.campo_clave): instancia for instancia in self.modelo.objects.filter(**filtro)}
+
+    def antes_de_guardar(self, instancias):
+        """!
+        @brief Completa campos derivados que `save()` calcularía (bulk_create no lo llama).
+        """
+
+    def despues_de_guardar(self, nuevos, modificados):
+        """!
+        @brief Se llama dentro de la transacción del lote, después de escribirlo (eventos, contadores).
+        """
+
+    def _convertir(self, fila):
+        datos, errores = {}, {}
+        for columna in self.columnas:
+            valor = (fila.get(columna) or '').strip()
+            if not valor:
+                if columna in self.obligatorias:
+                    errores[columna] = 'Este campo es obligatorio.'
+                continue
+            try:
+                datos[columna] = convertir_valor(self.modelo._meta.get_field(columna), valor)
+            except ErrorFila as e:
+                errores[columna] = e.errores
+        if errores:
+            raise ErrorFila(errores)
+        return datos
+
+    def _procesar_lote(self, lote):
+        contexto = self.preparar_lote([fila for _, fila in lote])
+        validas = []
+        for numero, fila in lote:
+            try:
+                datos = self._convertir(fila)
+                self.validar_fila(datos, fila, contexto)
+            except ErrorFila as e:
+                self.errores.append({'fila': numero, 'errores': e.errores})
+                continue
+            validas.append((numero, datos))
+        if validas:
+            self.guardar(validas)
+
+    def guardar(self, validas):
+        """!
+        @brief Separa altas de modificaciones y las escribe con bulk_create/bulk_update.
+        """
+        claves = [clave for clave in (self.clave(datos) for _, datos in validas) if clave]
+        existentes = self.existentes(claves)
+        nuevos, modificados, campos = [], [], set()
+        for numero, datos in validas:
+            clave = self.clave(datos)
+            if clave:
+                if clave in self._claves_vistas:
+                    self.errores.append({'fila': numero, 'errores': {self.campo_clave: f"Repetido en la fila {self._claves_vistas[clave]}."}})
+                    continue
+                self._claves_vistas[clave] = numero
+            instancia = existentes.get(clave) if clave else None
+            if instancia is None:
+                nuevos.append(self.modelo(**datos))
+            elif not self.actualizar:
+                self.errores.append({'fila': numero, 'errores': {self.campo_clave: 'Ya existe. Use actualizar para modificarlo.'}})
+            else:
+                for campo, valor in datos.items():
+                    setattr(instancia, campo, valor)
+                campos.update(datos)
+                modificados.append(instancia)
+
+        if not self.simular:
+            self.antes_de_guardar(nuevos + modificados)
+            with transaction.atomic():
+                self.modelo.objects.bulk_create(nuevos)
+                if modificados:
+                    self.modelo.objects.bulk_update(modificados, sorted(campos))
+                self.despues_de_guardar(nuevos, modificados)
+        self.creados += len(nuevos)
+        self.actualizados += len(modificados)
+
+
+class ImportarCSVView(APIView):
+    """!
+    @brief Base de los endpoints de importación: recibe un CSV en el campo `archivo` (multipart).
+    @details
+        `?actualizar=1` modifica los registros existentes y `?simular=1` sólo
+        valida. Responde 200 con {'creados', 'actualizados', 'errores', 'simulado'},
+        donde `errores` lista las filas rechazadas ({'fila': n, 'errores': {...}});
+        las filas válidas se importan igual. Las subclases definen `importador_class`.
+    """
+    importador_class = None
+    ## Las consultas crecen con la cantidad de lotes: no aplica un presupuesto fijo.
+    query_budget = None
+
+    def post(self, request):
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'detail': 'Falta el archivo CSV (campo "archivo").'}, status=status.HTTP_400_BAD_REQUEST)
+
+        importador = self.importador_class(
+            actualizar=request.query_params.get('actualizar') in ('1', 'true'),
+            simular=request.query_params.get('simular') in ('1', 'true'),
+        )
+        lineas = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+        try:
+            resultado = importador.importar(lineas)
+        except (UnicodeDecodeError, csv.Error):
+            return Response({'detail': 'El archivo no es un CSV válido en UTF-8.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_200_OK)
@@ -0,0 +1,138 @@
+import logging
+import time as reloj
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.pedidos.models import Pedido
+from apps.pedidosProductos.models import PedidoProductos
+from apps.cobros.models import Cobro
+from apps.archivo.models import PedidoArchivado, PedidoProductosArchivado, CobroArchivado
+
+logger = logging.getLogger(__name__)
+
+
+def fecha_corte(dias=None):
+    """!
+    @brief Inicio del primer día que se mantiene en las tablas en curso.
+    @details
+        Se archivan días completos: todo pedido pagado anterior a las 00:00
+        (hora local) de hace `dias` días. Así las tablas archivadas sólo
+        contienen pedidos más viejos que los de las tablas en curso, salvo los
+        impagos, que quedan en curso hasta que se paguen.
+    @param dias: Días a conservar. Por defecto `settings.ARCHIVO_DIAS`.
+    """
+    if dias is None:
+        dias = settings.ARCHIVO_DIAS
+    dia = timezone.localdate() - timedelta(days=dias)
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def _copiar(filas, modelo):
+    """!
+    @brief Crea instancias de `modelo` con las columnas de `filas` (mismo id incluido).
+    """
+    campos = [f.attname for f in modelo._meta.concrete_fields if f.attname != 'archivado']
+    return [modelo(**{campo: getattr(fila, campo) for campo in campos}) for fila in filas]
+
+
+def pedidos_a_archivar(corte):
+    """!
+    @brief Pedidos en curso que se archivan con el `corte` dado: los pagados anteriores a él.
+    @details
+        Los impagos siguen en curso para poder registrarles cobros.
+        `pagado=True` se traduce a `WHERE pagado`, que no usa índices; con IN
+        es una igualdad.
+    """
+    return Pedido.objects.filter(fecha_pedido__lt=corte, pagado__in=[True])
+
+
+def archivar_lote(corte, lote):
+    """!
+    @brief Mueve a las tablas de archivo un lote de pedidos pagados anteriores a `corte`, con sus líneas y cobros.
+    @details
+        Todo el lote se mueve en una transacción. Los ids se eligen con una
+        lectura sin bloqueo y después se bloquean sólo esas filas
+        (`SELECT ... FOR UPDATE` por clave primaria), así el recorrido por fecha
+        no bloquea rangos de la tabla en curso.
+        El borrado de las líneas y los cobros lo hace la cascada en dos `DELETE`
+        por `id_pedido`.
+    @return dict: Cantidad de pedidos, líneas y cobros movidos (0 pedidos si no quedaba nada).
+    """
+    with transaction.atomic():
+        ids = list(
+            pedidos_a_archivar(corte)
+            .order_by('fecha_pedido', 'id')
+            .values_list('id', flat=True)[:lote]
+        )
+        # Se repite el filtro: un cobro cancelado entre las dos lecturas pudo dejar un pedido impago
+        pedidos = list(pedidos_a_archivar(corte).select_for_update().filter(id__in=ids))
+        if not pedidos:
+            return {'pedidos': 0, 'lineas': 0, 'cobros': 0}
+        ids = [pedido.id for pedido in pedidos]
+        lineas = list(PedidoProductos.objects.filter(id_pedido__in=ids))
+        cobros = list(Cobro.objects.filter(pedido_id__in=ids))
+
+        PedidoArchivado.objects.bulk_create(_copiar(pedidos, PedidoArchivado))
+        PedidoProductosArchivado.objects.bulk_create(_copiar(lineas, PedidoProductosArchivado))
+        CobroArchivado.objects.bulk_create(_copiar(cobros, CobroArchivado))
+        Pedido.objects.filter(id__in=ids).delete()
+
+    return {'pedidos': len(pedidos), 'lineas': len(lineas), 'cobros': len(cobros)}
+
+
+def archivar_pedidos(corte=None, lote=None, pausa=0.0):
+    """!
+    @brief Archiva, lote por lote, todos los pedidos pagados anteriores a `corte`.
+    @details
+        Cada lote es una transacción corta, así las vistas que usan las tablas
+        en curso nunca esperan más que lo que tarda un lote. `pausa` agrega
+        segundos de espera entre lotes para no competir con el servicio.
+    @param corte: Fecha y hora límite (por defecto `fecha_corte()`).
+    @param lote: Pedidos por transacción (por defecto `settings.ARCHIVO_LOTE`).
+    @return dict: Totales de pedidos, líneas y cobros archivados y cantidad de lotes.
+    """
+    corte = corte or fecha_corte()
+    lote = lote or settings.ARCHIVO_LOTE
+    totales = {'pedidos': 0, 'lineas': 0, 'cobros': 0, 'lotes': 0}
+    while True:
+        movidos = archivar_lote(corte, lote)
+        if not movidos['pedidos']:
+            break
+        for clave, cantidad in movidos.items():
+            totales[clave] += cantidad
+        totales['lotes'] += 1
+        logger.info(f"Lote archivado: {movidos['pedidos']} pedidos, {movidos['lineas']} líneas, {movidos['cobros']} cobros")
+        if movidos['pedidos'] < lote:
+            break
+        if pausa:
+            reloj.sleep(pausa)
+    return totales
+
+
+def desarchivar(pedido_id):
+    """!
+    @brief Devuelve un pedido archivado a las tablas en curso, con sus líneas y cobros.
+    @details
+        Se usa para registrar un cobro a un pedido archivado: los cobros nuevos
+        se escriben sólo en las tablas en curso. Conserva los ids, y la próxima
+        pasada de `archivar_pedidos` lo vuelve a archivar si sigue pagado.
+        Si otra solicitud lo desarchivó mientras se esperaba el bloqueo, se
+        devuelve el que quedó en curso.
+    @return Pedido | None: None si el pedido no existe en ninguna de las dos tablas.
+    """
+    with transaction.atomic():
+        archivado = PedidoArchivado.objects.select_for_update().filter(id=pedido_id).first()
+        if archivado is None:
+            return Pedido.objects.filter(id=pedido_id).first()
+        lineas = list(PedidoProductosArchivado.objects.filter(id_pedido=archivado.id))
+        cobros = list(CobroArchivado.objects.filter(pedido_id=archivado.id))
+
+        Pedido.objects.bulk_create(_copiar([archivado], Pedido))
+        PedidoProductos.objects.bulk_create(_copiar(lineas, PedidoProductos))
+        Cobro.objects.bulk_create(_copiar(cobros, Cobro))
+        PedidoArchivado.objects.filter(id=archivado.id).delete()
+
+    return Pedido.objects.get(id=pedido_id)
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from apps.pedidos.models import Pedido
+from apps.cobros.models import Cobro
+from apps.archivo.models import CobroArchivado, PedidoArchivado
+
+
+def total_cobros_del_dia(fecha):
+    """!
+    @brief Suma de los cobros activos de un día, en curso y archivados.
+    @details
+        Son dos `SUM` resueltos en la base (uno por tabla), sin traer los cobros.
+    @return Decimal
+    """
+    total = Decimal('0')
+    for modelo in (Cobro, CobroArchivado):
+        suma = modelo.objects.filter(fecha=fecha, estado='activo').aggregate(total=Sum('monto'))['total']
+        total += suma or 0
+    return total
+
+
+def cobros_activos_de_pedido(pedido_id):
+    """!
+    @brief Cobros activos de un pedido, esté en curso o archivado.
+    @details
+        Un pedido está en una sola de las dos tablas: si tiene cobros en curso no
+        se consulta el archivo.
+    @return list: Instancias de `Cobro` o de `CobroArchivado`, de la más nueva a la más vieja.
+    """
+    cobros = list(Cobro.objects.filter(pedido_id=pedido_id, estado='activo').order_by('-fecha'))
+    if cobros:
+        return cobros
+    return list(CobroArchivado.objects.filter(pedido_id=pedido_id, estado='activo').order_by('-fecha'))
+
+
+def buscar_pedido(**filtros):
+    """!
+    @brief El pedido que cumple `filtros`, esté en curso o archivado.
+    @details Se consulta el archivo sólo si no está en curso.
+    @return Pedido | PedidoArchivado
+    @raise Pedido.DoesNotExist si no está en ninguna de las dos tablas.
+    """
+    try:
+        return Pedido.objects.get(**filtros)
+    except Pedido.DoesNotExist:
+        pass
+    try:
+        return PedidoArchivado.objects.get(**filtros)
+    except PedidoArchivado.DoesNotExist:
+        raise Pedido.DoesNotExist(f"No hay pedido en curso ni archivado con {filtros}.")
+
+
+def ultimo_pedido_de_cliente(id_cliente):
+    """!
+    @brief El pedido más reciente de un cliente, esté en curso o archivado.
+    @details
+        Se consultan las dos tablas: los pedidos impagos de días cerrados
+        siguen en curso, así que el último en curso puede ser más viejo que el
+        último archivado.
+    @return Pedido | PedidoArchivado
+    @raise Pedido.DoesNotExist si el cliente no tiene pedidos.
+    """
+    candidatos = [
+        modelo.objects.filter(id_cliente=id_cliente).order_by('-fecha_pedido', '-id').first()
+        for modelo in (Pedido, PedidoArchivado)
+    ]
+    candidatos = [pedido for pedido in candidatos if pedido is not None]
+    if not candidatos:
+        raise Pedido.DoesNotExist(f"El cliente {id_cliente} no tiene pedidos.")
+    return max(candidatos, key=lambda pedido: (pedido.fecha_pedido, pedido.id))
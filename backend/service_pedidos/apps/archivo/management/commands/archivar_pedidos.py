@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.archivo.archivado import archivar_pedidos, fecha_corte, pedidos_a_archivar
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los pedidos pagados de días cerrados (con sus líneas y cobros) a las tablas de archivo, "
+        "en lotes. Pensado para correr una vez por día fuera del horario de atención."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None, help='Días a conservar en las tablas en curso (por defecto y como mínimo ARCHIVO_DIAS).')
+        parser.add_argument('--lote', type=int, default=None, help='Pedidos por transacción (por defecto ARCHIVO_LOTE).')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Segundos de espera entre lotes.')
+        parser.add_argument('--simular', action='store_true', help='Sólo informar cuántos pedidos se archivarían.')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else settings.ARCHIVO_DIAS
+        # Las vistas buscan en el archivo sólo antes de fecha_corte() (con
+        # ARCHIVO_DIAS): lo archivado después de esa fecha dejaría de verse
+        if dias < settings.ARCHIVO_DIAS:
+            raise CommandError(f"Se deben conservar al menos ARCHIVO_DIAS días (--dias {settings.ARCHIVO_DIAS} o más).")
+        lote = options['lote'] or settings.ARCHIVO_LOTE
+        if lote < 1:
+            raise CommandError("El tamaño de lote debe ser positivo.")
+        corte = fecha_corte(dias)
+
+        if options['simular']:
+            cantidad = pedidos_a_archivar(corte).count()
+            self.stdout.write(f"Se archivarían {cantidad} pedidos anteriores a {corte:%Y-%m-%d %H:%M}.")
+            return
+
+        totales = archivar_pedidos(corte=corte, lote=lote, pausa=options['pausa'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivados {totales['pedidos']} pedidos, {totales['lineas']} líneas y {totales['cobros']} cobros "
+            f"anteriores a {corte:%Y-%m-%d %H:%M} en {totales['lotes']} lotes."
+        ))
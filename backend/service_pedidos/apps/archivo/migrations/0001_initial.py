@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoArchivado',
+            fields=[
+                ('numero_pedido', models.IntegerField(db_column='numero_pedido')),
+                ('fecha_pedido', models.DateTimeField(db_column='fecha_pedido', default=django.utils.timezone.now)),
+                ('cliente', models.CharField(db_column='cliente', default='Sin nombre', max_length=100)),
+                ('id_cliente', models.IntegerField(blank=True, db_column='id_cliente', null=True)),
+                ('para_hora', models.TimeField(db_column='para_hora', null=True)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'PENDIENTE'), ('LISTO', 'LISTO'), ('ENTREGADO', 'ENTREGADO')], db_column='estado', default='PENDIENTE', max_length=20)),
+                ('entregado', models.BooleanField(db_column='entregado', default=False)),
+                ('avisado', models.BooleanField(db_column='avisado', default=False)),
+                ('pagado', models.BooleanField(db_column='pagado', default=False)),
+                ('total', models.DecimalField(db_column='total_pedido', decimal_places=2, default=0, max_digits=10)),
+                ('id', models.IntegerField(db_column='id', primary_key=True, serialize=False)),
+                ('archivado', models.DateTimeField(db_column='archivado', default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'pedidos_archivo',
+                'indexes': [models.Index(fields=['id_cliente', 'fecha_pedido'], name='pedido_arch_cliente_fecha_idx'), models.Index(fields=['fecha_pedido'], name='pedido_arch_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PedidoProductosArchivado',
+            fields=[
+                ('id_producto', models.IntegerField(db_column='id_producto')),
+                ('cantidad_producto', models.DecimalField(db_column='cantidad_producto', decimal_places=2, max_digits=6)),
+                ('nombre_producto', models.CharField(db_column='nombre_producto', max_length=100)),
+                ('precio_unitario', models.DecimalField(db_column='precio_unitario', decimal_places=2, max_digits=10)),
+                ('aclaraciones', models.TextField(blank=True, db_column='aclaraciones')),
+                ('id', models.IntegerField(db_column='id', primary_key=True, serialize=False)),
+                ('id_pedido', models.ForeignKey(db_column='id_pedido', on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='archivo.pedidoarchivado')),
+            ],
+            options={
+                'db_table': 'pedidoProductos_archivo',
+            },
+        ),
+        migrations.CreateModel(
+            name='CobroArchivado',
+            fields=[
+                ('tipo', models.CharField(choices=[('efectivo', 'Efectivo'), ('debito', 'Débito'), ('credito', 'Crédito'), ('mercadopago', 'Mercado Pago')], db_column='tipo_cobro', max_length=20)),
+                ('monto', models.DecimalField(db_column='monto_cobro', decimal_places=2, max_digits=10)),
+                ('moneda', models.CharField(blank=True, db_column='moneda_cobro', default='ARS', max_length=20, null=True)),
+                ('fecha', models.DateField(db_column='fecha_cobro')),
+                ('banco', models.CharField(blank=True, db_column='banco_cobro', max_length=50, null=True)),
+                ('referencia', models.CharField(blank=True, db_column='referencia_cobro', max_length=100, null=True)),
+                ('cuotas', models.IntegerField(blank=True, db_column='cuotas_cobro', null=True)),
+                ('descuento', models.DecimalField(blank=True, db_column='descuento_cobro', decimal_places=2, max_digits=10, null=True)),
+                ('recargo', models.DecimalField(blank=True, db_column='recargo_cobro', decimal_places=2, max_digits=10, null=True)),
+                ('estado', models.CharField(choices=[('activo', 'Activo'), ('cancelado', 'Cancelado')], default='activo', max_length=20)),
+                ('id', models.IntegerField(db_column='id_cobro', primary_key=True, serialize=False)),
+                ('pedido', models.ForeignKey(db_column='id_pedido', on_delete=django.db.models.deletion.CASCADE, related_name='cobros', to='archivo.pedidoarchivado')),
+            ],
+            options={
+                'db_table': 'cobros_archivo',
+                'indexes': [models.Index(fields=['fecha', 'estado'], name='cobro_arch_fecha_estado_idx')],
+            },
+        ),
+    ]
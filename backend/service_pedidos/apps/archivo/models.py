@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+from apps.pedidos.models import PedidoBase
+from apps.pedidosProductos.models import PedidoProductosBase
+from apps.cobros.models import CobroBase
+
+
+class PedidoArchivadoQuerySet(models.QuerySet):
+    def con_detalle(self):
+        """!
+        @brief Igual que `PedidoQuerySet.con_detalle()`, para los pedidos archivados.
+        """
+        return self.prefetch_related(
+            'lineas',
+            models.Prefetch('cobros', queryset=CobroArchivado.objects.filter(estado='activo'), to_attr='cobros_activos'),
+        )
+
+
+class PedidoArchivado(PedidoBase):
+    """!
+    @brief Pedido de un día cerrado, movido fuera de la tabla `pedidos`.
+    @details
+        Conserva el id original, así los ids que guardaron otros servicios o el
+        frontend siguen siendo válidos. Sólo se escribe desde `archivar_pedidos`.
+    """
+    id = models.IntegerField(primary_key=True, db_column='id')
+    archivado = models.DateTimeField(default=timezone.now, db_column='archivado')
+
+    objects = PedidoArchivadoQuerySet.as_manager()
+
+    def obtener_productos(self):
+        if 'lineas' in getattr(self, '_prefetched_objects_cache', {}):
+            return self.lineas.all()
+        return PedidoProductosArchivado.objects.filter(id_pedido=self.id)
+
+    def obtener_cobros_activos(self):
+        if hasattr(self, 'cobros_activos'):
+            return self.cobros_activos
+        return self.cobros.filter(estado='activo')
+
+    class Meta:
+        db_table = 'pedidos_archivo'
+        indexes = [
+            models.Index(fields=['id_cliente', 'fecha_pedido'], name='pedido_arch_cliente_fecha_idx'),
+            models.Index(fields=['fecha_pedido'], name='pedido_arch_fecha_idx'),
+        ]
+
+
+class PedidoProductosArchivado(PedidoProductosBase):
+    id = models.IntegerField(primary_key=True, db_column='id')
+    id_pedido = models.ForeignKey(PedidoArchivado, db_column='id_pedido', on_delete=models.CASCADE, related_name='lineas')
+
+    class Meta:
+        db_table = 'pedidoProductos_archivo'
+
+
+class CobroArchivado(CobroBase):
+    id = models.IntegerField(primary_key=True, db_column='id_cobro')
+    pedido = models.ForeignKey(PedidoArchivado, db_column='id_pedido', on_delete=models.CASCADE, related_name='cobros')
+
+    class Meta:
+        db_table = 'cobros_archivo'
+        indexes = [
+            models.Index(fields=['fecha', 'estado'], name='cobro_arch_fecha_estado_idx'),
+        ]
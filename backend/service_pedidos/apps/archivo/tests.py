@@ -0,0 +1,210 @@
+from datetime import timedelta
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.pedidos.models import Pedido
+from apps.pedidosProductos.models import PedidoProductos
+from apps.cobros.models import Cobro
+from apps.catalogo.models import CatalogoLocal, ProductoCatalogo
+from apps.archivo.models import PedidoArchivado, PedidoProductosArchivado, CobroArchivado
+from apps.archivo.archivado import archivar_pedidos, desarchivar, fecha_corte
+from apps.archivo.consultas import ultimo_pedido_de_cliente
+
+User = get_user_model()
+
+
+class ArchivadoTestCase(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Administrador", email="admin@test.com", password="1234")
+        self.usuario.rol = "Administrador"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Empanada', precio_unitario=100)
+
+        # Un pedido por día, de hace 0 a 5 días, todos del cliente 7
+        self.ahora = timezone.now()
+        self.pedidos = []
+        for dias in range(6):
+            fecha = self.ahora - timedelta(days=dias)
+            pedido = Pedido.objects.create(numero_pedido=dias + 1, id_cliente=7, cliente="Ana", fecha_pedido=fecha)
+            PedidoProductos.objects.create(
+                id_pedido=pedido, id_producto=1, nombre_producto="Empanada",
+                cantidad_producto=2, precio_unitario=100, aclaraciones="Carne",
+            )
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=200, fecha=fecha.date())
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=50, fecha=fecha.date(), estado='cancelado')
+            pedido.save()
+            self.pedidos.append(pedido)
+
+    def test_archiva_dias_cerrados_en_lotes_conservando_ids(self):
+        corte = fecha_corte(3)
+        viejos = [p for p in self.pedidos if p.fecha_pedido < corte]
+        totales = archivar_pedidos(corte=corte, lote=1)
+
+        self.assertEqual(totales, {'pedidos': len(viejos), 'lineas': len(viejos), 'cobros': 2 * len(viejos), 'lotes': len(viejos)})
+        self.assertFalse(Pedido.objects.filter(fecha_pedido__lt=corte).exists())
+        self.assertFalse(Cobro.objects.filter(pedido_id__in=[p.id for p in viejos]).exists())
+        self.assertEqual(sorted(PedidoArchivado.objects.values_list('id', flat=True)), sorted(p.id for p in viejos))
+
+        archivado = PedidoArchivado.objects.con_detalle().get(id=viejos[0].id)
+        self.assertEqual(archivado.total, viejos[0].total)
+        self.assertEqual(archivado.saldo_pendiente(), 0)
+        self.assertEqual(archivado.obtener_productos()[0].aclaraciones, "Carne")
+        self.assertEqual(PedidoProductosArchivado.objects.count(), len(viejos))
+        self.assertEqual(CobroArchivado.objects.filter(estado='cancelado').count(), len(viejos))
+
+        # Repetirlo no mueve nada más
+        self.assertEqual(archivar_pedidos(corte=corte, lote=1)['pedidos'], 0)
+
+    def test_historial_continua_en_el_archivo(self):
+        archivar_pedidos(corte=fecha_corte(3))
+        url = reverse('historial_cliente_pedidos')
+        response = self.client.get(url, {'id_cliente': 7, 'limite': 2})
+        vistos = [p['id'] for p in response.data['results']]
+        siguiente = response.data['next']
+        while siguiente:
+            response = self.client.get(siguiente)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            vistos += [p['id'] for p in response.data['results']]
+            siguiente = response.data['next']
+        self.assertEqual(vistos, [p.id for p in self.pedidos])
+
+    def test_historial_sin_pedidos_en_curso_empieza_en_el_archivo(self):
+        archivar_pedidos(corte=self.ahora + timedelta(seconds=1))
+        response = self.client.get(reverse('historial_cliente_pedidos'), {'id_cliente': 7, 'limite': 4})
+        self.assertEqual([p['id'] for p in response.data['results']], [p.id for p in self.pedidos[:4]])
+        self.assertEqual(response.data['results'][0]['total_pagado'], 200.0)
+        self.assertEqual(len(response.data['results'][0]['productos_detalle']), 1)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['id'] for p in response.data['results']], [p.id for p in self.pedidos[4:]])
+
+    def test_cobros_de_pedido_y_total_del_dia_incluyen_archivados(self):
+        viejo = self.pedidos[5]
+        archivar_pedidos(corte=fecha_corte(3))
+
+        response = self.client.get(reverse('cobros-por-pedido', kwargs={'pedido_id': viejo.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['monto'] for c in response.data], ['200.00'])
+        self.assertEqual(response.data[0]['pedido'], viejo.id)
+
+        fecha = viejo.fecha_pedido.date().isoformat()
+        response = self.client.get(reverse('cobros-total-by-date', kwargs={'fecha': fecha}))
+        self.assertEqual(response.data['total'], 200.0)
+
+    def crear_impago(self, dias):
+        fecha = self.ahora - timedelta(days=dias)
+        pedido = Pedido.objects.create(numero_pedido=90, id_cliente=7, cliente="Ana", fecha_pedido=fecha)
+        PedidoProductos.objects.create(
+            id_pedido=pedido, id_producto=1, nombre_producto="Empanada",
+            cantidad_producto=1, precio_unitario=100, aclaraciones="",
+        )
+        pedido.save()
+        return pedido
+
+    def test_no_archiva_pedidos_impagos(self):
+        impago = self.crear_impago(5)
+        self.assertFalse(impago.pagado)
+        archivar_pedidos(corte=fecha_corte(3))
+        self.assertTrue(Pedido.objects.filter(id=impago.id).exists())
+        self.assertFalse(PedidoArchivado.objects.filter(id=impago.id).exists())
+
+    def test_pedidos_del_dia_incluyen_archivados(self):
+        viejo = self.pedidos[5]
+        impago = self.crear_impago(5)
+        archivar_pedidos(corte=fecha_corte(3))
+        fecha = timezone.localtime(viejo.fecha_pedido).date().isoformat()
+        for rapida in (True, False):
+            with self.subTest(rapida=rapida), override_settings(LECTURA_RAPIDA=rapida):
+                response = self.client.get(reverse('pedidos'), {'fecha': fecha})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(sorted(p['id'] for p in response.data), sorted([viejo.id, impago.id]))
+                archivado = next(p for p in response.data if p['id'] == viejo.id)
+                self.assertEqual(archivado['total_pagado'], 200.0)
+                self.assertEqual(len(archivado['productos_detalle']), 1)
+
+                response = self.client.get(reverse('pedidos'), {'fecha': fecha, 'numero': viejo.numero_pedido})
+                self.assertEqual([p['id'] for p in response.data], [viejo.id])
+
+    def test_saldo_pendiente_de_pedido_archivado(self):
+        viejo = self.pedidos[5]
+        archivar_pedidos(corte=fecha_corte(3))
+        fecha = timezone.localtime(viejo.fecha_pedido).date().isoformat()
+        response = self.client.get(reverse('saldo_pendiente_pedido'), {'fecha': fecha, 'numero': viejo.numero_pedido})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pendiente'], 0)
+
+        response = self.client.get(reverse('saldo_pendiente_pedido'), {'fecha': fecha, 'numero': 99})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_repetir_pedido_archivado(self):
+        viejo = self.pedidos[5]
+        archivar_pedidos(corte=self.ahora + timedelta(seconds=1))
+
+        response = self.client.post(reverse('repetir_pedido') + f"?id={viejo.id}")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        nuevo = Pedido.objects.get(id=response.data['id'])
+        self.assertEqual(nuevo.id_cliente, 7)
+        self.assertEqual([l.aclaraciones for l in PedidoProductos.objects.filter(id_pedido=nuevo)], ["Carne"])
+
+        # Sin pedidos en curso del cliente se repite el archivado más nuevo
+        nuevo.delete()
+        response = self.client.post(reverse('repetir_pedido') + "?id_cliente=7")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total'], float(self.pedidos[0].total))
+
+    def test_ultimo_pedido_del_cliente_compara_ambas_tablas(self):
+        self.crear_impago(6)
+        archivar_pedidos(corte=fecha_corte(3))
+        self.assertEqual(ultimo_pedido_de_cliente(7).id, self.pedidos[0].id)
+
+        # El impago sigue en curso, pero es más viejo que el último archivado
+        Pedido.objects.filter(fecha_pedido__gte=fecha_corte(3)).delete()
+        ultimo = ultimo_pedido_de_cliente(7)
+        self.assertIsInstance(ultimo, PedidoArchivado)
+        self.assertEqual(ultimo.id, self.pedidos[4].id)
+
+    def test_cobro_de_pedido_archivado_lo_devuelve_a_curso(self):
+        viejo = self.pedidos[5]
+        archivar_pedidos(corte=fecha_corte(3))
+
+        response = self.client.post(reverse('cobros-list'), {'pedido': viejo.id, 'tipo': 'efectivo', 'monto': 10}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(PedidoArchivado.objects.filter(id=viejo.id).exists())
+        pedido = Pedido.objects.get(id=viejo.id)
+        self.assertEqual(pedido.obtener_productos().count(), 1)
+        self.assertEqual(Cobro.objects.filter(pedido=pedido).count(), 3)
+        self.assertEqual(response.data['saldo_restante'], -10)
+
+        # Si ya estaba en curso no cambia nada
+        self.assertEqual(desarchivar(viejo.id), pedido)
+        self.assertIsNone(desarchivar(9999))
+
+    @override_settings(ARCHIVO_DIAS=3)
+    def test_comando_simular_y_archivar(self):
+        salida = io.StringIO()
+        call_command('archivar_pedidos', '--dias', '3', '--simular', stdout=salida)
+        self.assertIn('Se archivarían', salida.getvalue())
+        self.assertEqual(PedidoArchivado.objects.count(), 0)
+
+        call_command('archivar_pedidos', '--dias', '3', '--lote', '2', stdout=salida)
+        self.assertIn('Archivados', salida.getvalue())
+        self.assertEqual(Pedido.objects.count() + PedidoArchivado.objects.count(), len(self.pedidos))
+        self.assertFalse(Pedido.objects.filter(fecha_pedido__lt=fecha_corte(3)).exists())
+
+    @override_settings(ARCHIVO_DIAS=3)
+    def test_comando_no_archiva_dias_que_las_vistas_no_buscan_en_el_archivo(self):
+        # Los días posteriores a fecha_corte() se leen sólo de las tablas en curso
+        with self.assertRaisesMessage(CommandError, '--dias 3'):
+            call_command('archivar_pedidos', '--dias', '2', stdout=io.StringIO())
+        self.assertEqual(PedidoArchivado.objects.count(), 0)
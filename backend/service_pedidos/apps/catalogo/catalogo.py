@@ -0,0 +1,189 @@
+import logging
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from utils.http_client import obtener_cliente
+from utils.upsert import opciones_upsert
+from .models import ProductoCatalogo, CatalogoLocal
+
+logger = logging.getLogger(__name__)
+
+## Ruta del catálogo completo en el servicio de productos (`CatalogoView`).
+RUTA_CATALOGO = '/api/productos/catalogo/'
+CAMPOS = ('nombre', 'precio_unitario', 'disponible')
+
+
+def version_local():
+    """!
+    @brief Versión del catálogo de la copia local (0 si nunca se descargó).
+    """
+    return CatalogoLocal.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def token_servicio():
+    """!
+    @brief Token de acceso para llamar a productos en nombre de este servicio.
+    @details
+        Los servicios comparten la clave de firma de los JWT, así que el token
+        se firma acá mismo, sin pedirlo al servicio de usuarios.
+    """
+    token = AccessToken()
+    token[api_settings.USER_ID_CLAIM] = 0
+    token['nombre'] = getattr(settings, 'TRACING_SERVICIO', 'pedidos')
+    token['rol'] = 'Servicio'
+    return str(token)
+
+
+def descargar_catalogo(version=None, cliente=None):
+    """!
+    @brief Pide el catálogo completo a productos.
+    @param version: Versión que ya se tiene; si no cambió, productos responde sin la lista.
+    @param cliente: `ClienteHTTP` a usar (por defecto, la dependencia 'productos').
+    @return tuple: (versión, lista de productos o None si no hubo cambios).
+    @exception requests.exceptions.RequestException
+    """
+    cliente = cliente or obtener_cliente('productos')
+    respuesta = cliente.get(
+        RUTA_CATALOGO,
+        params={'version': version} if version else None,
+        headers={'Authorization': f'Bearer {token_servicio()}'},
+    )
+    respuesta.raise_for_status()
+    datos = respuesta.json()
+    return datos['version'], datos['productos']
+
+
+def _filas(productos):
+    return [
+        ProductoCatalogo(
+            id_producto=producto['id'],
+            nombre=producto['nombre'],
+            precio_unitario=Decimal(str(producto['precio_unitario'])).quantize(Decimal('0.01')),
+            disponible=producto['disponible'],
+        )
+        for producto in productos
+    ]
+
+
+def _guardar(productos):
+    """!
+    @brief Inserta o actualiza los productos con un solo INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE
+        (ver `utils/upsert.py`).
+    """
+    if productos:
+        ProductoCatalogo.objects.bulk_create(
+            _filas(productos), **opciones_upsert(ProductoCatalogo, ['id_producto'], CAMPOS),
+        )
+
+
+def _bloquear_estado():
+    CatalogoLocal.objects.get_or_create(pk=1)
+    return CatalogoLocal.objects.select_for_update().get(pk=1)
+
+
+def reemplazar_catalogo(version, productos):
+    """!
+    @brief Reemplaza la copia local por el catálogo completo recibido.
+    @details
+        Si mientras tanto se aplicó un evento más nuevo, no se pisa con datos
+        más viejos.
+    @return bool: True si se aplicó.
+    """
+    with transaction.atomic():
+        estado = _bloquear_estado()
+        if version < estado.version:
+            return False
+        _guardar(productos)
+        ProductoCatalogo.objects.exclude(id_producto__in=[producto['id'] for producto in productos]).delete()
+        estado.version = version
+        estado.sincronizado = timezone.now()
+        estado.save()
+    return True
+
+
+def sincronizar_catalogo(cliente=None, forzar=False):
+    """!
+    @brief Descarga el catálogo de productos si cambió desde la versión local.
+    @return tuple: (versión, bool indicando si se reemplazó la copia).
+    @exception requests.exceptions.RequestException
+    """
+    actual = version_local()
+    version, productos = descargar_catalogo(None if forzar else actual, cliente)
+    if productos is None:
+        return version, False
+    return version, reemplazar_catalogo(version, productos)
+
+
+def aplicar_evento(datos, cliente=None):
+    """!
+    @brief Aplica un evento `producto_actualizado` a la copia local.
+    @details
+        Los eventos llevan la versión del catálogo que produjeron. Uno con
+        versión igual o menor a la local ya está aplicado y se ignora (puede
+        llegar repetido). Si el evento no es el siguiente (se perdieron eventos,
+        por ejemplo antes del primer arranque del consumidor) o indica un cambio
+        sin detalle (`completo`), se descarga el catálogo entero.
+    @return str: 'ignorado', 'aplicado' o 'descargado'.
+    """
+    with transaction.atomic():
+        estado = _bloquear_estado()
+        if datos['version'] <= estado.version:
+            return 'ignorado'
+        if not datos.get('completo') and datos['version'] == estado.version + 1:
+            _guardar(datos.get('productos') or [])
+            if datos.get('eliminados'):
+                ProductoCatalogo.objects.filter(id_producto__in=datos['eliminados']).delete()
+            estado.version = datos['version']
+            estado.sincronizado = timezone.now()
+            estado.save()
+            return 'aplicado'
+
+    logger.info(f"Catálogo local en la versión {estado.version} y evento en la {datos['version']}: se descarga completo.")
+    sincronizar_catalogo(cliente, forzar=True)
+    return 'descargado'
+
+
+def completar_lineas(lineas):
+    """!
+    @brief Valida las líneas de un pedido contra la copia del catálogo y les pone nombre y precio.
+    @details
+        Se leen todos los productos del pedido con una consulta y el resto se
+        resuelve en memoria. El nombre y el precio que mande el cliente se
+        reemplazan por los del catálogo. Si la copia no se descargó nunca
+        (versión 0) se descarga en el momento; si productos no responde, se
+        rechazan todas las líneas en vez de aceptar precios sin validar.
+    @param lineas: Lista de dicts con al menos `id_producto` (se modifican).
+    @return dict: {índice de la línea: mensaje} con los errores; vacío si todas son válidas.
+
+    @example
+        errores = completar_lineas(validated_data['productos'])
+        if errores:
+            raise serializers.ValidationError({'productos': errores})
+    """
+    if not lineas:
+        return {}
+    if not version_local():
+        try:
+            sincronizar_catalogo()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"No se pudo descargar el catálogo de productos para validar un pedido: {e}")
+        if not version_local():
+            return {indice: "No se pudo validar el producto: el catálogo no está disponible." for indice in range(len(lineas))}
+    productos = ProductoCatalogo.objects.in_bulk({linea['id_producto'] for linea in lineas})
+    errores = {}
+    for indice, linea in enumerate(lineas):
+        producto = productos.get(linea['id_producto'])
+        if producto is None:
+            errores[indice] = f"El producto {linea['id_producto']} no existe."
+        elif not producto.disponible:
+            errores[indice] = f"El producto «{producto.nombre}» no está disponible."
+        else:
+            linea['nombre_producto'] = producto.nombre
+            linea['precio_unitario'] = producto.precio_unitario
+    return errores
@@ -0,0 +1,10 @@
+from utils.event_bus import manejador
+from .catalogo import aplicar_evento
+
+
+@manejador('producto_actualizado')
+def actualizar_catalogo(evento):
+    """!
+    @brief Mantiene la copia local del catálogo con los cambios de productos.
+    """
+    aplicar_evento(evento['datos'])
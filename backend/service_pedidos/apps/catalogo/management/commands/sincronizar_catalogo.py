@@ -0,0 +1,25 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.catalogo.catalogo import sincronizar_catalogo, version_local
+
+
+class Command(BaseCommand):
+    help = (
+        "Descarga el catálogo de productos si cambió desde la versión local. Pensado para la "
+        "primera carga y como respaldo periódico del consumidor de eventos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true', help='Descargar aunque la versión no haya cambiado.')
+
+    def handle(self, *args, **options):
+        anterior = version_local()
+        try:
+            version, reemplazado = sincronizar_catalogo(forzar=options['forzar'])
+        except requests.exceptions.RequestException as e:
+            raise CommandError(f"No se pudo descargar el catálogo de productos: {e}")
+        if reemplazado:
+            self.stdout.write(self.style.SUCCESS(f"Catálogo actualizado de la versión {anterior} a la {version}."))
+        else:
+            self.stdout.write(f"El catálogo local ya está en la versión {version}.")
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogoLocal',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('sincronizado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'catalogo_local',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductoCatalogo',
+            fields=[
+                ('id_producto', models.IntegerField(db_column='id_producto', primary_key=True, serialize=False)),
+                ('nombre', models.CharField(db_column='nombre_producto', max_length=100)),
+                ('precio_unitario', models.DecimalField(db_column='precio_unitario', decimal_places=2, max_digits=10)),
+                ('disponible', models.BooleanField(db_column='disponible', default=True)),
+            ],
+            options={
+                'db_table': 'catalogo_producto',
+            },
+        ),
+    ]
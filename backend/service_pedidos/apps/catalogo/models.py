@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class ProductoCatalogo(models.Model):
+    """!
+    @brief Copia local de un producto del servicio de productos.
+    @details
+        Sólo guarda lo necesario para validar y valorizar las líneas de un
+        pedido. Se mantiene con los eventos `producto_actualizado` y con la
+        descarga del catálogo completo (ver `apps/catalogo/catalogo.py`); no se
+        edita desde este servicio.
+    """
+    id_producto = models.IntegerField(primary_key=True, db_column='id_producto')
+    nombre = models.CharField(max_length=100, db_column='nombre_producto')
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2, db_column='precio_unitario')
+    disponible = models.BooleanField(default=True, db_column='disponible')
+
+    class Meta:
+        db_table = 'catalogo_producto'
+
+
+class CatalogoLocal(models.Model):
+    """!
+    @brief Versión del catálogo de productos que tiene la copia local (una sola fila, id=1).
+    @details
+        `version` es la de `CatalogoVersion` en el servicio de productos. Vale 0
+        mientras el catálogo no se descargó: en ese estado no se validan los
+        pedidos contra la copia.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    version = models.PositiveBigIntegerField(default=0)
+    sincronizado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'catalogo_local'
@@ -0,0 +1,193 @@
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.catalogo.models import ProductoCatalogo, CatalogoLocal
+from apps.catalogo.catalogo import aplicar_evento, completar_lineas, sincronizar_catalogo, version_local
+from apps.pedidos.models import Pedido
+from apps.pedidosProductos.models import PedidoProductos
+from utils.http_client import ClienteHTTP
+
+User = get_user_model()
+
+
+class _ProductosFalsoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        servidor = self.server
+        servidor.tokens.append(self.headers.get('Authorization', ''))
+        conocida = parse_qs(urlparse(self.path).query).get('version', [None])[0]
+        if conocida is not None and int(conocida) == servidor.version:
+            datos = {'version': servidor.version, 'productos': None}
+        else:
+            datos = {'version': servidor.version, 'productos': servidor.productos}
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class CatalogoLocalTestCase(TestCase):
+
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ProductosFalsoHandler)
+        self.servidor.tokens = []
+        self.servidor.version = 10
+        self.servidor.productos = [
+            {'id': 1, 'nombre': 'Muzzarella', 'precio_unitario': 1000.0, 'disponible': True},
+            {'id': 2, 'nombre': 'Coca Cola', 'precio_unitario': '500.00', 'disponible': True},
+        ]
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.productos = ClienteHTTP('productos', f"http://127.0.0.1:{self.servidor.server_address[1]}", reintentos=0)
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def catalogo(self):
+        return {p.id_producto: (p.nombre, p.precio_unitario, p.disponible) for p in ProductoCatalogo.objects.all()}
+
+    def test_sincronizar_descarga_solo_si_cambio(self):
+        ProductoCatalogo.objects.create(id_producto=99, nombre='Vieja', precio_unitario=1)
+        self.assertEqual(sincronizar_catalogo(self.productos), (10, True))
+        self.assertEqual(self.catalogo(), {
+            1: ('Muzzarella', Decimal('1000.00'), True),
+            2: ('Coca Cola', Decimal('500.00'), True),
+        })
+        self.assertEqual(sincronizar_catalogo(self.productos), (10, False))
+
+        # El token lo firma pedidos con la clave compartida
+        token = AccessToken(self.servidor.tokens[0].removeprefix('Bearer '))
+        self.assertEqual(token['rol'], 'Servicio')
+
+    def test_eventos_en_orden_repetidos_y_con_huecos(self):
+        sincronizar_catalogo(self.productos)
+        evento = {'version': 11, 'completo': False, 'productos': [
+            {'id': 1, 'nombre': 'Muzzarella', 'precio_unitario': '1100.00', 'disponible': True},
+            {'id': 3, 'nombre': 'Fugazzeta', 'precio_unitario': '1300.00', 'disponible': False},
+        ], 'eliminados': [2]}
+        self.assertEqual(aplicar_evento(evento, self.productos), 'aplicado')
+        self.assertEqual(aplicar_evento(evento, self.productos), 'ignorado')
+        self.assertEqual(self.catalogo(), {
+            1: ('Muzzarella', Decimal('1100.00'), True),
+            3: ('Fugazzeta', Decimal('1300.00'), False),
+        })
+        self.assertEqual(len(self.servidor.tokens), 1)
+
+        # Se perdió la versión 12: se descarga el catálogo completo
+        self.servidor.version = 13
+        self.assertEqual(aplicar_evento({'version': 13, 'completo': False, 'productos': [], 'eliminados': []}, self.productos), 'descargado')
+        self.assertEqual(version_local(), 13)
+        self.assertEqual(set(self.catalogo()), {1, 2})
+
+        # Las importaciones no detallan los productos
+        self.servidor.version = 14
+        self.assertEqual(aplicar_evento({'version': 14, 'completo': True}, self.productos), 'descargado')
+        self.assertEqual(version_local(), 14)
+
+    def test_upsert_sin_columnas_de_conflicto_en_mysql(self):
+        # MySQL (ON DUPLICATE KEY UPDATE) no admite unique_fields: Django lanzaría NotSupportedError
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(ProductoCatalogo.objects, 'bulk_create') as bulk_create:
+            sincronizar_catalogo(self.productos)
+        opciones = bulk_create.call_args.kwargs
+        self.assertTrue(opciones['update_conflicts'])
+        self.assertNotIn('unique_fields', opciones)
+        self.assertEqual(opciones['update_fields'], ['nombre', 'precio_unitario', 'disponible'])
+
+    def test_pedido_sin_catalogo_local_lo_descarga_antes_de_validar(self):
+        lineas = [{'id_producto': 1, 'nombre_producto': 'Otro', 'precio_unitario': 1}, {'id_producto': 7}]
+        with mock.patch('apps.catalogo.catalogo.obtener_cliente', return_value=self.productos):
+            errores = completar_lineas(lineas)
+        self.assertEqual(version_local(), 10)
+        self.assertEqual(set(errores), {1})
+        self.assertEqual((lineas[0]['nombre_producto'], lineas[0]['precio_unitario']), ('Muzzarella', Decimal('1000.00')))
+
+
+class ValidacionPedidosTestCase(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        CatalogoLocal.objects.create(pk=1, version=5)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Muzzarella', precio_unitario=Decimal('1000'))
+        ProductoCatalogo.objects.create(id_producto=2, nombre='Fugazzeta', precio_unitario=Decimal('1300'), disponible=False)
+
+    def crear(self, *lineas):
+        return self.client.post(reverse('crear_pedido'), {
+            "numero_pedido": 1, "cliente": "Ana", "estado": "PENDIENTE",
+            "productos": [
+                {"id_producto": id_producto, "nombre_producto": "Otro nombre", "cantidad_producto": 2, "precio_unitario": 1, "aclaraciones": ""}
+                for id_producto in lineas
+            ],
+        }, format='json')
+
+    def test_precio_y_nombre_salen_del_catalogo(self):
+        response = self.crear(1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        linea = PedidoProductos.objects.get(id_pedido=response.data['id'])
+        self.assertEqual((linea.nombre_producto, linea.precio_unitario), ('Muzzarella', Decimal('1000')))
+        self.assertEqual(response.data['total'], 2000.0)
+
+    def test_rechaza_productos_inexistentes_o_no_disponibles(self):
+        response = self.crear(1, 2, 7)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['productos']), {1, 2})
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_sin_catalogo_y_sin_productos_rechaza(self):
+        CatalogoLocal.objects.update(version=0)
+        caido = ClienteHTTP('productos', 'http://127.0.0.1:1', reintentos=0)
+        with mock.patch('apps.catalogo.catalogo.obtener_cliente', return_value=caido), \
+                self.assertLogs('apps.catalogo.catalogo', 'WARNING'):
+            response = self.crear(1, 7)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['productos']), {0, 1})
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_editar_valida_y_valoriza_las_lineas(self):
+        pedido = Pedido.objects.create(numero_pedido=1, cliente="ANA")
+        url = f"{reverse('editar_pedido')}?id={pedido.id}&fecha={pedido.fecha_pedido.date()}&numero=1"
+        datos = {"numero_pedido": 1, "cliente": "Ana", "productos": [
+            {"id_producto": 1, "nombre_producto": "Otro nombre", "cantidad_producto": 3, "precio_unitario": 1, "aclaraciones": ""},
+        ]}
+        response = self.client.put(url, datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linea = PedidoProductos.objects.get(id_pedido=pedido)
+        self.assertEqual((linea.nombre_producto, linea.precio_unitario), ('Muzzarella', Decimal('1000')))
+
+        datos['productos'][0]['id_producto'] = 2
+        response = self.client.put(url, datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PedidoProductos.objects.get(id_pedido=pedido).id_producto, 1)
+
+    def test_repetir_usa_los_precios_actuales(self):
+        pedido = Pedido.objects.create(numero_pedido=1, cliente="ANA", id_cliente=3)
+        PedidoProductos.objects.create(id_pedido=pedido, id_producto=1, nombre_producto="Muzza", cantidad_producto=1, precio_unitario=800, aclaraciones="")
+        response = self.client.post(f"{reverse('repetir_pedido')}?id={pedido.id}", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total'], 1000.0)
+
+        PedidoProductos.objects.create(id_pedido=pedido, id_producto=2, nombre_producto="Fugazzeta", cantidad_producto=1, precio_unitario=900, aclaraciones="")
+        response = self.client.post(f"{reverse('repetir_pedido')}?id={pedido.id}", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cobros', '0002_cobro_estado'),
+        ('pedidos', '0012_pedido_fecha_numero_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['pedido', 'estado'], name='cobro_pedido_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['fecha', 'estado'], name='cobro_fecha_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['fecha'], name='cobro_fecha_idx'),
+        ),
+    ]
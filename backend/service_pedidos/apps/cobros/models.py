@@ -1,7 +1,51 @@
 from django.db import models
 from apps.pedidos.models import Pedido
 
-class Cobro(models.Model):
+class CobroBase(models.Model):
+    """!
+    @brief Columnas comunes a los cobros en curso y archivados.
+    @details
+        La relación con el pedido la define cada subclase (`pedido`), porque
+        apunta a `Pedido` o a `PedidoArchivado`.
+    """
+
+    TIPO_CHOICES = [
+        ("efectivo", "Efectivo"),
+        ("debito", "Débito"),
+        ("credito", "Crédito"),
+        ("mercadopago", "Mercado Pago"),
+    ]
+
+    ESTADOS = [
+        ('activo', 'Activo'),
+        ('cancelado', 'Cancelado'),
+    ]
+
+    id = models.AutoField(primary_key=True, db_column='id_cobro')
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, db_column='tipo_cobro')
+    monto = models.DecimalField(max_digits=10, decimal_places=2, db_column='monto_cobro')
+    moneda = models.CharField(max_length=20, db_column='moneda_cobro', default='ARS', blank=True, null=True)
+    fecha = models.DateField(db_column='fecha_cobro')
+
+    # Opcionales según tipo de cobro
+    banco = models.CharField(max_length=50, blank=True, null=True, db_column='banco_cobro')
+    referencia = models.CharField(max_length=100, blank=True, null=True, db_column='referencia_cobro')
+    cuotas = models.IntegerField(blank=True, null=True, db_column='cuotas_cobro')
+
+    # Opcionales según descuento/aumento
+    descuento= models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, db_column="descuento_cobro")
+    recargo= models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, db_column="recargo_cobro")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='activo')
+
+    def __str__(self):
+        return f"{self.tipo.capitalize()} - {self.monto} {self.moneda} (Pedido #{self.pedido_id}) - {self.estado}"
+
+    class Meta:
+        abstract = True
+
+
+class Cobro(CobroBase):
     """!
     @brief Modelo que representa un cobro realizado sobre un pedido.
     @details
@@ -50,20 +94,6 @@ class Cobro(models.Model):
         verbose_name_plural : "Cobros"
     """
 
-    TIPO_CHOICES = [
-        ("efectivo", "Efectivo"),
-        ("debito", "Débito"),
-        ("credito", "Crédito"),
-        ("mercadopago", "Mercado Pago"),
-    ]
-
-    ESTADOS = [
-        ('activo', 'Activo'),
-        ('cancelado', 'Cancelado'),
-    ]
-
-    id = models.AutoField(primary_key=True, db_column='id_cobro')
-
     pedido = models.ForeignKey(
         Pedido,
         on_delete=models.CASCADE,
@@ -71,25 +101,15 @@ class Cobro(models.Model):
         related_name='cobros'
     )
 
-    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, db_column='tipo_cobro')
-    monto = models.DecimalField(max_digits=10, decimal_places=2, db_column='monto_cobro')
-    moneda = models.CharField(max_length=20, db_column='moneda_cobro', default='ARS', blank=True, null=True)
-    fecha = models.DateField(db_column='fecha_cobro')
-
-    # Opcionales según tipo de cobro
-    banco = models.CharField(max_length=50, blank=True, null=True, db_column='banco_cobro')
-    referencia = models.CharField(max_length=100, blank=True, null=True, db_column='referencia_cobro')
-    cuotas = models.IntegerField(blank=True, null=True, db_column='cuotas_cobro')
-
-    # Opcionales según descuento/aumento
-    descuento= models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, db_column="descuento_cobro")
-    recargo= models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, db_column="recargo_cobro")
-    estado = models.CharField(max_length=20, choices=ESTADOS, default='activo')
-
-    def __str__(self):
-        return f"{self.tipo.capitalize()} - {self.monto} {self.moneda} (Pedido #{self.pedido_id}) - {self.estado}"
-
     class Meta:
         db_table = 'cobros'
         verbose_name = "Cobro"
         verbose_name_plural = "Cobros"
+        indexes = [
+            # Cobros activos de un pedido (id_pedido = ? AND estado = ?)
+            models.Index(fields=['pedido', 'estado'], name='cobro_pedido_estado_idx'),
+            # Total del día (fecha_cobro = ? AND estado = ?)
+            models.Index(fields=['fecha', 'estado'], name='cobro_fecha_estado_idx'),
+            # Listado ORDER BY fecha_cobro DESC, id_cobro DESC (el índice incluye la clave primaria)
+            models.Index(fields=['fecha'], name='cobro_fecha_idx'),
+        ]
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Cobro
+from utils.sparse_fields import CamposDinamicosSerializerMixin
 
-class CobroSerializer(serializers.ModelSerializer):
+class CobroSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """!
     @brief Serializador para el modelo Cobro.
     @details
@@ -166,3 +166,50 @@ class CobroViewSetTests(APITestCase):
         data = {"monto": 150}
         response = self.client.put(f"/api/pedidos/cobros/{cobro.id}/", data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CobroListarPaginacionTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="Administrador",
+            email="admin@test.com",
+            password="1234",
+        )
+        self.admin.rol = "Administrador"
+        self.admin.save()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        self.pedido = Pedido.objects.create(numero_pedido=1, cliente="Cliente de prueba")
+        hoy = timezone.localdate()
+        self.cobros = [
+            Cobro.objects.create(
+                pedido=self.pedido,
+                tipo="efectivo",
+                monto=Decimal("10.00") * (i + 1),
+                fecha=hoy - timezone.timedelta(days=i // 2),
+                estado="activo",
+            )
+            for i in range(5)
+        ]
+
+    def test_listado_sin_parametros_devuelve_lista_completa(self):
+        response = self.client.get("/api/pedidos/cobros/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_listado_paginado_por_fecha_descendente(self):
+        response = self.client.get("/api/pedidos/cobros/", {'limite': 2, 'fields': 'id,fecha'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0].keys()), {'id', 'fecha'})
+
+        ids = [c['id'] for c in response.data['results']]
+        siguiente = response.data['next']
+        while siguiente:
+            response = self.client.get(siguiente)
+            ids += [c['id'] for c in response.data['results']]
+            siguiente = response.data['next']
+
+        esperados = [c.id for c in sorted(self.cobros, key=lambda c: (c.fecha, c.id), reverse=True)]
+        self.assertEqual(ids, esperados)
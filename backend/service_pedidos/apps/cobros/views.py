@@ -11,27 +11,37 @@ from .serializer import CobroSerializer
 from .factories import CobroElectronicoFabrica, CobroContadoFabrica
 from .decorators import Descuento, Recargo
 from apps.pedidos.models import Pedido
+from apps.archivo.archivado import desarchivar
+from apps.archivo.consultas import cobros_activos_de_pedido, total_cobros_del_dia
 
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AdminOnly, AdminRecepcionista
 
 from utils.channels_helper import send_channel_message
+from utils.event_bus import publicar
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
 from apps.pedidos.serializer import PedidoSerializer
 
-class CobroViewSet(viewsets.ModelViewSet):
+class CobroViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para la gestión de cobros, incluyendo cobros parciales y actualización automática
     del saldo del pedido.
+
+    El listado admite paginación por cursor (`?limite=` / `?cursor=`) sobre
+    (-fecha, -id) y limitar los campos devueltos con `?fields=`.
     """
-    queryset = Cobro.objects.all().order_by('-fecha')
+    queryset = Cobro.objects.all().order_by('-fecha', '-id')
     serializer_class = CobroSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPaginacionOpcional
 
     # Filtros y búsqueda avanzada
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['pedido', 'tipo', 'estado']
     search_fields = ['banco', 'referencia']
     ordering_fields = ['fecha', 'monto']
+    ordering = ('-fecha', '-id')
 
     def get_permissions(self):
         if self.action == 'destroy':
@@ -43,7 +53,7 @@ class CobroViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = Cobro.objects.all().order_by('-fecha')
+        queryset = Cobro.objects.all().order_by('-fecha', '-id')
         estado = self.request.query_params.get('estado', None)
         if estado and estado.lower() in ['activo', 'cancelado']:
             queryset = queryset.filter(estado=estado.lower())
@@ -117,7 +127,10 @@ class CobroViewSet(viewsets.ModelViewSet):
         try:
             pedido = Pedido.objects.get(pk=pedido_id)
         except Pedido.DoesNotExist:
-            return Response({"error": "Pedido no encontrado"}, status=404)
+            # Un pedido archivado vuelve a las tablas en curso para registrarle el cobro
+            pedido = desarchivar(pedido_id)
+            if pedido is None:
+                return Response({"error": "Pedido no encontrado"}, status=404)
 
         if monto_base <= 0:
             return Response({"error": "El monto debe ser mayor a 0"}, status=400)
@@ -146,17 +159,19 @@ class CobroViewSet(viewsets.ModelViewSet):
         
         # Actualizar Pedido (Dispara recálculo de 'pagado')
         pedido.save()
+        data = PedidoSerializer(pedido).data
         message_payload = {
             'type': 'send.notification', 
             'message': {
                 'source': 'pedidos', 
                 'action': 'update',
-                'pedido': PedidoSerializer(pedido).data
+                'pedido': data
             }
         }
         send_channel_message('app_notifications', message_payload, 10, 0.5)
 
         serializer = CobroSerializer(cobro)
+        publicar('cobro_registrado', {'cobro': serializer.data, 'pedido': data})
         return Response({
             "detalle": transaccion.detalle(), 
             "cobro": serializer.data,
@@ -205,15 +220,17 @@ class CobroViewSet(viewsets.ModelViewSet):
         cobro.save()
 
         cobro.pedido.save() # Actualizar estado del pedido
+        data = PedidoSerializer(cobro.pedido).data
         message_payload = {
             'type': 'send.notification', 
             'message': {
                 'source': 'pedidos', 
                 'action': 'update',
-                'pedido': PedidoSerializer(cobro.pedido).data
+                'pedido': data
             }
         }
         send_channel_message('app_notifications', message_payload, 10, 0.5)
+        publicar('pedido_editado', {'pedido': data})
 
         serializer = CobroSerializer(cobro)
         return Response({
@@ -235,30 +252,29 @@ class CobroViewSet(viewsets.ModelViewSet):
         cobro.save()
 
         cobro.pedido.save() # Recalcular estado pagado
+        data = PedidoSerializer(cobro.pedido).data
         message_payload = {
             'type': 'send.notification', 
             'message': {
                 'source': 'pedidos', 
                 'action': 'update',
-                'pedido': PedidoSerializer(cobro.pedido).data
+                'pedido': data
             }
         }
         send_channel_message('app_notifications', message_payload, 10, 0.5)
+        publicar('pedido_editado', {'pedido': data})
         
         return Response({"mensaje": "Cobro cancelado correctamente"}, status=204)
 
     @action(detail=False, methods=['get'], url_path='listar/(?P<pedido_id>[^/.]+)')
     def por_pedido(self, request, pedido_id=None):
-        """Devuelve todos los cobros de un pedido específico"""
-        cobros = Cobro.objects.filter(pedido_id=pedido_id, estado='activo').order_by('-fecha')
+        """Devuelve todos los cobros de un pedido específico (en curso o archivado)"""
+        cobros = cobros_activos_de_pedido(pedido_id)
         serializer = self.get_serializer(cobros, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='total/(?P<fecha>\d{4}-\d{2}-\d{2})')
     def total_by_date(self, request, fecha=None):
-        """Devuelve el total de ingresos brutos por cobros en un día específico"""
-        total = 0
-        cobros = Cobro.objects.filter(fecha=fecha, estado='activo')
-        for cobro in cobros:
-            total += float(cobro.monto)
-        return Response({'total': total}, status=200)
+        """Devuelve el total de ingresos brutos por cobros en un día específico, incluidos los archivados"""
+        total = total_cobros_del_dia(fecha)
+        return Response({'total': float(total)}, status=200)
@@ -0,0 +1,74 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from utils.health import SondaSalud, verificar_base, verificar_redis
+
+
+class SondaSaludTestCase(TestCase):
+
+    def test_guarda_resultado_de_chequeos(self):
+        sonda = SondaSalud({'db': lambda: None, 'redis': lambda: 'Connection refused'}, intervalo=5)
+        sonda.ejecutar_chequeos()
+        with mock.patch.object(sonda, 'iniciar'):
+            estado = sonda.estado()
+        self.assertFalse(estado['listo'])
+        self.assertTrue(estado['dependencias']['db']['ok'])
+        self.assertEqual(estado['dependencias']['redis']['error'], 'Connection refused')
+
+    def test_resultado_vencido_no_esta_listo(self):
+        sonda = SondaSalud({'db': lambda: None}, intervalo=5)
+        sonda.ejecutar_chequeos()
+        sonda._resultado['verificado'] = time.time() - 60
+        with mock.patch.object(sonda, 'iniciar'):
+            estado = sonda.estado()
+        self.assertFalse(estado['listo'])
+        self.assertIn('vencido', estado['detalle'])
+
+    def test_hilo_en_segundo_plano(self):
+        llamadas = []
+        sonda = SondaSalud({'db': lambda: llamadas.append(1)}, intervalo=0.01)
+        self.addCleanup(sonda.detener)
+        estado = sonda.estado(espera=2)
+        self.assertTrue(estado['listo'])
+        time.sleep(0.1)
+        self.assertGreater(len(llamadas), 1)
+
+    def test_chequeos_reales(self):
+        self.assertIsNone(verificar_base())
+        # Los tests usan la capa de channels en memoria: no hay Redis que verificar
+        self.assertIsNone(verificar_redis())
+
+
+class HealthViewsTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_liveness(self):
+        response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_readiness_usa_resultado_guardado(self):
+        sonda = SondaSalud({'db': lambda: None}, intervalo=5)
+        sonda.ejecutar_chequeos()
+        chequeos = {'db': mock.Mock(return_value=None)}
+        sonda.chequeos = chequeos
+        with mock.patch('apps.healthcheck.views.SONDA', sonda), mock.patch.object(sonda, 'iniciar'):
+            for nombre in ('readyz', 'healthcheck'):
+                response = self.client.get(reverse(nombre))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()['status'], 'ok')
+        chequeos['db'].assert_not_called()
+
+    def test_readiness_con_dependencia_caida(self):
+        sonda = SondaSalud({'db': lambda: 'sin conexión'}, intervalo=5)
+        sonda.ejecutar_chequeos()
+        with mock.patch('apps.healthcheck.views.SONDA', sonda), mock.patch.object(sonda, 'iniciar'):
+            response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()['dependencias']['db']['error'], 'sin conexión')
@@ -1,35 +1,50 @@
 from django.http import JsonResponse
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from redis.exceptions import ConnectionError, TimeoutError
-import asyncio
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from utils.permissions import AllowRoles
+from utils.http_client import estado_dependencias
+from utils.health import SONDA
 
 
-class HealthCheckView(APIView):
+class LivenessView(APIView):
     """!
-    @brief Vista verificar el estado del microservicio.
-    @details Verifica el estado con la base de datos y el canal de redis.
+    @brief Liveness: el proceso está vivo y atiende solicitudes.
+    @details No consulta dependencias; si responde, el proceso no necesita reiniciarse.
     """
+    authentication_classes = []
     permission_classes = []
 
     def get(self, request):
-        try:
-            from django.db import connection
-            connection.ensure_connection()
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'db_error': str(e)}, status=503)
+        return JsonResponse({'status': 'ok'})
 
-        try:
-            channel_layer = get_channel_layer()
-            async def check_channel_layer():
-                await channel_layer.send("health_check_channel", {"type": "health.check"})
 
-            asyncio.run(asyncio.wait_for(check_channel_layer(), timeout=2.0))
+class HealthCheckView(APIView):
+    """!
+    @brief Readiness: el microservicio puede atender tráfico.
+    @details
+        Devuelve el último resultado de la sonda en segundo plano (base de datos
+        y Redis, ver utils/health.py). No abre conexiones ni envía mensajes por
+        la capa de channels, por lo que sondearla seguido no tiene costo.
+        Responde 503 si alguna dependencia falla o el último chequeo está vencido.
+    """
+    authentication_classes = []
+    permission_classes = []
 
-        except (ConnectionError, TimeoutError, asyncio.TimeoutError) as e:
-            return JsonResponse({'status': 'error', 'channel_layer_error': str(e)}, status=503)
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'unexpected_error': str(e)}, status=503)
+    def get(self, request):
+        estado = SONDA.estado()
+        codigo = 200 if estado['listo'] else 503
+        return JsonResponse({'status': 'ok' if estado['listo'] else 'error', **estado}, status=codigo)
 
-        return JsonResponse({'status': 'ok'})
\ No newline at end of file
+
+class DependenciasView(APIView):
+    """!
+    @brief Vista con el estado de las dependencias HTTP salientes del microservicio.
+    @details
+        Devuelve, por cada dependencia de `HTTP_DEPENDENCIAS`, el estado de su
+        circuit breaker y sus métricas de llamadas, errores, reintentos,
+        rechazos y latencia (promedio, máxima e histograma acumulado).
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Administrador')]
+
+    def get(self, request):
+        return JsonResponse(estado_dependencias())
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import math
+import resource
+import tracemalloc
+from time import perf_counter
+from uuid import uuid4
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from channels_redis.core import RedisChannelLayer
+
+from .consumers import NotificationConsumer
+
+RUTA = '/api/pedidos/ws/notifications/'
+PONG = json.dumps({'tipo': 'pong'})
+
+
+def percentil(valores, p):
+    """!
+    @brief Percentil `p` (0-100) por rango más cercano de una lista ya ordenada.
+    """
+    if not valores:
+        return None
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+async def miembros_grupo(capa, grupo):
+    """!
+    @brief Cantidad de canales anotados en un grupo de la capa.
+    @return int | None: None con Redis pub/sub, donde los grupos son suscripciones y no quedan nombres guardados.
+    """
+    if isinstance(capa, InMemoryChannelLayer):
+        return len(capa.groups.get(grupo, {}))
+    if isinstance(capa, RedisChannelLayer):
+        return await capa.connection(capa.consistent_hash(grupo)).zcard(capa._group_key(grupo))
+    return None
+
+
+async def _siguiente(conexion, timeout):
+    # Se lee la cola directamente: receive_output() cancela el consumidor si vence el timeout
+    try:
+        return await asyncio.wait_for(conexion.output_queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def _recibir(conexion, mensajes, espera):
+    """!
+    @brief Lee los mensajes del benchmark de una conexión, respondiendo los latidos.
+    @return list: Latencia en segundos de cada mensaje recibido.
+    """
+    latencias = []
+    while len(latencias) < mensajes:
+        salida = await _siguiente(conexion, espera)
+        if salida is None or salida['type'] == 'websocket.close':
+            break
+        recibido = perf_counter()
+        mensaje = json.loads(salida['text'])
+        if mensaje.get('tipo') == 'ping':
+            await conexion.send_to(text_data=PONG)
+        elif mensaje.get('tipo') == 'benchmark':
+            latencias.append(recibido - mensaje['enviado'])
+    return latencias
+
+
+async def medir_difusion(clientes=100, mensajes=50, tasa=10.0, inactivos=0, espera=5.0):
+    """!
+    @brief Mide cuánto tarda una notificación en llegar a todas las conexiones de `NotificationConsumer`.
+    @details
+        Abre `clientes` conexiones que leen y responden los latidos, y
+        `inactivos` que nunca leen (como una pantalla que perdió la red sin
+        cerrar el socket). Después publica `mensajes` notificaciones a `tasa`
+        por segundo con `group_send`, igual que las vistas, por la capa de
+        channels configurada y en un grupo propio, así no llegan a las
+        pantallas reales aunque la capa sea el Redis de producción.
+
+        Las conexiones se abren en este proceso (`WebsocketCommunicator`): se
+        mide la capa y el consumidor, no la red ni Daphne. La memoria por
+        conexión incluye también el lado cliente, así que es una cota superior.
+
+        Si hay latidos (`WS_HEARTBEAT_SEGUNDOS`) y la prueba dura más de un
+        intervalo y medio, las conexiones inactivas se cierran y salen del grupo.
+    @param espera: Segundos sin mensajes tras los que una conexión deja de esperar los que faltan.
+    @return dict: Entregas, latencias (ms), memoria y tamaño del grupo antes y después.
+    """
+    grupo = f'benchmark_{uuid4().hex[:12]}'
+    aplicacion = type('BenchmarkConsumer', (NotificationConsumer,), {'grupo': grupo}).as_asgi()
+    capa = get_channel_layer()
+
+    tracemalloc.start()
+    memoria_inicial = tracemalloc.get_traced_memory()[0]
+    conexiones = []
+    for _ in range(clientes + inactivos):
+        conexion = WebsocketCommunicator(aplicacion, RUTA)
+        conectado, _ = await conexion.connect()
+        if not conectado:
+            raise ConnectionError('El consumidor rechazó la conexión')
+        conexiones.append(conexion)
+    memoria_conexiones = tracemalloc.get_traced_memory()[0] - memoria_inicial
+    tracemalloc.stop()
+    activas, dormidas = conexiones[:clientes], conexiones[clientes:]
+    grupo_inicial = await miembros_grupo(capa, grupo)
+
+    lectores = [asyncio.create_task(_recibir(conexion, mensajes, espera)) for conexion in activas]
+    inicio = perf_counter()
+    for numero in range(mensajes):
+        # Se respeta la tasa aunque un group_send tarde: cada envío tiene su momento
+        demora = inicio + numero / tasa - perf_counter()
+        if demora > 0:
+            await asyncio.sleep(demora)
+        await capa.group_send(grupo, {
+            'type': 'send.notification',
+            'message': {'tipo': 'benchmark', 'numero': numero, 'enviado': perf_counter()},
+        })
+    duracion_envio = perf_counter() - inicio
+    latencias = sorted(latencia for recibidas in await asyncio.gather(*lectores) for latencia in recibidas)
+    grupo_final = await miembros_grupo(capa, grupo)
+
+    podadas = 0
+    for conexion in dormidas:
+        while not conexion.output_queue.empty():
+            if conexion.output_queue.get_nowait()['type'] == 'websocket.close':
+                podadas += 1
+    for conexion in conexiones:
+        await conexion.disconnect()
+
+    return {
+        'capa': f'{type(capa).__module__}.{type(capa).__name__}',
+        'clientes': clientes,
+        'inactivos': inactivos,
+        'mensajes': mensajes,
+        'tasa': tasa,
+        'duracion_envio': duracion_envio,
+        'esperados': clientes * mensajes,
+        'entregados': len(latencias),
+        'latencia_ms': {
+            clave: percentil(latencias, p) * 1000 if latencias else None
+            for clave, p in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))
+        },
+        'memoria_por_conexion': memoria_conexiones // max(1, clientes + inactivos),
+        # ru_maxrss está en KiB en Linux
+        'memoria_maxima_proceso': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'grupo_inicial': grupo_inicial,
+        'grupo_final': grupo_final,
+        'podadas': podadas,
+    }
@@ -1,22 +1,81 @@
+import asyncio
 import json
+from time import monotonic
+
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from utils.metrics import REGISTRO
+
+CONEXIONES_ACTIVAS = REGISTRO.medidor(
+    'websocket_connections_active', 'Conexiones WebSocket abiertas por grupo.', ('group',),
+)
+CONEXIONES_PODADAS = REGISTRO.contador(
+    'websocket_connections_pruned_total', 'Conexiones WebSocket cerradas por no responder el latido.', ('group',),
+)
+
+PING = json.dumps({'tipo': 'ping'})
+## Código de cierre cuando el cliente no responde el latido (4000-4999: de la aplicación).
+CIERRE_SIN_LATIDO = 4000
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    ## Grupo al que se suman las conexiones (el benchmark usa uno propio).
+    grupo = 'app_notifications'
 
-class NotificationConsumer(AsyncWebsocketConsumer): 
     async def connect(self):
-        self.room_group_name = 'app_notifications' 
+        self.room_group_name = self.grupo
 
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
         await self.accept()
+        CONEXIONES_ACTIVAS.inc(group=self.room_group_name)
+        self.contabilizada = True
+        self.ultimo_mensaje = monotonic()
+        self.latidos = None
+        if settings.WS_HEARTBEAT_SEGUNDOS:
+            self.latidos = asyncio.create_task(self.enviar_latidos(settings.WS_HEARTBEAT_SEGUNDOS))
 
     async def disconnect(self, close_code):
+        # disconnect también se llama si la conexión no llegó a aceptarse
+        if getattr(self, 'latidos', None):
+            self.latidos.cancel()
+        if getattr(self, 'contabilizada', False):
+            CONEXIONES_ACTIVAS.dec(group=self.room_group_name)
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
 
-    async def send_notification(self, event): 
+    async def receive(self, text_data=None, bytes_data=None):
+        # Cualquier mensaje del cliente (normalmente {"tipo": "pong"}) cuenta como respuesta al latido
+        self.ultimo_mensaje = monotonic()
+
+    async def enviar_latidos(self, intervalo):
+        """!
+        @brief Envía un ping cada `intervalo` segundos y cierra la conexión si el cliente dejó de responder.
+        @details
+            Una conexión muerta sin cierre TCP (pantalla apagada, red caída) no
+            dispara `disconnect` hasta mucho después; mientras tanto su canal
+            sigue en el grupo y cada `group_send` le escribe. Si no llegó nada
+            del cliente en un intervalo y medio se la saca del grupo y se cierra.
+
+            Cada latido también renueva la pertenencia al grupo, así
+            `CHANNEL_GROUP_EXPIRY` puede ser corto y los canales de un proceso
+            que murió sin desconectarse vencen solos.
+        """
+        while True:
+            await asyncio.sleep(intervalo)
+            if monotonic() - self.ultimo_mensaje > intervalo * 1.5:
+                CONEXIONES_PODADAS.inc(group=self.room_group_name)
+                await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+                await self.close(code=CIERRE_SIN_LATIDO)
+                return
+            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            await self.send(text_data=PING)
+
+    async def send_notification(self, event):
         message = event['message']
+        if 'request_id' in event:
+            message = {**message, 'request_id': event['request_id']}
         await self.send(text_data=json.dumps(message))
@@ -0,0 +1,16 @@
+from utils.event_bus import manejador
+from apps.pedidos.models import Pedido
+
+
+@manejador('cliente_actualizado')
+def actualizar_nombre_cliente(evento):
+    """!
+    @brief Copia el nombre nuevo del cliente a sus pedidos que todavía no se entregaron.
+    @details
+        Los pedidos entregados conservan el nombre con el que se hicieron. El
+        UPDATE deja el mismo resultado si el evento llega más de una vez.
+    """
+    cliente = evento['datos']
+    Pedido.objects.filter(id_cliente=cliente['id']).exclude(estado=Pedido.ESTADO_ENTREGADO).update(
+        cliente=cliente['nombre'].upper(),
+    )
@@ -0,0 +1,159 @@
+import csv
+import io
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.utils import timezone
+
+from apps.pedidos.models import Pedido
+from apps.pedidosProductos.models import PedidoProductos
+from apps.cobros.models import Cobro
+from apps.archivo.models import PedidoArchivado, PedidoProductosArchivado, CobroArchivado
+
+## Filas leídas por consulta (y escritas por bloque de la respuesta).
+LOTE = 2000
+
+## Columnas de cada exportación: (encabezado, campo de `values_list`).
+COLUMNAS = {
+    'pedidos': [
+        ('id', 'id'),
+        ('numero_pedido', 'numero_pedido'),
+        ('fecha_pedido', 'fecha_pedido'),
+        ('cliente', 'cliente'),
+        ('id_cliente', 'id_cliente'),
+        ('para_hora', 'para_hora'),
+        ('estado', 'estado'),
+        ('entregado', 'entregado'),
+        ('pagado', 'pagado'),
+        ('total', 'total'),
+    ],
+    'lineas': [
+        ('id_pedido', 'id_pedido_id'),
+        ('numero_pedido', 'id_pedido__numero_pedido'),
+        ('fecha_pedido', 'id_pedido__fecha_pedido'),
+        ('id_producto', 'id_producto'),
+        ('nombre_producto', 'nombre_producto'),
+        ('cantidad', 'cantidad_producto'),
+        ('precio_unitario', 'precio_unitario'),
+        ('subtotal', 'subtotal'),
+        ('aclaraciones', 'aclaraciones'),
+    ],
+    'cobros': [
+        ('id', 'id'),
+        ('id_pedido', 'pedido_id'),
+        ('numero_pedido', 'pedido__numero_pedido'),
+        ('fecha_pedido', 'pedido__fecha_pedido'),
+        ('fecha', 'fecha'),
+        ('tipo', 'tipo'),
+        ('monto', 'monto'),
+        ('moneda', 'moneda'),
+        ('descuento', 'descuento'),
+        ('recargo', 'recargo'),
+        ('banco', 'banco'),
+        ('referencia', 'referencia'),
+        ('cuotas', 'cuotas'),
+        ('estado', 'estado'),
+    ],
+}
+
+TIPOS = tuple(COLUMNAS)
+
+
+def rango_fechas(desde, hasta):
+    """!
+    @brief Convierte dos fechas (inclusive) en el intervalo [desde 00:00, hasta + 1 día 00:00) en hora local.
+    """
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def _consultas(tipo, desde, hasta):
+    """!
+    @brief Querysets a exportar para `tipo`: primero el archivo (días más viejos) y después las tablas en curso.
+    @details
+        Los pedidos y las líneas se filtran por la fecha del pedido; los cobros,
+        por su propia fecha, que es la que usa la contabilidad.
+    """
+    if tipo == 'cobros':
+        return [
+            modelo.objects.filter(fecha__range=(desde, hasta))
+            for modelo in (CobroArchivado, Cobro)
+        ]
+    inicio, fin = rango_fechas(desde, hasta)
+    if tipo == 'pedidos':
+        return [
+            modelo.objects.filter(fecha_pedido__gte=inicio, fecha_pedido__lt=fin)
+            for modelo in (PedidoArchivado, Pedido)
+        ]
+    subtotal = ExpressionWrapper(F('cantidad_producto') * F('precio_unitario'), output_field=DecimalField(max_digits=16, decimal_places=4))
+    return [
+        modelo.objects.filter(id_pedido__fecha_pedido__gte=inicio, id_pedido__fecha_pedido__lt=fin).annotate(subtotal=subtotal)
+        for modelo in (PedidoProductosArchivado, PedidoProductos)
+    ]
+
+
+def lotes_de_filas(queryset, campos, lote=LOTE):
+    """!
+    @brief Recorre `queryset` por clave primaria y devuelve listas de hasta `lote` tuplas con `campos`.
+    @details
+        Cada lote es una consulta `pk > último ORDER BY pk LIMIT lote`, así la
+        memoria usada no depende del total de filas. `.iterator()` no alcanza
+        en MySQL: mysqlclient trae el resultado completo al cliente.
+    """
+    ultimo = None
+    while True:
+        consulta = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        filas = list(consulta.order_by('pk').values_list(*campos, 'pk')[:lote])
+        if filas:
+            yield filas
+        if len(filas) < lote:
+            return
+        ultimo = filas[-1][-1]
+
+
+def generar_csv(tipo, desde, hasta, lote=LOTE):
+    """!
+    @brief Genera el CSV de `tipo` ('pedidos', 'lineas' o 'cobros') entre dos fechas, un bloque de texto por lote.
+    @details
+        Incluye los registros archivados. Las fechas y horas se escriben en hora
+        local; la zona se resuelve una vez y no por fila.
+    @param desde: Fecha inicial (date, inclusive).
+    @param hasta: Fecha final (date, inclusive).
+
+    @example
+        for bloque in generar_csv('cobros', date(2026, 1, 1), date(2026, 12, 31)):
+            archivo.write(bloque)
+    """
+    encabezados = [titulo for titulo, _ in COLUMNAS[tipo]]
+    campos = [campo for _, campo in COLUMNAS[tipo]]
+    # Columnas DateTimeField (las demás las escribe csv tal cual; None queda vacío)
+    con_hora = [i for i, campo in enumerate(campos) if campo.endswith('fecha_pedido')]
+    zona = timezone.get_current_timezone()
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(encabezados)
+    for queryset in _consultas(tipo, desde, hasta):
+        for filas in lotes_de_filas(queryset, campos, lote):
+            for fila in filas:
+                fila = list(fila[:-1])
+                for i in con_hora:
+                    fila[i] = fila[i].astimezone(zona).replace(tzinfo=None).isoformat(' ', 'seconds')
+                escritor.writerow(fila)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def leer_fecha(texto):
+    """!
+    @brief Interpreta una fecha `YYYY-MM-DD`.
+    @return date | None: None si el texto no es una fecha válida.
+    """
+    try:
+        return date.fromisoformat(texto or '')
+    except ValueError:
+        return None
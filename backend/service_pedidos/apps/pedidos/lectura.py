@@ -0,0 +1,69 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from apps.cobros.models import Cobro
+from apps.pedidosProductos.models import PedidoProductos
+from apps.archivo.models import CobroArchivado, PedidoProductosArchivado
+from utils.fast_read import LecturaRapida
+from .models import credito_cobros, saldo, total_lineas
+from .serializer import PedidoProductosSerializer, PedidoSerializer
+
+LECTURA_LINEAS = LecturaRapida(PedidoProductosSerializer, calculados={
+    # Como PedidoProductosSerializer.get_subtotal
+    'subtotal': (('precio_unitario', 'cantidad_producto'),
+                 lambda precio, cantidad: None if precio is None else float(Decimal(precio) * Decimal(cantidad))),
+})
+
+
+def _saldo_pendiente(lineas, cobros):
+    total = total_lineas((linea['precio_unitario'], linea['cantidad_producto']) for linea in lineas)
+    return float(saldo(total, credito_cobros(cobros)))
+
+
+class LecturaPedidos(LecturaRapida):
+    """!
+    @brief `LecturaRapida` de `PedidoSerializer`: pedidos, líneas y cobros activos en tres consultas.
+    @details
+        Las mismas tres consultas que `con_detalle()`, pero con `.values()`.
+        Las líneas y los cobros de cada pedido se agregan a su fila antes de
+        mapearla, y el detalle, el total pagado y el saldo se calculan con las
+        mismas funciones que el modelo.
+    @param modelo_lineas, modelo_cobros: Tablas de las líneas y los cobros
+        (las en curso o las archivadas).
+    """
+
+    def __init__(self, modelo_lineas=PedidoProductos, modelo_cobros=Cobro):
+        self.modelo_lineas = modelo_lineas
+        self.modelo_cobros = modelo_cobros
+        super().__init__(PedidoSerializer, agregados=('_lineas', '_cobros'), calculados={
+            'productos_detalle': (('_lineas',), lambda lineas: [linea['detalle'] for linea in lineas]),
+            'total': (('total',), float),
+            'total_pagado': (('_cobros',), lambda cobros: float(sum(Decimal(monto) for monto, _, _ in cobros))),
+            'saldo_pendiente': (('_lineas', '_cobros'), _saldo_pendiente),
+        })
+
+    def serializar(self, queryset, campos=None):
+        columnas, mapear = self.mapeador(campos)
+        pedidos = list(queryset.prefetch_related(None).values('id', *columnas))
+        ids = [pedido['id'] for pedido in pedidos]
+        if not ids:
+            return []
+
+        columnas_lineas, mapear_linea = LECTURA_LINEAS.mapeador()
+        lineas = defaultdict(list)
+        for linea in self.modelo_lineas.objects.filter(id_pedido__in=ids).values('id_pedido', *columnas_lineas):
+            lineas[linea['id_pedido']].append({**linea, 'detalle': mapear_linea(linea)})
+        cobros = defaultdict(list)
+        for id_pedido, *importes in self.modelo_cobros.objects.filter(pedido__in=ids, estado='activo').values_list(
+            'pedido_id', 'monto', 'descuento', 'recargo',
+        ):
+            cobros[id_pedido].append(importes)
+
+        for pedido in pedidos:
+            pedido['_lineas'] = lineas[pedido['id']]
+            pedido['_cobros'] = cobros[pedido['id']]
+        return [mapear(pedido) for pedido in pedidos]
+
+
+LECTURA_PEDIDOS = LecturaPedidos()
+LECTURA_PEDIDOS_ARCHIVO = LecturaPedidos(PedidoProductosArchivado, CobroArchivado)
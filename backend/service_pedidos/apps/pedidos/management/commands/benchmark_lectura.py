@@ -0,0 +1,8 @@
+from apps.pedidos.views import PedidoListView
+from utils.benchmark_lectura import BenchmarkLecturaCommand
+
+
+class Command(BenchmarkLecturaCommand):
+    vistas = {
+        'PedidoListView': (PedidoListView, '/api/pedidos/buscar/'),
+    }
@@ -0,0 +1,62 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.pedidos.benchmark import medir_difusion
+
+
+class Command(BaseCommand):
+    help = (
+        "Abre N conexiones a NotificationConsumer, publica notificaciones a una tasa fija y muestra "
+        "los percentiles de latencia de entrega, la memoria por conexión y el tamaño del grupo. "
+        "Sirve para comparar capas de channels (--capa) y para ver cómo el latido poda conexiones muertas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=100, help='Conexiones que leen los mensajes.')
+        parser.add_argument('--inactivos', type=int, default=0, help='Conexiones que nunca leen ni responden el latido.')
+        parser.add_argument('--mensajes', type=int, default=50, help='Notificaciones a publicar.')
+        parser.add_argument('--tasa', type=float, default=10.0, help='Notificaciones por segundo.')
+        parser.add_argument('--capa', choices=sorted(settings.CAPAS_CHANNELS), default=None,
+                            help='Capa de channels a usar (por defecto la configurada en CHANNEL_LAYER).')
+        parser.add_argument('--latido', type=float, default=None,
+                            help='Segundos entre latidos (por defecto WS_HEARTBEAT_SEGUNDOS; 0 los desactiva).')
+        parser.add_argument('--espera', type=float, default=5.0, help='Segundos a esperar los mensajes que faltan.')
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['mensajes'] < 1 or options['tasa'] <= 0:
+            raise CommandError("--clientes, --mensajes y --tasa deben ser mayores que 0.")
+        ajustes = {}
+        if options['capa']:
+            ajustes['CHANNEL_LAYERS'] = {'default': settings.CAPAS_CHANNELS[options['capa']]}
+        if options['latido'] is not None:
+            ajustes['WS_HEARTBEAT_SEGUNDOS'] = options['latido']
+
+        # override_settings también reinicia las capas de channels ya creadas
+        with override_settings(**ajustes):
+            resultado = async_to_sync(medir_difusion)(
+                clientes=options['clientes'], mensajes=options['mensajes'], tasa=options['tasa'],
+                inactivos=options['inactivos'], espera=options['espera'],
+            )
+
+        self.stdout.write(f"Capa: {resultado['capa']}")
+        self.stdout.write(
+            f"Conexiones: {resultado['clientes']} activas + {resultado['inactivos']} inactivas; "
+            f"{resultado['mensajes']} mensajes a {resultado['tasa']:g}/s en {resultado['duracion_envio']:.2f} s"
+        )
+        self.stdout.write(f"Entregados: {resultado['entregados']} de {resultado['esperados']}")
+        latencias = resultado['latencia_ms']
+        if resultado['entregados']:
+            self.stdout.write("Latencia ms: " + '  '.join(f"{clave} {valor:.2f}" for clave, valor in latencias.items()))
+        self.stdout.write(
+            f"Memoria: {resultado['memoria_por_conexion'] / 1024:.1f} KiB por conexión; "
+            f"máximo del proceso {resultado['memoria_maxima_proceso'] / 1024 / 1024:.1f} MiB"
+        )
+        if resultado['grupo_inicial'] is None:
+            self.stdout.write("Grupo: la capa pub/sub no guarda los canales de los grupos")
+        else:
+            self.stdout.write(
+                f"Grupo: {resultado['grupo_inicial']} canales al conectar, {resultado['grupo_final']} al terminar; "
+                f"{resultado['podadas']} conexiones inactivas cerradas por el latido"
+            )
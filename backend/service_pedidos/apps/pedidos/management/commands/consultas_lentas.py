@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.slow_queries import cargar_agregados
+
+ORDENES = ('total', 'maximo', 'cantidad', 'promedio')
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra las consultas SQL que más tiempo consumen, agrupadas por huella y por vista. "
+        "Lee el archivo que genera SlowQueryMiddleware (SLOW_QUERY_LOG=True)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Cantidad de consultas a mostrar.')
+        parser.add_argument('--orden', choices=ORDENES, default='total', help='Criterio de orden.')
+        parser.add_argument('--por-huella', action='store_true', help='Sumar todas las vistas de una misma huella.')
+        parser.add_argument('--archivo', default=None, help='Archivo de estadísticas (por defecto SLOW_QUERY_ARCHIVO).')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo'] or settings.SLOW_QUERY_ARCHIVO
+        try:
+            datos = cargar_agregados(ruta)
+        except FileNotFoundError:
+            raise CommandError(f"No existe {ruta}. ¿Está activo SLOW_QUERY_LOG en el servicio?")
+
+        consultas = datos['consultas']
+        if options['por_huella']:
+            consultas = self._agrupar_por_huella(consultas)
+        for consulta in consultas:
+            consulta['promedio_ms'] = consulta['total_ms'] / consulta['cantidad'] if consulta['cantidad'] else 0.0
+
+        clave = {'total': 'total_ms', 'maximo': 'maximo_ms', 'cantidad': 'cantidad', 'promedio': 'promedio_ms'}[options['orden']]
+        consultas.sort(key=lambda c: c[clave], reverse=True)
+
+        self.stdout.write(f"{'total ms':>12} {'máx ms':>10} {'prom ms':>10} {'n':>8}  vista / huella")
+        for consulta in consultas[:options['top']]:
+            self.stdout.write(
+                f"{consulta['total_ms']:>12.1f} {consulta['maximo_ms']:>10.1f} {consulta['promedio_ms']:>10.2f} "
+                f"{consulta['cantidad']:>8}  {consulta['vista']}"
+            )
+            self.stdout.write(f"{'':>44}  {consulta['huella']}")
+
+    def _agrupar_por_huella(self, consultas):
+        agrupadas = defaultdict(lambda: {'cantidad': 0, 'total_ms': 0.0, 'maximo_ms': 0.0, 'vistas': set()})
+        for consulta in consultas:
+            grupo = agrupadas[consulta['huella']]
+            grupo['cantidad'] += consulta['cantidad']
+            grupo['total_ms'] += consulta['total_ms']
+            grupo['maximo_ms'] = max(grupo['maximo_ms'], consulta['maximo_ms'])
+            grupo['vistas'].add(consulta['vista'])
+        return [
+            {'huella': huella, 'vista': ', '.join(sorted(grupo.pop('vistas'))), **grupo}
+            for huella, grupo in agrupadas.items()
+        ]
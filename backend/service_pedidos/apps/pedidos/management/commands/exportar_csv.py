@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pedidos.exportacion import TIPOS, generar_csv, leer_fecha
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta pedidos, líneas o cobros (incluidos los archivados) de un rango de fechas a un archivo CSV. "
+        "Mismo formato que el endpoint exportar/<tipo>/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=TIPOS, help='Qué exportar.')
+        parser.add_argument('--desde', required=True, help='Fecha inicial, YYYY-MM-DD (inclusive).')
+        parser.add_argument('--hasta', required=True, help='Fecha final, YYYY-MM-DD (inclusive).')
+        parser.add_argument('--salida', default='-', help="Archivo de destino ('-' para la salida estándar).")
+
+    def handle(self, *args, **options):
+        desde = leer_fecha(options['desde'])
+        hasta = leer_fecha(options['hasta'])
+        if desde is None or hasta is None:
+            raise CommandError("Las fechas deben tener el formato YYYY-MM-DD.")
+        if desde > hasta:
+            raise CommandError("La fecha desde no puede ser posterior a hasta.")
+
+        inicio = time.perf_counter()
+        if options['salida'] == '-':
+            for bloque in generar_csv(options['tipo'], desde, hasta):
+                self.stdout.write(bloque, ending='')
+            return
+
+        with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+            for bloque in generar_csv(options['tipo'], desde, hasta):
+                archivo.write(bloque)
+        self.stderr.write(f"{options['salida']} generado en {time.perf_counter() - inicio:.1f} s.")
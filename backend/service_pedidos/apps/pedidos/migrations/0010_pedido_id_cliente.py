@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0009_pedido_total_alter_pedido_avisado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='id_cliente',
+            field=models.IntegerField(blank=True, db_column='id_cliente', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['id_cliente', 'fecha_pedido'], name='pedido_cliente_fecha_idx'),
+        ),
+    ]
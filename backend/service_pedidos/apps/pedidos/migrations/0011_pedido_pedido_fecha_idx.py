@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0010_pedido_id_cliente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fecha_pedido'], name='pedido_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0011_pedido_pedido_fecha_idx'),
+    ]
+
+    operations = [
+        # Se crea el compuesto antes de quitar el simple, así no hay un momento sin índice por fecha
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fecha_pedido', 'numero_pedido'], name='pedido_fecha_numero_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='pedido',
+            name='pedido_fecha_idx',
+        ),
+    ]
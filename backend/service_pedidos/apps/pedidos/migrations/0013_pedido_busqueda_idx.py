@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0012_pedido_fecha_numero_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'fecha_pedido'], name='pedido_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['pagado', 'fecha_pedido'], name='pedido_pagado_fecha_idx'),
+        ),
+    ]
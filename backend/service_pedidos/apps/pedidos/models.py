@@ -4,7 +4,65 @@ from django.utils import timezone
 from decimal import Decimal
 from apps.pedidosProductos.models import PedidoProductos
 
-class Pedido(models.Model):
+def total_lineas(lineas):
+    """!
+    @brief Total de las líneas de un pedido, redondeado a centavos.
+    @param lineas: Iterable de (precio_unitario, cantidad_producto).
+    """
+    total = sum(Decimal(precio) * Decimal(cantidad) for precio, cantidad in lineas)
+    return Decimal(total).quantize(Decimal('0.01'))
+
+
+def credito_cobros(cobros):
+    """!
+    @brief Crédito de los cobros activos: monto + descuento − recargo de cada uno.
+    @param cobros: Iterable de (monto, descuento, recargo); los None cuentan como 0.
+    """
+    credito_total = Decimal('0.00')
+    for monto, descuento, recargo in cobros:
+        credito_total += (monto or Decimal('0.00')) + (descuento or Decimal('0.00')) - (recargo or Decimal('0.00'))
+    return credito_total
+
+
+def saldo(total, credito):
+    """!
+    @brief Deuda restante; negativa si el cliente pagó de más.
+    """
+    restante = total - credito
+
+    # Tolerancia para errores de redondeo de centavos
+    if abs(restante) < Decimal("0.01"):
+        return Decimal("0.00")
+
+    return restante.quantize(Decimal("0.01"))
+
+
+class PedidoQuerySet(models.QuerySet):
+    def con_detalle(self):
+        """!
+        @brief Precarga los productos y los cobros activos de cada pedido.
+        @details
+            Con esto `PedidoSerializer` calcula detalle, total pagado y saldo sin
+            consultar la base por cada pedido. Los cobros activos quedan en el
+            atributo `cobros_activos`.
+        """
+        # Cobro importa Pedido, por eso se resuelve desde la relación inversa
+        cobro = self.model._meta.get_field('cobros').related_model
+        return self.prefetch_related(
+            'pedidoproductos_set',
+            models.Prefetch('cobros', queryset=cobro.objects.filter(estado='activo'), to_attr='cobros_activos'),
+        )
+
+
+class PedidoBase(models.Model):
+    """!
+    @brief Campos y cálculos comunes a los pedidos en curso y a los archivados.
+    @details
+        `Pedido` (tabla `pedidos`) y `PedidoArchivado` (tabla `pedidos_archivo`)
+        comparten columnas, así el archivado copia filas sin transformarlas y
+        `PedidoSerializer` sirve para ambos. Cada subclase define
+        `obtener_productos()` y `obtener_cobros_activos()`.
+    """
     ESTADO_PENDIENTE = 'PENDIENTE'
     ESTADO_LISTO = 'LISTO'
     ESTADO_ENTREGADO = 'ENTREGADO'
@@ -19,18 +77,20 @@ class Pedido(models.Model):
     numero_pedido = models.IntegerField(db_column='numero_pedido')    
     fecha_pedido = models.DateTimeField(default=timezone.now, db_column='fecha_pedido')    
     cliente = models.CharField(max_length=100, default="Sin nombre", db_column='cliente')
+    id_cliente = models.IntegerField(db_column='id_cliente', null=True, blank=True)
     para_hora = models.TimeField(db_column='para_hora', null=True)
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, db_column='estado')
     entregado = models.BooleanField(db_column='entregado', default=False)
     avisado = models.BooleanField(db_column='avisado', default=False)
     pagado = models.BooleanField(db_column='pagado', default=False)
     total = models.DecimalField(max_digits=10, decimal_places=2, db_column="total_pedido", default=0)
-    
+
+    class Meta:
+        abstract = True
+
     def calcular_total(self):
         """Total original del pedido (sin descuentos ni recargos)."""
-        productos = PedidoProductos.objects.filter(id_pedido=self.id)
-        total = sum(Decimal(p.precio_unitario) * Decimal(p.cantidad_producto) for p in productos)
-        return Decimal(total).quantize(Decimal('0.01'))
+        return total_lineas((p.precio_unitario, p.cantidad_producto) for p in self.obtener_productos())
 
     def calcular_credito_real(self):
         """
@@ -42,35 +102,30 @@ class Pedido(models.Model):
         Ejemplo Descuento: Pedido $100. Pago Efvo $90 (inc. $10 descuento).
                            Credito = 90 + 10 - 0 = $100. (Cubre la deuda exacta).
         """
-        credito_total = Decimal('0.00')
-        
-        cobros_activos = self.cobros.filter(estado='activo')
-        
-        for cobro in cobros_activos:
-            monto = cobro.monto or Decimal('0.00')
-            descuento = cobro.descuento or Decimal('0.00')
-            recargo = cobro.recargo or Decimal('0.00')
-            
-            credito_real = monto + descuento - recargo
-            credito_total += credito_real
-            
-        return credito_total
+        return credito_cobros((c.monto, c.descuento, c.recargo) for c in self.obtener_cobros_activos())
 
     def saldo_pendiente(self):
         """
         Retorna la deuda restante.
         Si es negativo, significa que el cliente pagó de más (crédito a favor).
         """
-        total_pedido = self.calcular_total()
-        credito_real = self.calcular_credito_real()
-        
-        saldo = total_pedido - credito_real
+        return saldo(self.calcular_total(), self.calcular_credito_real())
+
+
+class Pedido(PedidoBase):
+    objects = PedidoQuerySet.as_manager()
 
-        # Tolerancia para errores de redondeo de centavos
-        if abs(saldo) < Decimal("0.01"):
-            return Decimal("0.00")
+    def obtener_productos(self):
+        """Productos del pedido, usando los precargados por `con_detalle()` si los hay."""
+        if 'pedidoproductos_set' in getattr(self, '_prefetched_objects_cache', {}):
+            return self.pedidoproductos_set.all()
+        return PedidoProductos.objects.filter(id_pedido=self.id)
 
-        return saldo.quantize(Decimal("0.01"))
+    def obtener_cobros_activos(self):
+        """Cobros activos del pedido, usando los precargados por `con_detalle()` si los hay."""
+        if hasattr(self, 'cobros_activos'):
+            return self.cobros_activos
+        return self.cobros.filter(estado='activo')
 
     def save(self, *args, **kwargs):
         self.cliente = self.cliente.upper()
@@ -85,3 +140,13 @@ class Pedido(models.Model):
 
     class Meta:
         db_table = 'pedidos'
+        indexes = [
+            # Historial de pedidos por cliente (id_cliente = ? ORDER BY fecha_pedido DESC)
+            models.Index(fields=['id_cliente', 'fecha_pedido'], name='pedido_cliente_fecha_idx'),
+            # Pedidos del día (fecha_pedido BETWEEN ? AND ? [AND numero_pedido = ?]); también
+            # resuelve el recorrido por fecha del archivado (fecha_pedido < ? ORDER BY fecha_pedido)
+            models.Index(fields=['fecha_pedido', 'numero_pedido'], name='pedido_fecha_numero_idx'),
+            # Búsqueda por estado o por pagado en un rango de días (estado = ? AND fecha_pedido BETWEEN ? AND ?)
+            models.Index(fields=['estado', 'fecha_pedido'], name='pedido_estado_fecha_idx'),
+            models.Index(fields=['pagado', 'fecha_pedido'], name='pedido_pagado_fecha_idx'),
+        ]
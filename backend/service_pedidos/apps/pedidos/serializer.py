@@ -4,6 +4,7 @@ from rest_framework import serializers
 from apps.pedidos.models import Pedido
 from apps.pedidosProductos.models import PedidoProductos
 from apps.cobros.models import Cobro
+from apps.catalogo.catalogo import completar_lineas
 
 class PedidoProductosSerializer(serializers.ModelSerializer):
     subtotal = serializers.SerializerMethodField()
@@ -38,6 +39,7 @@ class PedidoSerializer(serializers.ModelSerializer):
                   'numero_pedido',
                   'fecha_pedido',
                   'cliente',
+                  'id_cliente',
                   'para_hora',
                   'productos',
                   'productos_detalle',
@@ -55,6 +57,14 @@ class PedidoSerializer(serializers.ModelSerializer):
             'productos': {'write_only': True}
         }
 
+    def validate(self, attrs):
+        # Las líneas se valorizan con la copia local del catálogo, también al
+        # editar: `update` reemplaza todas las líneas por las recibidas
+        errores = completar_lineas(attrs.get('productos'))
+        if errores:
+            raise serializers.ValidationError({'productos': errores})
+        return attrs
+
     def create(self, validated_data):
         productos_data = validated_data.pop('productos', [])
         pedido = Pedido.objects.create(**validated_data)
@@ -91,15 +101,14 @@ class PedidoSerializer(serializers.ModelSerializer):
         return instance
 
     def get_productos_detalle(self, pedido):
-        productos = PedidoProductos.objects.filter(id_pedido=pedido.id)
-        return PedidoProductosSerializer(productos, many=True).data
+        return PedidoProductosSerializer(pedido.obtener_productos(), many=True).data
 
     def get_total(self, pedido):
         return float(pedido.total)
 
     def get_total_pagado(self, pedido):
         cobrado = sum(
-            Decimal(c.monto) for c in pedido.cobros.filter(estado='activo')
+            Decimal(c.monto) for c in pedido.obtener_cobros_activos()
         )
         return float(cobrado)
 
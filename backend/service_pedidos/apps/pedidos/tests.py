@@ -3,9 +3,45 @@ from rest_framework.test import APIClient
 from django.utils import timezone
 from apps.pedidos.models import Pedido
 from apps.pedidosProductos.models import PedidoProductos
+from apps.catalogo.models import CatalogoLocal, ProductoCatalogo
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+import threading
+import time
+import requests
+from utils.http_client import ClienteHTTP, CircuitoAbiertoError
+from utils.query_budget import QueryBudgetTestMixin, PresupuestoConsultasExcedido
+from utils.query_plan import PlanConsultasTestMixin
+from apps.pedidos.exportacion import generar_csv
+from apps.archivo.archivado import archivar_pedidos, fecha_corte
+import csv
+from apps.cobros.models import Cobro
+from utils import event_bus
+from utils.event_bus import Consumidor, manejador, nombre_stream, stream_descartados, obtener_backend
+from apps.pedidos.eventos import actualizar_nombre_cliente
+from django.test import override_settings
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from orders.asgi import application
+from utils import metrics
+from utils.channels_helper import LATENCIA_PUBLICACION
+from apps.pedidos.consumers import CONEXIONES_ACTIVAS, CONEXIONES_PODADAS
+from apps.pedidos.benchmark import medir_difusion, percentil
+from channels.layers import get_channel_layer
+from utils.slow_queries import AGREGADOR, huella_sql
+from utils import tracing
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+import io
+import os
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import tempfile
 
 User = get_user_model()
 
@@ -44,6 +80,14 @@ class PedidoViewsMicroserviceUserTestCase(TestCase):
         self.client_false = APIClient()
         self.client_false.force_authenticate(user= self.otro_usuario)
 
+        # Copia local del catálogo con la que se valorizan las líneas
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.bulk_create([
+            ProductoCatalogo(id_producto=1, nombre='Producto A', precio_unitario=100),
+            ProductoCatalogo(id_producto=2, nombre='Producto B', precio_unitario=50),
+            ProductoCatalogo(id_producto=3, nombre='Producto C', precio_unitario=70),
+        ])
+
         # Crear un pedido de prueba
         self.pedido = Pedido.objects.create(
             numero_pedido=1,
@@ -188,4 +232,921 @@ class PedidoViewsMicroserviceUserTestCase(TestCase):
         payload = {"numero_pedido": 2, "fecha_pedido": "2025-11-10T08:01:18", "id_cliente": 1, "cliente": "MARIA LOPEZ",
                    "para_hora": "15:00:00", "estado": "PENDIENTE", "entregado": False, "avisado": False, "pagado": False, "productos": []}
         response = self.client_false.post(url, payload, format='json')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class HistorialYRepetirPedidoTestCase(TestCase):
+
+    def setUp(self):
+        self.recepcionista = User.objects.create_user(
+            username="Recepcionista",
+            email="recep@test.com",
+            password="1234",
+        )
+        self.recepcionista.rol = "Recepcionista"
+        self.recepcionista.save()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.recepcionista)
+
+        # Copia local del catálogo con la que se valorizan las líneas
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.bulk_create([
+            ProductoCatalogo(id_producto=1, nombre='Empanada', precio_unitario=100),
+            ProductoCatalogo(id_producto=2, nombre='Pizza', precio_unitario=500),
+        ])
+
+        ahora = timezone.now()
+        self.pedidos_cliente = []
+        for dias in range(5):
+            pedido = Pedido.objects.create(
+                numero_pedido=dias + 1,
+                id_cliente=7,
+                cliente="Ana Gomez",
+                fecha_pedido=ahora - timezone.timedelta(days=dias + 1),
+            )
+            PedidoProductos.objects.create(
+                id_pedido=pedido,
+                id_producto=1,
+                nombre_producto="Empanada",
+                cantidad_producto=12,
+                precio_unitario=100,
+                aclaraciones="Carne",
+            )
+            PedidoProductos.objects.create(
+                id_pedido=pedido,
+                id_producto=2,
+                nombre_producto="Pizza",
+                cantidad_producto=1,
+                precio_unitario=500,
+            )
+            pedido.save()
+            self.pedidos_cliente.append(pedido)
+
+        Pedido.objects.create(numero_pedido=1, id_cliente=8, cliente="Otro", fecha_pedido=ahora)
+
+    def test_historial_ordenado_y_paginado_por_cursor(self):
+        url = reverse('historial_cliente_pedidos')
+        response = self.client.get(url, {'id_cliente': 7, 'limite': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [p['id'] for p in response.data['results']]
+        self.assertEqual(ids, [self.pedidos_cliente[0].id, self.pedidos_cliente[1].id])
+        self.assertIsNotNone(response.data['next'])
+
+        vistos = list(ids)
+        siguiente = response.data['next']
+        while siguiente:
+            response = self.client.get(siguiente)
+            vistos += [p['id'] for p in response.data['results']]
+            siguiente = response.data['next']
+        self.assertEqual(vistos, [p.id for p in self.pedidos_cliente])
+
+    def test_historial_sin_id_cliente(self):
+        response = self.client.get(reverse('historial_cliente_pedidos'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', response.data)
+
+    def test_repetir_ultimo_pedido_del_cliente(self):
+        response = self.client.post(reverse('repetir_pedido') + "?id_cliente=7", {'para_hora': '21:00:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        nuevo = Pedido.objects.get(id=response.data['id'])
+        self.assertEqual(nuevo.id_cliente, 7)
+        self.assertEqual(nuevo.cliente, "ANA GOMEZ")
+        self.assertEqual(nuevo.numero_pedido, 2)
+        self.assertEqual(nuevo.total, self.pedidos_cliente[0].total)
+        lineas = PedidoProductos.objects.filter(id_pedido=nuevo).order_by('id_producto')
+        self.assertEqual([l.nombre_producto for l in lineas], ["Empanada", "Pizza"])
+        self.assertEqual(lineas[0].aclaraciones, "Carne")
+
+    def test_repetir_con_hora_invalida(self):
+        for hora in ('25:00', 'mañana', ['21:00']):
+            with self.subTest(hora=hora):
+                response = self.client.post(reverse('repetir_pedido') + "?id_cliente=7", {'para_hora': hora}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('para_hora', response.data)
+        self.assertEqual(Pedido.objects.filter(id_cliente=7).count(), len(self.pedidos_cliente))
+
+    def test_repetir_pedido_inexistente(self):
+        response = self.client.post(reverse('repetir_pedido') + "?id=9999")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_repetir_sin_parametros(self):
+        response = self.client.post(reverse('repetir_pedido'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PresupuestoConsultasPedidosTestCase(QueryBudgetTestMixin, TestCase):
+    """Los listados de pedidos no deben hacer consultas por cada pedido."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.fecha = timezone.now()
+
+    def generar_pedidos(self, n):
+        for numero in range(Pedido.objects.count() + 1, n + 1):
+            pedido = Pedido.objects.create(numero_pedido=numero, id_cliente=7, cliente="Ana", fecha_pedido=self.fecha)
+            for id_producto in (1, 2):
+                PedidoProductos.objects.create(
+                    id_pedido=pedido, id_producto=id_producto, nombre_producto="Empanada",
+                    cantidad_producto=2, precio_unitario=100,
+                )
+            pedido.save()
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=150, fecha=self.fecha.date())
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=50, fecha=self.fecha.date(), estado='cancelado')
+
+    def test_listado_del_dia_con_consultas_constantes(self):
+        url = reverse('pedidos') + f"?fecha={timezone.localtime(self.fecha).strftime('%Y-%m-%d')}"
+        self.assertConsultasConstantes(url, self.generar_pedidos)
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 8)
+        self.assertEqual(response.data[0]['total_pagado'], 150.0)
+        self.assertEqual(response.data[0]['saldo_pendiente'], 250.0)
+        self.assertEqual(len(response.data[0]['productos_detalle']), 2)
+
+    def test_historial_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('historial_cliente_pedidos') + "?id_cliente=7", self.generar_pedidos)
+
+    def test_cobros_con_consultas_constantes(self):
+        self.assertConsultasConstantes('/api/pedidos/cobros/', self.generar_pedidos)
+
+    def test_middleware_informa_consultas_y_tiempo(self):
+        self.generar_pedidos(3)
+        response = self.client.get(reverse('historial_cliente_pedidos') + "?id_cliente=7")
+        self.assertIn('X-DB-Queries', response)
+        self.assertIn('X-DB-Time-ms', response)
+        self.assertNotIn('X-Query-Budget-Exceeded', response)
+
+    @override_settings(QUERY_BUDGET_DEFAULT=0)
+    def test_middleware_marca_presupuesto_excedido(self):
+        self.generar_pedidos(1)
+        with self.assertLogs('utils.query_budget', level='WARNING'):
+            response = self.client.get('/api/pedidos/cobros/')
+        self.assertIn('X-Query-Budget-Exceeded', response)
+
+    @override_settings(QUERY_BUDGET_DEFAULT=0, QUERY_BUDGET_ESTRICTO=True)
+    def test_middleware_estricto_lanza_excepcion(self):
+        with self.assertRaises(PresupuestoConsultasExcedido), self.assertLogs('utils.query_budget', level='WARNING'):
+            self.client.get('/api/pedidos/cobros/')
+
+class MetricasTestCase(TestCase):
+    """Métricas por vista, de channels y de WebSocket expuestas en /metrics."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Empanada', precio_unitario=100)
+
+    def test_solicitudes_y_publicacion_por_vista(self):
+        solicitudes = metrics.SOLICITUDES.valor(view='CrearPedidoView', method='POST', status=201)
+        publicaciones = LATENCIA_PUBLICACION.conteo(group='app_notifications')
+
+        response = self.client.post(reverse('crear_pedido'), {
+            'numero_pedido': 1,
+            'cliente': 'Ana',
+            'productos': [{'id_producto': 1, 'nombre_producto': 'Empanada', 'cantidad_producto': 2,
+                           'precio_unitario': 100, 'aclaraciones': ''}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.get('/api/pedidos/cobros/')
+
+        self.assertEqual(metrics.SOLICITUDES.valor(view='CrearPedidoView', method='POST', status=201), solicitudes + 1)
+        self.assertEqual(LATENCIA_PUBLICACION.conteo(group='app_notifications'), publicaciones + 1)
+        self.assertGreater(metrics.CONSULTAS_DB.conteo(view='CrearPedidoView'), 0)
+
+        texto = self.client.get('/metrics').content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{view="CrearPedidoView",method="POST",le="+Inf"}', texto)
+        self.assertIn('http_requests_total{view="CobroViewSet.list",method="GET",status="200"}', texto)
+        self.assertIn('db_query_duration_seconds_total{view="CrearPedidoView"}', texto)
+        self.assertIn('channel_publish_duration_seconds_count{group="app_notifications"}', texto)
+
+    def test_conexiones_websocket_activas(self):
+        async def conectar_y_cerrar():
+            comunicador = WebsocketCommunicator(application, '/api/pedidos/ws/notifications/')
+            conectado, _ = await comunicador.connect()
+            abiertas = CONEXIONES_ACTIVAS.valor(group='app_notifications')
+            await comunicador.disconnect()
+            return conectado, abiertas
+
+        antes = CONEXIONES_ACTIVAS.valor(group='app_notifications')
+        conectado, abiertas = async_to_sync(conectar_y_cerrar)()
+        self.assertTrue(conectado)
+        self.assertEqual(abiertas, antes + 1)
+        self.assertEqual(CONEXIONES_ACTIVAS.valor(group='app_notifications'), antes)
+
+    def test_formato_histograma(self):
+        registro = metrics.Registro()
+        histograma = registro.histograma('prueba_seconds', 'Prueba.', ('view',), buckets=(0.1, 1))
+        histograma.observar(0.05, view='A')
+        histograma.observar(0.5, view='A')
+        histograma.observar(3, view='A')
+        self.assertEqual(registro.exponer().splitlines(), [
+            '# HELP prueba_seconds Prueba.',
+            '# TYPE prueba_seconds histogram',
+            'prueba_seconds_bucket{view="A",le="0.1"} 1',
+            'prueba_seconds_bucket{view="A",le="1"} 2',
+            'prueba_seconds_bucket{view="A",le="+Inf"} 3',
+            'prueba_seconds_sum{view="A"} 3.55',
+            'prueba_seconds_count{view="A"} 3',
+        ])
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_token_requerido(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class ConsultasLentasTestCase(TestCase):
+    """Huellas SQL, agregación por vista y comando consultas_lentas."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        Pedido.objects.create(numero_pedido=1, cliente="Ana", fecha_pedido=timezone.now())
+        self.archivo = os.path.join(tempfile.mkdtemp(), 'consultas.json')
+        AGREGADOR.reiniciar()
+
+    def test_huella_agrupa_valores_y_listas(self):
+        self.assertEqual(
+            huella_sql('SELECT * FROM "pedidos" WHERE "id" IN (%s, %s, %s) AND "cliente" = \'ANA\' LIMIT 21'),
+            'select * from "pedidos" where "id" in (...) and "cliente" = ? limit ?',
+        )
+        self.assertEqual(
+            huella_sql('SELECT * FROM "pedidos" WHERE "id" IN (%s)'),
+            huella_sql('SELECT  *\nFROM "pedidos" WHERE "id" IN (%s, %s)'),
+        )
+
+    def test_registra_consultas_lentas_por_vista_y_comando(self):
+        fecha = timezone.localtime().strftime('%Y-%m-%d')
+        with override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_UMBRAL_MS=0, SLOW_QUERY_ARCHIVO=self.archivo,
+                               SLOW_QUERY_INTERVALO=0):
+            client = APIClient()
+            client.force_authenticate(user=self.usuario)
+            with self.assertLogs('utils.slow_queries', level='WARNING') as logs:
+                response = client.get(reverse('pedidos'), {'fecha': fecha})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any('PedidoListView' in linea and 'Plan:' in linea for linea in logs.output))
+
+        vistas = {c['vista'] for c in AGREGADOR.instantanea() if '"pedidos"' in c['huella']}
+        self.assertIn('PedidoListView', vistas)
+
+        salida = io.StringIO()
+        call_command('consultas_lentas', archivo=self.archivo, top=5, stdout=salida)
+        self.assertIn('PedidoListView', salida.getvalue())
+
+        salida = io.StringIO()
+        call_command('consultas_lentas', archivo=self.archivo, por_huella=True, orden='maximo', stdout=salida)
+        self.assertIn('from "pedidos"', salida.getvalue())
+
+    def test_desactivado_por_defecto(self):
+        client = APIClient()
+        client.force_authenticate(user=self.usuario)
+        client.get(reverse('pedidos'), {'fecha': timezone.localtime().strftime('%Y-%m-%d')})
+        self.assertEqual(AGREGADOR.instantanea(), [])
+
+class TrazasTestCase(TestCase):
+    """Id de solicitud, spans por vista y propagación a las notificaciones."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Empanada', precio_unitario=100)
+        self.pedido = {
+            'numero_pedido': 1,
+            'cliente': 'Ana',
+            'productos': [{'id_producto': 1, 'nombre_producto': 'Empanada', 'cantidad_producto': 2,
+                           'precio_unitario': 100, 'aclaraciones': ''}],
+        }
+
+    def test_genera_id_si_no_viene_o_es_invalido(self):
+        response = self.client.get('/api/pedidos/cobros/')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+        response = self.client.get('/api/pedidos/cobros/', HTTP_X_REQUEST_ID='no valido\n')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_spans_de_vista_y_channel_y_notificacion_con_id(self):
+        async def crear_y_escuchar():
+            comunicador = WebsocketCommunicator(application, '/api/pedidos/ws/notifications/')
+            await comunicador.connect()
+            response = await sync_to_async(self.client.post)(
+                reverse('crear_pedido'), self.pedido, format='json', HTTP_X_REQUEST_ID='pedido-abc-1',
+            )
+            mensaje = await comunicador.receive_json_from(timeout=2)
+            await comunicador.disconnect()
+            return response, mensaje
+
+        response, mensaje = async_to_sync(crear_y_escuchar)()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['X-Request-ID'], 'pedido-abc-1')
+        self.assertEqual(mensaje['request_id'], 'pedido-abc-1')
+        self.assertEqual(mensaje['action'], 'create')
+
+        spans = self.client.get(reverse('trazas'), {'request_id': 'pedido-abc-1'}).json()
+        vista = next(s for s in spans if s['tipo'] == 'vista')
+        channel = next(s for s in spans if s['tipo'] == 'channel')
+        self.assertEqual(vista['nombre'], 'POST CrearPedidoView')
+        self.assertEqual(vista['servicio'], 'pedidos')
+        self.assertEqual(vista['atributos']['status'], 201)
+        self.assertGreater(vista['atributos']['db_consultas'], 0)
+        self.assertEqual(channel['padre'], vista['span_id'])
+        self.assertLessEqual(vista['inicio'], channel['inicio'])
+
+
+class PlanConsultasPedidosTestCase(PlanConsultasTestMixin, TestCase):
+    """Las consultas de los listados principales deben resolverse con índices."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Administrador", email="admin@test.com", password="1234")
+        self.usuario.rol = "Administrador"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.fecha = timezone.now()
+        for numero in range(1, 6):
+            pedido = Pedido.objects.create(numero_pedido=numero, id_cliente=7, cliente="Ana", fecha_pedido=self.fecha)
+            PedidoProductos.objects.create(
+                id_pedido=pedido, id_producto=1, nombre_producto="Empanada",
+                cantidad_producto=2, precio_unitario=100,
+            )
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=100, fecha=self.fecha.date())
+        self.pedido = pedido
+        self.dia = timezone.localtime(self.fecha).strftime('%Y-%m-%d')
+
+    def test_pedidos_del_dia(self):
+        url = reverse('pedidos') + f"?fecha={self.dia}&numero=3"
+        self.assertUsaIndices(url, ['pedido_fecha_numero_idx', 'cobro_pedido_estado_idx'])
+        self.assertSinRecorridosCompletos(url, ['pedidos', 'pedidoProductos', 'cobros'])
+
+    def test_historial_del_cliente(self):
+        url = reverse('historial_cliente_pedidos') + "?id_cliente=7"
+        self.assertUsaIndices(url, ['pedido_cliente_fecha_idx'])
+        self.assertSinRecorridosCompletos(url, ['pedidos', 'pedidoProductos', 'cobros', 'pedidos_archivo'])
+
+    def test_cobros_de_un_pedido(self):
+        url = reverse('cobros-por-pedido', kwargs={'pedido_id': self.pedido.id})
+        self.assertUsaIndices(url, ['cobro_pedido_estado_idx'])
+        self.assertSinRecorridosCompletos(url, ['cobros', 'cobros_archivo'])
+
+    def test_total_del_dia(self):
+        url = reverse('cobros-total-by-date', kwargs={'fecha': self.fecha.date().isoformat()})
+        self.assertUsaIndices(url, ['cobro_fecha_estado_idx', 'cobro_arch_fecha_estado_idx'])
+        self.assertSinRecorridosCompletos(url, ['cobros', 'cobros_archivo'])
+
+    def test_listado_de_cobros_paginado(self):
+        url = '/api/pedidos/cobros/?limite=2'
+        self.assertUsaIndices(url, ['cobro_fecha_idx'])
+        self.assertSinRecorridosCompletos(url, ['cobros'])
+
+    def test_busqueda_por_estado_y_pagado(self):
+        url = reverse('busqueda_pedidos') + f"?desde={self.dia}&estado=PENDIENTE"
+        self.assertUsaIndices(url, ['pedido_estado_fecha_idx'])
+        self.assertSinRecorridosCompletos(url, ['pedidos', 'pedidoProductos', 'cobros', 'pedidos_archivo'])
+        url = reverse('busqueda_pedidos') + f"?desde={self.dia}&pagado=false"
+        self.assertUsaIndices(url, ['pedido_pagado_fecha_idx'])
+
+    def test_busqueda_por_cliente_y_producto(self):
+        url = reverse('busqueda_pedidos') + f"?desde={self.dia}&cliente=an&producto=1"
+        self.assertSinRecorridosCompletos(url, ['pedidos', 'pedidoProductos', 'cobros', 'pedidos_archivo', 'pedidoProductos_archivo'])
+
+
+class ExportacionCSVTestCase(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="Administrador", email="admin@test.com", password="1234")
+        self.admin.rol = "Administrador"
+        self.admin.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        self.hoy = timezone.localdate()
+        self.pedidos = []
+        for dias in range(5):
+            fecha = timezone.now() - timezone.timedelta(days=dias)
+            pedido = Pedido.objects.create(numero_pedido=dias + 1, cliente="Ana, la de \"enfrente\"", fecha_pedido=fecha)
+            for id_producto in (1, 2):
+                PedidoProductos.objects.create(
+                    id_pedido=pedido, id_producto=id_producto, nombre_producto="Empanada",
+                    cantidad_producto=3, precio_unitario=100, aclaraciones="Sin sal\ny sin picante",
+                )
+            pedido.save()
+            Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=600, fecha=timezone.localdate(fecha))
+            self.pedidos.append(pedido)
+        # Los dos más viejos quedan en el archivo y se exportan igual
+        archivar_pedidos(corte=fecha_corte(3))
+
+    def leer(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.DictReader(io.StringIO(contenido)))
+
+    def test_exporta_pedidos_del_rango_incluyendo_archivados(self):
+        desde = self.hoy - timezone.timedelta(days=4)
+        response = self.client.get(reverse('exportar_csv', args=['pedidos']), {'desde': desde, 'hasta': self.hoy - timezone.timedelta(days=1)})
+        self.assertIn('attachment; filename="pedidos_', response['Content-Disposition'])
+        filas = self.leer(response)
+        self.assertEqual(sorted(int(f['numero_pedido']) for f in filas), [2, 3, 4, 5])
+        self.assertEqual(filas[0]['cliente'], 'ANA, LA DE "ENFRENTE"')
+        self.assertEqual(filas[0]['total'], '600.00')
+
+    def test_exporta_lineas_y_cobros(self):
+        rango = {'desde': self.hoy - timezone.timedelta(days=10), 'hasta': self.hoy}
+        lineas = self.leer(self.client.get(reverse('exportar_csv', args=['lineas']), rango))
+        self.assertEqual(len(lineas), 10)
+        self.assertEqual(lineas[0]['aclaraciones'], 'Sin sal\ny sin picante')
+        self.assertEqual(float(lineas[0]['subtotal']), 300.0)
+
+        cobros = self.leer(self.client.get(reverse('exportar_csv', args=['cobros']), rango))
+        self.assertEqual(len(cobros), 5)
+        self.assertEqual({c['monto'] for c in cobros}, {'600.00'})
+
+    def test_lotes_pequenos_no_pierden_ni_repiten_filas(self):
+        desde = self.hoy - timezone.timedelta(days=10)
+        contenido = ''.join(generar_csv('lineas', desde, self.hoy, lote=3))
+        filas = list(csv.DictReader(io.StringIO(contenido)))
+        self.assertEqual(len(filas), 10)
+        self.assertEqual(len({(f['id_pedido'], f['id_producto']) for f in filas}), 10)
+
+    def test_parametros_invalidos(self):
+        url = reverse('exportar_csv', args=['pedidos'])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'desde': '2026-02-01', 'hasta': '2026-01-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('exportar_csv', args=['clientes']), {'desde': '2026-01-01', 'hasta': '2026-01-02'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requiere_administrador(self):
+        recepcionista = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        recepcionista.rol = "Recepcionista"
+        self.client.force_authenticate(user=recepcionista)
+        response = self.client.get(reverse('exportar_csv', args=['pedidos']), {'desde': '2026-01-01', 'hasta': '2026-01-02'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_comando_escribe_archivo(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'cobros.csv')
+            call_command(
+                'exportar_csv', 'cobros', '--desde', str(self.hoy - timezone.timedelta(days=10)),
+                '--hasta', str(self.hoy), '--salida', ruta, stderr=io.StringIO(),
+            )
+            with open(ruta, encoding='utf-8', newline='') as archivo:
+                self.assertEqual(len(list(csv.DictReader(archivo))), 5)
+
+
+class _DependenciaFalsaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _responder(self):
+        servidor = self.server
+        servidor.solicitudes += 1
+        servidor.puertos_cliente.add(self.client_address[1])
+        servidor.request_ids.append(self.headers.get('X-Request-ID'))
+        codigo = servidor.respuestas.pop(0) if servidor.respuestas else 200
+        cuerpo = b'{"detail": "ok"}'
+        if self.headers.get('Content-Length'):
+            self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    do_GET = _responder
+    do_POST = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+class ClienteHTTPTestCase(TestCase):
+
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _DependenciaFalsaHandler)
+        self.servidor.solicitudes = 0
+        self.servidor.puertos_cliente = set()
+        self.servidor.respuestas = []
+        self.servidor.request_ids = []
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def crear_cliente(self, **kwargs):
+        opciones = {'reintentos': 2, 'backoff_base': 0.001, 'umbral_fallos': 3, 'tiempo_apertura': 60}
+        opciones.update(kwargs)
+        return ClienteHTTP('prueba', self.base_url, **opciones)
+
+    def test_reutiliza_conexion_keep_alive(self):
+        cliente = self.crear_cliente()
+        for _ in range(5):
+            self.assertEqual(cliente.get('/').status_code, 200)
+        self.assertEqual(self.servidor.solicitudes, 5)
+        self.assertEqual(len(self.servidor.puertos_cliente), 1)
+        self.assertEqual(cliente.estado()['llamadas'], 5)
+
+    def test_propaga_request_id_y_registra_span(self):
+        cliente = self.crear_cliente()
+        cliente.get('/')
+        self.assertEqual(self.servidor.request_ids, [None])
+
+        token = tracing.id_solicitud.set('traza-http-1')
+        try:
+            cliente.get('/estado')
+        finally:
+            tracing.id_solicitud.reset(token)
+        self.assertEqual(self.servidor.request_ids[-1], 'traza-http-1')
+        spans = tracing.obtener_recolector().buscar(request_id='traza-http-1')
+        self.assertEqual([(s['tipo'], s['nombre']) for s in spans], [('http', 'prueba GET /estado')])
+        self.assertEqual(spans[0]['atributos']['status'], 200)
+
+    def test_reintenta_get_ante_error_5xx(self):
+        self.servidor.respuestas = [503, 503]
+        cliente = self.crear_cliente()
+        self.assertEqual(cliente.get('/').status_code, 200)
+        estado = cliente.estado()
+        self.assertEqual(estado['reintentos'], 2)
+        self.assertEqual(estado['errores'], 2)
+        self.assertEqual(estado['circuito'], 'cerrado')
+
+    def test_no_reintenta_post_ya_enviado(self):
+        self.servidor.respuestas = [500]
+        cliente = self.crear_cliente()
+        with self.assertRaises(requests.exceptions.HTTPError):
+            cliente.post('/imprimir_comanda', json={})
+        self.assertEqual(self.servidor.solicitudes, 1)
+
+    def test_circuito_abierto_falla_rapido(self):
+        self.servidor.respuestas = [500, 500, 500]
+        cliente = self.crear_cliente(reintentos=0)
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                cliente.get('/')
+
+        with self.assertRaises(CircuitoAbiertoError):
+            cliente.get('/')
+        self.assertEqual(self.servidor.solicitudes, 3)
+        self.assertEqual(cliente.estado()['circuito'], 'abierto')
+        self.assertEqual(cliente.estado()['rechazos_circuito'], 1)
+
+    def test_circuito_semiabierto_se_cierra_tras_exito(self):
+        self.servidor.respuestas = [500]
+        cliente = self.crear_cliente(reintentos=0, umbral_fallos=1, tiempo_apertura=0)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            cliente.get('/')
+        self.assertEqual(cliente.breaker.estado, 'abierto')
+
+        self.assertEqual(cliente.get('/').status_code, 200)
+        self.assertEqual(cliente.breaker.estado, 'cerrado')
+
+    def test_prueba_fallida_lanza_el_error_original_sin_reintentar(self):
+        self.servidor.respuestas = [500, 503, 503]
+        cliente = self.crear_cliente(reintentos=2, umbral_fallos=1, tiempo_apertura=0)
+        with self.assertRaises(requests.exceptions.HTTPError) as error:
+            cliente.get('/')
+        self.assertNotIsInstance(error.exception, CircuitoAbiertoError)
+        self.assertEqual(self.servidor.solicitudes, 1)
+
+        # La prueba del circuito semiabierto falla: se lanza su error, no un rechazo del circuito
+        with self.assertRaises(requests.exceptions.HTTPError) as error:
+            cliente.get('/')
+        self.assertNotIsInstance(error.exception, CircuitoAbiertoError)
+        self.assertIn('503', str(error.exception))
+        self.assertEqual(self.servidor.solicitudes, 2)
+        self.assertEqual(cliente.estado()['reintentos'], 0)
+
+    def test_error_ajeno_a_la_dependencia_libera_la_prueba(self):
+        self.servidor.respuestas = [500]
+        cliente = self.crear_cliente(reintentos=0, umbral_fallos=1, tiempo_apertura=0)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            cliente.get('/')
+
+        with mock.patch.object(cliente.session, 'request', side_effect=TypeError("argumento inválido")):
+            with self.assertRaises(TypeError):
+                cliente.get('/')
+        self.assertEqual(cliente.get('/').status_code, 200)
+        self.assertEqual(cliente.breaker.estado, 'cerrado')
+
+
+class BusquedaPedidosTestCase(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+        self.hoy = timezone.localdate()
+        # Dos pedidos por día durante 6 días; los de hace 4 y 5 días quedan archivados
+        for dias in range(6):
+            fecha = timezone.now() - timezone.timedelta(days=dias)
+            for i, (cliente, estado, producto) in enumerate((("Ana Gomez", 'PENDIENTE', 1), ("Luis Diaz", 'ENTREGADO', 2))):
+                pedido = Pedido.objects.create(numero_pedido=i + 1, cliente=cliente, estado=estado, fecha_pedido=fecha)
+                PedidoProductos.objects.create(
+                    id_pedido=pedido, id_producto=producto, nombre_producto="Producto",
+                    cantidad_producto=1, precio_unitario=100,
+                )
+                pedido.save()
+                if estado == 'ENTREGADO':
+                    Cobro.objects.create(pedido=pedido, tipo='efectivo', monto=100, fecha=timezone.localdate(fecha))
+                    pedido.save()
+        archivar_pedidos(corte=fecha_corte(4))
+
+    def buscar(self, **params):
+        return self.client.get(reverse('busqueda_pedidos'), params)
+
+    def todos(self, **params):
+        """Recorre todas las páginas (incluidas las del archivo) y devuelve los pedidos."""
+        response = self.buscar(**params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pedidos = list(response.data['results'])
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pedidos += response.data['results']
+        return pedidos
+
+    def test_rango_con_filtros_incluye_archivados(self):
+        desde = self.hoy - timezone.timedelta(days=5)
+        pedidos = self.todos(desde=desde, hasta=self.hoy, cliente='gomez', limite=2)
+        self.assertEqual(len(pedidos), 6)
+        self.assertEqual({p['cliente'] for p in pedidos}, {'ANA GOMEZ'})
+        fechas = [p['fecha_pedido'] for p in pedidos]
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+
+        pagados = self.todos(desde=desde, hasta=self.hoy, pagado='true', estado='entregado,listo')
+        self.assertEqual(len(pagados), 6)
+        self.assertTrue(all(p['pagado'] and p['estado'] == 'ENTREGADO' for p in pagados))
+
+        con_producto = self.todos(desde=self.hoy - timezone.timedelta(days=1), hasta=self.hoy, producto=2)
+        self.assertEqual([p['cliente'] for p in con_producto], ['LUIS DIAZ', 'LUIS DIAZ'])
+
+    def test_sin_hasta_busca_un_dia(self):
+        pedidos = self.todos(desde=self.hoy, numero=2)
+        self.assertEqual(len(pedidos), 1)
+        self.assertEqual(pedidos[0]['cliente'], 'LUIS DIAZ')
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.buscar().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(desde='2026-02-01', hasta='2026-01-01').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(desde='ayer').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(desde=self.hoy, estado='CANCELADO').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(desde=self.hoy, pagado='quizas').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(desde=self.hoy, producto='x').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class _RedisLentoHandler(StreamRequestHandler):
+    """!
+    @brief Servidor RESP mínimo: XREADGROUP espera todo el BLOCK y responde que no hubo eventos, como Redis.
+    """
+
+    def handle(self):
+        while True:
+            linea = self.rfile.readline()
+            if not linea.startswith(b'*'):
+                return
+            argumentos = []
+            for _ in range(int(linea[1:])):
+                largo = int(self.rfile.readline()[1:])
+                argumentos.append(self.rfile.read(largo + 2)[:-2].decode())
+            if argumentos[0].upper() == 'HELLO':
+                self.wfile.write(f'%1\r\n+proto\r\n:{argumentos[1]}\r\n'.encode())
+            elif argumentos[0].upper() == 'XREADGROUP':
+                time.sleep(int(argumentos[argumentos.index('BLOCK') + 1]) / 1000)
+                self.wfile.write(b'*-1\r\n')
+            else:
+                self.wfile.write(b'+OK\r\n')
+
+
+class BusEventosTestCase(TestCase):
+
+    def setUp(self):
+        # Un backend en memoria nuevo por prueba
+        self.enterContext(override_settings(EVENTOS_BACKEND='memoria'))
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        CatalogoLocal.objects.create(pk=1, version=1)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Muzzarella', precio_unitario=100)
+        self.backend = obtener_backend()
+
+    def crear_pedido(self):
+        return self.client.post(reverse('crear_pedido'), {
+            "numero_pedido": 1, "id_cliente": 7, "cliente": "Ana Gomez", "estado": "PENDIENTE",
+            "productos": [{"id_producto": 1, "nombre_producto": "Muzzarella", "cantidad_producto": 1, "precio_unitario": 100, "aclaraciones": ""}],
+        }, format='json')
+
+    def evento_cliente(self, nombre):
+        event_bus.publicar('cliente_actualizado', {'id': 7, 'nombre': nombre})
+
+    def test_publica_al_confirmar_la_transaccion(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.crear_pedido()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Antes del commit no se publicó nada
+        self.assertEqual(self.backend.mensajes(nombre_stream('pedido_creado')), [])
+
+        for callback in callbacks:
+            callback()
+        eventos = self.backend.mensajes(nombre_stream('pedido_creado'))
+        self.assertEqual(len(eventos), 1)
+        self.assertEqual(eventos[0]['tipo'], 'pedido_creado')
+        self.assertEqual(eventos[0]['origen'], 'pedidos')
+        self.assertEqual(eventos[0]['datos']['pedido']['id'], response.data['id'])
+
+    def test_error_del_backend_no_rompe_la_operacion(self):
+        errores = event_bus.ERRORES_PUBLICACION.valor(tipo='pedido_creado')
+        with override_settings(EVENTOS_BACKEND='redis', EVENTOS_REDIS_URL='redis://127.0.0.1:1/0', EVENTOS_TIMEOUT=0.2):
+            with self.assertLogs('utils.event_bus', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                response = self.crear_pedido()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(event_bus.ERRORES_PUBLICACION.valor(tipo='pedido_creado'), errores + 1)
+
+    def test_consumidor_confirma_y_actualiza_pedidos_pendientes(self):
+        pendiente = Pedido.objects.create(numero_pedido=1, id_cliente=7, cliente="ANA GOMEZ", estado=Pedido.ESTADO_PENDIENTE)
+        entregado = Pedido.objects.create(numero_pedido=2, id_cliente=7, cliente="ANA GOMEZ", estado=Pedido.ESTADO_ENTREGADO)
+        consumidor = Consumidor({'cliente_actualizado': [actualizar_nombre_cliente]}, grupo='pedidos', nombre='prueba')
+        consumidor.preparar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento_cliente("Ana Gómez de Paz")
+
+        self.assertEqual(consumidor.ejecutar_una_vez(bloqueo_ms=0), 1)
+        pendiente.refresh_from_db()
+        entregado.refresh_from_db()
+        self.assertEqual(pendiente.cliente, "ANA GÓMEZ DE PAZ")
+        self.assertEqual(entregado.cliente, "ANA GOMEZ")
+        # Confirmado: no queda pendiente ni se vuelve a leer
+        self.assertEqual(self.backend.pendientes(nombre_stream('cliente_actualizado'), 'pedidos', 0, 10), [])
+        self.assertEqual(consumidor.ejecutar_una_vez(bloqueo_ms=0), 0)
+
+    def test_reintenta_y_descarta(self):
+        llamadas = []
+
+        def fallar(evento):
+            llamadas.append(evento['id'])
+            raise RuntimeError("falla")
+
+        consumidor = Consumidor({'cliente_actualizado': [fallar]}, grupo='pedidos', nombre='prueba', reintentos=2, inactivo_ms=0)
+        consumidor.preparar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento_cliente("Ana")
+
+        stream = nombre_stream('cliente_actualizado')
+        with self.assertLogs('utils.event_bus', 'ERROR'):
+            consumidor.ejecutar_una_vez(bloqueo_ms=0)
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(len(self.backend.pendientes(stream, 'pedidos', 0, 10)), 1)
+
+        # Segunda entrega: se reintenta y vuelve a fallar; a la tercera se descarta
+        with self.assertLogs('utils.event_bus', 'ERROR') as registros:
+            consumidor.ejecutar_una_vez(bloqueo_ms=0)
+            consumidor.ejecutar_una_vez(bloqueo_ms=0)
+        self.assertIn('descartado después de 2 entregas', registros.output[-1])
+        self.assertEqual(len(llamadas), 2)
+        self.assertEqual(self.backend.pendientes(stream, 'pedidos', 0, 10), [])
+        descartados = self.backend.mensajes(stream_descartados(stream))
+        self.assertEqual(len(descartados), 1)
+        self.assertEqual(descartados[0]['grupo'], 'pedidos')
+        self.assertEqual(descartados[0]['entregas'], '2')
+        self.assertEqual(descartados[0]['id'], llamadas[0])
+
+    def test_comando_una_vez(self):
+        Pedido.objects.create(numero_pedido=1, id_cliente=7, cliente="ANA GOMEZ", estado=Pedido.ESTADO_PENDIENTE)
+        salida = io.StringIO()
+        call_command('consumir_eventos', '--una-vez', stdout=salida)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento_cliente("Ana Paz")
+        call_command('consumir_eventos', '--una-vez', stdout=salida)
+        self.assertIn("Procesados 1 eventos.", salida.getvalue())
+        self.assertEqual(Pedido.objects.get().cliente, "ANA PAZ")
+
+    def test_lectura_redis_espera_todo_el_bloqueo(self):
+        servidor = ThreadingTCPServer(('127.0.0.1', 0), _RedisLentoHandler)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+
+        # El bloqueo supera el timeout de las demás operaciones
+        backend = event_bus.BackendRedis(f'redis://127.0.0.1:{servidor.server_address[1]}/0', timeout=0.1)
+        self.assertEqual(backend.leer('pedidos', 'prueba', ['eventos:pedido_creado'], 10, 300), [])
+        self.assertEqual(backend._redis.connection_pool.connection_kwargs['socket_timeout'], 0.1)
+
+    def test_evento_desconocido(self):
+        with self.assertRaises(ValueError):
+            event_bus.publicar('pedido_perdido', {})
+        with self.assertRaises(ValueError):
+            manejador('pedido_perdido')
+
+
+
+class DifusionWebsocketTestCase(TestCase):
+
+    def test_latido_mantiene_activas_y_cierra_las_que_no_responden(self):
+        async def probar():
+            activa = WebsocketCommunicator(application, '/api/pedidos/ws/notifications/')
+            muerta = WebsocketCommunicator(application, '/api/pedidos/ws/notifications/')
+            await activa.connect()
+            await muerta.connect()
+            ping = await activa.receive_json_from(timeout=1)
+            await activa.send_json_to({'tipo': 'pong'})
+            cierre = await muerta.receive_output(timeout=1)
+            while cierre['type'] != 'websocket.close':
+                cierre = await muerta.receive_output(timeout=1)
+            await activa.receive_json_from(timeout=1)
+            capa = get_channel_layer()
+            miembros = len(capa.groups.get('app_notifications', {}))
+            await muerta.disconnect()
+            await activa.disconnect()
+            return ping, cierre, miembros
+
+        podadas = CONEXIONES_PODADAS.valor(group='app_notifications')
+        with override_settings(WS_HEARTBEAT_SEGUNDOS=0.2):
+            ping, cierre, miembros = async_to_sync(probar)()
+        self.assertEqual(ping, {'tipo': 'ping'})
+        self.assertEqual(cierre['code'], 4000)
+        self.assertEqual(miembros, 1)
+        self.assertEqual(CONEXIONES_PODADAS.valor(group='app_notifications'), podadas + 1)
+
+    def test_benchmark_entrega_a_todas_las_conexiones(self):
+        with override_settings(WS_HEARTBEAT_SEGUNDOS=0.2):
+            resultado = async_to_sync(medir_difusion)(clientes=4, inactivos=2, mensajes=8, tasa=10, espera=2)
+        self.assertEqual((resultado['esperados'], resultado['entregados']), (32, 32))
+        self.assertEqual((resultado['grupo_inicial'], resultado['grupo_final'], resultado['podadas']), (6, 4, 2))
+        latencias = resultado['latencia_ms']
+        self.assertLessEqual(latencias['p50'], latencias['p99'])
+        self.assertLessEqual(latencias['p99'], latencias['max'])
+        self.assertGreater(resultado['memoria_por_conexion'], 0)
+
+    def test_percentil_por_rango(self):
+        valores = list(range(1, 11))
+        self.assertEqual([percentil(valores, p) for p in (0, 50, 90, 99, 100)], [1, 5, 9, 10, 10])
+        self.assertIsNone(percentil([], 50))
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('benchmark_websocket', clientes=3, mensajes=2, tasa=50, latido=0, stdout=salida)
+        self.assertIn('Entregados: 6 de 6', salida.getvalue())
+
+
+class LecturaRapidaPedidosTestCase(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Recepcionista", email="recep@test.com", password="1234")
+        self.usuario.rol = "Recepcionista"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.fecha = timezone.make_aware(timezone.datetime(2026, 10, 19, 20, 30, 15, 123456))
+        uno = Pedido.objects.create(numero_pedido=1, cliente="Ana\u2028Ñandú", id_cliente=3, fecha_pedido=self.fecha,
+                                    para_hora=timezone.datetime(2026, 1, 1, 21, 15).time())
+        PedidoProductos.objects.create(id_pedido=uno, id_producto=1, nombre_producto="Muzza \"grande\"",
+                                       cantidad_producto=Decimal('1.5'), precio_unitario=Decimal('1000.10'), aclaraciones="sin\ncebolla")
+        PedidoProductos.objects.create(id_pedido=uno, id_producto=2, nombre_producto="Coca", cantidad_producto=3,
+                                       precio_unitario=Decimal('500'), aclaraciones="")
+        uno.save()
+        Cobro.objects.create(pedido=uno, tipo='efectivo', monto=Decimal('1000'), descuento=Decimal('50.15'), fecha=self.fecha.date())
+        Cobro.objects.create(pedido=uno, tipo='credito', monto=Decimal('700'), recargo=Decimal('70'), fecha=self.fecha.date())
+        Cobro.objects.create(pedido=uno, tipo='efectivo', monto=Decimal('999'), fecha=self.fecha.date(), estado='cancelado')
+        Pedido.objects.create(numero_pedido=2, cliente="Sin productos", fecha_pedido=self.fecha, estado=Pedido.ESTADO_LISTO)
+
+    def listar(self, rapida, **parametros):
+        with override_settings(LECTURA_RAPIDA=rapida), CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('pedidos'), {'fecha': '2026-10-19', **parametros})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content, len(consultas)
+
+    def test_misma_respuesta_byte_a_byte(self):
+        normal, consultas_normal = self.listar(False)
+        rapida, consultas_rapida = self.listar(True)
+        self.assertEqual(rapida, normal)
+        self.assertEqual(consultas_rapida, consultas_normal)
+        self.assertIn(b'\\u2028', rapida)
+        self.assertEqual(self.listar(True, numero=2)[0], self.listar(False, numero=2)[0])
+
+    def test_sin_orjson_usa_el_renderer_de_drf(self):
+        normal, _ = self.listar(False)
+        with mock.patch('utils.fast_read.orjson', None):
+            self.assertEqual(self.listar(True)[0], normal)
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('benchmark_lectura', repeticiones=2, parametros='fecha=2026-10-19', stdout=salida)
+        fila = salida.getvalue().splitlines()[1]
+        self.assertTrue(fila.startswith('PedidoListView'))
+        self.assertTrue(fila.endswith('sí'))
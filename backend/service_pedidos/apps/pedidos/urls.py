@@ -7,6 +7,10 @@ from apps.pedidos.views import (
     EditarPedidoView,
     ImprimirPedidoView,
     SaldoPendientePedidoView,
+    HistorialClientePedidoView,
+    RepetirPedidoView,
+    ExportarCSVView,
+    BuscarPedidosView,
 )
 
 urlpatterns = [
@@ -16,5 +20,9 @@ urlpatterns = [
     path('editar/', EditarPedidoView.as_view(), name='editar_pedido'),
     path('imprimir/', ImprimirPedidoView.as_view(), name='imprimir_pedido'),
     path('saldo_pendiente/', SaldoPendientePedidoView.as_view(), name='saldo_pendiente_pedido'),
+    path('cliente/historial/', HistorialClientePedidoView.as_view(), name='historial_cliente_pedidos'),
+    path('busqueda/', BuscarPedidosView.as_view(), name='busqueda_pedidos'),
+    path('repetir/', RepetirPedidoView.as_view(), name='repetir_pedido'),
+    path('exportar/<str:tipo>/', ExportarCSVView.as_view(), name='exportar_csv'),
 ]
 
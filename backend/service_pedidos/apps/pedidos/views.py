@@ -1,19 +1,34 @@
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from utils.permissions import AllowRoles
+from utils.permissions import AllowRoles, AdminOnly
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from apps.pedidos.models import Pedido
 from apps.pedidos.serializer import PedidoSerializer
+from apps.pedidos.lectura import LECTURA_PEDIDOS, LECTURA_PEDIDOS_ARCHIVO
+from apps.pedidosProductos.models import PedidoProductos
+from apps.archivo.models import PedidoArchivado, PedidoProductosArchivado
+from apps.archivo.archivado import fecha_corte
+from apps.archivo.consultas import buscar_pedido, ultimo_pedido_de_cliente
+from apps.pedidos.exportacion import TIPOS, generar_csv, leer_fecha, rango_fechas
+from apps.catalogo.catalogo import completar_lineas
 from datetime import datetime, time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Exists, OuterRef
 from django.utils import timezone
+from django.http import StreamingHttpResponse
 import requests
-from decouple import config 
 from channels.layers import get_channel_layer
 from utils.channels_helper import send_channel_message
+from utils.event_bus import publicar
+from utils.pagination import HistorialPedidosPagination, BusquedaPedidosPagination
+from utils.http_client import obtener_cliente
+from utils.fast_read import LecturaRapidaViewMixin
 
-class PedidoListView(ListAPIView):
+class PedidoListView(LecturaRapidaViewMixin, ListAPIView):
     """!
     @brief Vista para listar y buscar pedidos.
     @details
@@ -22,11 +37,39 @@ class PedidoListView(ListAPIView):
         proporcionados como parámetros en la query string de la URL.
         Requiere que el usuario esté autenticado.
         No requiere privilegios de superusuario.
+        La respuesta se arma con `LECTURA_PEDIDOS` (ver `utils/fast_read.py`).
+        Si el día pudo haberse archivado, a los pedidos en curso (los impagos)
+        les siguen los archivados.
     @property serializer_class: Especifica el serializador a usar (PedidoSerializer).
     @property permission_classes: Define los permisos requeridos.
     """
     serializer_class = PedidoSerializer
+    lectura_rapida = LECTURA_PEDIDOS
     permission_classes = [IsAuthenticated]
+    query_budget = 8
+
+    def rango_del_dia(self):
+        """!
+        @brief Inicio y fin del día indicado en 'fecha'.
+        @return tuple | None: None si falta la fecha o no tiene el formato 'YYYY-MM-DD'.
+        """
+        try:
+            fecha_obj = datetime.strptime(self.request.query_params.get('fecha'), "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return None
+        return (timezone.make_aware(datetime.combine(fecha_obj, time.min)),
+                timezone.make_aware(datetime.combine(fecha_obj, time.max)))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        archivados = self.get_queryset_archivo()
+        if archivados is not None and response.status_code == status.HTTP_200_OK:
+            if settings.LECTURA_RAPIDA:
+                datos = LECTURA_PEDIDOS_ARCHIVO.serializar(archivados)
+            else:
+                datos = self.get_serializer(archivados, many=True).data
+            response.data = [*response.data, *datos]
+        return response
 
     def get_queryset(self):
         """!
@@ -44,18 +87,29 @@ class PedidoListView(ListAPIView):
         if not fecha and not numero_pedido:
             return Response({'detail':'Falta proporcionar fecha o número de pedido.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            fecha_obj = datetime.strptime(fecha, "%Y-%m-%d").date()
-            start_of_day = timezone.make_aware(datetime.combine(fecha_obj, time.min))
-            end_of_day = timezone.make_aware(datetime.combine(fecha_obj, time.max))
-        except:
+        rango = self.rango_del_dia()
+        if rango is None:
             return Pedido.objects.none()
         
-        queryset = Pedido.objects.filter(fecha_pedido__range=(start_of_day, end_of_day))
+        queryset = Pedido.objects.con_detalle().filter(fecha_pedido__range=rango)
 
         if numero_pedido:
             queryset = queryset.filter(numero_pedido=numero_pedido)     
         return queryset
+
+    def get_queryset_archivo(self):
+        """!
+        @brief Pedidos archivados del día, o None si el día es posterior al último corte del archivado.
+        @details Para los días recientes (los del trabajo diario) no se consulta el archivo.
+        """
+        rango = self.rango_del_dia()
+        if rango is None or rango[0] >= fecha_corte():
+            return None
+        queryset = PedidoArchivado.objects.con_detalle().filter(fecha_pedido__range=rango)
+        numero_pedido = self.request.query_params.get('numero')
+        if numero_pedido:
+            queryset = queryset.filter(numero_pedido=numero_pedido)
+        return queryset
         
 class CrearPedidoView(APIView):
     """!
@@ -86,18 +140,20 @@ class CrearPedidoView(APIView):
 
         if pedidoSerializer.is_valid():
             pedido = pedidoSerializer.save()
+            data = PedidoSerializer(pedido).data
 
             message_payload = {
                 'type': 'send.notification',
                 'message': {
                     'source':'pedidos',
                     'action': 'create',
-                    'pedido': PedidoSerializer(pedido).data
+                    'pedido': data
                 }
             }
             send_channel_message('app_notifications', message_payload, 10, 0.5)
+            publicar('pedido_creado', {'pedido': data})
 
-            return Response(PedidoSerializer(pedido).data, status=status.HTTP_201_CREATED)
+            return Response(data, status=status.HTTP_201_CREATED)
         else:
             return Response(pedidoSerializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -149,6 +205,7 @@ class EliminarPedidoView(APIView):
             else:
                 pedido = Pedido.objects.get(id=id_pedido, fecha_pedido__range=(start_of_day, end_of_day), numero_pedido=numero_pedido)            
             pedido_id = pedido.id
+            id_cliente = pedido.id_cliente
             pedido.delete()
 
             message_payload = {
@@ -160,6 +217,7 @@ class EliminarPedidoView(APIView):
                 }
             }
             send_channel_message('app_notifications', message_payload, 10, 0.5)
+            publicar('pedido_eliminado', {'id': pedido_id, 'id_cliente': id_cliente})
 
             return Response({'detail':'Pedido eliminado exitosamente'}, status=status.HTTP_200_OK)
         except:
@@ -215,16 +273,18 @@ class EditarPedidoView(APIView):
 
             if(pedidoSerializer.is_valid()):
                 pedido_actualizado = pedidoSerializer.save()
+                data = PedidoSerializer(pedido_actualizado).data
 
                 message_payload = {
                     'type': 'send.notification', 
                     'message': {
                         'source': 'pedidos', 
                         'action': 'update',
-                        'pedido': PedidoSerializer(pedido_actualizado).data
+                        'pedido': data
                     }
                 }
                 send_channel_message('app_notifications', message_payload, 10, 0.5)
+                publicar('pedido_editado', {'pedido': data})
                 return Response({'detail':'Pedido editado exitosamente'}, status=status.HTTP_200_OK)
             else:
                 return Response(pedidoSerializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -237,9 +297,7 @@ class ImprimirPedidoView(APIView):
     def imprimirComanda(self, pedido):
         try:
             pedidoSerialized = PedidoSerializer(pedido).data
-            ip = config('IP_IMPRESORA')
-            route = f"http://{ip}:5000/imprimir_comanda"
-            r = requests.post(route, json=pedidoSerialized)
+            r = obtener_cliente('impresora').post('/imprimir_comanda', json=pedidoSerialized)
             r.raise_for_status()
             return r.json()
         except requests.exceptions.RequestException as e:
@@ -280,6 +338,10 @@ class ImprimirPedidoView(APIView):
             return Response({'detail': f'Error interno al procesar la solicitud de impresión: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 class SaldoPendientePedidoView(APIView):
+    """!
+    @brief Saldo pendiente de un pedido, indicado por 'fecha' y 'numero'.
+    @details Busca el pedido en curso y, si no está, entre los archivados.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -293,13 +355,13 @@ class SaldoPendientePedidoView(APIView):
             fecha_obj = datetime.strptime(fecha, "%Y-%m-%d").date()
             start_of_day = timezone.make_aware(datetime.combine(fecha_obj, time.min))
             end_of_day = timezone.make_aware(datetime.combine(fecha_obj, time.max))
-        except:
-            return Pedido.objects.none()
+        except ValueError:
+            return Response({'detail':'La fecha debe tener el formato YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        queryset = Pedido.objects.filter(fecha_pedido__range=(start_of_day, end_of_day))
-
-        if numero_pedido:
-            pedido = queryset.filter(numero_pedido=numero_pedido)     
+        try:
+            pedido = buscar_pedido(fecha_pedido__range=(start_of_day, end_of_day), numero_pedido=numero_pedido)
+        except (Pedido.DoesNotExist, ValueError):
+            return Response({'detail':'Pedido no encontrado'}, status=status.HTTP_404_NOT_FOUND)
         
         saldo_pendiente = pedido.saldo_pendiente()
 
@@ -308,3 +370,282 @@ class SaldoPendientePedidoView(APIView):
 
         return Response({"pendiente": saldo_pendiente}, status=status.HTTP_200_OK)
 
+
+
+class HistorialClientePedidoView(ListAPIView):
+    """!
+    @brief Vista para listar los pedidos más recientes de un cliente.
+    @details
+        Recibe el parámetro obligatorio 'id_cliente' y devuelve sus pedidos del
+        más nuevo al más viejo, paginados por cursor (ver HistorialPedidosPagination).
+        La consulta se resuelve con el índice (id_cliente, fecha_pedido).
+        Después de los pedidos en curso siguen los archivados (ver apps/archivo).
+    """
+    serializer_class = PedidoSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = HistorialPedidosPagination
+    query_budget = 5
+
+    def list(self, request, *args, **kwargs):
+        """!
+        @brief Valida el parámetro 'id_cliente' antes de listar.
+        @return:
+            - HTTP 400 BAD REQUEST si falta 'id_cliente' o no es un entero.
+            - HTTP 200 OK con la página de pedidos y los enlaces 'next'/'previous'.
+        """
+        id_cliente = request.query_params.get('id_cliente')
+        if not id_cliente:
+            return Response({'detail':'Falta proporcionar el id del cliente.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not id_cliente.isdigit():
+            return Response({'detail':'El id del cliente debe ser un número.'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """!
+        @brief Filtra los pedidos del cliente indicado en 'id_cliente'.
+        @return QuerySet: Pedidos del cliente (el orden lo aplica la paginación).
+        """
+        return Pedido.objects.con_detalle().filter(id_cliente=self.request.query_params.get('id_cliente'))
+
+    def get_queryset_archivo(self):
+        """!
+        @brief Pedidos archivados del cliente, donde continúa el historial.
+        """
+        return PedidoArchivado.objects.con_detalle().filter(id_cliente=self.request.query_params.get('id_cliente'))
+
+class BuscarPedidosView(ListAPIView):
+    """!
+    @brief Búsqueda de pedidos en un rango de días con filtros, paginada por cursor.
+    @details
+        Parámetros de la query string:
+        - `desde` (obligatorio) y `hasta`: fechas `YYYY-MM-DD`, inclusive. Sin
+          `hasta` se busca sólo el día `desde`.
+        - `estado`: uno o varios separados por coma (PENDIENTE, LISTO, ENTREGADO).
+        - `pagado`: true o false.
+        - `cliente`: parte del nombre del cliente.
+        - `id_cliente`, `numero` y `producto` (id de un producto que el pedido contiene).
+
+        Devuelve los pedidos del más nuevo al más viejo y, después de los
+        pedidos en curso, los archivados (ver BusquedaPedidosPagination). Todas
+        las consultas llevan el rango de fechas, así se recorren sólo esos días
+        con `pedido_fecha_numero_idx`, `pedido_estado_fecha_idx` o
+        `pedido_pagado_fecha_idx`; el filtro por producto es un EXISTS por pedido
+        sobre el índice de `id_pedido` de las líneas.
+    """
+    serializer_class = PedidoSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = BusquedaPedidosPagination
+    query_budget = 8
+
+    ESTADOS = {estado for estado, _ in Pedido.ESTADO_CHOICES}
+    VERDADEROS = ('true', '1')
+    FALSOS = ('false', '0')
+
+    def list(self, request, *args, **kwargs):
+        """!
+        @brief Valida los filtros antes de listar.
+        @return:
+            - HTTP 400 BAD REQUEST si falta `desde` o algún filtro no es válido.
+            - HTTP 200 OK con la página de pedidos y los enlaces 'next'/'previous'.
+        """
+        try:
+            self.filtros = self.leer_filtros(request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def leer_filtros(self, params):
+        """!
+        @brief Interpreta y valida los parámetros de búsqueda.
+        @return dict: Filtros para `filtrar()`.
+        @raise ValueError con el mensaje para el cliente.
+        """
+        if not params.get('desde'):
+            raise ValueError('Falta proporcionar la fecha desde.')
+        desde = leer_fecha(params.get('desde'))
+        hasta = leer_fecha(params.get('hasta') or params.get('desde'))
+        if desde is None or hasta is None:
+            raise ValueError('Las fechas deben tener el formato YYYY-MM-DD.')
+        if hasta < desde:
+            raise ValueError('La fecha hasta no puede ser anterior a desde.')
+        filtros = {'rango': rango_fechas(desde, hasta)}
+
+        if params.get('estado'):
+            estados = {estado.strip().upper() for estado in params['estado'].split(',') if estado.strip()}
+            if not estados <= self.ESTADOS:
+                raise ValueError(f"Estado inválido. Use {', '.join(sorted(self.ESTADOS))}.")
+            filtros['estados'] = sorted(estados)
+
+        pagado = params.get('pagado', '').lower()
+        if pagado:
+            if pagado not in self.VERDADEROS + self.FALSOS:
+                raise ValueError('pagado debe ser true o false.')
+            filtros['pagado'] = pagado in self.VERDADEROS
+
+        for parametro in ('id_cliente', 'numero', 'producto'):
+            valor = params.get(parametro)
+            if valor:
+                if not valor.isdigit():
+                    raise ValueError(f'{parametro} debe ser un número.')
+                filtros[parametro] = int(valor)
+
+        cliente = params.get('cliente', '').strip()
+        if cliente:
+            filtros['cliente'] = cliente
+        return filtros
+
+    def filtrar(self, queryset, modelo_lineas):
+        """!
+        @brief Aplica los filtros a los pedidos en curso o a los archivados.
+        @param modelo_lineas: Modelo de las líneas de esos pedidos (para el filtro por producto).
+        """
+        filtros = self.filtros
+        inicio, fin = filtros['rango']
+        queryset = queryset.filter(fecha_pedido__gte=inicio, fecha_pedido__lt=fin)
+        if 'estados' in filtros:
+            queryset = queryset.filter(estado__in=filtros['estados'])
+        if 'pagado' in filtros:
+            # `pagado=False` se traduce a `NOT pagado`, que no usa índices; con IN es una igualdad
+            queryset = queryset.filter(pagado__in=[filtros['pagado']])
+        if 'id_cliente' in filtros:
+            queryset = queryset.filter(id_cliente=filtros['id_cliente'])
+        if 'numero' in filtros:
+            queryset = queryset.filter(numero_pedido=filtros['numero'])
+        if 'cliente' in filtros:
+            queryset = queryset.filter(cliente__icontains=filtros['cliente'])
+        if 'producto' in filtros:
+            lineas = modelo_lineas.objects.filter(id_pedido=OuterRef('pk'), id_producto=filtros['producto'])
+            queryset = queryset.filter(Exists(lineas))
+        return queryset
+
+    def get_queryset(self):
+        return self.filtrar(Pedido.objects.con_detalle(), PedidoProductos)
+
+    def get_queryset_archivo(self):
+        """!
+        @brief Pedidos archivados que cumplen los filtros, donde continúa la búsqueda.
+        """
+        return self.filtrar(PedidoArchivado.objects.con_detalle(), PedidoProductosArchivado)
+
+class RepetirPedidoView(APIView):
+    """!
+    @brief Vista para repetir un pedido anterior en una sola llamada.
+    @details
+        Clona un pedido existente, en curso o archivado (cliente y productos
+        con sus aclaraciones), como un pedido nuevo del día, con el siguiente
+        número de pedido disponible. Los precios y nombres se toman de la copia local del
+        catálogo, como al crear un pedido; si algún producto ya no existe o no
+        está disponible responde 400. Los productos se copian con un único INSERT masivo.
+        Igual que en CrearPedidoView, el consumo de stock queda a cargo del cliente.
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Administrador', 'Recepcionista')]
+
+    def post(self, request):
+        """!
+        @brief Maneja las solicitudes POST para repetir un pedido.
+        @details
+            El pedido a repetir se indica con el query param 'id'. Si en su lugar
+            se envía 'id_cliente', se repite el último pedido de ese cliente.
+            Opcionalmente el cuerpo puede traer 'para_hora' para el pedido nuevo.
+
+        @param request: Objeto de la solicitud HTTP.
+        @return:
+            - Éxito: Datos del pedido creado y HTTP 201 CREATED.
+            - Faltan parámetros, 'para_hora' inválida o productos que ya no se venden: HTTP 400 BAD REQUEST.
+            - Pedido origen no encontrado: HTTP 404 NOT FOUND.
+        """
+        id_pedido = request.query_params.get('id')
+        id_cliente = request.query_params.get('id_cliente')
+
+        if not id_pedido and not id_cliente:
+            return Response({'detail':'Falta proporcionar id de pedido o id de cliente a repetir.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        para_hora = request.data.get('para_hora') or None
+        if para_hora is not None:
+            # Se aceptan los mismos formatos que al crear un pedido
+            try:
+                para_hora = PedidoSerializer().fields['para_hora'].run_validation(para_hora)
+            except ValidationError as e:
+                return Response({'para_hora': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if id_pedido:
+                original = buscar_pedido(id=id_pedido)
+            else:
+                original = ultimo_pedido_de_cliente(id_cliente)
+        except (Pedido.DoesNotExist, ValueError):
+            return Response({'detail':'Pedido a repetir no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        ahora = timezone.now()
+        hoy = timezone.localdate(ahora)
+        start_of_day = timezone.make_aware(datetime.combine(hoy, time.min))
+        end_of_day = timezone.make_aware(datetime.combine(hoy, time.max))
+
+        lineas = list(original.obtener_productos().values(
+            'id_producto', 'nombre_producto', 'cantidad_producto', 'precio_unitario', 'aclaraciones',
+        ))
+        # Se repite con los precios actuales del catálogo
+        errores = completar_lineas(lineas)
+        if errores:
+            return Response({'productos': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            ultimo_numero = Pedido.objects.filter(
+                fecha_pedido__range=(start_of_day, end_of_day)
+            ).aggregate(ultimo=Max('numero_pedido'))['ultimo'] or 0
+
+            pedido = Pedido.objects.create(
+                numero_pedido=ultimo_numero + 1,
+                fecha_pedido=ahora,
+                cliente=original.cliente,
+                id_cliente=original.id_cliente,
+                para_hora=para_hora,
+            )
+            PedidoProductos.objects.bulk_create([PedidoProductos(id_pedido=pedido, **linea) for linea in lineas])
+            pedido.save()
+
+        data = PedidoSerializer(pedido).data
+        message_payload = {
+            'type': 'send.notification',
+            'message': {
+                'source':'pedidos',
+                'action': 'create',
+                'pedido': data
+            }
+        }
+        send_channel_message('app_notifications', message_payload, 10, 0.5)
+        publicar('pedido_creado', {'pedido': data})
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class ExportarCSVView(APIView):
+    """!
+    @brief Vista para exportar pedidos, líneas o cobros de un rango de fechas en CSV.
+    @details
+        `GET exportar/<tipo>/?desde=YYYY-MM-DD&hasta=YYYY-MM-DD`, con tipo
+        'pedidos', 'lineas' o 'cobros'. La respuesta se genera mientras se envía
+        (StreamingHttpResponse) leyendo la base por lotes, así la memoria usada
+        no depende del rango. Incluye los registros archivados.
+        Requiere rol Administrador.
+    """
+    permission_classes = [IsAuthenticated, AdminOnly]
+
+    def get(self, request, tipo):
+        """!
+        @return:
+            - HTTP 200 OK con el CSV como adjunto.
+            - HTTP 400 BAD REQUEST si el tipo o las fechas no son válidos.
+        """
+        if tipo not in TIPOS:
+            return Response({'detail': f"Tipo de exportación inválido. Opciones: {', '.join(TIPOS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        desde = leer_fecha(request.query_params.get('desde'))
+        hasta = leer_fecha(request.query_params.get('hasta'))
+        if desde is None or hasta is None:
+            return Response({'detail': 'Las fechas desde y hasta son obligatorias (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if desde > hasta:
+            return Response({'detail': 'La fecha desde no puede ser posterior a hasta.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(generar_csv(tipo, desde, hasta), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{tipo}_{desde}_{hasta}.csv"'
+        return response
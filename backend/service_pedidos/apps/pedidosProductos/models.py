@@ -1,6 +1,23 @@
 from django.db import models
 
-class PedidoProductos(models.Model):
+class PedidoProductosBase(models.Model):
+    """!
+    @brief Columnas comunes a las líneas de pedido en curso y archivadas.
+    @details
+        La relación con el pedido la define cada subclase (`id_pedido`), porque
+        apunta a `Pedido` o a `PedidoArchivado`.
+    """
+    id_producto = models.IntegerField(db_column='id_producto')
+    cantidad_producto = models.DecimalField(db_column= 'cantidad_producto', max_digits=6, decimal_places=2)
+    nombre_producto = models.CharField(max_length=100, db_column='nombre_producto')
+    precio_unitario = models.DecimalField(db_column= 'precio_unitario', max_digits=10, decimal_places=2)
+    aclaraciones = models.TextField(db_column='aclaraciones', blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class PedidoProductos(PedidoProductosBase):
     """!
     @brief Modelo para representar los productos contenidos en un pedido.
     @details
@@ -13,11 +30,6 @@ class PedidoProductos(models.Model):
     """
 
     id_pedido = models.ForeignKey("pedidos.Pedido", db_column=("id_pedido"), on_delete=models.CASCADE)
-    id_producto = models.IntegerField(db_column='id_producto')
-    cantidad_producto = models.DecimalField(db_column= 'cantidad_producto', max_digits=6, decimal_places=2)
-    nombre_producto = models.CharField(max_length=100, db_column='nombre_producto')
-    precio_unitario = models.DecimalField(db_column= 'precio_unitario', max_digits=10, decimal_places=2)
-    aclaraciones = models.TextField(db_column='aclaraciones', blank=True)
 
     class Meta:
         db_table = 'pedidoProductos'
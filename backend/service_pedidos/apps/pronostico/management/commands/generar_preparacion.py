@@ -0,0 +1,41 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.pedidos.exportacion import leer_fecha
+from apps.pronostico.pronostico import obtener_pronostico, obtener_preparacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula el pronóstico de ventas de un día y su lista de preparación, y las muestra. "
+        "Pensado para correr cada mañana antes de abrir la cocina."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Día a pronosticar (YYYY-MM-DD). Por defecto, hoy.')
+        parser.add_argument('--recalcular', action='store_true', help='Volver a calcular aunque ya exista el pronóstico.')
+
+    def handle(self, *args, **options):
+        fecha = leer_fecha(options['fecha']) if options['fecha'] else timezone.localdate()
+        if fecha is None:
+            raise CommandError('Formato de fecha inválido, se espera YYYY-MM-DD.')
+
+        pronostico = obtener_pronostico(fecha, recalcular=options['recalcular'])
+        self.stdout.write(f"Pronóstico del {fecha} ({pronostico.dias} días de historial en {pronostico.semanas} semanas):")
+        for producto in pronostico.productos:
+            self.stdout.write(f"  {producto['nombre'] or producto['id_producto']}: {producto['cantidad']}")
+
+        try:
+            preparacion = obtener_preparacion(pronostico)
+        except requests.exceptions.RequestException as e:
+            raise CommandError(f"No se pudo calcular la lista de preparación: {e}")
+        for titulo, clave in (('Recetas', 'recetas'), ('Sub-recetas', 'sub_recetas')):
+            self.stdout.write(f"{titulo}:")
+            for receta in preparacion[clave]:
+                self.stdout.write(f"  {receta['nombre']}: {receta['cantidad']}")
+        self.stdout.write("Insumos:")
+        for insumo in preparacion['insumos']:
+            faltante = f" (faltan {insumo['faltante']})" if insumo['faltante'] and float(insumo['faltante']) > 0 else ''
+            self.stdout.write(f"  {insumo['nombre']}: {insumo['cantidad']} {insumo['unidad_medida']}{faltante}")
+        self.stdout.write(self.style.SUCCESS(f"Lista de preparación del {fecha} generada."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:13
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoDiario',
+            fields=[
+                ('fecha', models.DateField(db_column='fecha', primary_key=True, serialize=False)),
+                ('generado', models.DateTimeField(auto_now=True, db_column='generado')),
+                ('semanas', models.PositiveSmallIntegerField(db_column='semanas')),
+                ('dias', models.PositiveSmallIntegerField(db_column='dias')),
+                ('productos', models.JSONField(db_column='productos', encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('preparacion', models.JSONField(blank=True, db_column='preparacion', encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+            ],
+            options={
+                'db_table': 'pronostico_diario',
+            },
+        ),
+    ]
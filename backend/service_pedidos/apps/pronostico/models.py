@@ -0,0 +1,25 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class PronosticoDiario(models.Model):
+    """!
+    @brief Pronóstico de ventas de un día y su lista de preparación (una fila por fecha).
+    @details
+        El pronóstico sólo usa pedidos de días anteriores, así que no cambia
+        durante el día: se calcula una vez y se guarda. `preparacion` queda en
+        null hasta que el servicio de productos explota el pronóstico en
+        recetas, sub-recetas e insumos (ver `apps/pronostico/pronostico.py`).
+    """
+    fecha = models.DateField(primary_key=True, db_column='fecha')
+    generado = models.DateTimeField(auto_now=True, db_column='generado')
+    ## Semanas de historial consideradas y días (del mismo día de la semana) con pedidos en ellas.
+    semanas = models.PositiveSmallIntegerField(db_column='semanas')
+    dias = models.PositiveSmallIntegerField(db_column='dias')
+    ## [{"id_producto", "nombre", "cantidad", "horas": {"<hora>": cantidad}}]
+    productos = models.JSONField(encoder=DjangoJSONEncoder, db_column='productos')
+    ## Respuesta de `api/recetas/preparacion/` del servicio de productos.
+    preparacion = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True, db_column='preparacion')
+
+    class Meta:
+        db_table = 'pronostico_diario'
@@ -0,0 +1,145 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce, ExtractHour, TruncDate
+
+from apps.archivo.models import PedidoProductosArchivado
+from apps.catalogo.catalogo import token_servicio, version_local
+from apps.catalogo.models import ProductoCatalogo
+from apps.pedidos.exportacion import rango_fechas
+from apps.pedidosProductos.models import PedidoProductos
+from utils.http_client import obtener_cliente
+from .models import PronosticoDiario
+
+## Ruta de la lista de preparación en el servicio de productos (`RecetaPreparacionView`).
+RUTA_PREPARACION = '/api/recetas/preparacion/'
+CENTAVO = Decimal('0.01')
+
+
+def historial(fecha, semanas):
+    """!
+    @brief Cantidades vendidas por día, hora y producto en el mismo día de la semana de las semanas anteriores.
+    @details
+        Suma en la base las líneas de los pedidos archivados y de los en curso
+        (una consulta por tabla). La hora es la que el cliente pidió el pedido
+        (`para_hora`) o, si no la indicó, la hora en que se tomó.
+    @return list: dicts {'dia', 'hora', 'producto', 'cantidad'}.
+    """
+    inicio, fin = rango_fechas(fecha - timedelta(weeks=semanas), fecha - timedelta(days=1))
+    filas = []
+    for modelo in (PedidoProductosArchivado, PedidoProductos):
+        filas.extend(
+            modelo.objects.filter(
+                id_pedido__fecha_pedido__gte=inicio,
+                id_pedido__fecha_pedido__lt=fin,
+                id_pedido__fecha_pedido__iso_week_day=fecha.isoweekday(),
+            ).values(
+                dia=TruncDate('id_pedido__fecha_pedido'),
+                hora=Coalesce(ExtractHour('id_pedido__para_hora'), ExtractHour('id_pedido__fecha_pedido')),
+                producto=F('id_producto'),
+            ).annotate(cantidad=Sum('cantidad_producto')).order_by()
+        )
+    return filas
+
+
+def pronosticar(fecha, semanas=None, suavizado=None):
+    """!
+    @brief Pronostica cuánto se va a vender de cada producto, y a qué hora, en una fecha.
+    @details
+        Modelo estacional por día de la semana: para un martes se miran los
+        martes de las últimas `semanas` semanas y se promedia, hora por hora, lo
+        vendido de cada producto. El promedio es ponderado con suavizado
+        exponencial: el martes anterior pesa 1, el de dos semanas antes
+        (1 − suavizado), el de tres (1 − suavizado)², etc., así el pronóstico
+        sigue los cambios recientes sin depender de un solo día.
+
+        Sólo cuentan los días en que hubo pedidos (un feriado cerrado no baja
+        el promedio); un día con pedidos en que un producto no se vendió cuenta
+        como 0 para ese producto. Con la copia del catálogo descargada se
+        descartan los productos eliminados o no disponibles.
+    @param semanas: Semanas de historial (por defecto `PRONOSTICO_SEMANAS`).
+    @param suavizado: Entre 0 y 1 (por defecto `PRONOSTICO_SUAVIZADO`); 0 es un promedio simple.
+    @return tuple: (días usados, [{'id_producto', 'nombre', 'cantidad', 'horas': {hora: cantidad}}]).
+    """
+    semanas = semanas or settings.PRONOSTICO_SEMANAS
+    suavizado = Decimal(str(settings.PRONOSTICO_SUAVIZADO if suavizado is None else suavizado))
+    filas = historial(fecha, semanas)
+
+    pesos = {}
+    for fila in filas:
+        if fila['dia'] not in pesos:
+            pesos[fila['dia']] = (1 - suavizado) ** ((fecha - fila['dia']).days // 7 - 1)
+    if not pesos:
+        return 0, []
+    total_pesos = sum(pesos.values())
+
+    horas_por_producto = {}
+    for fila in filas:
+        horas = horas_por_producto.setdefault(fila['producto'], {})
+        horas[fila['hora']] = horas.get(fila['hora'], 0) + pesos[fila['dia']] * fila['cantidad']
+
+    catalogo = ProductoCatalogo.objects.in_bulk(horas_por_producto) if version_local() else None
+    productos = []
+    for id_producto, horas in sorted(horas_por_producto.items()):
+        producto = catalogo.get(id_producto) if catalogo is not None else None
+        if catalogo is not None and (producto is None or not producto.disponible):
+            continue
+        horas = {hora: (cantidad / total_pesos).quantize(CENTAVO) for hora, cantidad in sorted(horas.items())}
+        productos.append({
+            'id_producto': id_producto,
+            'nombre': producto.nombre if producto else '',
+            'cantidad': sum(horas.values(), Decimal('0.00')),
+            'horas': horas,
+        })
+    return len(pesos), productos
+
+
+def obtener_pronostico(fecha, recalcular=False):
+    """!
+    @brief Pronóstico guardado de la fecha; lo calcula si no existe o si se pide `recalcular`.
+    @return PronosticoDiario
+    """
+    if not recalcular:
+        pronostico = PronosticoDiario.objects.filter(fecha=fecha).first()
+        if pronostico is not None:
+            return pronostico
+    dias, productos = pronosticar(fecha)
+    pronostico, _ = PronosticoDiario.objects.update_or_create(fecha=fecha, defaults={
+        'semanas': settings.PRONOSTICO_SEMANAS,
+        'dias': dias,
+        'productos': productos,
+        'preparacion': None,
+    })
+    return pronostico
+
+
+def obtener_preparacion(pronostico, cliente=None):
+    """!
+    @brief Lista de preparación del pronóstico: recetas, sub-recetas e insumos a preparar.
+    @details
+        La primera vez se pide al servicio de productos, que tiene las recetas,
+        y se guarda con el pronóstico.
+    @param cliente: `ClienteHTTP` a usar (por defecto, la dependencia 'productos').
+    @return dict: Respuesta de `RecetaPreparacionView`.
+    @exception requests.exceptions.RequestException
+    """
+    if pronostico.preparacion is not None:
+        return pronostico.preparacion
+    if not pronostico.productos:
+        pronostico.preparacion = {'recetas': [], 'sub_recetas': [], 'insumos': [], 'sin_receta': []}
+    else:
+        cliente = cliente or obtener_cliente('productos')
+        respuesta = cliente.post(
+            RUTA_PREPARACION,
+            json={'productos': [
+                {'producto': producto['id_producto'], 'cantidad': str(producto['cantidad'])}
+                for producto in pronostico.productos
+            ]},
+            headers={'Authorization': f'Bearer {token_servicio()}'},
+        )
+        respuesta.raise_for_status()
+        pronostico.preparacion = respuesta.json()
+    pronostico.save(update_fields=['preparacion', 'generado'])
+    return pronostico.preparacion
@@ -0,0 +1,135 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.archivo.models import PedidoArchivado, PedidoProductosArchivado
+from apps.catalogo.models import CatalogoLocal, ProductoCatalogo
+from apps.pedidos.models import Pedido
+from apps.pedidosProductos.models import PedidoProductos
+from apps.pronostico.models import PronosticoDiario
+from apps.pronostico.pronostico import pronosticar, obtener_pronostico, obtener_preparacion
+from utils.http_client import ClienteHTTP
+
+User = get_user_model()
+
+PREPARACION = {
+    'recetas': [{'id': 5, 'nombre': 'Pizza', 'cantidad': '4.00'}],
+    'sub_recetas': [{'id': 3, 'nombre': 'Masa', 'cantidad': '8.00'}],
+    'insumos': [{'id': 4, 'nombre': 'Harina', 'unidad_medida': 'kg', 'cantidad': '4.00', 'stock_actual': '1.00', 'faltante': '3.00'}],
+    'sin_receta': [2],
+}
+
+
+class _ProductosFalsoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.pedidos.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        cuerpo = json.dumps(PREPARACION).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(PRONOSTICO_SEMANAS=4, PRONOSTICO_SUAVIZADO=0.5)
+class PronosticoTestCase(TestCase):
+    # Martes 20/10/2026: cuentan los martes 13/10 (peso 1) y 06/10 (peso 0.5)
+    FECHA = date(2026, 10, 20)
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username="Cocinero", email="cocina@test.com", password="1234")
+        self.usuario.rol = "Cocinero"
+        self.usuario.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+        self.pedido(date(2026, 10, 13), 20, [(1, 4)])
+        self.pedido(date(2026, 10, 6), 20, [(1, 2)])
+        self.pedido(date(2026, 10, 6), 18, [(1, 2)], para_hora=time(21, 30))
+        self.pedido(date(2026, 10, 6), 20, [(2, 3)], archivado=True)
+        # Otro día de la semana, el mismo día o fuera del historial: no cuentan
+        self.pedido(date(2026, 10, 14), 20, [(1, 50)])
+        self.pedido(date(2026, 10, 20), 12, [(1, 50)])
+        self.pedido(date(2026, 9, 15), 20, [(1, 50)])
+
+    def pedido(self, dia, hora, lineas, para_hora=None, archivado=False):
+        fecha = timezone.make_aware(datetime.combine(dia, time(hora, 15)))
+        if archivado:
+            pedido = PedidoArchivado.objects.create(id=900 + PedidoArchivado.objects.count(), numero_pedido=1, fecha_pedido=fecha, para_hora=para_hora)
+            for id_producto, cantidad in lineas:
+                PedidoProductosArchivado.objects.create(
+                    id=900 + PedidoProductosArchivado.objects.count(), id_pedido=pedido, id_producto=id_producto,
+                    nombre_producto='', cantidad_producto=cantidad, precio_unitario=1,
+                )
+            return
+        pedido = Pedido.objects.create(numero_pedido=1, fecha_pedido=fecha, para_hora=para_hora)
+        for id_producto, cantidad in lineas:
+            PedidoProductos.objects.create(id_pedido=pedido, id_producto=id_producto, nombre_producto='', cantidad_producto=cantidad, precio_unitario=1)
+
+    def test_promedio_ponderado_por_dia_de_la_semana_y_hora(self):
+        dias, productos = pronosticar(self.FECHA)
+        self.assertEqual(dias, 2)
+        self.assertEqual(productos, [
+            {'id_producto': 1, 'nombre': '', 'cantidad': Decimal('4.00'), 'horas': {20: Decimal('3.33'), 21: Decimal('0.67')}},
+            {'id_producto': 2, 'nombre': '', 'cantidad': Decimal('1.00'), 'horas': {20: Decimal('1.00')}},
+        ])
+
+        # Con el catálogo descargado se usan sus nombres y se descartan los no disponibles
+        CatalogoLocal.objects.create(pk=1, version=3)
+        ProductoCatalogo.objects.create(id_producto=1, nombre='Muzzarella', precio_unitario=1000)
+        ProductoCatalogo.objects.create(id_producto=2, nombre='Fugazzeta', precio_unitario=1000, disponible=False)
+        _, productos = pronosticar(self.FECHA)
+        self.assertEqual([(p['id_producto'], p['nombre']) for p in productos], [(1, 'Muzzarella')])
+
+    def test_preparacion_se_calcula_una_vez_por_dia(self):
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ProductosFalsoHandler)
+        servidor.pedidos = []
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        productos = ClienteHTTP('productos', f"http://127.0.0.1:{servidor.server_address[1]}", reintentos=0)
+
+        pronostico = obtener_pronostico(self.FECHA)
+        self.assertEqual(obtener_preparacion(pronostico, productos), PREPARACION)
+        self.assertEqual(servidor.pedidos, [{'productos': [
+            {'producto': 1, 'cantidad': '4.00'}, {'producto': 2, 'cantidad': '1.00'},
+        ]}])
+
+        # Guardado: no se recalcula ni se vuelve a pedir a productos
+        self.pedido(date(2026, 10, 13), 20, [(1, 40)])
+        pronostico = obtener_pronostico(self.FECHA)
+        self.assertEqual(pronostico.productos[0]['cantidad'], '4.00')
+        self.assertEqual(obtener_preparacion(pronostico, productos), PREPARACION)
+        self.assertEqual(len(servidor.pedidos), 1)
+
+        pronostico = obtener_pronostico(self.FECHA, recalcular=True)
+        self.assertIsNone(pronostico.preparacion)
+        self.assertEqual(PronosticoDiario.objects.count(), 1)
+
+    def test_vista(self):
+        response = self.client.get(reverse('preparacion') + '?fecha=2026-13-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Un día sin historial no necesita consultar a productos
+        response = self.client.get(reverse('preparacion') + '?fecha=2026-10-22')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['dias'], response.data['productos']), (0, []))
+        self.assertEqual(response.data['preparacion']['insumos'], [])
+
+        self.usuario.rol = 'Recepcionista'
+        response = self.client.get(reverse('preparacion'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import PreparacionView
+
+urlpatterns = [
+    path('preparacion/', PreparacionView.as_view(), name='preparacion'),
+]
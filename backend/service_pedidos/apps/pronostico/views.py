@@ -0,0 +1,56 @@
+import logging
+
+import requests
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.pedidos.exportacion import leer_fecha
+from utils.permissions import AllowRoles
+from .pronostico import obtener_pronostico, obtener_preparacion
+
+logger = logging.getLogger(__name__)
+
+
+class PreparacionView(APIView):
+    """!
+    @brief Pronóstico de ventas de un día y lo que hay que preparar para cubrirlo.
+    @details
+        `?fecha=YYYY-MM-DD` (por defecto hoy). El pronóstico se calcula una vez
+        por fecha y se guarda; `?recalcular=1` lo vuelve a calcular (por ejemplo
+        después de cambiar recetas). La lista de preparación la calcula el
+        servicio de productos; si no responde se devuelve igual el pronóstico,
+        con `preparacion` en null.
+
+    @example
+        GET /api/pedidos/preparacion/?fecha=2026-10-20
+        -> {"fecha": "2026-10-20", "generado": "...", "semanas": 8, "dias": 7,
+            "productos": [{"id_producto": 8, "nombre": "Muzzarella", "cantidad": "23.40",
+                           "horas": {"20": "9.10", "21": "14.30"}}],
+            "preparacion": {"recetas": [...], "sub_recetas": [...], "insumos": [...], "sin_receta": [...]}}
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+
+    def get(self, request):
+        fecha = request.query_params.get('fecha')
+        fecha = leer_fecha(fecha) if fecha else timezone.localdate()
+        if fecha is None:
+            return Response({'detail': 'Formato de fecha inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        pronostico = obtener_pronostico(fecha, recalcular=request.query_params.get('recalcular') == '1')
+        respuesta = {
+            'fecha': pronostico.fecha,
+            'generado': pronostico.generado,
+            'semanas': pronostico.semanas,
+            'dias': pronostico.dias,
+            'productos': pronostico.productos,
+            'preparacion': None,
+        }
+        try:
+            respuesta['preparacion'] = obtener_preparacion(pronostico)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"No se pudo calcular la lista de preparación del {fecha}: {e}")
+            respuesta['detail'] = 'El servicio de productos no está disponible: la lista de preparación no se pudo calcular.'
+        return Response(respuesta, status=status.HTTP_200_OK)
@@ -3,6 +3,7 @@ from pathlib import Path
 from datetime import timedelta
 from decouple import config 
 import sys
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +21,9 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
 CORS_ALLOW_ALL_ORIGINS = True
+# El frontend envía X-Request-ID para correlacionar las llamadas de un mismo pedido
+CORS_ALLOW_HEADERS = (*default_headers, 'x-request-id')
+CORS_EXPOSE_HEADERS = ['X-Request-ID']
 
 # Application definition
 INSTALLED_APPS = [
@@ -34,6 +38,9 @@ INSTALLED_APPS = [
     'apps.pedidos',
     'apps.pedidosProductos',
     'apps.cobros',
+    'apps.archivo',
+    'apps.catalogo',
+    'apps.pronostico',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -63,6 +70,10 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',
+    'utils.tracing.TracingMiddleware',
+    'utils.query_budget.QueryBudgetMiddleware',
+    'utils.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,16 +108,26 @@ WSGI_APPLICATION = 'orders.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': config('PEDIDOS_DB_NAME'),
-        'USER': config('PEDIDOS_DB_USER'),
-        'PASSWORD': config('PEDIDOS_DB_PASSWORD'),
-        'HOST': config('PEDIDOS_DB_HOST'),
-        'PORT': config('PEDIDOS_DB_PORT', cast=int),
+# USE_SQLITE=True permite levantar el servicio sin MySQL (pruebas de carga locales)
+if config('USE_SQLITE', default=False, cast=bool):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': config('PEDIDOS_DB_NAME'),
+            'USER': config('PEDIDOS_DB_USER'),
+            'PASSWORD': config('PEDIDOS_DB_PASSWORD'),
+            'HOST': config('PEDIDOS_DB_HOST'),
+            'PORT': config('PEDIDOS_DB_PORT', cast=int),
+        }
     }
-}
 
 
 # Password validation
@@ -153,12 +174,110 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 ASGI_APPLICATION = 'orders.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("redis", 6379)],
-        },
+# Dependencias HTTP salientes (ver utils/http_client.py)
+HTTP_DEPENDENCIAS = {
+    'impresora': {
+        'base_url': f"http://{config('IP_IMPRESORA', default='127.0.0.1')}:5000",
+        'timeout_conexion': config('IMPRESORA_TIMEOUT_CONEXION', default=2.0, cast=float),
+        'timeout_lectura': config('IMPRESORA_TIMEOUT_LECTURA', default=10.0, cast=float),
+        'reintentos': 1,
+        'umbral_fallos': 3,
+        'tiempo_apertura': 30.0,
+    },
+    'productos': {
+        'base_url': config('PRODUCTOS_URL', default='http://productos:8003'),
+        'timeout_conexion': 2.0,
+        'timeout_lectura': 10.0,
+        'reintentos': 2,
+        'umbral_fallos': 3,
+        'tiempo_apertura': 30.0,
     },
 }
 
+# Latido de los WebSocket de notificaciones: cada tantos segundos el servidor
+# envía {"tipo": "ping"} y cierra las conexiones que no respondieron el anterior.
+# 0 lo desactiva.
+WS_HEARTBEAT_SEGUNDOS = config('WS_HEARTBEAT_SEGUNDOS', default=30, cast=float)
+# Tras cuántos segundos sin renovarse se descarta un canal de un grupo. Cada
+# latido renueva la pertenencia, así los canales de un proceso que murió sin
+# desconectarse no se acumulan; sin latidos no debe vencer antes que la conexión.
+CHANNEL_GROUP_EXPIRY = config('CHANNEL_GROUP_EXPIRY', default=int(WS_HEARTBEAT_SEGUNDOS * 4) or 86400, cast=int)
+# Mensajes pendientes por canal antes de descartar los nuevos.
+CHANNEL_CAPACITY = config('CHANNEL_CAPACITY', default=100, cast=int)
+
+# Capas de channels disponibles (ver el comando benchmark_websocket para compararlas):
+# - redis: channels_redis core; un group_send escribe en la cola de cada canal.
+# - pubsub: Redis pub/sub; un group_send es un PUBLISH por grupo, sin capacidad
+#   ni vencimiento (lo que llega sin suscriptor se pierde).
+# - memory: en memoria (un solo proceso, sin Redis).
+REDIS_HOSTS = [(config('REDIS_HOST', default='redis'), config('REDIS_PORT', default=6379, cast=int))]
+CAPAS_CHANNELS = {
+    'redis': {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": REDIS_HOSTS, "group_expiry": CHANNEL_GROUP_EXPIRY, "capacity": CHANNEL_CAPACITY},
+    },
+    'pubsub': {
+        "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+        "CONFIG": {"hosts": REDIS_HOSTS},
+    },
+    'memory': {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "CONFIG": {"group_expiry": CHANNEL_GROUP_EXPIRY, "capacity": CHANNEL_CAPACITY},
+    },
+}
+CHANNEL_LAYERS = {"default": CAPAS_CHANNELS[config('CHANNEL_LAYER', default='redis')]}
+
+# Listados de sólo lectura armados con .values() y codificados con orjson si
+# está instalado (ver utils/fast_read.py). False vuelve a los serializadores.
+LECTURA_RAPIDA = config('LECTURA_RAPIDA', default=True, cast=bool)
+
+# Presupuesto de consultas SQL por solicitud (ver utils/query_budget.py).
+# Las vistas pueden declarar el suyo con el atributo `query_budget`.
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=50, cast=int)
+# True: superar el presupuesto lanza una excepción en lugar de sólo registrarlo
+QUERY_BUDGET_ESTRICTO = config('QUERY_BUDGET_ESTRICTO', default=False, cast=bool)
+
+# Si se define, /metrics exige el encabezado "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Registro de consultas lentas (ver utils/slow_queries.py y el comando consultas_lentas)
+SLOW_QUERY_LOG = config('SLOW_QUERY_LOG', default=False, cast=bool)
+SLOW_QUERY_UMBRAL_MS = config('SLOW_QUERY_UMBRAL_MS', default=100, cast=float)
+SLOW_QUERY_ARCHIVO = config('SLOW_QUERY_ARCHIVO', default=str(BASE_DIR / 'consultas_lentas.json'))
+SLOW_QUERY_INTERVALO = config('SLOW_QUERY_INTERVALO', default=30, cast=float)
+
+# Sonda de salud en segundo plano (ver utils/health.py): cada cuántos segundos
+# verifica la base y Redis, y cuánto espera cada chequeo
+HEALTH_INTERVALO = config('HEALTH_INTERVALO', default=5.0, cast=float)
+HEALTH_TIMEOUT = config('HEALTH_TIMEOUT', default=2.0, cast=float)
+
+# Trazas por solicitud (ver utils/tracing.py y el endpoint trazas/)
+TRACING_SERVICIO = 'pedidos'
+TRACING_ARCHIVO = config('TRACING_ARCHIVO', default='')
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=5000, cast=int)
+TRACING_CONSULTAS = config('TRACING_CONSULTAS', default=False, cast=bool)
+
+# Archivado de pedidos (ver apps/archivo y el comando archivar_pedidos): días
+# que se conservan en las tablas en curso y pedidos movidos por transacción
+ARCHIVO_DIAS = config('ARCHIVO_DIAS', default=3, cast=int)
+ARCHIVO_LOTE = config('ARCHIVO_LOTE', default=500, cast=int)
+
+# Bus de eventos entre servicios (ver utils/event_bus.py y el comando consumir_eventos).
+# 'memoria' reemplaza a Redis en las pruebas y en desarrollo
+EVENTOS_BACKEND = config('EVENTOS_BACKEND', default='redis')
+EVENTOS_REDIS_URL = config(
+    'EVENTOS_REDIS_URL',
+    default=f"redis://{config('REDIS_HOST', default='redis')}:{config('REDIS_PORT', default=6379, cast=int)}/0",
+)
+# Eventos que se conservan por stream, entregas antes de descartar un evento y
+# milisegundos sin confirmar tras los que otro consumidor lo reintenta
+EVENTOS_MAXIMO = config('EVENTOS_MAXIMO', default=100000, cast=int)
+EVENTOS_REINTENTOS = config('EVENTOS_REINTENTOS', default=5, cast=int)
+EVENTOS_INACTIVO_MS = config('EVENTOS_INACTIVO_MS', default=30000, cast=int)
+# Módulos con los manejadores (@manejador) de los eventos que consume este servicio
+EVENTOS_MANEJADORES = ['apps.pedidos.eventos', 'apps.catalogo.eventos']
+
+# Pronóstico de ventas para la lista de preparación (ver apps/pronostico/pronostico.py):
+# semanas de historial y suavizado exponencial entre semanas (0 = promedio simple)
+PRONOSTICO_SEMANAS = config('PRONOSTICO_SEMANAS', default=8, cast=int)
+PRONOSTICO_SUAVIZADO = config('PRONOSTICO_SUAVIZADO', default=0.3, cast=float)
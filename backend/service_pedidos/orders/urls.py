@@ -1,15 +1,25 @@
 from django.contrib import admin
 from django.urls import path, include
-from apps.healthcheck.views import HealthCheckView
+from apps.healthcheck.views import HealthCheckView, LivenessView, DependenciasView
+from utils.metrics import metrics_view
+from utils.tracing import trazas_view
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+    path('trazas/', trazas_view, name='trazas'),
     path('healthcheck/', HealthCheckView.as_view(), name='healthcheck'),
+    path('healthz/', LivenessView.as_view(), name='healthz'),
+    path('readyz/', HealthCheckView.as_view(), name='readyz'),
+    path('healthcheck/dependencias/', DependenciasView.as_view(), name='healthcheck_dependencias'),
 
     #Rutas de Pedidos
     path('api/pedidos/', include('apps.pedidos.urls')),
 
     #Rutas de Cobros
     path('api/pedidos/', include('apps.cobros.urls')),
+
+    #Pronóstico de ventas y lista de preparación
+    path('api/pedidos/', include('apps.pronostico.urls')),
 ]
 
 
@@ -0,0 +1,78 @@
+from time import perf_counter
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+def comparar_lectura(vista, ruta, parametros=None, repeticiones=20):
+    """!
+    @brief Ejecuta una vista de listado con y sin `LECTURA_RAPIDA` y compara tiempos y respuestas.
+    @details
+        Cada camino se ejecuta una vez para calentar (compilar mapeadores,
+        cargar la conexión) y después `repeticiones` veces, renderizando la
+        respuesta. Los tiempos incluyen las consultas, que son las mismas en
+        los dos caminos.
+    @return dict: {'normal', 'rapida'} con segundos por solicitud, 'consultas' de cada camino,
+        'bytes' de la respuesta e 'iguales' si las respuestas coinciden byte a byte.
+    """
+    fabrica = APIRequestFactory()
+    usuario = SimpleNamespace(is_authenticated=True, rol='Administrador', id=0, pk=0)
+    vista = vista.as_view()
+
+    def ejecutar():
+        solicitud = fabrica.get(ruta, parametros or {})
+        force_authenticate(solicitud, user=usuario)
+        respuesta = vista(solicitud)
+        respuesta.render()
+        return respuesta
+
+    resultado, contenidos = {'consultas': {}}, {}
+    for clave, rapida in (('normal', False), ('rapida', True)):
+        with override_settings(LECTURA_RAPIDA=rapida):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = ejecutar()
+            if respuesta.status_code != 200:
+                raise CommandError(f"{ruta} respondió {respuesta.status_code}: {respuesta.content[:200]!r}")
+            inicio = perf_counter()
+            for _ in range(repeticiones):
+                ejecutar()
+            resultado[clave] = (perf_counter() - inicio) / repeticiones
+        resultado['consultas'][clave] = len(consultas)
+        contenidos[clave] = respuesta.content
+    resultado['bytes'] = len(contenidos['normal'])
+    resultado['iguales'] = contenidos['normal'] == contenidos['rapida']
+    return resultado
+
+
+class BenchmarkLecturaCommand(BaseCommand):
+    """!
+    @brief Base del comando `benchmark_lectura` de cada servicio.
+    @details La subclase declara `vistas`: {nombre: (clase de la vista, ruta)}.
+    """
+    help = (
+        "Compara el tiempo por solicitud de los listados con el serializador de DRF y con LECTURA_RAPIDA, "
+        "y verifica que las respuestas sean iguales byte a byte. Usa los datos de la base configurada."
+    )
+    vistas = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vista', choices=sorted(self.vistas), default=None, help='Vista a medir (por defecto todas).')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Solicitudes por camino.')
+        parser.add_argument('--parametros', default='', help='Query string de la solicitud, por ejemplo "fecha=2026-10-19".')
+
+    def handle(self, *args, **options):
+        parametros = dict(par.split('=', 1) for par in options['parametros'].split('&') if '=' in par)
+        nombres = [options['vista']] if options['vista'] else sorted(self.vistas)
+        self.stdout.write(f"{'vista':<24} {'bytes':>10} {'normal ms':>10} {'rápida ms':>10} {'mejora':>7} {'consultas':>10}  iguales")
+        for nombre in nombres:
+            vista, ruta = self.vistas[nombre]
+            resultado = comparar_lectura(vista, ruta, parametros, options['repeticiones'])
+            consultas = resultado['consultas']
+            self.stdout.write(
+                f"{nombre:<24} {resultado['bytes']:>10} {resultado['normal'] * 1000:>10.2f} "
+                f"{resultado['rapida'] * 1000:>10.2f} {resultado['normal'] / resultado['rapida']:>6.1f}x "
+                f"{consultas['normal']:>4} / {consultas['rapida']:<3}  {'sí' if resultado['iguales'] else 'NO'}"
+            )
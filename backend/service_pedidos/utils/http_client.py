@@ -0,0 +1,309 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from django.conf import settings
+
+from utils.tracing import span, encabezados_propagacion
+
+logger = logging.getLogger(__name__)
+
+## Métodos que pueden reintentarse sin riesgo de duplicar efectos.
+METODOS_IDEMPOTENTES = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+## Límites superiores (en segundos) de los buckets del histograma de latencias.
+BUCKETS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _conexion_no_establecida(error):
+    """!
+    @brief Indica si el error ocurrió antes de que la solicitud llegara a enviarse.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+class CircuitoAbiertoError(requests.exceptions.ConnectionError):
+    """!
+    @brief Error lanzado cuando el circuito de una dependencia está abierto.
+    @details
+        Hereda de `requests.exceptions.ConnectionError` para que el código que ya
+        captura `RequestException` trate el rechazo inmediato igual que una caída.
+    """
+
+
+class CircuitBreaker:
+    """!
+    @brief Circuit breaker por dependencia.
+    @details
+        - **cerrado:** las llamadas pasan normalmente. Tras `umbral_fallos`
+          fallos consecutivos el circuito se abre.
+        - **abierto:** las llamadas se rechazan al instante durante
+          `tiempo_apertura` segundos, sin ocupar un worker esperando un timeout.
+        - **semiabierto:** pasado ese tiempo se deja pasar una única llamada de
+          prueba; si funciona el circuito se cierra y si falla vuelve a abrirse
+          (sin reintentos: la llamada lanza el error de la prueba).
+    """
+    CERRADO = 'cerrado'
+    ABIERTO = 'abierto'
+    SEMIABIERTO = 'semiabierto'
+
+    def __init__(self, nombre, umbral_fallos=5, tiempo_apertura=30.0):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self.estado = self.CERRADO
+        self.fallos_consecutivos = 0
+        self.abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """!
+        @brief Indica si una llamada puede realizarse en este momento.
+        @return bool: False si el circuito está abierto (o ya hay una prueba en curso).
+        """
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            if self.estado == self.ABIERTO and time.monotonic() >= self.abierto_hasta:
+                self.estado = self.SEMIABIERTO
+                self._prueba_en_curso = False
+            if self.estado == self.SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self.fallos_consecutivos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        """!
+        @return bool: True si el circuito quedó abierto.
+        """
+        with self._lock:
+            self.fallos_consecutivos += 1
+            if self.estado == self.SEMIABIERTO or self.fallos_consecutivos >= self.umbral_fallos:
+                if self.estado != self.ABIERTO:
+                    logger.warning(f"Circuito de '{self.nombre}' abierto tras {self.fallos_consecutivos} fallos consecutivos")
+                self.estado = self.ABIERTO
+                self.abierto_hasta = time.monotonic() + self.tiempo_apertura
+                self._prueba_en_curso = False
+            return self.estado == self.ABIERTO
+
+    def liberar_prueba(self):
+        """!
+        @brief Permite otra llamada de prueba cuando la anterior terminó sin éxito ni fallo de la dependencia.
+        """
+        with self._lock:
+            self._prueba_en_curso = False
+
+
+class MetricasDependencia:
+    """!
+    @brief Contadores de latencia y errores de una dependencia HTTP.
+    """
+
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.reintentos = 0
+        self.rechazos_circuito = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)
+        self._lock = threading.Lock()
+
+    def registrar(self, duracion, error):
+        with self._lock:
+            self.llamadas += 1
+            if error:
+                self.errores += 1
+            self.latencia_total += duracion
+            self.latencia_max = max(self.latencia_max, duracion)
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if duracion <= limite:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def registrar_reintento(self):
+        with self._lock:
+            self.reintentos += 1
+
+    def registrar_rechazo(self):
+        with self._lock:
+            self.rechazos_circuito += 1
+
+    def snapshot(self):
+        """!
+        @brief Devuelve una copia serializable de las métricas.
+        """
+        with self._lock:
+            acumulado = 0
+            histograma = {}
+            for limite, cantidad in zip(BUCKETS_LATENCIA, self.buckets):
+                acumulado += cantidad
+                histograma[str(limite)] = acumulado
+            histograma['+Inf'] = acumulado + self.buckets[-1]
+            return {
+                'llamadas': self.llamadas,
+                'errores': self.errores,
+                'reintentos': self.reintentos,
+                'rechazos_circuito': self.rechazos_circuito,
+                'latencia_promedio': self.latencia_total / self.llamadas if self.llamadas else 0.0,
+                'latencia_max': self.latencia_max,
+                'latencia_total': self.latencia_total,
+                'histograma_latencia': histograma,
+            }
+
+
+class ClienteHTTP:
+    """!
+    @brief Cliente HTTP para una dependencia externa (otro servicio, la impresora, etc.).
+    @details
+        Cada instancia mantiene una `requests.Session` con su propio pool de
+        conexiones keep-alive hacia la dependencia, aplica timeouts de conexión
+        y lectura a todas las llamadas, reintenta con backoff exponencial y
+        jitter completo, y protege a la dependencia con un `CircuitBreaker`.
+
+        Las llamadas no idempotentes (POST, PATCH) sólo se reintentan si la
+        conexión no llegó a establecerse, para no duplicar efectos (por ejemplo
+        imprimir dos veces una comanda).
+
+        Lanza `requests.exceptions.RequestException` (o `CircuitoAbiertoError`)
+        cuando la llamada no pudo completarse.
+    """
+
+    def __init__(self, nombre, base_url, timeout_conexion=2.0, timeout_lectura=10.0,
+                 reintentos=2, backoff_base=0.1, backoff_max=2.0,
+                 umbral_fallos=5, tiempo_apertura=30.0, pool_maxsize=10):
+        self.nombre = nombre
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.reintentos = reintentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(nombre, umbral_fallos, tiempo_apertura)
+        self.metricas = MetricasDependencia()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _espera(self, intento):
+        """!
+        @brief Backoff exponencial con jitter completo: uniforme en [0, min(max, base * 2^intento)].
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** intento)))
+
+    def _puede_reintentar(self, metodo, error):
+        if metodo in METODOS_IDEMPOTENTES:
+            return True
+        return _conexion_no_establecida(error)
+
+    def request(self, metodo, ruta, **kwargs):
+        """!
+        @brief Realiza una llamada a la dependencia.
+        @param metodo: Método HTTP ('GET', 'POST', ...).
+        @param ruta: Ruta relativa a `base_url` (por ejemplo '/imprimir_comanda').
+        @param kwargs: Argumentos adicionales para `requests.Session.request`.
+        @return requests.Response: Respuesta con código < 500.
+        @exception requests.exceptions.RequestException: Si la llamada falla tras los reintentos,
+            si la dependencia responde 5xx o si el circuito está abierto.
+        """
+        metodo = metodo.upper()
+        url = f"{self.base_url}/{ruta.lstrip('/')}"
+        kwargs.setdefault('timeout', self.timeout)
+        # Propaga el id de la solicitud para correlacionar las trazas entre servicios
+        kwargs['headers'] = {**encabezados_propagacion(), **(kwargs.get('headers') or {})}
+
+        for intento in range(self.reintentos + 1):
+            if not self.breaker.permitir():
+                self.metricas.registrar_rechazo()
+                raise CircuitoAbiertoError(f"Circuito abierto para '{self.nombre}', se descarta la llamada a {url}")
+
+            inicio = time.perf_counter()
+            try:
+                with span('http', f"{self.nombre} {metodo} {ruta}", intento=intento + 1) as datos:
+                    respuesta = self.session.request(metodo, url, **kwargs)
+                    datos['atributos']['status'] = respuesta.status_code
+                    if respuesta.status_code >= 500:
+                        respuesta.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                self.metricas.registrar(time.perf_counter() - inicio, error=True)
+                # Si este fallo abrió el circuito, reintentar sólo cambiaría el error por CircuitoAbiertoError
+                circuito_abierto = self.breaker.registrar_fallo()
+                if not circuito_abierto and intento < self.reintentos and self._puede_reintentar(metodo, e):
+                    self.metricas.registrar_reintento()
+                    logger.warning(f"Fallo al llamar a '{self.nombre}' ({e}). Reintento {intento + 1} de {self.reintentos}")
+                    time.sleep(self._espera(intento))
+                    continue
+                raise
+            except BaseException:
+                # Un error que no es de la dependencia no cuenta como fallo, pero no debe dejar tomada la prueba
+                self.breaker.liberar_prueba()
+                raise
+
+            self.metricas.registrar(time.perf_counter() - inicio, error=False)
+            self.breaker.registrar_exito()
+            return respuesta
+
+    def get(self, ruta, **kwargs):
+        return self.request('GET', ruta, **kwargs)
+
+    def post(self, ruta, **kwargs):
+        return self.request('POST', ruta, **kwargs)
+
+    def put(self, ruta, **kwargs):
+        return self.request('PUT', ruta, **kwargs)
+
+    def estado(self):
+        """!
+        @brief Devuelve el estado del circuito y las métricas de la dependencia.
+        """
+        return {
+            'base_url': self.base_url,
+            'circuito': self.breaker.estado,
+            **self.metricas.snapshot(),
+        }
+
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+
+def obtener_cliente(nombre):
+    """!
+    @brief Devuelve el cliente compartido de una dependencia declarada en `settings.HTTP_DEPENDENCIAS`.
+    @details
+        Los clientes se crean una sola vez por proceso, de modo que todas las
+        vistas comparten el pool de conexiones y el estado del circuito.
+    @param nombre: Clave de la dependencia en `HTTP_DEPENDENCIAS`.
+    @return ClienteHTTP
+    @exception KeyError: Si la dependencia no está configurada.
+    """
+    with _clientes_lock:
+        if nombre not in _clientes:
+            _clientes[nombre] = ClienteHTTP(nombre, **settings.HTTP_DEPENDENCIAS[nombre])
+        return _clientes[nombre]
+
+
+def estado_dependencias():
+    """!
+    @brief Estado y métricas de todas las dependencias configuradas.
+    @return dict: {nombre_dependencia: estado}
+    """
+    return {nombre: obtener_cliente(nombre).estado() for nombre in settings.HTTP_DEPENDENCIAS}
@@ -0,0 +1,84 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorPaginacionOpcional(CursorPagination):
+    """!
+    @brief Paginación por cursor (keyset) que se activa sólo si el cliente la pide.
+    @details
+        Los listados devuelven la lista completa, como siempre, salvo que la
+        solicitud incluya `?cursor=` o `?limite=`. En ese caso la respuesta pasa a
+        ser `{"next": ..., "previous": ..., "results": [...]}` y cada página se pide
+        a partir de la última posición vista, sin OFFSET, por lo que su costo no
+        crece con el número de página.
+
+        El orden usado es el `ordering` de la vista si ésta usa `OrderingFilter`,
+        o `id` en caso contrario.
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'limite'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """!
+        @brief Pagina el queryset sólo si la solicitud trae `cursor` o `limite`.
+        @return list | None: La página pedida, o None para devolver el listado completo.
+        """
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class HistorialPedidosPagination(CursorPagination):
+    """!
+    @brief Paginación por cursor (keyset) para el historial de pedidos.
+    @details
+        En lugar de OFFSET, cada página se pide a partir del último
+        `fecha_pedido` visto, por lo que el costo de traer la página N no crece
+        con N y el índice (id_cliente, fecha_pedido) resuelve el recorrido.
+        El tamaño de página puede ajustarse con `?limite=` hasta `max_page_size`.
+
+        Si la vista define `get_queryset_archivo()`, al terminar los pedidos en
+        curso el enlace `next` continúa en los archivados (`?origen=archivo`).
+        Como el archivo sólo tiene días anteriores a los de las tablas en curso,
+        el orden se mantiene; la página del cambio puede venir incompleta.
+    """
+    ordering = ('-fecha_pedido', '-id')
+    page_size = 10
+    page_size_query_param = 'limite'
+    max_page_size = 50
+    origen_query_param = 'origen'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        archivo = getattr(view, 'get_queryset_archivo', None)
+        self.continua_en_archivo = False
+        if archivo is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        if request.query_params.get(self.origen_query_param) == 'archivo':
+            return super().paginate_queryset(archivo(), request, view)
+
+        pagina = super().paginate_queryset(queryset, request, view)
+        if not self.has_next and archivo().exists():
+            if not pagina and self.cursor is None:
+                # No hay pedidos en curso: se arranca directamente en el archivo
+                pagina = super().paginate_queryset(archivo(), request, view)
+                self.base_url = replace_query_param(self.base_url, self.origen_query_param, 'archivo')
+            else:
+                self.continua_en_archivo = True
+        return pagina
+
+    def get_next_link(self):
+        if self.continua_en_archivo:
+            url = remove_query_param(self.base_url, self.cursor_query_param)
+            return replace_query_param(url, self.origen_query_param, 'archivo')
+        return super().get_next_link()
+
+
+class BusquedaPedidosPagination(HistorialPedidosPagination):
+    """!
+    @brief Paginación por cursor de la búsqueda de pedidos; igual a la del historial, con páginas más grandes.
+    """
+    page_size = 25
+    max_page_size = 100
@@ -0,0 +1,206 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from utils.metrics import nombre_vista
+
+logger = logging.getLogger(__name__)
+
+## Vista que está ejecutando las consultas (fuera de una solicitud: 'sin_vista').
+vista_actual = contextvars.ContextVar('vista_actual', default='sin_vista')
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_MARCADORES = re.compile(r'%s|\?')
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def huella_sql(sql):
+    """!
+    @brief Normaliza una sentencia SQL para agrupar las que sólo difieren en sus valores.
+    @details
+        Reemplaza literales y marcadores de parámetros por `?`, colapsa las listas
+        de `IN (...)` de cualquier largo y unifica espacios y mayúsculas.
+
+    @example
+        huella_sql("SELECT * FROM pedidos WHERE id IN (%s, %s, %s)")
+        # 'select * from pedidos where id in (...)'
+    """
+    huella = _CADENAS.sub('?', sql)
+    huella = _NUMEROS.sub('?', huella)
+    huella = _MARCADORES.sub('?', huella)
+    huella = _LISTAS.sub('(...)', huella)
+    return _ESPACIOS.sub(' ', huella).strip().lower()
+
+
+class AgregadorConsultas:
+    """!
+    @brief Acumula cantidad, tiempo total y tiempo máximo por huella SQL y por vista.
+    """
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, huella, vista, duracion, sql):
+        clave = (huella, vista)
+        with self._lock:
+            datos = self._datos.get(clave)
+            if datos is None:
+                datos = self._datos[clave] = {'cantidad': 0, 'total': 0.0, 'maximo': 0.0, 'ejemplo': sql}
+            datos['cantidad'] += 1
+            datos['total'] += duracion
+            if duracion > datos['maximo']:
+                datos['maximo'] = duracion
+                datos['ejemplo'] = sql
+
+    def instantanea(self):
+        """!
+        @brief Copia de los datos acumulados, lista para serializar.
+        @return list: Un dict por (huella, vista) con tiempos en milisegundos.
+        """
+        with self._lock:
+            items = list(self._datos.items())
+        return [
+            {
+                'huella': huella,
+                'vista': vista,
+                'cantidad': datos['cantidad'],
+                'total_ms': round(datos['total'] * 1000, 3),
+                'maximo_ms': round(datos['maximo'] * 1000, 3),
+                'ejemplo': datos['ejemplo'],
+            }
+            for (huella, vista), datos in items
+        ]
+
+    def reiniciar(self):
+        with self._lock:
+            self._datos = {}
+
+
+## Agregador único del proceso.
+AGREGADOR = AgregadorConsultas()
+
+
+def explicar(sql, params):
+    """!
+    @brief Devuelve el plan de ejecución de una consulta SELECT, o None.
+    @details
+        Usa `EXPLAIN` en MySQL y `EXPLAIN QUERY PLAN` en SQLite. Se ejecuta sobre
+        el cursor del driver para no pasar por los `execute_wrapper` (no cuenta
+        como consulta de la solicitud). Los errores se registran y no
+        interrumpen la solicitud.
+    """
+    if not sql.lstrip().lower().startswith('select'):
+        return None
+    prefijo = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.cursor.execute(prefijo + sql, params)
+            return [list(fila) for fila in cursor.cursor.fetchall()]
+    except Exception as e:
+        logger.debug(f"No se pudo obtener el EXPLAIN de la consulta: {e}")
+        return None
+
+
+class RegistroConsultasLentas:
+    """!
+    @brief `execute_wrapper` que agrega cada consulta y registra las lentas.
+    @details
+        Las consultas que tardan al menos `umbral` segundos se registran con sus
+        parámetros y su plan de ejecución.
+    """
+
+    def __init__(self, umbral, agregador=AGREGADOR):
+        self.umbral = umbral
+        self.agregador = agregador
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            vista = vista_actual.get()
+            self.agregador.registrar(huella_sql(sql), vista, duracion, sql)
+            if duracion >= self.umbral:
+                self._registrar_lenta(sql, params, many, duracion, vista)
+
+    def _registrar_lenta(self, sql, params, many, duracion, vista):
+        plan = None if many else explicar(sql, params)
+        logger.warning(
+            f"Consulta lenta ({duracion * 1000:.1f} ms) en {vista}: {sql}\n"
+            f"  Parámetros: {params!r}\n"
+            f"  Plan: {plan!r}"
+        )
+
+
+def guardar_agregados(ruta, agregador=AGREGADOR):
+    """!
+    @brief Escribe los agregados del proceso en `ruta` (JSON), reemplazando el archivo.
+    """
+    datos = {'pid': os.getpid(), 'actualizado': time.time(), 'consultas': agregador.instantanea()}
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def cargar_agregados(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+class SlowQueryMiddleware:
+    """!
+    @brief Activa el registro de consultas lentas durante cada solicitud.
+    @details
+        Sólo se activa con `settings.SLOW_QUERY_LOG = True`; si no, Django lo
+        descarta al iniciar y no tiene costo. Cada `SLOW_QUERY_INTERVALO` segundos
+        vuelca los agregados a `SLOW_QUERY_ARCHIVO`, de donde los lee el comando
+        `consultas_lentas`.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.registro = RegistroConsultasLentas(settings.SLOW_QUERY_UMBRAL_MS / 1000)
+        self.archivo = settings.SLOW_QUERY_ARCHIVO
+        self.intervalo = settings.SLOW_QUERY_INTERVALO
+        self._ultimo_volcado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        token = vista_actual.set('sin_ruta')
+        try:
+            with connection.execute_wrapper(self.registro):
+                response = self.get_response(request)
+        finally:
+            vista_actual.reset(token)
+        self._volcar_si_corresponde()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        vista_actual.set(nombre_vista(request))
+
+    def _volcar_si_corresponde(self):
+        ahora = time.monotonic()
+        if ahora - self._ultimo_volcado < self.intervalo or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._ultimo_volcado = ahora
+            guardar_agregados(self.archivo)
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar las estadísticas de consultas en {self.archivo}: {e}")
+        finally:
+            self._lock.release()
@@ -0,0 +1,95 @@
+from django.core.exceptions import FieldDoesNotExist
+
+
+class CamposDinamicosSerializerMixin:
+    """!
+    @brief Mixin de serializador que permite limitar los campos devueltos.
+    @details
+        Acepta el argumento opcional `campos` (lista de nombres) y descarta del
+        serializador todos los campos que no estén en ella. Los nombres que no
+        existen en el serializador se ignoran.
+
+    @example
+        ClienteSerializer(clientes, many=True, campos=['id', 'nombre'])
+    """
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('campos', None)
+        super().__init__(*args, **kwargs)
+        if campos:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
+class CamposDinamicosViewMixin:
+    """!
+    @brief Mixin de vistas de listado para soportar el parámetro `?fields=`.
+    @details
+        `?fields=id,nombre` limita tanto los campos serializados (el serializador
+        debe heredar de `CamposDinamicosSerializerMixin`) como las columnas que se
+        traen de la base de datos, aplicando `.only()` al queryset.
+
+        Las columnas se deducen del `source` de cada campo pedido. Si algún campo
+        no corresponde a una columna (por ejemplo un `SerializerMethodField`) y la
+        vista no declara en `columnas_por_campo` qué columnas necesita, no se
+        aplica `.only()` y se traen todas las columnas.
+    """
+    campos_query_param = 'fields'
+    columnas_por_campo = {}
+
+    def get_campos(self):
+        """!
+        @brief Devuelve la lista de campos pedidos en `?fields=`, o None.
+        """
+        valor = self.request.query_params.get(self.campos_query_param, '') if self.request else ''
+        campos = [campo.strip() for campo in valor.split(',') if campo.strip()]
+        return campos or None
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            campos = self.get_campos()
+            if campos:
+                kwargs['campos'] = campos
+        return super().get_serializer(*args, **kwargs)
+
+    def get_columnas(self, queryset, campos):
+        """!
+        @brief Calcula las columnas necesarias para serializar los campos pedidos.
+        @return list | None: Nombres para `.only()`, o None si no pueden deducirse.
+        """
+        modelo = queryset.model
+        serializer = self.get_serializer_class()(campos=campos)
+        accesores_inversos = {rel.get_accessor_name() for rel in modelo._meta.related_objects}
+        columnas = set()
+        for nombre, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            if nombre in self.columnas_por_campo:
+                columnas.update(self.columnas_por_campo[nombre])
+                continue
+            source = campo.source.split('.')[0]
+            if source == '*':
+                return None
+            if source in accesores_inversos:
+                # Relaciones inversas: se consultan aparte, sólo necesitan la pk
+                continue
+            try:
+                campo_modelo = modelo._meta.get_field(source)
+            except FieldDoesNotExist:
+                return None
+            if campo_modelo.concrete:
+                columnas.add(campo_modelo.name)
+
+        # Las relaciones de select_related no pueden quedar diferidas
+        if isinstance(queryset.query.select_related, dict):
+            columnas.update(queryset.query.select_related.keys())
+        return sorted(columnas)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.get_campos()
+        if campos and queryset.query.select_related is not True:
+            columnas = self.get_columnas(queryset, campos)
+            if columnas is not None:
+                queryset = queryset.only(*columnas)
+        return queryset
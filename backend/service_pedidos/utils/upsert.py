@@ -0,0 +1,25 @@
+from django.db import connections, router
+
+
+def opciones_upsert(modelo, unicos, actualizar):
+    """!
+    @brief Argumentos de `bulk_create` para insertar o, si la fila ya existe, actualizarla.
+    @details
+        PostgreSQL y SQLite necesitan las columnas del conflicto
+        (`ON CONFLICT (...) DO UPDATE`). MySQL no las admite: `ON DUPLICATE KEY
+        UPDATE` usa las claves únicas de la tabla, y Django lanza
+        `NotSupportedError` si se indican. Por eso `unicos` tiene que ser una
+        clave única (o la primaria) del modelo, y en MySQL no debe haber otra
+        clave única que pueda chocar.
+    @param modelo: Modelo donde se escribe (define la base según los routers).
+    @param unicos: Campos de la clave única que identifica la fila.
+    @param actualizar: Campos que se sobrescriben si la fila ya existe.
+    @return dict: kwargs para `Modelo.objects.bulk_create(filas, **opciones)`.
+
+    @example
+        Modelo.objects.bulk_create(filas, **opciones_upsert(Modelo, ['codigo'], ['nombre']))
+    """
+    opciones = {'update_conflicts': True, 'update_fields': list(actualizar)}
+    if connections[router.db_for_write(modelo)].features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = list(unicos)
+    return opciones
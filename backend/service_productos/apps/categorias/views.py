@@ -5,9 +5,13 @@ from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from .models import Categoria
 from .serializer import CategoriaSerializer
 from utils.permissions import AllowRoles
+from apps.productos.models import Producto
+from apps.productos.catalogo import invalidar_catalogo
+from apps.productos.tiempo_real import notificar_cambio
 
 
 class CategoriaCrearView(APIView):
@@ -16,7 +20,8 @@ class CategoriaCrearView(APIView):
     def post(self, request):
         serializer = CategoriaSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            categoria = serializer.save()
+            notificar_cambio('categoria', categorias=[{'id': categoria.id, 'nombre': categoria.nombre}], eliminadas=[])
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -33,7 +38,8 @@ class CategoriaEditarView(APIView):
         categoria = get_object_or_404(Categoria, id=id)
         serializer = CategoriaSerializer(categoria, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            categoria = serializer.save()
+            notificar_cambio('categoria', categorias=[{'id': categoria.id, 'nombre': categoria.nombre}], eliminadas=[])
             return Response({'detail': 'Categoría editada exitosamente'}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -51,7 +57,13 @@ class CategoriaEliminarView(APIView):
         if not categoria:
             return Response({'detail': 'Categoría a eliminar no encontrada'}, status=status.HTTP_400_BAD_REQUEST)
 
-        categoria.delete()
+        # Los productos de la categoría se eliminan con ella
+        with transaction.atomic():
+            productos = list(Producto.objects.filter(categoria=categoria).values_list('id', flat=True))
+            categoria.delete()
+            if productos:
+                invalidar_catalogo(eliminados=productos)
+            notificar_cambio('categoria', categorias=[], eliminadas=[int(id)])
         return Response({'detail': 'Categoría eliminada exitosamente'}, status=status.HTTP_200_OK)
 
 
@@ -0,0 +1,33 @@
+from django.http import JsonResponse
+from rest_framework.views import APIView
+from utils.health import SONDA
+
+
+class LivenessView(APIView):
+    """!
+    @brief Liveness: el proceso está vivo y atiende solicitudes.
+    @details No consulta dependencias; si responde, el proceso no necesita reiniciarse.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return JsonResponse({'status': 'ok'})
+
+
+class HealthCheckView(APIView):
+    """!
+    @brief Readiness: el microservicio puede atender tráfico.
+    @details
+        Devuelve el último resultado de la sonda en segundo plano (base de datos
+        y Redis, ver utils/health.py). No abre conexiones ni envía mensajes por
+        la capa de channels, por lo que sondearla seguido no tiene costo.
+        Responde 503 si alguna dependencia falla o el último chequeo está vencido.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        estado = SONDA.estado()
+        codigo = 200 if estado['listo'] else 503
+        return JsonResponse({'status': 'ok' if estado['listo'] else 'error', **estado}, status=codigo)
@@ -0,0 +1,21 @@
+from utils.importacion import ImportadorCSV
+from apps.productos.disponibilidad import programar_actualizacion
+from .models import Insumo
+
+
+class ImportadorInsumos(ImportadorCSV):
+    """!
+    @brief Importa insumos desde un CSV.
+    @details
+        Columnas: nombre, descripcion, unidad_medida, stock_actual y
+        costo_unitario. Un insumo existente se reconoce por su nombre.
+    """
+    modelo = Insumo
+    columnas = ('nombre', 'descripcion', 'unidad_medida', 'stock_actual', 'costo_unitario')
+    obligatorias = ('nombre', 'unidad_medida', 'stock_actual', 'costo_unitario')
+    campo_clave = 'nombre'
+
+    def despues_de_guardar(self, nuevos, modificados):
+        # Los insumos nuevos todavía no están en ninguna receta
+        if modificados:
+            programar_actualizacion(insumos=[insumo.pk for insumo in modificados])
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Insumo
+from utils.sparse_fields import CamposDinamicosSerializerMixin
 
-class InsumoSerializer(serializers.ModelSerializer):
+class InsumoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """!
     @brief Serializador para el modelo Insumo.
     @details
@@ -2,6 +2,7 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from types import SimpleNamespace
 from apps.insumos.models import Insumo
 
@@ -179,3 +180,36 @@ class InsumoAPITestCase(APITestCase):
         self.client.force_authenticate(user=self.cliente_user)
         response = self.client.post(f"{self.url_eliminar}?id={self.insumo.id}")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class InsumoImportarTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cocinero', password='cocinero123')
+        self.user.rol = 'Cocinero'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Insumo.objects.create(nombre='Harina', unidad_medida='kg', stock_actual=10, costo_unitario=800)
+
+    def importar(self, contenido, url=None):
+        archivo = SimpleUploadedFile('insumos.csv', contenido.encode('utf-8'), content_type='text/csv')
+        return self.client.post(url or reverse('insumo_importar'), {'archivo': archivo}, format='multipart')
+
+    def test_importa_y_actualiza_por_nombre(self):
+        contenido = (
+            "nombre,unidad_medida,stock_actual,costo_unitario\n"
+            "Queso,kg,\"5,5\",4200\n"
+            "Harina,kg,25,850\n"
+            "Sal,,1,300\n"
+        )
+        response = self.importar(contenido, url=reverse('insumo_importar') + '?actualizar=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['creados'], response.data['actualizados']), (1, 1))
+        self.assertEqual(response.data['errores'], [{'fila': 4, 'errores': {'unidad_medida': 'Este campo es obligatorio.'}}])
+        self.assertEqual(str(Insumo.objects.get(nombre='Queso').stock_actual), '5.50')
+        self.assertEqual(Insumo.objects.get(nombre='Harina').stock_actual, 25)
+
+    def test_requiere_rol(self):
+        self.user.rol = 'Recepcionista'
+        response = self.importar("nombre,unidad_medida,stock_actual,costo_unitario\nQueso,kg,1,1\n")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -4,7 +4,8 @@ from apps.insumos.views import (
     InsumoEditarView,
     InsumoEliminarView,
     InsumoListarView,
-    InsumoBuscarView
+    InsumoBuscarView,
+    InsumoImportarView,
 )
 
 urlpatterns = [
@@ -13,4 +14,5 @@ urlpatterns = [
     path('eliminar/', InsumoEliminarView.as_view(), name='insumo_eliminar'),
     path('listar/', InsumoListarView.as_view(), name='insumo_listar'),
     path('buscar/', InsumoBuscarView.as_view(), name='insumo_buscar'),
+    path('importar/', InsumoImportarView.as_view(), name='insumo_importar'),
 ]
@@ -7,6 +7,11 @@ from .serializer import InsumoSerializer
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AllowRoles
 from rest_framework.generics import ListAPIView
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
+from utils.importacion import ImportarCSVView
+from .importacion import ImportadorInsumos
+from apps.productos.disponibilidad import programar_actualizacion
 
 class InsumoCrearView(APIView):
     """!
@@ -37,6 +42,7 @@ class InsumoEditarView(APIView):
             serializer = InsumoSerializer(insumo, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                programar_actualizacion(insumos=[insumo.id])
                 return Response({'detail':'Insumo editado exitosamente'}, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -57,21 +63,22 @@ class InsumoEliminarView(APIView):
         try:
             insumo = Insumo.objects.get(id=id)
             insumo.delete()
+            programar_actualizacion()
             return Response({'detail':'Insumo eliminado exitosamente'}, status=status.HTTP_200_OK)
         except Insumo.DoesNotExist:
             return Response({'detail':'Insumo a eliminar no encontrado'}, status=status.HTTP_400_BAD_REQUEST)
         
-class InsumoListarView(APIView):
+class InsumoListarView(CamposDinamicosViewMixin, ListAPIView):
     """!
     @brief Vista para listar todos los insumos.
+    @details
+        Admite paginación por cursor (`?limite=` / `?cursor=`) y `?fields=`.
     """
+    queryset = Insumo.objects.all()
+    serializer_class = InsumoSerializer
+    pagination_class = CursorPaginacionOpcional
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        insumos = Insumo.objects.all()
-        serializer = InsumoSerializer(insumos, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
 class InsumoBuscarView(ListAPIView):
     """!
     @brief Vista para buscar insumos según criterios.
@@ -92,4 +99,15 @@ class InsumoBuscarView(ListAPIView):
         if nombre:
             queryset = queryset.filter(nombre__icontains=nombre) 
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+class InsumoImportarView(ImportarCSVView):
+    """!
+    @brief Vista para dar de alta (o actualizar) muchos insumos desde un CSV.
+    @details
+        Recibe el archivo en el campo `archivo`. Ver `ImportadorInsumos` para
+        las columnas e `ImportarCSVView` para el formato de la respuesta.
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+    importador_class = ImportadorInsumos
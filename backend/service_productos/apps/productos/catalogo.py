@@ -0,0 +1,191 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Ceil, Floor, Round
+
+from utils.event_bus import publicar
+from .models import Producto, CatalogoVersion
+from .tiempo_real import notificar_cambio
+
+## Formas de indicar el cambio de precio.
+MODOS = ('porcentaje', 'monto')
+## Redondeo del precio nuevo al múltiplo indicado.
+DIRECCIONES = ('cercano', 'arriba', 'abajo')
+_REDONDEO = {'cercano': Round, 'arriba': Ceil, 'abajo': Floor}
+## Campos de cada producto en el evento `producto_actualizado`.
+CAMPOS_EVENTO = ('id', 'nombre', 'precio_unitario', 'disponible')
+## Mayor precio que admite `Producto.precio_unitario` (10 dígitos, 2 decimales).
+PRECIO_MAXIMO = Decimal('99999999.99')
+
+
+class CatalogoDesactualizado(Exception):
+    """!
+    @brief El catálogo cambió entre la vista previa y la confirmación de un cambio masivo.
+    """
+
+    def __init__(self, version):
+        super().__init__(version)
+        self.version = version
+
+
+def version_catalogo():
+    """!
+    @brief Versión actual del catálogo (0 si todavía no hubo cambios).
+    """
+    return CatalogoVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def invalidar_catalogo(productos=None, eliminados=()):
+    """!
+    @brief Sube la versión del catálogo y publica el evento `producto_actualizado`.
+    @details
+        Se llama una vez por operación, después de escribir los productos y en
+        la misma transacción, aunque la operación haya cambiado muchos productos.
+        El evento lleva la versión nueva, los productos modificados (ver
+        `datos_evento()`) y los ids eliminados; con `productos=None` indica que
+        cambió una parte del catálogo que no se detalla y quien guarde una copia
+        debe descargarlo entero. El mismo cambio se envía por el WebSocket del
+        catálogo (ver `notificar_cambio()`).
+    @param productos: Lista de dicts con `CAMPOS_EVENTO`, o None.
+    @param eliminados: Ids de los productos eliminados.
+    @return int: Versión nueva.
+    """
+    with transaction.atomic():
+        if not CatalogoVersion.objects.filter(pk=1).update(version=F('version') + 1):
+            CatalogoVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        # La fila queda bloqueada por el UPDATE hasta el commit: se lee la versión propia
+        version = version_catalogo()
+    cambio = {
+        'version': version,
+        'completo': productos is None,
+        'productos': productos or [],
+        'eliminados': list(eliminados),
+    }
+    publicar('producto_actualizado', cambio)
+    notificar_cambio('producto', **cambio)
+    return version
+
+
+def catalogo_completo():
+    """!
+    @brief Versión y productos del catálogo, leídos en la misma transacción (dos consultas).
+    @return tuple: (versión, lista de dicts con `CAMPOS_EVENTO`).
+    """
+    with transaction.atomic():
+        version = version_catalogo()
+        productos = list(Producto.objects.order_by('id').values(*CAMPOS_EVENTO))
+    return version, productos
+
+
+def datos_evento(producto):
+    """!
+    @brief Campos de un producto que viajan en `producto_actualizado`.
+    """
+    return {campo: getattr(producto, campo) for campo in CAMPOS_EVENTO}
+
+
+def filtrar_productos(categoria=None, ids=None, nombre=None):
+    """!
+    @brief Productos alcanzados por un cambio masivo; los filtros indicados se combinan con AND.
+    """
+    queryset = Producto.objects.all()
+    if categoria is not None:
+        queryset = queryset.filter(categoria_id=categoria)
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    if nombre:
+        queryset = queryset.filter(nombre__icontains=nombre)
+    return queryset
+
+
+def expresion_precio(modo, valor, redondeo=Decimal('0.01'), direccion='cercano'):
+    """!
+    @brief Expresión SQL del precio nuevo, para calcularlo en la base sin leer los productos.
+    @details
+        Con `modo='porcentaje'` el precio se multiplica por (1 + valor / 100);
+        con `modo='monto'` se le suma `valor` (negativo para bajarlo). El
+        resultado se redondea al múltiplo de `redondeo` más cercano, al de arriba
+        o al de abajo según `direccion`.
+
+    @example
+        # +12,5 % redondeado a la decena superior: 1000 -> 1130
+        expresion_precio('porcentaje', Decimal('12.5'), Decimal('10'), 'arriba')
+    """
+    precio = F('precio_unitario')
+    if modo == 'porcentaje':
+        nuevo = precio * Value(1 + valor / 100)
+    else:
+        nuevo = precio + Value(valor)
+    # El redondeo previo a 6 decimales descarta el error de punto flotante de
+    # SQLite (1000 * 1.1 = 1100.0000000000002), que Ceil llevaría al múltiplo siguiente
+    multiplos = Round(nuevo / Value(redondeo), 6)
+    nuevo = _REDONDEO[direccion](multiplos) * Value(redondeo)
+    return ExpressionWrapper(Round(nuevo, 2), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def preparar_cambio(queryset, modo=None, valor=None, redondeo=Decimal('0.01'), direccion='cercano', disponible=None):
+    """!
+    @brief Arma el cambio masivo: los productos que cambian y los valores del UPDATE.
+    @return tuple: (queryset anotado con `precio_nuevo` y `disponible_nuevo`, solo con
+        los productos que cambian; dict de campos para `update()`).
+    """
+    valores = {}
+    cambia = Q(pk__in=[])
+    if modo is not None:
+        valores['precio_unitario'] = expresion_precio(modo, valor, redondeo, direccion)
+        cambia |= ~Q(precio_unitario=F('precio_nuevo'))
+    if disponible is not None:
+        valores['disponible'] = Value(disponible)
+        cambia |= ~Q(disponible=disponible)
+
+    queryset = queryset.annotate(
+        precio_nuevo=valores.get('precio_unitario', F('precio_unitario')),
+        disponible_nuevo=ExpressionWrapper(valores.get('disponible', F('disponible')), output_field=Producto._meta.get_field('disponible')),
+    ).filter(cambia)
+    return queryset, valores
+
+
+def precios_fuera_de_rango(queryset):
+    """!
+    @brief Indica si el cambio dejaría algún precio negativo o mayor al que admite la columna.
+    """
+    return queryset.filter(Q(precio_nuevo__lt=0) | Q(precio_nuevo__gt=PRECIO_MAXIMO)).exists()
+
+
+def vista_previa(queryset):
+    """!
+    @brief Diferencias que produciría el cambio, producto por producto (una consulta).
+    """
+    return list(queryset.order_by('id').values(
+        'id', 'nombre', 'precio_unitario', 'precio_nuevo', 'disponible', 'disponible_nuevo',
+    ))
+
+
+def aplicar_cambio(queryset, valores, version=None):
+    """!
+    @brief Aplica el cambio con un solo UPDATE y sube la versión del catálogo una vez.
+    @details
+        La fila de la versión se bloquea durante la transacción, así dos cambios
+        masivos no se mezclan. Si se indica `version` (la de la vista previa) y
+        el catálogo cambió desde entonces, no se modifica nada.
+    @return tuple: (diferencias aplicadas, versión nueva).
+    @raise CatalogoDesactualizado
+    """
+    with transaction.atomic():
+        actual = CatalogoVersion.objects.select_for_update().filter(pk=1).values_list('version', flat=True).first() or 0
+        if version is not None and version != actual:
+            raise CatalogoDesactualizado(actual)
+        cambios = vista_previa(queryset)
+        if cambios:
+            Producto.objects.filter(id__in=[cambio['id'] for cambio in cambios]).update(**valores)
+            actual = invalidar_catalogo([
+                {
+                    'id': cambio['id'],
+                    'nombre': cambio['nombre'],
+                    'precio_unitario': cambio['precio_nuevo'].quantize(Decimal('0.01')),
+                    'disponible': cambio['disponible_nuevo'],
+                }
+                for cambio in cambios
+            ])
+    return cambios, actual
@@ -0,0 +1,37 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from utils.metrics import REGISTRO
+
+CONEXIONES_ACTIVAS = REGISTRO.medidor(
+    'websocket_connections_active', 'Conexiones WebSocket abiertas por grupo.', ('group',),
+)
+
+## Grupo de channels al que se envían los cambios del catálogo (ver `apps/productos/tiempo_real.py`).
+GRUPO_CATALOGO = 'catalogo'
+
+
+class CatalogoConsumer(AsyncWebsocketConsumer):
+    """!
+    @brief WebSocket por el que los clientes reciben los cambios del catálogo.
+    @details
+        Sólo envía: cada mensaje es un cambio compacto (ver `notificar_cambio()`)
+        para que el cliente actualice su copia sin volver a pedir el listado.
+    """
+
+    async def connect(self):
+        await self.channel_layer.group_add(GRUPO_CATALOGO, self.channel_name)
+        await self.accept()
+        CONEXIONES_ACTIVAS.inc(group=GRUPO_CATALOGO)
+        self.contabilizada = True
+
+    async def disconnect(self, close_code):
+        # disconnect también se llama si la conexión no llegó a aceptarse
+        if getattr(self, 'contabilizada', False):
+            CONEXIONES_ACTIVAS.dec(group=GRUPO_CATALOGO)
+        await self.channel_layer.group_discard(GRUPO_CATALOGO, self.channel_name)
+
+    async def catalogo_cambio(self, event):
+        message = event['message']
+        if 'request_id' in event:
+            message = {**message, 'request_id': event['request_id']}
+        await self.send(text_data=json.dumps(message))
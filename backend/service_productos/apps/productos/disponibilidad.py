@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.insumos.models import Insumo
+from apps.recetas.bom import GrafoRecetas
+from utils.upsert import opciones_upsert
+from .models import Producto, DisponibilidadProducto
+from .tiempo_real import notificar_cambio
+
+
+def calcular_maximo(producto, requeridos, stocks):
+    """!
+    @brief Unidades de un producto que alcanzan con el stock actual.
+    @details
+        Cada insumo de la receta (en todos los niveles) limita a
+        stock / (cantidad por unidad de receta × `cantidad_receta`); el máximo es
+        el menor de esos límites. Es el máximo del producto por sí solo: si dos
+        productos comparten un insumo, vender uno baja el máximo del otro, y eso
+        se refleja cuando se descuenta el stock.
+    @param producto: dict con 'receta_id', 'cantidad_receta' y 'stock'.
+    @param requeridos: {id_insumo: cantidad} por unidad de la receta del producto.
+    @param stocks: {id_insumo: stock_actual}.
+    @return int | None: None si el producto no tiene límite.
+    """
+    if producto['receta_id'] is None:
+        return None if producto['stock'] is None else max(producto['stock'], 0)
+    maximo = None
+    for insumo, cantidad in requeridos.items():
+        necesario = cantidad * producto['cantidad_receta']
+        if necesario <= 0:
+            continue
+        alcanza = max(int(stocks.get(insumo, 0) // necesario), 0)
+        maximo = alcanza if maximo is None else min(maximo, alcanza)
+    return maximo
+
+
+def actualizar_disponibilidad(insumos=None, productos=None):
+    """!
+    @brief Recalcula el máximo vendible de los productos afectados por un cambio.
+    @details
+        Con `insumos` se recalculan los productos cuya receta usa (en cualquier
+        nivel) alguno de esos insumos; con `productos`, esos productos. Sin
+        ninguno de los dos se recalcula todo el menú. Se lee el grafo de recetas
+        (dos consultas), los productos y el stock de los insumos involucrados, y
+        se escribe con un solo INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE
+        (ver `utils/upsert.py`).
+        Los productos cuyo máximo cambió se envían por el WebSocket del catálogo.
+    @return dict: {id_producto: máximo} de los productos recalculados.
+    """
+    grafo = GrafoRecetas.cargar()
+    requerimientos = grafo.requerimientos()
+    consulta = Producto.objects.all()
+    if insumos is not None or productos is not None:
+        insumos = set(insumos or ())
+        recetas = [receta for receta, requeridos in requerimientos.items() if not insumos.isdisjoint(requeridos)]
+        consulta = consulta.filter(Q(id__in=list(productos or ())) | Q(receta_id__in=recetas))
+    filas = list(consulta.values('id', 'receta_id', 'cantidad_receta', 'stock'))
+    if not filas:
+        return {}
+
+    usados = {insumo for fila in filas for insumo in requerimientos.get(fila['receta_id'], {})}
+    stocks = dict(Insumo.objects.filter(id__in=usados).values_list('id', 'stock_actual')) if usados else {}
+    maximos = {fila['id']: calcular_maximo(fila, requerimientos.get(fila['receta_id'], {}), stocks) for fila in filas}
+    anteriores = dict(DisponibilidadProducto.objects.filter(producto_id__in=list(maximos)).values_list('producto_id', 'maximo'))
+    ahora = timezone.now()
+    DisponibilidadProducto.objects.bulk_create(
+        [DisponibilidadProducto(producto_id=id_producto, maximo=maximo, actualizado=ahora) for id_producto, maximo in maximos.items()],
+        **opciones_upsert(DisponibilidadProducto, ['producto'], ['maximo', 'actualizado']),
+    )
+    cambios = {id_producto: maximo for id_producto, maximo in maximos.items() if id_producto not in anteriores or anteriores[id_producto] != maximo}
+    if cambios:
+        notificar_cambio('disponibilidad', productos=cambios)
+    return maximos
+
+
+def programar_actualizacion(insumos=None, productos=None):
+    """!
+    @brief Recalcula la disponibilidad (ver `actualizar_disponibilidad`) cuando se confirme la transacción.
+    @example
+        insumo.save()
+        programar_actualizacion(insumos=[insumo.id])
+    """
+    insumos = None if insumos is None else list(insumos)
+    productos = None if productos is None else list(productos)
+    transaction.on_commit(lambda: actualizar_disponibilidad(insumos, productos))
+
+
+def disponibilidad():
+    """!
+    @brief Máximo vendible de todos los productos, {id_producto: máximo o None}.
+    @details
+        Se lee de la tabla ya calculada; si todavía no se calculó nunca (tabla
+        vacía con productos cargados) se calcula todo en el momento.
+    """
+    maximos = dict(DisponibilidadProducto.objects.values_list('producto_id', 'maximo'))
+    if not maximos:
+        maximos = actualizar_disponibilidad()
+    return maximos
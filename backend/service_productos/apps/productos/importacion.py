@@ -0,0 +1,53 @@
+from utils.importacion import ImportadorCSV, ErrorFila, buscar_referencias
+from apps.categorias.models import Categoria
+from apps.recetas.models import Receta
+from .models import Producto
+from .catalogo import invalidar_catalogo
+from .disponibilidad import programar_actualizacion
+
+
+class ImportadorProductos(ImportadorCSV):
+    """!
+    @brief Importa productos desde un CSV.
+    @details
+        Columnas: nombre, descripcion, precio_unitario, disponible, categoria,
+        stock, receta y cantidad_receta. La categoría y la receta se indican por
+        nombre o por id y se buscan una vez por lote. Un producto existente se
+        reconoce por su nombre. Al terminar sube la versión del catálogo una vez.
+    """
+    modelo = Producto
+    columnas = ('nombre', 'descripcion', 'precio_unitario', 'disponible', 'stock', 'cantidad_receta')
+    obligatorias = ('nombre', 'precio_unitario', 'categoria')
+    campo_clave = 'nombre'
+
+    def preparar_lote(self, filas):
+        return {
+            'categorias': buscar_referencias(Categoria, [fila.get('categoria') for fila in filas]),
+            'recetas': buscar_referencias(Receta, [fila.get('receta') for fila in filas]),
+        }
+
+    def validar_fila(self, datos, fila, contexto):
+        errores = {}
+        categoria = (fila.get('categoria') or '').strip()
+        if not categoria:
+            errores['categoria'] = 'Este campo es obligatorio.'
+        elif categoria not in contexto['categorias']:
+            errores['categoria'] = f"No existe la categoría «{categoria}»."
+        else:
+            datos['categoria'] = contexto['categorias'][categoria]
+
+        receta = (fila.get('receta') or '').strip()
+        if receta:
+            if receta not in contexto['recetas']:
+                errores['receta'] = f"No existe la receta «{receta}»."
+            else:
+                datos['receta'] = contexto['recetas'][receta]
+        if errores:
+            raise ErrorFila(errores)
+
+    def importar(self, lineas):
+        resultado = super().importar(lineas)
+        if not self.simular and (self.creados or self.actualizados):
+            invalidar_catalogo()
+            programar_actualizacion()
+        return resultado
@@ -1,27 +1,35 @@
 from django.db import transaction
 from decimal import Decimal
 
-def descontar_stock_recursivo_receta(receta, cantidad_consumida):
+from apps.insumos.models import Insumo
+from apps.recetas.bom import GrafoRecetas
+from .disponibilidad import programar_actualizacion
+
+
+def descontar_stock_recursivo_receta(receta, cantidad_consumida, grafo=None):
     """
-    Descuenta recursivamente los stocks de insumos de una receta y sus sub-recetas.
+    Descuenta los stocks de insumos de una receta y sus sub-recetas.
+
+    La receta se explota con el grafo de recetas (`GrafoRecetas`), así cada
+    insumo se descuenta una sola vez con el total de todos los niveles, y los
+    insumos se bloquean y actualizan en dos consultas. Sin `grafo` se carga
+    sólo lo alcanzable desde esta receta.
     """
-    # Descontar Insumos directos
-    for receta_insumo in receta.recetainsumo_set.all():
-        insumo = receta_insumo.insumo
-        cantidad_necesaria = receta_insumo.cantidad * cantidad_consumida
-        nuevo_stock = insumo.stock_actual - cantidad_necesaria
-        insumo.stock_actual = max(Decimal('0.00'), nuevo_stock)
-        insumo.save()
-
-    # Descontar insumos en Sub-recetas (Recursión)
-    for sub_detalle in receta.recetasubreceta_principal.all():
-        sub_receta = sub_detalle.receta_hija
-        cantidad_sub_necesaria = sub_detalle.cantidad * cantidad_consumida
-        descontar_stock_recursivo_receta(sub_receta, cantidad_sub_necesaria)
-
-def procesar_venta_producto(producto, cantidad_vendida):
+    grafo = grafo or GrafoRecetas.cargar(recetas=[receta.id])
+    requeridos = grafo.explotar(receta.id, cantidad_consumida)
+    if not requeridos:
+        return
+
+    insumos = list(Insumo.objects.select_for_update().filter(pk__in=requeridos))
+    for insumo in insumos:
+        nuevo_stock = insumo.stock_actual - requeridos[insumo.pk]
+        insumo.stock_actual = max(Decimal('0.00'), nuevo_stock).quantize(Decimal('0.01'))
+    Insumo.objects.bulk_update(insumos, ['stock_actual'])
+    programar_actualizacion(insumos=requeridos)
+
+def procesar_venta_producto(producto, cantidad_vendida, grafo=None):
     """
-    - Si tiene receta -> descuenta insumos.
+    - Si tiene receta -> descuenta insumos (con `grafo` si ya está cargado).
     - Si no tiene receta -> descuenta stock directo.
     """
     cantidad_vendida = Decimal(cantidad_vendida)
@@ -29,9 +37,26 @@ def procesar_venta_producto(producto, cantidad_vendida):
     with transaction.atomic():
         if producto.receta:
             total_receta_a_consumir = producto.cantidad_receta * cantidad_vendida
-            descontar_stock_recursivo_receta(producto.receta, total_receta_a_consumir)
+            descontar_stock_recursivo_receta(producto.receta, total_receta_a_consumir, grafo)
         else:
             if producto.stock is not None:
                 nuevo_stock = producto.stock - int(cantidad_vendida)
                 producto.stock = max(0, nuevo_stock)
-                producto.save()
\ No newline at end of file
+                producto.save()
+                programar_actualizacion(productos=[producto.id])
+
+
+def procesar_venta_pedido(lineas):
+    """
+    Descuenta el stock de todas las líneas de un pedido en una transacción.
+
+    Las recetas de todos los productos se cargan juntas en un solo grafo
+    (sólo lo alcanzable desde ellas), que se usa para todas las líneas.
+    `lineas` es una lista de (producto, cantidad vendida).
+    """
+    recetas = {producto.receta_id for producto, _ in lineas if producto.receta_id}
+    grafo = GrafoRecetas.cargar(recetas=recetas) if recetas else None
+
+    with transaction.atomic():
+        for producto, cantidad_vendida in lineas:
+            procesar_venta_producto(producto, cantidad_vendida, grafo)
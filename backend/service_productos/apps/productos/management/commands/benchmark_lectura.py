@@ -0,0 +1,8 @@
+from apps.productos.views import ProductoListarView
+from utils.benchmark_lectura import BenchmarkLecturaCommand
+
+
+class Command(BenchmarkLecturaCommand):
+    vistas = {
+        'ProductoListarView': (ProductoListarView, '/api/productos/listar/'),
+    }
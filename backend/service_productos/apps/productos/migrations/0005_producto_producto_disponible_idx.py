@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categorias', '0002_alter_categoria_table'),
+        ('productos', '0004_producto_cantidad_receta_producto_receta_and_more'),
+        ('recetas', '0002_remove_receta_productos_recetasubreceta_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['disponible', 'nombre'], name='producto_disponible_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+def crear_version(apps, schema_editor):
+    apps.get_model('productos', 'CatalogoVersion').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0005_producto_producto_disponible_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogoVersion',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'catalogo_version',
+            },
+        ),
+        migrations.RunPython(crear_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_catalogo_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisponibilidadProducto',
+            fields=[
+                ('producto', models.OneToOneField(db_column='id_producto', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='disponibilidad', serialize=False, to='productos.producto')),
+                ('maximo', models.IntegerField(blank=True, db_column='maximo', null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True, db_column='actualizado')),
+            ],
+            options={
+                'db_table': 'producto_disponibilidad',
+            },
+        ),
+    ]
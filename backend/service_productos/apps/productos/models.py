@@ -39,3 +39,44 @@ class Producto(models.Model):
     
     class Meta:
         db_table = 'producto'
+        indexes = [
+            # Búsqueda de productos disponibles por nombre (disponible = ? AND nombre LIKE ?):
+            # el LIKE se evalúa sobre el índice antes de leer las filas
+            models.Index(fields=['disponible', 'nombre'], name='producto_disponible_idx'),
+        ]
+
+
+class CatalogoVersion(models.Model):
+    """!
+    @brief Versión del catálogo de productos (una sola fila).
+    @details
+        Sube en uno con cada cambio de productos (alta, edición, baja, importación
+        o cambio masivo). Quien guarde una copia del catálogo compara la versión
+        para saber si tiene que volver a pedirlo.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'catalogo_version'
+
+
+class DisponibilidadProducto(models.Model):
+    """!
+    @brief Cuántas unidades de un producto se pueden vender todavía con el stock actual.
+    @details
+        Para un producto con receta es lo que alcanza a producirse con el
+        `stock_actual` de sus insumos; sin receta, su `stock`. `maximo` es null
+        si el producto no tiene límite (sin receta ni stock, o receta sin
+        insumos). Se recalcula después de cada cambio de stock, insumos,
+        recetas o productos (ver `apps/productos/disponibilidad.py`).
+    """
+    producto = models.OneToOneField(
+        Producto, primary_key=True, on_delete=models.CASCADE, db_column='id_producto', related_name='disponibilidad',
+    )
+    maximo = models.IntegerField(null=True, blank=True, db_column='maximo')
+    actualizado = models.DateTimeField(auto_now=True, db_column='actualizado')
+
+    class Meta:
+        db_table = 'producto_disponibilidad'
@@ -0,0 +1,6 @@
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(r'api/productos/ws/catalogo/$', consumers.CatalogoConsumer.as_asgi()),
+]
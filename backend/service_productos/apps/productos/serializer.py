@@ -1,10 +1,14 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Producto
 from apps.categorias.models import Categoria
 from apps.categorias.serializer import CategoriaSerializer
 from apps.recetas.models import Receta
+from utils.sparse_fields import CamposDinamicosSerializerMixin
+from .catalogo import MODOS, DIRECCIONES
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """!
     @brief Serializador para el modelo Producto.
     @details
@@ -30,3 +34,39 @@ class ProductoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Producto
         fields = ['id', 'nombre', 'descripcion', 'precio_unitario', 'disponible', 'stock', 'receta_id', 'receta', 'cantidad_receta', 'categoria_id', 'categoria']
+
+
+class CambioMasivoSerializer(serializers.Serializer):
+    """!
+    @brief Valida un cambio masivo de precios o disponibilidad.
+    @details
+        Filtros (al menos uno, se combinan con AND): `categoria` (id), `ids` y
+        `nombre` (contiene). Cambios (al menos uno): `modo` + `valor` para el
+        precio, con `redondeo` y `direccion`, y/o `disponible`.
+        Sin `confirmar` sólo se devuelve la vista previa; `version` es la que
+        devolvió la vista previa y evita aplicar un cambio sobre un catálogo
+        que se modificó mientras tanto.
+    """
+    categoria = serializers.IntegerField(required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    nombre = serializers.CharField(required=False)
+
+    modo = serializers.ChoiceField(choices=MODOS, required=False)
+    valor = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    redondeo = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), default=Decimal('0.01'))
+    direccion = serializers.ChoiceField(choices=DIRECCIONES, default='cercano')
+    disponible = serializers.BooleanField(required=False)
+
+    confirmar = serializers.BooleanField(default=False)
+    version = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not any(campo in data for campo in ('categoria', 'ids', 'nombre')):
+            raise serializers.ValidationError('Indique al menos un filtro: categoria, ids o nombre.')
+        if ('modo' in data) != ('valor' in data):
+            raise serializers.ValidationError('El cambio de precio requiere modo y valor.')
+        if 'modo' not in data and 'disponible' not in data:
+            raise serializers.ValidationError('Indique un cambio de precio (modo y valor) o de disponible.')
+        if data.get('modo') == 'porcentaje' and data['valor'] <= -100:
+            raise serializers.ValidationError({'valor': 'El porcentaje debe ser mayor que -100.'})
+        return data
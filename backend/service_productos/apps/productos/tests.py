@@ -2,9 +2,30 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from types import SimpleNamespace
-from apps.productos.models import Producto
+from django.core.management import call_command
+import io
+from decimal import Decimal
+from apps.productos.models import Producto, DisponibilidadProducto
 from apps.categorias.models import Categoria
+from apps.recetas.models import Receta, RecetaInsumo, RecetaSubReceta
+from apps.insumos.models import Insumo
+from apps.productos.disponibilidad import disponibilidad, actualizar_disponibilidad
+from unittest import mock
+from apps.productos.logic import procesar_venta_producto
+from utils.query_budget import QueryBudgetTestMixin
+from utils.query_plan import PlanConsultasTestMixin
+from utils import metrics
+from utils.event_bus import obtener_backend, nombre_stream
+from django.test import override_settings
+from django.db import transaction
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from products.asgi import application
+from apps.productos.catalogo import invalidar_catalogo, datos_evento
 
 
 class ProductoAPITestCase(APITestCase):
@@ -194,3 +215,406 @@ class ProductoAPITestCase(APITestCase):
         self.client.force_authenticate(user=self.cliente_user)
         response = self.client.post(f"{self.url_eliminar}?id={self.producto.id}")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProductoListarCamposTestCase(APITestCase):
+    """!
+    @brief Casos de prueba de paginación y `?fields=` en el listado de productos.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.categoria = Categoria.objects.create(nombre='Pizzas', descripcion='')
+        for i in range(3):
+            Producto.objects.create(
+                nombre=f'Pizza {i}',
+                descripcion='Descripcion larga',
+                precio_unitario=100 + i,
+                categoria=self.categoria,
+            )
+
+    def test_listar_campos_con_categoria_anidada(self):
+        response = self.client.get(reverse('producto_listar'), {'fields': 'id,nombre,categoria'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0].keys()), {'id', 'nombre', 'categoria'})
+        self.assertEqual(response.data[0]['categoria']['nombre'], 'Pizzas')
+
+    def test_listar_paginado(self):
+        response = self.client.get(reverse('producto_listar'), {'limite': 2, 'fields': 'id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_lectura_rapida_misma_respuesta_byte_a_byte(self):
+        receta = Receta.objects.create(nombre='Masa')
+        Producto.objects.create(
+            nombre='Fugazzeta \u2028 "especial"', descripcion='Con\ncebolla', precio_unitario=Decimal('1300.5'),
+            categoria=self.categoria, receta=receta, cantidad_receta=Decimal('0.5'), stock=None,
+        )
+        for parametros in ({}, {'fields': 'id,nombre,categoria'}, {'fields': 'precio_unitario,receta'}):
+            respuestas = []
+            for rapida in (False, True):
+                with override_settings(LECTURA_RAPIDA=rapida):
+                    response = self.client.get(reverse('producto_listar'), parametros)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                respuestas.append(response.content)
+            self.assertEqual(respuestas[1], respuestas[0], parametros)
+
+    def test_comando_benchmark_lectura(self):
+        salida = io.StringIO()
+        call_command('benchmark_lectura', repeticiones=2, stdout=salida)
+        self.assertTrue(salida.getvalue().splitlines()[1].endswith('sí'))
+
+
+class ProductoPresupuestoConsultasTestCase(QueryBudgetTestMixin, APITestCase):
+    """!
+    @brief Los listados de productos no deben consultar la categoría de cada producto.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def generar_productos(self, n):
+        for i in range(Producto.objects.count(), n):
+            categoria = Categoria.objects.create(nombre=f'Categoria {i}', descripcion='')
+            Producto.objects.create(nombre=f'Pizza {i}', descripcion='', precio_unitario=100, categoria=categoria)
+
+    def test_listar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('producto_listar'), self.generar_productos)
+
+    def test_buscar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('producto_buscar') + '?nombre=pizza', self.generar_productos)
+
+
+class ProductoMetricasTestCase(APITestCase):
+    """!
+    @brief El listado de productos queda registrado en /metrics.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_metricas_de_listado(self):
+        antes = metrics.SOLICITUDES.valor(view='ProductoListarView', method='GET', status=200)
+        self.client.get(reverse('producto_listar'))
+        self.assertEqual(metrics.SOLICITUDES.valor(view='ProductoListarView', method='GET', status=200), antes + 1)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('db_queries_per_request_count{view="ProductoListarView"}', response.content.decode())
+
+
+class ProductoPlanConsultasTestCase(PlanConsultasTestMixin, APITestCase):
+    """!
+    @brief La búsqueda por nombre debe resolverse con el índice de productos disponibles.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        categoria = Categoria.objects.create(nombre='Empanadas', descripcion='Empanadas')
+        for nombre, disponible in (('Empanada de carne', True), ('Empanada de pollo', True), ('Empanada vieja', False)):
+            Producto.objects.create(
+                nombre=nombre, descripcion=nombre, precio_unitario=100, disponible=disponible, categoria=categoria,
+            )
+
+    def test_buscar_por_nombre_usa_indice(self):
+        url = reverse('producto_buscar') + '?nombre=carne'
+        self.assertUsaIndices(url, ['producto_disponible_idx'])
+        self.assertSinRecorridosCompletos(url, ['producto'])
+
+        response = self.client.get(url)
+        self.assertEqual([p['nombre'] for p in response.data], ['Empanada de carne'])
+
+
+class ProductoImportarTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.bebidas = Categoria.objects.create(nombre='Bebidas', descripcion='Bebidas')
+        self.comidas = Categoria.objects.create(nombre='Comidas', descripcion='Comidas')
+        self.receta = Receta.objects.create(nombre='Empanada de carne')
+        Producto.objects.create(nombre='Coca Cola', descripcion='500ml', precio_unitario=1500, categoria=self.bebidas)
+
+    def importar(self, contenido, **params):
+        archivo = SimpleUploadedFile('productos.csv', contenido.encode('utf-8'), content_type='text/csv')
+        url = reverse('producto_importar')
+        if params:
+            url += '?' + '&'.join(f'{clave}={valor}' for clave, valor in params.items())
+        return self.client.post(url, {'archivo': archivo}, format='multipart')
+
+    def test_resuelve_categoria_y_receta_y_reporta_errores(self):
+        contenido = (
+            "nombre,descripcion,precio_unitario,disponible,categoria,receta,cantidad_receta\n"
+            "Empanada,Carne,\"1200,50\",si,Comidas,Empanada de carne,1\n"
+            f"Docena,12 empanadas,12000,no,{self.comidas.id},Empanada de carne,12\n"
+            "Agua,,abc,si,Bebidas,,\n"
+            "Pizza,,9000,si,Pastas,,\n"
+            "Coca Cola,1l,2500,si,Bebidas,,\n"
+        )
+        response = self.importar(contenido)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['creados'], 2)
+        errores = {e['fila']: e['errores'] for e in response.data['errores']}
+        self.assertEqual(set(errores), {4, 5, 6})
+        self.assertIn('precio_unitario', errores[4])
+        self.assertIn('Pastas', errores[5]['categoria'])
+        self.assertIn('Ya existe', errores[6]['nombre'])
+
+        empanada = Producto.objects.get(nombre='Empanada')
+        self.assertEqual(str(empanada.precio_unitario), '1200.50')
+        self.assertEqual(empanada.categoria, self.comidas)
+        self.assertEqual(empanada.receta, self.receta)
+        docena = Producto.objects.get(nombre='Docena')
+        self.assertFalse(docena.disponible)
+        self.assertEqual(docena.cantidad_receta, 12)
+
+    def test_actualizar_y_consultas_por_lote(self):
+        filas = "".join(f"Producto {i},,{100 + i},si,Comidas,,\n" for i in range(1200))
+        encabezado = "nombre,descripcion,precio_unitario,disponible,categoria,receta,cantidad_receta\n"
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.importar(encabezado + "Coca Cola,,1800,si,Bebidas,,\n" + filas, actualizar=1)
+        self.assertEqual(response.data['creados'], 1200)
+        self.assertEqual(response.data['actualizados'], 1)
+        self.assertEqual(Producto.objects.get(nombre='Coca Cola').precio_unitario, 1800)
+        # 3 lotes de 500 filas: una búsqueda de categorías y una de existentes por lote
+        # (sin recetas en el archivo no se consultan), más la versión nueva del catálogo
+        # para el evento. SQLite parte cada INSERT en varios.
+        lecturas = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('SELECT')]
+        self.assertEqual(len(lecturas), 3 * 2 + 1)
+
+
+class ProductoCambioMasivoTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.pizzas = Categoria.objects.create(nombre='Pizzas', descripcion='')
+        self.bebidas = Categoria.objects.create(nombre='Bebidas', descripcion='')
+        self.muzza = Producto.objects.create(nombre='Muzzarella', descripcion='', precio_unitario=Decimal('1000'), categoria=self.pizzas)
+        self.napo = Producto.objects.create(nombre='Napolitana', descripcion='', precio_unitario=Decimal('1235.50'), categoria=self.pizzas)
+        self.agua = Producto.objects.create(nombre='Agua', descripcion='', precio_unitario=Decimal('500'), categoria=self.bebidas)
+
+    def cambiar(self, **datos):
+        return self.client.post(reverse('producto_cambio_masivo'), datos, format='json')
+
+    def precios(self):
+        return dict(Producto.objects.values_list('nombre', 'precio_unitario'))
+
+    def test_vista_previa_no_modifica(self):
+        version = self.client.get(reverse('catalogo_version')).data['version']
+        response = self.cambiar(categoria=self.pizzas.id, modo='porcentaje', valor='10', redondeo='50', direccion='arriba')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['confirmado'])
+        self.assertEqual(response.data['version'], version)
+        cambios = {c['nombre']: c['precio_nuevo'] for c in response.data['cambios']}
+        self.assertEqual(cambios, {'Muzzarella': Decimal('1100'), 'Napolitana': Decimal('1400')})
+        self.assertEqual(self.precios()['Muzzarella'], Decimal('1000'))
+
+    def test_confirmar_aplica_un_update_y_sube_la_version(self):
+        version = self.client.get(reverse('catalogo_version')).data['version']
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.cambiar(categoria=self.pizzas.id, modo='monto', valor='-35.5', redondeo='100', confirmar=True, version=version)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 1000 - 35,50 redondea otra vez a 1000: sólo cambia la Napolitana
+        self.assertEqual(response.data['cantidad'], 1)
+        self.assertEqual(response.data['version'], version + 1)
+        self.assertEqual(self.precios(), {'Muzzarella': Decimal('1000'), 'Napolitana': Decimal('1200'), 'Agua': Decimal('500')})
+        actualizaciones = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE "producto"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(self.client.get(reverse('catalogo_version')).data['version'], version + 1)
+
+    def test_confirmar_publica_los_productos_cambiados(self):
+        with override_settings(EVENTOS_BACKEND='memoria'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.cambiar(ids=[self.muzza.id, self.agua.id], modo='monto', valor='100', confirmar=True)
+            eventos = obtener_backend().mensajes(nombre_stream('producto_actualizado'))
+        self.assertEqual(len(eventos), 1)
+        datos = eventos[0]['datos']
+        self.assertEqual(datos['version'], response.data['version'])
+        self.assertFalse(datos['completo'])
+        self.assertEqual(
+            {p['nombre']: (p['precio_unitario'], p['disponible']) for p in datos['productos']},
+            {'Muzzarella': ('1100.00', True), 'Agua': ('600.00', True)},
+        )
+
+    def test_catalogo_completo_y_sin_cambios(self):
+        response = self.client.get(reverse('catalogo'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        version = response.data['version']
+        self.assertEqual([p['nombre'] for p in response.data['productos']], ['Muzzarella', 'Napolitana', 'Agua'])
+        self.assertEqual(set(response.data['productos'][0]), {'id', 'nombre', 'precio_unitario', 'disponible'})
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('catalogo'), {'version': version})
+        self.assertEqual(response.data, {'version': version, 'productos': None})
+        self.assertEqual(len(consultas), 1)
+
+    def test_disponible_solo_cambia_los_distintos(self):
+        self.agua.disponible = False
+        self.agua.save()
+        response = self.cambiar(ids=[self.muzza.id, self.agua.id], disponible=False, confirmar=True)
+        self.assertEqual([c['nombre'] for c in response.data['cambios']], ['Muzzarella'])
+        self.assertFalse(Producto.objects.get(id=self.muzza.id).disponible)
+        self.assertTrue(Producto.objects.get(id=self.napo.id).disponible)
+
+    def test_version_vieja_no_aplica(self):
+        version = self.client.get(reverse('catalogo_version')).data['version']
+        self.cambiar(ids=[self.agua.id], disponible=False, confirmar=True)
+        response = self.cambiar(categoria=self.pizzas.id, modo='porcentaje', valor='10', confirmar=True, version=version)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['version'], version + 1)
+        self.assertEqual(self.precios()['Muzzarella'], Decimal('1000'))
+
+    def test_validaciones(self):
+        self.assertEqual(self.cambiar(modo='monto', valor='10').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.cambiar(categoria=self.pizzas.id).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.cambiar(categoria=self.pizzas.id, modo='porcentaje').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.cambiar(categoria=self.bebidas.id, modo='monto', valor='-600', confirmar=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.precios()['Agua'], Decimal('500'))
+
+
+class DisponibilidadProductoTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recepcionista', password='recep123')
+        self.user.rol = 'Recepcionista'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        categoria = Categoria.objects.create(nombre='Pizzas', descripcion='')
+        self.harina = Insumo.objects.create(nombre='Harina', unidad_medida='kg', stock_actual=Decimal('10'), costo_unitario=800)
+        self.queso = Insumo.objects.create(nombre='Queso', unidad_medida='kg', stock_actual=Decimal('3'), costo_unitario=6000)
+        # Masa: 0.5 harina; Pizza: 1 Masa + 0.4 queso
+        self.masa = Receta.objects.create(nombre='Masa')
+        self.pizza = Receta.objects.create(nombre='Pizza')
+        RecetaInsumo.objects.create(receta=self.masa, insumo=self.harina, cantidad=Decimal('0.50'))
+        RecetaInsumo.objects.create(receta=self.pizza, insumo=self.queso, cantidad=Decimal('0.40'))
+        RecetaSubReceta.objects.create(receta_padre=self.pizza, receta_hija=self.masa, cantidad=Decimal('1.00'))
+
+        self.muzza = Producto.objects.create(nombre='Muzzarella', descripcion='', precio_unitario=1000, categoria=categoria, receta=self.pizza)
+        self.media = Producto.objects.create(
+            nombre='Media pizza', descripcion='', precio_unitario=600, categoria=categoria, receta=self.pizza, cantidad_receta=Decimal('0.5'),
+        )
+        self.prepizza = Producto.objects.create(nombre='Prepizza', descripcion='', precio_unitario=500, categoria=categoria, receta=self.masa)
+        self.gaseosa = Producto.objects.create(nombre='Gaseosa', descripcion='', precio_unitario=500, categoria=categoria, stock=12)
+        self.postre = Producto.objects.create(nombre='Postre', descripcion='', precio_unitario=500, categoria=categoria, stock=None)
+
+    def test_calcula_todo_el_menu_la_primera_vez(self):
+        response = self.client.get(reverse('producto_disponibilidad'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['productos'], {
+            self.muzza.id: 7, self.media.id: 15, self.prepizza.id: 20, self.gaseosa.id: 12, self.postre.id: None,
+        })
+        with self.assertNumQueries(1):
+            self.client.get(reverse('producto_disponibilidad'))
+
+    def test_venta_actualiza_solo_los_productos_afectados(self):
+        disponibilidad()
+        with self.captureOnCommitCallbacks(execute=True):
+            procesar_venta_producto(self.muzza, 2)
+        self.assertEqual(disponibilidad(), {
+            self.muzza.id: 5, self.media.id: 11, self.prepizza.id: 18, self.gaseosa.id: 12, self.postre.id: None,
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            procesar_venta_producto(self.gaseosa, 5)
+        self.assertEqual(disponibilidad()[self.gaseosa.id], 7)
+
+        # Un insumo que no usa la receta de la prepizza no la recalcula
+        self.assertEqual(actualizar_disponibilidad(insumos=[self.queso.id]), {self.muzza.id: 5, self.media.id: 11})
+
+    def test_upsert_sin_columnas_de_conflicto_en_mysql(self):
+        # MySQL (ON DUPLICATE KEY UPDATE) no admite unique_fields: Django lanzaría NotSupportedError
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(DisponibilidadProducto.objects, 'bulk_create') as bulk_create:
+            actualizar_disponibilidad(productos=[self.gaseosa.id])
+        opciones = bulk_create.call_args.kwargs
+        self.assertTrue(opciones['update_conflicts'])
+        self.assertNotIn('unique_fields', opciones)
+        self.assertEqual(opciones['update_fields'], ['maximo', 'actualizado'])
+
+        # Con conflicto por clave (SQLite, PostgreSQL) se actualiza la fila existente
+        actualizar_disponibilidad(productos=[self.gaseosa.id])
+        Producto.objects.filter(id=self.gaseosa.id).update(stock=3)
+        actualizar_disponibilidad(productos=[self.gaseosa.id])
+        self.assertEqual(DisponibilidadProducto.objects.get(producto=self.gaseosa).maximo, 3)
+
+
+class CatalogoTiempoRealTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='admin123')
+        self.user.rol = 'Administrador'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.pizzas = Categoria.objects.create(nombre='Pizzas', descripcion='')
+        self.muzza = Producto.objects.create(nombre='Muzzarella', descripcion='', precio_unitario=1000, categoria=self.pizzas, stock=4)
+        self.muzza.refresh_from_db()
+
+    def escuchar(self, *acciones):
+        """!
+        @brief Ejecuta cada acción (confirmando su transacción) y devuelve los mensajes recibidos por el WebSocket.
+        """
+        def confirmar(accion):
+            with self.captureOnCommitCallbacks(execute=True):
+                accion()
+
+        async def conectar_y_ejecutar():
+            comunicador = WebsocketCommunicator(application, '/api/productos/ws/catalogo/')
+            conectado, _ = await comunicador.connect()
+            self.assertTrue(conectado)
+            for accion in acciones:
+                await sync_to_async(confirmar)(accion)
+            mensajes = []
+            while not await comunicador.receive_nothing(timeout=0.2):
+                mensajes.append(await comunicador.receive_json_from())
+            await comunicador.disconnect()
+            return mensajes
+
+        return async_to_sync(conectar_y_ejecutar)()
+
+    def test_cambios_de_productos_y_disponibilidad(self):
+        disponibilidad()
+
+        def vender():
+            procesar_venta_producto(self.muzza, 1)
+
+        def revertido():
+            with transaction.atomic():
+                invalidar_catalogo([datos_evento(self.muzza)])
+                transaction.set_rollback(True)
+
+        mensajes = self.escuchar(lambda: invalidar_catalogo([datos_evento(self.muzza)]), vender, revertido)
+        self.assertEqual(mensajes, [
+            {'tipo': 'producto', 'version': 1, 'completo': False, 'eliminados': [], 'productos': [
+                {'id': self.muzza.id, 'nombre': 'Muzzarella', 'precio_unitario': '1000.00', 'disponible': True},
+            ]},
+            {'tipo': 'disponibilidad', 'productos': {str(self.muzza.id): 3}},
+        ])
+
+    def test_eliminar_categoria_elimina_sus_productos(self):
+        mensajes = self.escuchar(lambda: self.client.post(reverse('categoria_eliminar') + f'?id={self.pizzas.id}'))
+        self.assertEqual([mensaje['tipo'] for mensaje in mensajes], ['producto', 'categoria'])
+        self.assertEqual(mensajes[0]['eliminados'], [self.muzza.id])
+        self.assertEqual(mensajes[1]['eliminadas'], [self.pizzas.id])
@@ -0,0 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+import json
+
+from utils.channels_helper import send_channel_message
+from .consumers import GRUPO_CATALOGO
+
+
+def notificar_cambio(tipo, **datos):
+    """!
+    @brief Envía un cambio del catálogo a los clientes conectados al WebSocket, cuando se confirme la transacción.
+    @details
+        Si la transacción se revierte no se envía nada, así los clientes nunca
+        ven un cambio que no quedó guardado. Los mensajes son compactos: sólo lo
+        que cambió, con el mismo `tipo` que usa el cliente para aplicarlo.
+
+        - 'producto': `version` del catálogo, `productos` (id, nombre,
+          precio_unitario, disponible), `eliminados` y `completo` (si es true
+          cambió una parte no detallada y hay que volver a pedir el listado).
+          Si la versión no es la siguiente a la que tiene el cliente, se
+          perdió un mensaje y también conviene volver a pedirlo.
+        - 'categoria': `categorias` (id, nombre) y `eliminadas`.
+        - 'disponibilidad': `productos`, {id: unidades vendibles o null}, sólo
+          los que cambiaron.
+        - 'receta': `recetas` (ids) y `eliminadas`, o `completo`.
+
+    @example
+        notificar_cambio('categoria', categorias=[{'id': 3, 'nombre': 'Pizzas'}])
+    """
+    # Decimal y fechas pasan a texto como en las respuestas de la API
+    mensaje = json.loads(json.dumps({'tipo': tipo, **datos}, cls=DjangoJSONEncoder))
+    transaction.on_commit(lambda: send_channel_message(
+        GRUPO_CATALOGO, {'type': 'catalogo.cambio', 'message': mensaje}, 3, 0.5,
+    ))
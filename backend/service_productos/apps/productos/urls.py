@@ -6,6 +6,11 @@ from apps.productos.views import (
     ProductoListarView,
     ProductoBuscarView,
     ActualizarStockProductoView,
+    ProductoImportarView,
+    ProductoCambioMasivoView,
+    CatalogoVersionView,
+    CatalogoView,
+    DisponibilidadView,
 )
 
 urlpatterns = [
@@ -15,4 +20,9 @@ urlpatterns = [
     path('listar/', ProductoListarView.as_view(), name='producto_listar'),
     path('buscar/', ProductoBuscarView.as_view(), name='producto_buscar'),
     path('consumir-stock/', ActualizarStockProductoView.as_view(), name='producto-consumir-stock'),
+    path('importar/', ProductoImportarView.as_view(), name='producto_importar'),
+    path('cambio-masivo/', ProductoCambioMasivoView.as_view(), name='producto_cambio_masivo'),
+    path('catalogo/version/', CatalogoVersionView.as_view(), name='catalogo_version'),
+    path('catalogo/', CatalogoView.as_view(), name='catalogo'),
+    path('disponibilidad/', DisponibilidadView.as_view(), name='producto_disponibilidad'),
 ]
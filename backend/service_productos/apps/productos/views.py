@@ -3,33 +3,52 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Producto
-from .serializer import ProductoSerializer
-from .logic import procesar_venta_producto
+from .serializer import ProductoSerializer, CambioMasivoSerializer
+from .catalogo import (
+    CatalogoDesactualizado, version_catalogo, invalidar_catalogo, datos_evento, catalogo_completo, filtrar_productos,
+    preparar_cambio, precios_fuera_de_rango, vista_previa, aplicar_cambio,
+)
+from .logic import procesar_venta_pedido
+from .disponibilidad import disponibilidad, programar_actualizacion
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AllowRoles
 from rest_framework.generics import ListAPIView
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
+from utils.fast_read import LecturaRapida, LecturaRapidaViewMixin
+from utils.importacion import ImportarCSVView
+from .importacion import ImportadorProductos
 
 class ActualizarStockProductoView(APIView):
     """
     Endpoint llamado por el servicio de Pedidos o Frontend cuando se confirma una venta.
     Recibe: { "producto_id": 1, "cantidad": 2 }
+    o, para todas las líneas de un pedido: { "lineas": [{ "producto_id": 1, "cantidad": 2 }, ...] }
     """
     permission_classes = [IsAuthenticated] 
 
     def post(self, request):
-        producto_id = request.data.get('producto_id')
-        cantidad = request.data.get('cantidad')
+        lineas = request.data.get('lineas')
+        if lineas is None:
+            lineas = [{'producto_id': request.data.get('producto_id'), 'cantidad': request.data.get('cantidad')}]
 
-        if not producto_id or cantidad is None:
+        try:
+            pedidas = [(int(linea['producto_id']), linea['cantidad']) for linea in lineas]
+        except (TypeError, ValueError, KeyError):
+            pedidas = None
+        if not pedidas or any(cantidad is None for _, cantidad in pedidas):
             return Response(
                 {"error": "Se requieren 'producto_id' y 'cantidad'"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        producto = get_object_or_404(Producto, id=producto_id)
+        productos = Producto.objects.select_related('receta').in_bulk({producto_id for producto_id, _ in pedidas})
+        if any(producto_id not in productos for producto_id, _ in pedidas):
+            return Response({"detail": "No encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            procesar_venta_producto(producto, cantidad)
+            # Un solo grafo de recetas para todas las líneas
+            procesar_venta_pedido([(productos[producto_id], cantidad) for producto_id, cantidad in pedidas])
             return Response(
                 {"detail": "Stock actualizado correctamente"}, 
                 status=status.HTTP_200_OK
@@ -66,7 +85,9 @@ class ProductoCrearView(APIView):
 
         serializer = ProductoSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            producto = serializer.save()
+            invalidar_catalogo([datos_evento(producto)])
+            programar_actualizacion(productos=[producto.id])
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -105,7 +126,9 @@ class ProductoEditarView(APIView):
             productoSerializer = ProductoSerializer(producto, data=request.data)
 
             if productoSerializer.is_valid():
-                productoSerializer.save()
+                producto = productoSerializer.save()
+                invalidar_catalogo([datos_evento(producto)])
+                programar_actualizacion(productos=[producto.id])
                 return Response({'detail':'Producto editado exitosamente'}, status=status.HTTP_200_OK)
             else:
                 return Response(productoSerializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -143,49 +166,48 @@ class ProductoEliminarView(APIView):
 
         try:
             producto = Producto.objects.get(id=id)
+            eliminado = producto.id
             producto.delete()
+            invalidar_catalogo(eliminados=[eliminado])
             return Response({'detail':'Producto eliminado exitosamente'}, status=status.HTTP_200_OK)
         except:
             return Response({'detail':'Producto a eliminar no encontrado'}, status=status.HTTP_400_BAD_REQUEST)
         
-class ProductoListarView(APIView):
+class ProductoListarView(CamposDinamicosViewMixin, LecturaRapidaViewMixin, ListAPIView):
     """!
     @brief Vista para listar todos los productos.
     @details
         Permite obtener una lista de todos los productos mediante una solicitud GET.
+        Admite paginación por cursor (`?limite=` / `?cursor=`) y limitar los
+        campos devueltos con `?fields=id,nombre,precio_unitario`.
+        Sin paginación, la respuesta se arma con `LecturaRapida` (ver `utils/fast_read.py`).
         Requiere que el usuario esté autenticado.
         No se requieren privilegios de superusuario para esta acción.
     """
+    queryset = Producto.objects.select_related('categoria')
+    serializer_class = ProductoSerializer
+    lectura_rapida = LecturaRapida(ProductoSerializer)
+    pagination_class = CursorPaginacionOpcional
     permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        """!
-        @brief Maneja las solicitudes GET para listar todos las productos.
-        @details
-            Obtiene todas las instancias de Producto, los serializa con ProductoSerializer
-            y las devuelve con un estado HTTP 200 OK.
-        @param request: Objeto de la solicitud HTTP.
-        @return: Respuesta HTTP 200 OK con la lista de productos serializados.
-        """
-
-        productos = Producto.objects.all()
-        serializer = ProductoSerializer(productos, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    query_budget = 5
 
 class ProductoBuscarView(ListAPIView):
     serializer_class = ProductoSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
         id = self.request.query_params.get('id')
         nombre = self.request.query_params.get('nombre')
 
-        queryset = Producto.objects.all()
+        queryset = Producto.objects.select_related('categoria')
 
         if id:
             queryset = queryset.filter(id=id)
         if nombre:
-            queryset = queryset.filter(nombre__icontains=nombre, disponible=True)
+            # `disponible=True` se traduce a `WHERE disponible_producto`, que no usa índices;
+            # con `IN` es una igualdad y se resuelve con producto_disponible_idx
+            queryset = queryset.filter(nombre__icontains=nombre, disponible__in=[True])
 
         return queryset
 
@@ -201,3 +223,126 @@ class ProductoBuscarView(ListAPIView):
 
         return super().list(request, *args, **kwargs)
 
+
+class ProductoImportarView(ImportarCSVView):
+    """!
+    @brief Vista para dar de alta (o actualizar) muchos productos desde un CSV.
+    @details
+        Recibe el archivo en el campo `archivo`. Ver `ImportadorProductos` para
+        las columnas e `ImportarCSVView` para el formato de la respuesta.
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Recepcionista', 'Administrador')]
+    importador_class = ImportadorProductos
+
+
+class ProductoCambioMasivoView(APIView):
+    """!
+    @brief Cambia el precio o la disponibilidad de todos los productos que cumplen un filtro.
+    @details
+        Recibe los datos de `CambioMasivoSerializer`. Sin `confirmar` responde
+        la vista previa: los productos que cambiarían con su precio y
+        disponibilidad actuales y nuevos, y la `version` del catálogo. Con
+        `confirmar: true` aplica el cambio con un solo UPDATE y sube la versión
+        del catálogo una vez.
+
+    @example
+        POST /api/productos/cambio-masivo/
+        {"categoria": 3, "modo": "porcentaje", "valor": "8", "redondeo": "50", "direccion": "arriba"}
+        -> {"confirmado": false, "version": 41, "cantidad": 12, "cambios": [...]}
+        POST /api/productos/cambio-masivo/  (mismos datos + "confirmar": true, "version": 41)
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Recepcionista', 'Administrador')]
+
+    def post(self, request):
+        serializer = CambioMasivoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+
+        queryset, valores = preparar_cambio(
+            filtrar_productos(datos.get('categoria'), datos.get('ids'), datos.get('nombre')),
+            modo=datos.get('modo'),
+            valor=datos.get('valor'),
+            redondeo=datos['redondeo'],
+            direccion=datos['direccion'],
+            disponible=datos.get('disponible'),
+        )
+        if 'modo' in datos and precios_fuera_de_rango(queryset):
+            return Response({'detail': 'El cambio deja precios negativos o fuera de rango.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not datos['confirmar']:
+            cambios, version = vista_previa(queryset), version_catalogo()
+        else:
+            try:
+                cambios, version = aplicar_cambio(queryset, valores, datos.get('version'))
+            except CatalogoDesactualizado as e:
+                return Response(
+                    {'detail': 'El catálogo cambió desde la vista previa. Vuelva a generarla.', 'version': e.version},
+                    status=status.HTTP_409_CONFLICT,
+                )
+        return Response({
+            'confirmado': datos['confirmar'],
+            'version': version,
+            'cantidad': len(cambios),
+            'cambios': cambios,
+        }, status=status.HTTP_200_OK)
+
+
+class CatalogoVersionView(APIView):
+    """!
+    @brief Devuelve la versión actual del catálogo de productos.
+    @details
+        Permite a quien guarda una copia del catálogo saber, con una consulta
+        liviana, si tiene que volver a descargarlo.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'version': version_catalogo()}, status=status.HTTP_200_OK)
+
+
+class CatalogoView(APIView):
+    """!
+    @brief Devuelve el catálogo completo (id, nombre, precio y disponibilidad) con su versión.
+    @details
+        Lo usan los servicios que guardan una copia del catálogo para cargarla
+        por primera vez o cuando se perdieron eventos `producto_actualizado`.
+        Con `?version=n`, si el catálogo sigue en esa versión responde sólo
+        `{'version': n, 'productos': None}` sin leer los productos.
+
+    @example
+        GET /api/productos/catalogo/
+        -> {"version": 42, "productos": [{"id": 1, "nombre": "Muzzarella", "precio_unitario": 1000.0, "disponible": true}, ...]}
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def get(self, request):
+        conocida = request.query_params.get('version')
+        if conocida is not None and conocida.isdigit() and int(conocida) == version_catalogo():
+            return Response({'version': int(conocida), 'productos': None}, status=status.HTTP_200_OK)
+        version, productos = catalogo_completo()
+        return Response({'version': version, 'productos': productos}, status=status.HTTP_200_OK)
+
+
+class DisponibilidadView(APIView):
+    """!
+    @brief Devuelve cuántas unidades de cada producto se pueden vender todavía con el stock actual.
+    @details
+        Para los productos con receta, lo que alcanza a producirse con el stock
+        de sus insumos; para el resto, su `stock`. null indica que el producto
+        no tiene límite. Los valores ya están calculados (se actualizan después
+        de cada cambio de stock), así que la consulta es una lectura de tabla.
+        Ver `apps/productos/disponibilidad.py`.
+
+    @example
+        GET /api/productos/disponibilidad/
+        -> {"productos": {"1": 14, "2": null, "3": 0}}
+    """
+    permission_classes = [IsAuthenticated]
+    # Una lectura; la primera vez, si la tabla está vacía, se calcula todo el menú
+    query_budget = 6
+
+    def get(self, request):
+        return Response({'productos': disponibilidad()}, status=status.HTTP_200_OK)
+
@@ -0,0 +1,208 @@
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from .models import RecetaInsumo, RecetaSubReceta
+
+
+class GrafoRecetas:
+    """!
+    @brief Composición de todas las recetas cargada en memoria, para explotar requerimientos y costos.
+    @details
+        El grafo (recetas → insumos y recetas → sub-recetas, con sus cantidades)
+        se carga con dos consultas y se guarda como matrices dispersas: un
+        diccionario por receta con sólo los insumos o sub-recetas que usa.
+
+        `requerimientos()` calcula, para todas las recetas a la vez, cuánto de
+        cada insumo lleva una unidad de la receta, contando todos los niveles de
+        sub-recetas. Las recetas se recorren en orden topológico (primero las
+        que no tienen sub-recetas), así cada una se resuelve sumando las filas
+        ya calculadas de sus sub-recetas multiplicadas por la cantidad: es
+        (I − A)⁻¹ aplicado a los insumos directos, sin invertir nada.
+
+        Una vez explotados, el costo de cada receta es el producto de sus
+        requerimientos por el costo de los insumos, así que simular otros costos
+        de insumos (`costos(...)`) no vuelve a recorrer el grafo ni la base.
+
+        Si hay recetas que forman un ciclo (una es sub-receta de otra que la
+        contiene), quedan en `ciclos` y se resuelven como `Receta.calcular_costo()`
+        lo haría cortando el ciclo: la sub-receta que lo cierra no aporta nada.
+
+    @example
+        grafo = GrafoRecetas.cargar()
+        grafo.requerimientos()[receta.id]      # {id_insumo: cantidad}
+        GrafoRecetas.cargar(recetas=[receta.id]).explotar(receta.id, 3)
+        grafo.costos({harina.id: harina.costo_unitario * Decimal('1.2')})
+    """
+
+    def __init__(self, insumos, sub_recetas, costos_insumos):
+        ## {id_receta: {id_insumo: cantidad}} con los insumos directos.
+        self.insumos = insumos
+        ## {id_receta: {id_sub_receta: cantidad}}.
+        self.sub_recetas = sub_recetas
+        ## {id_insumo: costo unitario}.
+        self.costos_insumos = costos_insumos
+        self.ciclos = set()
+        self._requerimientos = None
+        self._componentes = None
+
+    @classmethod
+    def cargar(cls, recetas=None):
+        """!
+        @brief Carga el grafo completo con dos consultas (los costos de insumos vienen en la de insumos).
+        @details
+            Con `recetas` se carga sólo lo alcanzable desde ellas: una consulta de
+            sub-recetas por nivel y una de insumos. Es lo que usa una venta, que
+            no necesita leer todas las recetas.
+        @param recetas: Ids de las recetas de partida (None: todas).
+        """
+        sub_recetas = defaultdict(dict)
+        filas = RecetaSubReceta.objects.values_list('receta_padre_id', 'receta_hija_id', 'cantidad')
+        if recetas is None:
+            for padre_id, hija_id, cantidad in filas:
+                sub_recetas[padre_id][hija_id] = cantidad
+        else:
+            alcanzadas = nivel = set(recetas)
+            while nivel:
+                hijas = set()
+                for padre_id, hija_id, cantidad in filas.filter(receta_padre_id__in=nivel):
+                    sub_recetas[padre_id][hija_id] = cantidad
+                    hijas.add(hija_id)
+                nivel = hijas - alcanzadas
+                alcanzadas = alcanzadas | nivel
+
+        insumos = defaultdict(dict)
+        costos_insumos = {}
+        filas = RecetaInsumo.objects.values_list('receta_id', 'insumo_id', 'cantidad', 'insumo__costo_unitario')
+        if recetas is not None:
+            filas = filas.filter(receta_id__in=alcanzadas)
+        for receta_id, insumo_id, cantidad, costo in filas:
+            insumos[receta_id][insumo_id] = cantidad
+            costos_insumos[insumo_id] = costo
+        return cls(insumos, sub_recetas, costos_insumos)
+
+    def recetas(self):
+        return set(self.insumos) | set(self.sub_recetas) | {hija for hijas in self.sub_recetas.values() for hija in hijas}
+
+    def orden_topologico(self):
+        """!
+        @brief Recetas ordenadas de modo que cada una aparece después de todas sus sub-recetas.
+        @return tuple: (orden, recetas que quedaron fuera por estar en un ciclo o depender de uno).
+        """
+        pendientes = {receta: len(self.sub_recetas.get(receta, {})) for receta in self.recetas()}
+        padres = defaultdict(list)
+        for padre, hijas in self.sub_recetas.items():
+            for hija in hijas:
+                padres[hija].append(padre)
+
+        listas = deque(receta for receta, cantidad in pendientes.items() if cantidad == 0)
+        orden = []
+        while listas:
+            receta = listas.popleft()
+            orden.append(receta)
+            for padre in padres[receta]:
+                pendientes[padre] -= 1
+                if pendientes[padre] == 0:
+                    listas.append(padre)
+        return orden, set(pendientes) - set(orden)
+
+    def _sumar(self, destino, origen, factor):
+        for insumo, cantidad in origen.items():
+            destino[insumo] = destino.get(insumo, 0) + cantidad * factor
+
+    def _cerrar(self, directos):
+        """!
+        @brief Resuelve, para cada receta, sus filas directas más las de todas sus sub-recetas escaladas.
+        @param directos: {id_receta: {columna: cantidad}} con lo que la receta usa sin pasar por sub-recetas.
+        @return dict: {id_receta: {columna: cantidad total}}
+        """
+        orden, self.ciclos = self.orden_topologico()
+        cerrado = {}
+        for receta in orden:
+            total = dict(directos.get(receta, {}))
+            for hija, cantidad in self.sub_recetas.get(receta, {}).items():
+                self._sumar(total, cerrado[hija], cantidad)
+            cerrado[receta] = total
+
+        def resolver(receta, visitando):
+            if receta in cerrado:
+                return cerrado[receta]
+            if receta in visitando:
+                return {}
+            visitando.add(receta)
+            total = dict(directos.get(receta, {}))
+            for hija, cantidad in self.sub_recetas.get(receta, {}).items():
+                self._sumar(total, resolver(hija, visitando), cantidad)
+            visitando.discard(receta)
+            cerrado[receta] = total
+            return total
+
+        for receta in sorted(self.ciclos):
+            resolver(receta, set())
+        return cerrado
+
+    def requerimientos(self):
+        """!
+        @brief Insumos totales por unidad de cada receta, con todos los niveles de sub-recetas.
+        @return dict: {id_receta: {id_insumo: cantidad}}. Se calcula una vez por grafo.
+        """
+        if self._requerimientos is None:
+            self._requerimientos = self._cerrar(self.insumos)
+        return self._requerimientos
+
+    def componentes(self):
+        """!
+        @brief Sub-recetas totales por unidad de cada receta, en todos los niveles.
+        @details
+            Si una receta lleva 2 de Masa y la Masa lleva 1 de Prefermento, la
+            receta lleva 2 de Masa y 2 de Prefermento.
+        @return dict: {id_receta: {id_sub_receta: cantidad}}. Se calcula una vez por grafo.
+        """
+        if self._componentes is None:
+            self._componentes = self._cerrar(self.sub_recetas)
+        return self._componentes
+
+    def explotar(self, receta_id, cantidad=1):
+        """!
+        @brief Insumos necesarios para `cantidad` unidades de una receta.
+        @return dict: {id_insumo: cantidad}
+        """
+        return {insumo: requerido * cantidad for insumo, requerido in self.requerimientos().get(receta_id, {}).items()}
+
+    def explotar_demanda(self, demanda):
+        """!
+        @brief Sub-recetas e insumos necesarios para preparar varias recetas a la vez.
+        @param demanda: {id_receta: cantidad}
+        @return tuple: ({id_sub_receta: cantidad}, {id_insumo: cantidad})
+        """
+        sub_recetas, insumos = {}, {}
+        requerimientos, componentes = self.requerimientos(), self.componentes()
+        for receta, cantidad in demanda.items():
+            self._sumar(sub_recetas, componentes.get(receta, {}), cantidad)
+            self._sumar(insumos, requerimientos.get(receta, {}), cantidad)
+        return sub_recetas, insumos
+
+    def costos(self, costos_insumos=None):
+        """!
+        @brief Costo de una unidad de cada receta.
+        @param costos_insumos: {id_insumo: costo} que reemplaza al costo cargado de esos insumos (simulación).
+        @return dict: {id_receta: costo (Decimal)}
+        """
+        costos_insumos = {**self.costos_insumos, **(costos_insumos or {})}
+        return {
+            receta: sum((cantidad * costos_insumos[insumo] for insumo, cantidad in requeridos.items()), Decimal('0.00'))
+            for receta, requeridos in self.requerimientos().items()
+        }
+
+    def simular(self, variaciones):
+        """!
+        @brief Costos actuales y nuevos si los insumos indicados cambian de costo en un porcentaje.
+        @param variaciones: {id_insumo: porcentaje (Decimal; 20 = +20 %, -10 = −10 %)}.
+        @return dict: {id_receta: (costo actual, costo nuevo)} sólo de las recetas que usan esos insumos.
+        """
+        nuevos = {
+            insumo: self.costos_insumos[insumo] * (1 + porcentaje / 100)
+            for insumo, porcentaje in variaciones.items() if insumo in self.costos_insumos
+        }
+        afectadas = {receta for receta, requeridos in self.requerimientos().items() if not requeridos.keys().isdisjoint(nuevos)}
+        actuales, simulados = self.costos(), self.costos(nuevos)
+        return {receta: (actuales[receta], simulados[receta]) for receta in afectadas}
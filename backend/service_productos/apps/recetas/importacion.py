@@ -0,0 +1,165 @@
+from django.db import transaction
+
+from utils.importacion import ImportadorCSV, ErrorFila, buscar_referencias
+from apps.insumos.models import Insumo
+from apps.productos.disponibilidad import programar_actualizacion
+from apps.productos.tiempo_real import notificar_cambio
+from .models import Receta, RecetaInsumo, RecetaSubReceta
+
+
+class ImportadorRecetas(ImportadorCSV):
+    """!
+    @brief Importa la composición de las recetas desde un CSV, un componente por fila.
+    @details
+        Columnas: receta, descripcion, insumo, sub_receta y cantidad. Cada fila
+        indica un insumo (por nombre o id) o una sub-receta (por nombre) con su
+        cantidad. Las recetas que no existen se crean (con la descripción de su
+        primera fila) y pueden usarse como sub-receta en filas posteriores.
+
+        Un componente que la receta ya tiene se reporta, o con `actualizar=True`
+        se le cambia la cantidad. `creados` y `actualizados` cuentan componentes;
+        `recetas_creadas`, las recetas nuevas.
+
+    @example
+        receta,descripcion,insumo,sub_receta,cantidad
+        Masa,Masa de empanadas,Harina,,0.5
+        Empanada de carne,,Carne picada,,0.08
+        Empanada de carne,,,Masa,1
+    """
+    modelo = RecetaInsumo
+    columnas = ('cantidad',)
+    obligatorias = ('receta', 'cantidad')
+
+    def __init__(self, actualizar=False, simular=False):
+        super().__init__(actualizar=actualizar, simular=simular)
+        self.recetas_creadas = 0
+        # Recetas nuevas de lotes anteriores que no se escribieron (simulación)
+        self._recetas_simuladas = set()
+
+    def resultado(self):
+        resultado = super().resultado()
+        resultado['recetas_creadas'] = self.recetas_creadas
+        return resultado
+
+    def preparar_lote(self, filas):
+        return {'insumos': buscar_referencias(Insumo, [fila.get('insumo') for fila in filas])}
+
+    def validar_fila(self, datos, fila, contexto):
+        receta = (fila.get('receta') or '').strip()
+        insumo = (fila.get('insumo') or '').strip()
+        sub_receta = (fila.get('sub_receta') or '').strip()
+        errores = {}
+        if not receta:
+            errores['receta'] = 'Este campo es obligatorio.'
+        if bool(insumo) == bool(sub_receta):
+            errores['insumo'] = 'Indique un insumo o una sub_receta (sólo uno).'
+        elif insumo and insumo not in contexto['insumos']:
+            errores['insumo'] = f"No existe el insumo «{insumo}»."
+        elif sub_receta and sub_receta == receta:
+            errores['sub_receta'] = 'Una receta no puede contenerse a sí misma.'
+        if 'cantidad' in datos and datos['cantidad'] <= 0:
+            errores['cantidad'] = 'Debe ser mayor que cero.'
+        if errores:
+            raise ErrorFila(errores)
+
+        datos['receta'] = receta
+        datos['insumo'] = contexto['insumos'].get(insumo)
+        datos['sub_receta'] = sub_receta
+        datos['descripcion'] = (fila.get('descripcion') or '').strip()
+
+    def _crear_recetas(self, validas, recetas):
+        """!
+        @brief Crea las recetas del lote que no existen y agrega sus ids a `recetas` ({nombre: id}).
+        @details
+            `bulk_create` no devuelve los ids en MySQL, así que se vuelven a
+            leer por nombre (una consulta).
+        """
+        nuevas = {}
+        for _, datos in validas:
+            nombre = datos['receta']
+            if nombre not in recetas and nombre not in self._recetas_simuladas:
+                if not nuevas.get(nombre):
+                    nuevas[nombre] = datos['descripcion']
+        if not nuevas:
+            return
+        self.recetas_creadas += len(nuevas)
+        if self.simular:
+            self._recetas_simuladas.update(nuevas)
+            return
+        Receta.objects.bulk_create([Receta(nombre=nombre, descripcion=descripcion or None) for nombre, descripcion in nuevas.items()])
+        recetas.update(Receta.objects.filter(nombre__in=list(nuevas)).values_list('nombre', 'id'))
+
+    def guardar(self, validas):
+        """!
+        @brief Crea las recetas faltantes y escribe los componentes del lote con operaciones masivas.
+        """
+        with transaction.atomic():
+            nombres = {datos['receta'] for _, datos in validas} | {datos['sub_receta'] for _, datos in validas if datos['sub_receta']}
+            recetas = dict(Receta.objects.filter(nombre__in=list(nombres)).values_list('nombre', 'id'))
+            self._crear_recetas(validas, recetas)
+
+            # (número de fila, cantidad, id receta, modelo del componente, id componente, clave)
+            componentes = []
+            for numero, datos in validas:
+                receta_id = recetas.get(datos['receta'])
+                if datos['insumo'] is not None:
+                    modelo, componente_id, columna = RecetaInsumo, datos['insumo'].pk, 'insumo'
+                else:
+                    nombre = datos['sub_receta']
+                    if nombre not in recetas and nombre not in self._recetas_simuladas:
+                        self.errores.append({'fila': numero, 'errores': {'sub_receta': f"No existe la receta «{nombre}»."}})
+                        continue
+                    modelo, componente_id, columna = RecetaSubReceta, recetas.get(nombre), 'sub_receta'
+                clave = (datos['receta'], columna, componente_id or datos['sub_receta'])
+                if clave in self._claves_vistas:
+                    self.errores.append({'fila': numero, 'errores': {columna: f"Repetido en la fila {self._claves_vistas[clave]}."}})
+                    continue
+                self._claves_vistas[clave] = numero
+                componentes.append((numero, datos['cantidad'], receta_id, modelo, componente_id, columna))
+
+            existentes = self._componentes_existentes(componentes)
+            nuevos = {RecetaInsumo: [], RecetaSubReceta: []}
+            modificados = {RecetaInsumo: [], RecetaSubReceta: []}
+            for numero, cantidad, receta_id, modelo, componente_id, columna in componentes:
+                instancia = existentes.get((modelo, receta_id, componente_id))
+                if instancia is None:
+                    if modelo is RecetaInsumo:
+                        nuevos[modelo].append(RecetaInsumo(receta_id=receta_id, insumo_id=componente_id, cantidad=cantidad))
+                    else:
+                        nuevos[modelo].append(RecetaSubReceta(receta_padre_id=receta_id, receta_hija_id=componente_id, cantidad=cantidad))
+                elif not self.actualizar:
+                    self.errores.append({'fila': numero, 'errores': {columna: 'La receta ya lo tiene. Use actualizar para cambiar la cantidad.'}})
+                else:
+                    instancia.cantidad = cantidad
+                    modificados[modelo].append(instancia)
+
+            if not self.simular:
+                for modelo in (RecetaInsumo, RecetaSubReceta):
+                    modelo.objects.bulk_create(nuevos[modelo])
+                    if modificados[modelo]:
+                        modelo.objects.bulk_update(modificados[modelo], ['cantidad'])
+                programar_actualizacion()
+                notificar_cambio('receta', completo=True)
+        self.creados += len(nuevos[RecetaInsumo]) + len(nuevos[RecetaSubReceta])
+        self.actualizados += len(modificados[RecetaInsumo]) + len(modificados[RecetaSubReceta])
+
+    def _componentes_existentes(self, componentes):
+        """!
+        @brief Componentes que las recetas del lote ya tienen: {(modelo, id receta, id componente): instancia}.
+        @details Una consulta por tipo de componente.
+        """
+        existentes = {}
+        for modelo, campo_padre, campo_componente in (
+            (RecetaInsumo, 'receta_id', 'insumo_id'),
+            (RecetaSubReceta, 'receta_padre_id', 'receta_hija_id'),
+        ):
+            pares = [(c[2], c[4]) for c in componentes if c[3] is modelo and c[2] and c[4]]
+            if not pares:
+                continue
+            filtro = {
+                f'{campo_padre}__in': {receta_id for receta_id, _ in pares},
+                f'{campo_componente}__in': {componente_id for _, componente_id in pares},
+            }
+            for instancia in modelo.objects.filter(**filtro):
+                existentes[(modelo, getattr(instancia, campo_padre), getattr(instancia, campo_componente))] = instancia
+        return existentes
@@ -4,6 +4,28 @@ from django.db import models
 # Create your models here.
 from django.db import models
 
+class RecetaQuerySet(models.QuerySet):
+    def con_detalle(self):
+        """!
+        @brief Precarga insumos y sub-recetas para serializar sin consultas por fila.
+        """
+        return self.prefetch_related('recetainsumo_set__insumo', 'recetasubreceta_principal__receta_hija')
+
+
+def costos_por_receta():
+    """!
+    @brief Calcula el costo estimado de todas las recetas con dos consultas.
+    @details
+        Equivale a llamar `Receta.calcular_costo()` para cada receta, pero carga
+        de una vez el grafo de insumos y sub-recetas (ver `bom.GrafoRecetas`).
+        Una sub-receta que forme un ciclo aporta costo 0.
+    @return dict: {id_receta: costo (Decimal)}
+    """
+    from .bom import GrafoRecetas
+
+    return GrafoRecetas.cargar().costos()
+
+
 class Receta(models.Model):
     """!
     @brief Modelo para representar una receta de un producto vendible.
@@ -24,6 +46,8 @@ class Receta(models.Model):
         related_name='es_ingrediente_de'
     )
 
+    objects = RecetaQuerySet.as_manager()
+
     class Meta:
         db_table = 'receta'
 
@@ -1,6 +1,8 @@
+from decimal import Decimal
 from rest_framework import serializers
 from .models import Receta, RecetaInsumo, RecetaSubReceta
 from apps.insumos.serializer import InsumoSerializer
+from utils.sparse_fields import CamposDinamicosSerializerMixin
 
 class RecetaInsumoSerializer(serializers.ModelSerializer):
     """!
@@ -24,7 +26,7 @@ class RecetaSubRecetaSerializer(serializers.ModelSerializer):
         model = RecetaSubReceta
         fields = ['receta_hija_id', 'receta_hija_nombre', 'cantidad']
 
-class RecetaSerializer(serializers.ModelSerializer):
+class RecetaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     insumos = RecetaInsumoSerializer(source='recetainsumo_set', many=True)
     sub_recetas = RecetaSubRecetaSerializer(source='recetasubreceta_principal', many=True, required=False)
     costo_estimado = serializers.SerializerMethodField()
@@ -34,6 +36,10 @@ class RecetaSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'descripcion', 'insumos', 'sub_recetas', 'costo_estimado']
 
     def get_costo_estimado(self, obj):
+        # Los listados calculan todos los costos de una vez (ver costos_por_receta)
+        costos = self.context.get('costos_recetas')
+        if costos is not None:
+            return costos.get(obj.id, Decimal('0.00'))
         return obj.calcular_costo()
 
     def create(self, validated_data):
@@ -71,4 +77,31 @@ class RecetaSerializer(serializers.ModelSerializer):
         for item in sub_recetas_data:
             RecetaSubReceta.objects.create(receta_padre=instance, **item)
 
-        return instance
\ No newline at end of file
+        return instance
+
+class VariacionCostoSerializer(serializers.Serializer):
+    insumo = serializers.IntegerField()
+    porcentaje = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100'))
+
+
+class SimularCostosSerializer(serializers.Serializer):
+    """!
+    @brief Datos de una simulación de costos: cuánto cambia el costo de cada insumo.
+    @example
+        {"variaciones": [{"insumo": 4, "porcentaje": "20"}, {"insumo": 9, "porcentaje": "-5"}]}
+    """
+    variaciones = VariacionCostoSerializer(many=True, allow_empty=False)
+
+
+class DemandaProductoSerializer(serializers.Serializer):
+    producto = serializers.IntegerField()
+    cantidad = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0'))
+
+
+class PreparacionSerializer(serializers.Serializer):
+    """!
+    @brief Cantidades de productos a preparar, para calcular sus recetas, sub-recetas e insumos.
+    @example
+        {"productos": [{"producto": 8, "cantidad": "24"}, {"producto": 9, "cantidad": "6.5"}]}
+    """
+    productos = DemandaProductoSerializer(many=True)
@@ -2,9 +2,17 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from types import SimpleNamespace
+from unittest import mock
 from apps.insumos.models import Insumo
-from apps.recetas.models import Receta, RecetaInsumo
+from apps.recetas.models import Receta, RecetaInsumo, RecetaSubReceta
+from apps.recetas.bom import GrafoRecetas
+from apps.categorias.models import Categoria
+from apps.productos.models import Producto
+from apps.productos.logic import procesar_venta_producto
+from utils.query_budget import QueryBudgetTestMixin
+from decimal import Decimal
 from django.urls import reverse
 
 class RecetaAPITestCase(TestCase):
@@ -172,3 +180,250 @@ class RecetaAPITestCase(TestCase):
         """Usuario Cliente intenta eliminar receta"""
         response = self.client_cliente.post(f"{self.url_eliminar}?id={self.receta.id}")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RecetaPresupuestoConsultasTestCase(QueryBudgetTestMixin, TestCase):
+    """Los listados de recetas no deben consultar insumos ni sub-recetas por cada receta."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cocinero', password='cocinero123')
+        self.user.rol = 'Cocinero'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.base = Receta.objects.create(nombre='Masa base')
+        harina = Insumo.objects.create(nombre='Harina', unidad_medida='kg', stock_actual=10, costo_unitario=Decimal('2.50'))
+        RecetaInsumo.objects.create(receta=self.base, insumo=harina, cantidad=Decimal('0.50'))
+
+    def generar_recetas(self, n):
+        for i in range(Receta.objects.count() - 1, n):
+            receta = Receta.objects.create(nombre=f'Pizza {i}')
+            for j in range(2):
+                insumo = Insumo.objects.create(
+                    nombre=f'Insumo {i}-{j}', unidad_medida='kg', stock_actual=10, costo_unitario=Decimal('1.20') + j,
+                )
+                RecetaInsumo.objects.create(receta=receta, insumo=insumo, cantidad=Decimal('2.00'))
+            RecetaSubReceta.objects.create(receta_padre=receta, receta_hija=self.base, cantidad=Decimal('1.00'))
+
+    def test_listar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('receta_listar'), self.generar_recetas)
+
+        response = self.client.get(reverse('receta_listar'))
+        costos = {receta['id']: receta['costo_estimado'] for receta in response.data}
+        for receta in Receta.objects.all():
+            self.assertEqual(Decimal(str(costos[receta.id])), receta.calcular_costo())
+
+    def test_buscar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('receta_buscar') + '?nombre=pizza', self.generar_recetas)
+
+
+class RecetaImportarTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cocinero', password='cocinero123')
+        self.user.rol = 'Cocinero'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.harina = Insumo.objects.create(nombre='Harina', unidad_medida='kg', stock_actual=10, costo_unitario=800)
+        self.carne = Insumo.objects.create(nombre='Carne', unidad_medida='kg', stock_actual=10, costo_unitario=9000)
+        self.masa = Receta.objects.create(nombre='Masa')
+        RecetaInsumo.objects.create(receta=self.masa, insumo=self.harina, cantidad=Decimal('0.50'))
+
+    def importar(self, contenido, **params):
+        archivo = SimpleUploadedFile('recetas.csv', contenido.encode('utf-8'), content_type='text/csv')
+        url = reverse('receta_importar')
+        if params:
+            url += '?' + '&'.join(f'{clave}={valor}' for clave, valor in params.items())
+        return self.client.post(url, {'archivo': archivo}, format='multipart')
+
+    CONTENIDO = (
+        "receta,descripcion,insumo,sub_receta,cantidad\n"
+        "Relleno,Relleno de carne,Carne,,0.08\n"
+        "Empanada,Empanada de carne,,Masa,1\n"
+        "Empanada,,,Relleno,1\n"
+        "Empanada,,,Empanada,1\n"
+        "Empanada,,Carne,Masa,1\n"
+        "Masa,,Harina,,0.6\n"
+        "Empanada,,,Tapa,1\n"
+        "Relleno,,Carne,,0.1\n"
+    )
+
+    def test_crea_recetas_y_componentes(self):
+        response = self.importar(self.CONTENIDO)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recetas_creadas'], 2)
+        self.assertEqual(response.data['creados'], 3)
+        errores = {e['fila']: e['errores'] for e in response.data['errores']}
+        self.assertEqual(set(errores), {5, 6, 7, 8, 9})
+        self.assertIn('sub_receta', errores[5])
+        self.assertIn('insumo', errores[6])
+        self.assertIn('actualizar', errores[7]['insumo'])
+        self.assertIn('Tapa', errores[8]['sub_receta'])
+        self.assertIn('fila 2', errores[9]['insumo'])
+
+        empanada = Receta.objects.get(nombre='Empanada')
+        self.assertEqual(empanada.descripcion, 'Empanada de carne')
+        self.assertEqual(
+            set(empanada.recetasubreceta_principal.values_list('receta_hija__nombre', flat=True)),
+            {'Masa', 'Relleno'},
+        )
+        self.assertEqual(RecetaInsumo.objects.get(receta__nombre='Relleno').cantidad, Decimal('0.08'))
+
+    def test_actualizar_y_simular(self):
+        response = self.importar(self.CONTENIDO, simular=1)
+        self.assertEqual((response.data['recetas_creadas'], response.data['creados']), (2, 3))
+        self.assertEqual(Receta.objects.count(), 1)
+
+        response = self.importar("receta,insumo,cantidad\nMasa,Harina,0.6\n", actualizar=1)
+        self.assertEqual(response.data['actualizados'], 1)
+        self.assertEqual(RecetaInsumo.objects.get(receta=self.masa).cantidad, Decimal('0.60'))
+
+
+class GrafoRecetasTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='admin123')
+        self.user.rol = 'Administrador'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.harina = Insumo.objects.create(nombre='Harina', unidad_medida='kg', stock_actual=2, costo_unitario=800)
+        self.queso = Insumo.objects.create(nombre='Queso', unidad_medida='kg', stock_actual=10, costo_unitario=6000)
+        # Pizza -> 2 x Masa -> 0.5 Harina; Pizza -> 0.25 Queso + 0.5 Harina (directa)
+        self.masa = Receta.objects.create(nombre='Masa')
+        self.pizza = Receta.objects.create(nombre='Pizza')
+        RecetaInsumo.objects.create(receta=self.masa, insumo=self.harina, cantidad=Decimal('0.50'))
+        RecetaInsumo.objects.create(receta=self.pizza, insumo=self.queso, cantidad=Decimal('0.25'))
+        RecetaInsumo.objects.create(receta=self.pizza, insumo=self.harina, cantidad=Decimal('0.50'))
+        RecetaSubReceta.objects.create(receta_padre=self.pizza, receta_hija=self.masa, cantidad=Decimal('2.00'))
+
+    def test_requerimientos_y_costos_con_ciclos(self):
+        # Ciclo Relleno <-> Salsa: la sub-receta que lo cierra no aporta
+        relleno = Receta.objects.create(nombre='Relleno')
+        salsa = Receta.objects.create(nombre='Salsa')
+        RecetaInsumo.objects.create(receta=salsa, insumo=self.queso, cantidad=Decimal('0.10'))
+        RecetaSubReceta.objects.create(receta_padre=relleno, receta_hija=salsa, cantidad=Decimal('1.00'))
+        RecetaSubReceta.objects.create(receta_padre=salsa, receta_hija=relleno, cantidad=Decimal('1.00'))
+
+        with self.assertNumQueries(2):
+            grafo = GrafoRecetas.cargar()
+        self.assertEqual(grafo.requerimientos()[self.pizza.id], {self.harina.id: Decimal('1.5'), self.queso.id: Decimal('0.25')})
+        self.assertEqual(grafo.ciclos, {relleno.id, salsa.id})
+        costos = grafo.costos()
+        self.assertEqual(costos[self.pizza.id], self.pizza.calcular_costo())
+        self.assertEqual(costos[self.masa.id], Decimal('400'))
+        self.assertEqual(costos[relleno.id], Decimal('600'))
+
+        simulados = grafo.simular({self.harina.id: Decimal('20')})
+        self.assertEqual(set(simulados), {self.masa.id, self.pizza.id})
+        self.assertEqual(simulados[self.pizza.id], (Decimal('2700'), Decimal('2940')))
+
+    def test_explosion(self):
+        response = self.client.get(reverse('receta_explosion') + f'?id={self.pizza.id}&cantidad=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['costo'], Decimal('5400'))
+        harina = response.data['insumos'][0]
+        self.assertEqual((harina['nombre'], harina['cantidad'], harina['faltante']), ('Harina', Decimal('3'), Decimal('1')))
+
+        response = self.client.get(reverse('receta_explosion') + f'?id={self.pizza.id}&cantidad=-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('receta_explosion') + '?id=999')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_simular_costos(self):
+        categoria = Categoria.objects.create(nombre='Pizzas')
+        producto = Producto.objects.create(
+            nombre='Pizza grande', descripcion='', precio_unitario=9000, categoria=categoria,
+            receta=self.pizza, cantidad_receta=Decimal('2'),
+        )
+        response = self.client.post(reverse('receta_simular_costos'), {
+            'variaciones': [{'insumo': self.harina.id, 'porcentaje': '20'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([receta['id'] for receta in response.data['recetas']], [self.masa.id, self.pizza.id])
+        self.assertEqual(response.data['productos'], [{
+            'id': producto.id, 'nombre': 'Pizza grande', 'precio_unitario': Decimal('9000.00'),
+            'costo_actual': Decimal('5400.00'), 'costo_nuevo': Decimal('5880.00'),
+            'margen_actual': Decimal('3600.00'), 'margen_nuevo': Decimal('3120.00'),
+        }])
+        # Nada se guarda
+        self.harina.refresh_from_db()
+        self.assertEqual(self.harina.costo_unitario, Decimal('800'))
+
+    def test_venta_descuenta_todos_los_niveles_una_vez(self):
+        categoria = Categoria.objects.create(nombre='Pizzas')
+        producto = Producto.objects.create(
+            nombre='Pizza', descripcion='', precio_unitario=9000, categoria=categoria, receta=self.pizza,
+        )
+        procesar_venta_producto(producto, 1)
+        self.harina.refresh_from_db()
+        self.queso.refresh_from_db()
+        self.assertEqual((self.harina.stock_actual, self.queso.stock_actual), (Decimal('0.50'), Decimal('9.75')))
+
+        procesar_venta_producto(producto, 1)
+        self.harina.refresh_from_db()
+        self.assertEqual(self.harina.stock_actual, Decimal('0.00'))
+
+    def test_venta_carga_solo_las_recetas_alcanzables(self):
+        # Otra receta con su sub-receta, que la venta de una Masa no necesita leer
+        salsa = Receta.objects.create(nombre='Salsa')
+        RecetaInsumo.objects.create(receta=salsa, insumo=self.queso, cantidad=Decimal('0.10'))
+        RecetaSubReceta.objects.create(receta_padre=salsa, receta_hija=self.masa, cantidad=Decimal('1.00'))
+
+        # Un nivel de sub-recetas por consulta (el último no trae filas) y una de insumos
+        with self.assertNumQueries(3):
+            grafo = GrafoRecetas.cargar(recetas=[self.pizza.id])
+        self.assertEqual(grafo.recetas(), {self.pizza.id, self.masa.id})
+        self.assertEqual(grafo.explotar(self.pizza.id, 2), {self.harina.id: Decimal('3'), self.queso.id: Decimal('0.5')})
+        with self.assertNumQueries(2):
+            self.assertEqual(GrafoRecetas.cargar(recetas=[self.masa.id]).recetas(), {self.masa.id})
+
+    def test_consumir_stock_de_un_pedido_con_un_solo_grafo(self):
+        categoria = Categoria.objects.create(nombre='Pizzas')
+        grande = Producto.objects.create(
+            nombre='Pizza grande', descripcion='', precio_unitario=9000, categoria=categoria,
+            receta=self.pizza, cantidad_receta=Decimal('2'),
+        )
+        chica = Producto.objects.create(nombre='Pizza chica', descripcion='', precio_unitario=5000, categoria=categoria, receta=self.pizza)
+        gaseosa = Producto.objects.create(nombre='Gaseosa', descripcion='', precio_unitario=1500, categoria=categoria, stock=10)
+        self.harina.stock_actual = 10
+        self.harina.save()
+
+        with mock.patch.object(GrafoRecetas, 'cargar', wraps=GrafoRecetas.cargar) as cargar:
+            response = self.client.post(reverse('producto-consumir-stock'), {'lineas': [
+                {'producto_id': grande.id, 'cantidad': 1},
+                {'producto_id': chica.id, 'cantidad': 2},
+                {'producto_id': gaseosa.id, 'cantidad': 3},
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cargar.assert_called_once_with(recetas={self.pizza.id})
+        # 4 pizzas: 6 de harina y 1 de queso
+        self.harina.refresh_from_db()
+        self.queso.refresh_from_db()
+        gaseosa.refresh_from_db()
+        self.assertEqual((self.harina.stock_actual, self.queso.stock_actual, gaseosa.stock), (Decimal('4.00'), Decimal('9.00'), 7))
+
+        response = self.client.post(reverse('producto-consumir-stock'), {'lineas': [{'producto_id': 9999, 'cantidad': 1}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(reverse('producto-consumir-stock'), {'lineas': [{'producto_id': grande.id}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_preparacion(self):
+        categoria = Categoria.objects.create(nombre='Pizzas')
+        grande = Producto.objects.create(
+            nombre='Pizza grande', descripcion='', precio_unitario=9000, categoria=categoria,
+            receta=self.pizza, cantidad_receta=Decimal('2'),
+        )
+        chica = Producto.objects.create(nombre='Pizza chica', descripcion='', precio_unitario=5000, categoria=categoria, receta=self.pizza)
+        gaseosa = Producto.objects.create(nombre='Gaseosa', descripcion='', precio_unitario=1500, categoria=categoria)
+
+        self.user.rol = 'Servicio'
+        response = self.client.post(reverse('receta_preparacion'), {'productos': [
+            {'producto': grande.id, 'cantidad': '3'},
+            {'producto': chica.id, 'cantidad': '2'},
+            {'producto': gaseosa.id, 'cantidad': '10'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recetas'], [{'id': self.pizza.id, 'nombre': 'Pizza', 'cantidad': Decimal('8.00')}])
+        self.assertEqual(response.data['sub_recetas'], [{'id': self.masa.id, 'nombre': 'Masa', 'cantidad': Decimal('16.00')}])
+        insumos = {insumo['nombre']: (insumo['cantidad'], insumo['faltante']) for insumo in response.data['insumos']}
+        self.assertEqual(insumos, {'Harina': (Decimal('12.00'), Decimal('10.00')), 'Queso': (Decimal('2.00'), Decimal('0.00'))})
+        self.assertEqual(response.data['sin_receta'], [gaseosa.id])
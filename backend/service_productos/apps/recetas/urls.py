@@ -4,7 +4,11 @@ from apps.recetas.views import (
     RecetaEditarView,
     RecetaEliminarView,
     RecetaListarView,
-    RecetaBuscarView
+    RecetaBuscarView,
+    RecetaImportarView,
+    RecetaExplosionView,
+    RecetaSimularCostosView,
+    RecetaPreparacionView,
 )
 
 urlpatterns = [
@@ -13,4 +17,8 @@ urlpatterns = [
     path('eliminar/', RecetaEliminarView.as_view(), name='receta_eliminar'),
     path('listar/', RecetaListarView.as_view(), name='receta_listar'),
     path('buscar/', RecetaBuscarView.as_view(), name='receta_buscar'),
+    path('importar/', RecetaImportarView.as_view(), name='receta_importar'),
+    path('explosion/', RecetaExplosionView.as_view(), name='receta_explosion'),
+    path('simular-costos/', RecetaSimularCostosView.as_view(), name='receta_simular_costos'),
+    path('preparacion/', RecetaPreparacionView.as_view(), name='receta_preparacion'),
 ]
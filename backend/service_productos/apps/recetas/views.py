@@ -5,11 +5,21 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Receta
-from .serializer import RecetaSerializer
+from .models import Receta, costos_por_receta
+from .serializer import RecetaSerializer, SimularCostosSerializer, PreparacionSerializer
+from .bom import GrafoRecetas
+from apps.insumos.models import Insumo
+from apps.productos.models import Producto
+from decimal import Decimal, InvalidOperation
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AllowRoles
 from rest_framework.generics import ListAPIView
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
+from utils.importacion import ImportarCSVView
+from .importacion import ImportadorRecetas
+from apps.productos.disponibilidad import programar_actualizacion
+from apps.productos.tiempo_real import notificar_cambio
 
 class RecetaCrearView(APIView):
     permission_classes = [IsAuthenticated, AllowRoles('Administrador')]
@@ -17,7 +27,9 @@ class RecetaCrearView(APIView):
     def post(self, request):
         serializer = RecetaSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            receta = serializer.save()
+            programar_actualizacion()
+            notificar_cambio('receta', recetas=[receta.id], eliminadas=[])
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -34,6 +46,8 @@ class RecetaEditarView(APIView):
             serializer = RecetaSerializer(receta, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                programar_actualizacion()
+                notificar_cambio('receta', recetas=[receta.id], eliminadas=[])
                 return Response({'detail':'Receta editada exitosamente'}, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -51,21 +65,45 @@ class RecetaEliminarView(APIView):
         try:
             receta = Receta.objects.get(id=id)
             receta.delete()
+            programar_actualizacion()
+            notificar_cambio('receta', recetas=[], eliminadas=[int(id)])
             return Response({'detail':'Receta eliminada exitosamente'}, status=status.HTTP_200_OK)
         except Receta.DoesNotExist:
             return Response({'detail':'Receta a eliminar no encontrada'}, status=status.HTTP_400_BAD_REQUEST)
 
-class RecetaListarView(APIView):
-    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+class CostosRecetasMixin:
+    """!
+    @brief Agrega al contexto del serializador los costos de todas las recetas.
+    @details
+        Evita que `costo_estimado` recorra insumos y sub-recetas receta por receta.
+    """
 
-    def get(self, request):
-        recetas = Receta.objects.all()
-        serializer = RecetaSerializer(recetas, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        campos = self.get_campos() if hasattr(self, 'get_campos') else None
+        if not campos or 'costo_estimado' in campos:
+            contexto['costos_recetas'] = costos_por_receta()
+        return contexto
+
+class RecetaListarView(CostosRecetasMixin, CamposDinamicosViewMixin, ListAPIView):
+    """!
+    @brief Vista para listar todas las recetas.
+    @details
+        Admite paginación por cursor (`?limite=` / `?cursor=`) y `?fields=`.
+        `costo_estimado` se calcula a partir de los insumos y sub-recetas, por lo
+        que no requiere columnas propias de la receta.
+    """
+    queryset = Receta.objects.con_detalle()
+    serializer_class = RecetaSerializer
+    pagination_class = CursorPaginacionOpcional
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+    columnas_por_campo = {'costo_estimado': []}
+    query_budget = 8
 
-class RecetaBuscarView(ListAPIView):
+class RecetaBuscarView(CostosRecetasMixin, ListAPIView):
     serializer_class = RecetaSerializer
     permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+    query_budget = 8
     
     def get_queryset(self):
         id = self.request.query_params.get('id')
@@ -74,10 +112,195 @@ class RecetaBuscarView(ListAPIView):
         if not id and not nombre:
             return Receta.objects.none()
 
-        queryset = Receta.objects.all()
+        queryset = Receta.objects.con_detalle()
         if id:
             queryset = queryset.filter(id=id)
         if nombre:
             queryset = queryset.filter(nombre__icontains=nombre)
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+class RecetaExplosionView(APIView):
+    """!
+    @brief Devuelve todos los insumos que lleva una cantidad de una receta, con sus sub-recetas resueltas.
+    @details
+        Para cada insumo informa la cantidad total, su costo y cuánto falta con
+        el stock actual. Se resuelve con el grafo completo de recetas
+        (`GrafoRecetas`), sin recorrer las sub-recetas con una consulta por nivel.
+
+    @example
+        GET /api/recetas/explosion/?id=3&cantidad=12
+        -> {"receta": 3, "cantidad": "12", "costo": "8400.00", "insumos": [
+               {"id": 4, "nombre": "Harina", "unidad_medida": "kg", "cantidad": "3.00",
+                "costo": "2400.00", "stock_actual": "2.00", "faltante": "1.00"}, ...]}
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+    query_budget = 4
+
+    def get(self, request):
+        id = request.query_params.get('id')
+        if not id:
+            return Response({'detail': 'Falta proporcionar el id de la receta'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            cantidad = Decimal(request.query_params.get('cantidad', '1'))
+        except InvalidOperation:
+            cantidad = None
+        if cantidad is None or not cantidad.is_finite() or cantidad <= 0:
+            return Response({'detail': 'La cantidad debe ser un número positivo'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Receta.objects.filter(id=id).exists():
+            return Response({'detail': 'Receta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+
+        grafo = GrafoRecetas.cargar()
+        requeridos = grafo.explotar(int(id), cantidad)
+        insumos = Insumo.objects.in_bulk(requeridos)
+        detalle = []
+        for insumo_id, requerido in sorted(requeridos.items()):
+            insumo = insumos[insumo_id]
+            detalle.append({
+                'id': insumo_id,
+                'nombre': insumo.nombre,
+                'unidad_medida': insumo.unidad_medida,
+                'cantidad': requerido,
+                'costo': (requerido * insumo.costo_unitario).quantize(Decimal('0.01')),
+                'stock_actual': insumo.stock_actual,
+                'faltante': max(requerido - insumo.stock_actual, Decimal('0.00')),
+            })
+        return Response({
+            'receta': int(id),
+            'cantidad': cantidad,
+            'costo': sum((linea['costo'] for linea in detalle), Decimal('0.00')),
+            'insumos': detalle,
+        }, status=status.HTTP_200_OK)
+
+
+class RecetaSimularCostosView(APIView):
+    """!
+    @brief Simula cómo cambian los costos de recetas y productos si cambia el costo de algunos insumos.
+    @details
+        No guarda nada. Recibe los datos de `SimularCostosSerializer` y devuelve
+        sólo las recetas que usan (en cualquier nivel) alguno de los insumos, y
+        los productos hechos con ellas con su margen actual y simulado. Todo el
+        menú se recalcula en memoria sobre el grafo ya explotado.
+
+    @example
+        POST /api/recetas/simular-costos/
+        {"variaciones": [{"insumo": 4, "porcentaje": "20"}]}
+        -> {"recetas": [{"id": 3, "nombre": "Masa", "costo_actual": "700.00", "costo_nuevo": "780.00"}],
+            "productos": [{"id": 8, "nombre": "Muzzarella", "precio_unitario": "9000.00",
+                           "costo_actual": "2100.00", "costo_nuevo": "2340.00",
+                           "margen_actual": "6900.00", "margen_nuevo": "6660.00"}]}
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Administrador')]
+    query_budget = 4
+
+    def post(self, request):
+        serializer = SimularCostosSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        variaciones = {v['insumo']: v['porcentaje'] for v in serializer.validated_data['variaciones']}
+
+        grafo = GrafoRecetas.cargar()
+        costos = grafo.simular(variaciones)
+        nombres = dict(Receta.objects.filter(id__in=costos).values_list('id', 'nombre'))
+        centavo = Decimal('0.01')
+        recetas = [
+            {'id': receta_id, 'nombre': nombres.get(receta_id, ''),
+             'costo_actual': actual.quantize(centavo), 'costo_nuevo': nuevo.quantize(centavo)}
+            for receta_id, (actual, nuevo) in sorted(costos.items())
+        ]
+        productos = []
+        for producto in Producto.objects.filter(receta_id__in=costos).order_by('id').values(
+            'id', 'nombre', 'precio_unitario', 'receta_id', 'cantidad_receta',
+        ):
+            actual, nuevo = (costo * producto['cantidad_receta'] for costo in costos[producto['receta_id']])
+            productos.append({
+                'id': producto['id'],
+                'nombre': producto['nombre'],
+                'precio_unitario': producto['precio_unitario'],
+                'costo_actual': actual.quantize(centavo),
+                'costo_nuevo': nuevo.quantize(centavo),
+                'margen_actual': (producto['precio_unitario'] - actual).quantize(centavo),
+                'margen_nuevo': (producto['precio_unitario'] - nuevo).quantize(centavo),
+            })
+        return Response({'recetas': recetas, 'productos': productos}, status=status.HTTP_200_OK)
+
+
+class RecetaPreparacionView(APIView):
+    """!
+    @brief Lista de preparación: recetas, sub-recetas e insumos para producir ciertas cantidades de productos.
+    @details
+        Recibe los datos de `PreparacionSerializer`. Cada producto se convierte
+        en unidades de su receta (`cantidad_receta`) y todas las recetas se
+        explotan juntas sobre el grafo completo (`GrafoRecetas`). Los productos
+        sin receta se informan en `sin_receta`. La usa el servicio de pedidos
+        para convertir el pronóstico de ventas del día en lo que hay que preparar.
+
+    @example
+        POST /api/recetas/preparacion/
+        {"productos": [{"producto": 8, "cantidad": "24"}]}
+        -> {"recetas": [{"id": 5, "nombre": "Pizza", "cantidad": "24.00"}],
+            "sub_recetas": [{"id": 3, "nombre": "Masa", "cantidad": "48.00"}],
+            "insumos": [{"id": 4, "nombre": "Harina", "unidad_medida": "kg", "cantidad": "24.00",
+                         "stock_actual": "10.00", "faltante": "14.00"}],
+            "sin_receta": [9]}
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador', 'Servicio')]
+    query_budget = 5
+
+    def post(self, request):
+        serializer = PreparacionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        pedidos = {}
+        for linea in serializer.validated_data['productos']:
+            pedidos[linea['producto']] = pedidos.get(linea['producto'], 0) + linea['cantidad']
+
+        demanda, sin_receta = {}, []
+        for producto in Producto.objects.filter(id__in=pedidos).values('id', 'receta_id', 'cantidad_receta'):
+            if producto['receta_id'] is None:
+                sin_receta.append(producto['id'])
+                continue
+            cantidad = pedidos[producto['id']] * producto['cantidad_receta']
+            demanda[producto['receta_id']] = demanda.get(producto['receta_id'], 0) + cantidad
+
+        grafo = GrafoRecetas.cargar()
+        sub_recetas, requeridos = grafo.explotar_demanda(demanda)
+        nombres = dict(Receta.objects.filter(id__in=set(demanda) | set(sub_recetas)).values_list('id', 'nombre'))
+        insumos = Insumo.objects.in_bulk(requeridos)
+        centavo = Decimal('0.01')
+
+        def recetas(cantidades):
+            return [
+                {'id': receta_id, 'nombre': nombres.get(receta_id, ''), 'cantidad': cantidad.quantize(centavo)}
+                for receta_id, cantidad in sorted(cantidades.items())
+            ]
+
+        return Response({
+            'recetas': recetas(demanda),
+            'sub_recetas': recetas(sub_recetas),
+            'insumos': [
+                {
+                    'id': insumo_id,
+                    'nombre': insumos[insumo_id].nombre,
+                    'unidad_medida': insumos[insumo_id].unidad_medida,
+                    'cantidad': cantidad.quantize(centavo),
+                    'stock_actual': insumos[insumo_id].stock_actual,
+                    'faltante': max(cantidad - insumos[insumo_id].stock_actual, Decimal('0')).quantize(centavo),
+                }
+                for insumo_id, cantidad in sorted(requeridos.items())
+            ],
+            'sin_receta': sorted(sin_receta),
+        }, status=status.HTTP_200_OK)
+
+
+class RecetaImportarView(ImportarCSVView):
+    """!
+    @brief Vista para cargar la composición de muchas recetas desde un CSV.
+    @details
+        Recibe el archivo en el campo `archivo`, con un insumo o sub-receta por
+        fila. Ver `ImportadorRecetas` para las columnas e `ImportarCSVView` para
+        el formato de la respuesta (que además incluye `recetas_creadas`).
+    """
+    permission_classes = [IsAuthenticated, AllowRoles('Cocinero', 'Administrador')]
+    importador_class = ImportadorRecetas
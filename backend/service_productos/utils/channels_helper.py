@@ -0,0 +1,59 @@
+import logging
+from time import sleep, perf_counter
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from utils.metrics import REGISTRO
+from utils.tracing import span, request_id_actual
+
+logger = logging.getLogger(__name__)
+
+LATENCIA_PUBLICACION = REGISTRO.histograma(
+    'channel_publish_duration_seconds', 'Duración de group_send por grupo de channels.', ('group',),
+)
+ERRORES_PUBLICACION = REGISTRO.contador(
+    'channel_publish_errors_total', 'Intentos fallidos de group_send por grupo de channels.', ('group',),
+)
+
+def send_channel_message(group_name: str, message_payload: dict, retries: int = 3, delay: float = 1.0):
+    """
+    @brief Envía un mensaje a un grupo de Channels con política de reintentos
+    @param group_name (str): El nombre del grupo al que se propagará el mensaje
+    @param message_payload (dict): Contenido del mensaje
+    @param retries (int): Número de reintentos
+    @param delay (float): Tiempo entre intentos en segundos
+    """
+    channel_layer= get_channel_layer()
+
+    # El id de la solicitud viaja en el evento para poder correlacionar la notificación
+    request_id = request_id_actual()
+    if request_id:
+        message_payload = {**message_payload, 'request_id': request_id}
+
+    if not channel_layer:
+        logger.error('No se pudo obtener channel_layer...')
+        return
+    
+    for attempt in range(retries):
+        inicio = perf_counter()
+        try:
+            with span('channel', f"group_send {group_name}", intento=attempt + 1):
+                async_to_sync(channel_layer.group_send)(group_name, message_payload)
+            LATENCIA_PUBLICACION.observar(perf_counter() - inicio, group=group_name)
+            logger.info(f"Mensaje enviado correctamente.\n  Grupo: {group_name}\n  Intento número: {attempt+1}")
+            return
+        except (ConnectionError, TimeoutError) as e:
+            ERRORES_PUBLICACION.inc(group=group_name)
+            logger.warning(
+                f"Intento {attempt+1} de {retries} fallido al enviar el mensaje a {group_name}"
+                f"Error: {e}. Reintentando en {delay} segundos"
+            )
+
+            if attempt < retries -1:
+                sleep(delay)
+            else:
+                logger.error(
+                    f"No se pudo enviar el mensaje a {group_name} después de {retries} intentos. "
+                    "La operación principal continuará, pero la notificación en tiempo real se perdió."
+                )
+            return
+
@@ -0,0 +1,448 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from importlib import import_module
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from utils.metrics import REGISTRO
+from utils.tracing import id_solicitud, request_id_actual, span
+
+logger = logging.getLogger(__name__)
+
+## Eventos de dominio que se publican entre servicios.
+EVENTOS = (
+    'pedido_creado',
+    'pedido_editado',
+    'pedido_eliminado',
+    'cobro_registrado',
+    'producto_actualizado',
+    'cliente_actualizado',
+)
+
+PUBLICADOS = REGISTRO.contador(
+    'eventos_publicados_total', 'Eventos publicados en el bus por tipo.', ('tipo',),
+)
+ERRORES_PUBLICACION = REGISTRO.contador(
+    'eventos_errores_publicacion_total', 'Eventos que no se pudieron publicar por tipo.', ('tipo',),
+)
+PROCESADOS = REGISTRO.contador(
+    'eventos_procesados_total', 'Eventos consumidos por tipo y resultado (ok, error, descartado).', ('tipo', 'resultado'),
+)
+
+
+def nombre_stream(tipo):
+    """!
+    @brief Stream de Redis donde se publican los eventos de `tipo`.
+    """
+    return f"{getattr(settings, 'EVENTOS_PREFIJO', 'eventos:')}{tipo}"
+
+
+def stream_descartados(stream):
+    """!
+    @brief Stream donde quedan los eventos de `stream` que agotaron los reintentos.
+    """
+    return f'{stream}:descartados'
+
+
+class BackendRedis:
+    """!
+    @brief Operaciones del bus sobre Redis Streams (XADD, XREADGROUP, XACK, XPENDING, XCLAIM).
+    @details
+        Las lecturas bloqueantes usan otra conexión, con un `socket_timeout`
+        de `timeout` más el bloqueo: con el de las demás operaciones, cada
+        espera sin eventos terminaría en `TimeoutError` antes de que Redis
+        responda.
+    """
+
+    def __init__(self, url, timeout=2.0):
+        import redis
+
+        self._url = url
+        self._timeout = timeout
+        self._redis = self._conectar(timeout)
+        self._lectores = {}
+        self._error_respuesta = redis.ResponseError
+
+    def _conectar(self, socket_timeout):
+        import redis
+
+        return redis.Redis.from_url(
+            self._url, decode_responses=True, socket_timeout=socket_timeout, socket_connect_timeout=self._timeout,
+        )
+
+    def _lector(self, bloqueo_ms):
+        """!
+        @brief Cliente para XREADGROUP con `bloqueo_ms`, con un timeout de lectura mayor que el bloqueo.
+        """
+        socket_timeout = self._timeout + (bloqueo_ms or 0) / 1000
+        if socket_timeout not in self._lectores:
+            self._lectores[socket_timeout] = self._conectar(socket_timeout)
+        return self._lectores[socket_timeout]
+
+    def agregar(self, stream, campos, maximo=None):
+        return self._redis.xadd(stream, campos, maxlen=maximo, approximate=True)
+
+    def crear_grupo(self, stream, grupo):
+        """!
+        @brief Crea el grupo (y el stream) si no existe. Un grupo nuevo lee el stream desde el principio.
+        """
+        try:
+            self._redis.xgroup_create(stream, grupo, id='0', mkstream=True)
+        except self._error_respuesta as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def leer(self, grupo, consumidor, streams, cantidad, bloqueo_ms):
+        respuesta = self._lector(bloqueo_ms).xreadgroup(
+            grupo, consumidor, {stream: '>' for stream in streams}, count=cantidad, block=bloqueo_ms or None,
+        )
+        return [
+            (stream, id_mensaje, campos)
+            for stream, mensajes in (respuesta or [])
+            for id_mensaje, campos in mensajes
+        ]
+
+    def pendientes(self, stream, grupo, inactivo_ms, cantidad):
+        return [
+            (pendiente['message_id'], pendiente['times_delivered'])
+            for pendiente in self._redis.xpending_range(stream, grupo, min='-', max='+', count=cantidad, idle=inactivo_ms)
+        ]
+
+    def reclamar(self, stream, grupo, consumidor, inactivo_ms, ids):
+        # XCLAIM no devuelve (y quita de pendientes) los mensajes que ya se recortaron del stream
+        return [(id_mensaje, campos) for id_mensaje, campos in self._redis.xclaim(stream, grupo, consumidor, inactivo_ms, ids) if campos]
+
+    def confirmar(self, stream, grupo, ids):
+        if ids:
+            self._redis.xack(stream, grupo, *ids)
+
+
+class BackendMemoria:
+    """!
+    @brief Reemplazo en memoria de Redis Streams, para las pruebas y el desarrollo sin Redis.
+    @details
+        Respeta la semántica que usa el bus: cada grupo lee una vez cada mensaje,
+        los mensajes entregados quedan pendientes hasta confirmarlos y un
+        pendiente inactivo puede reclamarse, lo que suma una entrega.
+    """
+
+    def __init__(self):
+        self.streams = defaultdict(list)
+        self._grupos = {}
+        self._secuencia = 0
+        self._condicion = threading.Condition()
+
+    def agregar(self, stream, campos, maximo=None):
+        with self._condicion:
+            self._secuencia += 1
+            id_mensaje = f'{self._secuencia}-0'
+            self.streams[stream].append((id_mensaje, dict(campos)))
+            if maximo and len(self.streams[stream]) > maximo:
+                del self.streams[stream][:-maximo]
+            self._condicion.notify_all()
+            return id_mensaje
+
+    def crear_grupo(self, stream, grupo):
+        with self._condicion:
+            self.streams[stream]
+            self._grupos.setdefault((stream, grupo), {'ultimo': 0, 'pendientes': {}})
+
+    def _numero(self, id_mensaje):
+        return int(id_mensaje.split('-')[0])
+
+    def _leer(self, grupo, consumidor, streams, cantidad):
+        mensajes = []
+        for stream in streams:
+            estado = self._grupos[(stream, grupo)]
+            for id_mensaje, campos in self.streams[stream]:
+                if len(mensajes) >= cantidad:
+                    break
+                if self._numero(id_mensaje) > estado['ultimo']:
+                    estado['ultimo'] = self._numero(id_mensaje)
+                    estado['pendientes'][id_mensaje] = [consumidor, time.monotonic(), 1]
+                    mensajes.append((stream, id_mensaje, dict(campos)))
+        return mensajes
+
+    def leer(self, grupo, consumidor, streams, cantidad, bloqueo_ms):
+        with self._condicion:
+            mensajes = self._leer(grupo, consumidor, streams, cantidad)
+            if not mensajes and bloqueo_ms:
+                self._condicion.wait(bloqueo_ms / 1000)
+                mensajes = self._leer(grupo, consumidor, streams, cantidad)
+            return mensajes
+
+    def pendientes(self, stream, grupo, inactivo_ms, cantidad):
+        with self._condicion:
+            ahora = time.monotonic()
+            pendientes = self._grupos[(stream, grupo)]['pendientes']
+            return [
+                (id_mensaje, entregas)
+                for id_mensaje, (_, entregado, entregas) in sorted(pendientes.items(), key=lambda p: self._numero(p[0]))
+                if (ahora - entregado) * 1000 >= inactivo_ms
+            ][:cantidad]
+
+    def reclamar(self, stream, grupo, consumidor, inactivo_ms, ids):
+        with self._condicion:
+            ahora = time.monotonic()
+            pendientes = self._grupos[(stream, grupo)]['pendientes']
+            mensajes = dict(self.streams[stream])
+            reclamados = []
+            for id_mensaje in ids:
+                pendiente = pendientes.get(id_mensaje)
+                if pendiente is None or (ahora - pendiente[1]) * 1000 < inactivo_ms:
+                    continue
+                if id_mensaje not in mensajes:
+                    del pendientes[id_mensaje]
+                    continue
+                pendientes[id_mensaje] = [consumidor, ahora, pendiente[2] + 1]
+                reclamados.append((id_mensaje, dict(mensajes[id_mensaje])))
+            return reclamados
+
+    def confirmar(self, stream, grupo, ids):
+        with self._condicion:
+            pendientes = self._grupos[(stream, grupo)]['pendientes']
+            for id_mensaje in ids:
+                pendientes.pop(id_mensaje, None)
+
+    def mensajes(self, stream):
+        """!
+        @brief Eventos de un stream, decodificados (para las pruebas).
+        """
+        return [decodificar(campos) for _, campos in self.streams.get(stream, [])]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def obtener_backend():
+    """!
+    @brief Backend del proceso según `EVENTOS_BACKEND` ('redis' o 'memoria').
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if getattr(settings, 'EVENTOS_BACKEND', 'redis') == 'memoria':
+                    _backend = BackendMemoria()
+                else:
+                    _backend = BackendRedis(settings.EVENTOS_REDIS_URL, getattr(settings, 'EVENTOS_TIMEOUT', 2.0))
+    return _backend
+
+
+@receiver(setting_changed)
+def _reiniciar_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith('EVENTOS_'):
+        _backend = None
+
+
+def decodificar(campos):
+    """!
+    @brief Convierte los campos de un mensaje del stream en el evento, con `datos` ya decodificado.
+    """
+    return {**campos, 'datos': json.loads(campos.get('datos') or '{}')}
+
+
+def _enviar(tipo, campos):
+    stream = nombre_stream(tipo)
+    try:
+        with span('evento', f'publicar {tipo}'):
+            obtener_backend().agregar(stream, campos, getattr(settings, 'EVENTOS_MAXIMO', 100000))
+        PUBLICADOS.inc(tipo=tipo)
+    except Exception:
+        ERRORES_PUBLICACION.inc(tipo=tipo)
+        logger.exception(
+            f"No se pudo publicar el evento {tipo} ({campos['id']}). "
+            "La operación principal continúa, pero los otros servicios no lo recibirán."
+        )
+
+
+def publicar(tipo, datos):
+    """!
+    @brief Publica un evento de dominio cuando se confirma la transacción actual.
+    @details
+        Si la transacción se revierte el evento no se publica; fuera de una
+        transacción se publica en el momento. El evento lleva un id único (los
+        consumidores pueden recibirlo más de una vez), el servicio de origen y
+        el id de la solicitud, para correlacionar las trazas. Si Redis no
+        responde se registra el error y la operación principal continúa, igual
+        que con las notificaciones de channels.
+    @param tipo: Uno de `EVENTOS`.
+    @param datos: Contenido del evento (serializable a JSON; admite Decimal y fechas).
+
+    @example
+        publicar('cliente_actualizado', {'id': cliente.id, 'nombre': cliente.nombre})
+    """
+    if tipo not in EVENTOS:
+        raise ValueError(f'Evento desconocido: {tipo}')
+    campos = {
+        'id': uuid4().hex,
+        'tipo': tipo,
+        'origen': getattr(settings, 'TRACING_SERVICIO', ''),
+        'fecha': timezone.now().isoformat(),
+        'request_id': request_id_actual() or '',
+        'datos': json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False),
+    }
+    transaction.on_commit(lambda: _enviar(tipo, campos))
+
+
+_manejadores = defaultdict(list)
+
+
+def manejador(*tipos):
+    """!
+    @brief Decorador que registra una función para consumir los eventos `tipos`.
+    @details
+        La función recibe el evento (ver `decodificar()`) y corre en una
+        transacción. Si lanza una excepción el evento se reintenta, así que
+        debe poder aplicarse más de una vez sin efectos repetidos.
+
+    @example
+        @manejador('cliente_actualizado')
+        def actualizar_nombre(evento):
+            ...
+    """
+    for tipo in tipos:
+        if tipo not in EVENTOS:
+            raise ValueError(f'Evento desconocido: {tipo}')
+
+    def registrar(funcion):
+        for tipo in tipos:
+            if funcion not in _manejadores[tipo]:
+                _manejadores[tipo].append(funcion)
+        return funcion
+    return registrar
+
+
+def cargar_manejadores():
+    """!
+    @brief Importa los módulos de `EVENTOS_MANEJADORES` y devuelve los manejadores registrados.
+    @return dict: {tipo: [funciones]}
+    """
+    for modulo in getattr(settings, 'EVENTOS_MANEJADORES', []):
+        import_module(modulo)
+    return {tipo: list(funciones) for tipo, funciones in _manejadores.items() if funciones}
+
+
+class Consumidor:
+    """!
+    @brief Consume los eventos de un grupo (uno por servicio) con confirmación, reintentos y descarte.
+    @details
+        Cada servicio lee con su propio grupo, así todos reciben todos los
+        eventos, y varias instancias del mismo servicio se reparten el trabajo.
+
+        Un evento se confirma (XACK) cuando todos sus manejadores terminaron
+        sin error. Si alguno falla, el evento queda pendiente y, pasados
+        `inactivo_ms`, se reclama y se vuelve a procesar; lo mismo ocurre con
+        los que tomó una instancia que se detuvo. Después de `reintentos`
+        entregas fallidas se mueve al stream `<stream>:descartados` con el
+        grupo y la cantidad de entregas, para revisarlo a mano.
+    """
+
+    def __init__(self, manejadores, grupo=None, nombre=None, backend=None, lote=20, bloqueo_ms=5000, reintentos=None, inactivo_ms=None):
+        self.manejadores = manejadores
+        self.grupo = grupo or getattr(settings, 'TRACING_SERVICIO', 'servicio')
+        self.nombre = nombre or f'{socket.gethostname()}-{os.getpid()}'
+        self.backend = backend or obtener_backend()
+        self.lote = lote
+        self.bloqueo_ms = bloqueo_ms
+        self.reintentos = reintentos if reintentos is not None else getattr(settings, 'EVENTOS_REINTENTOS', 5)
+        self.inactivo_ms = inactivo_ms if inactivo_ms is not None else getattr(settings, 'EVENTOS_INACTIVO_MS', 30000)
+        self.streams = {nombre_stream(tipo): tipo for tipo in manejadores}
+
+    def preparar(self):
+        for stream in self.streams:
+            self.backend.crear_grupo(stream, self.grupo)
+
+    def procesar(self, stream, id_mensaje, campos):
+        """!
+        @brief Corre los manejadores del evento y lo confirma si no fallaron.
+        @return bool: True si se confirmó.
+        """
+        tipo = self.streams[stream]
+        evento = decodificar(campos)
+        token = id_solicitud.set(campos.get('request_id') or None)
+        try:
+            with span('evento', f'consumir {tipo}', id_evento=campos.get('id'), origen=campos.get('origen')):
+                for funcion in self.manejadores[tipo]:
+                    with transaction.atomic():
+                        funcion(evento)
+        except Exception:
+            PROCESADOS.inc(tipo=tipo, resultado='error')
+            logger.exception(f"Error al procesar el evento {tipo} ({campos.get('id')}); se reintentará.")
+            return False
+        finally:
+            id_solicitud.reset(token)
+        self.backend.confirmar(stream, self.grupo, [id_mensaje])
+        PROCESADOS.inc(tipo=tipo, resultado='ok')
+        return True
+
+    def descartar(self, stream, id_mensaje, campos, entregas):
+        tipo = self.streams[stream]
+        self.backend.agregar(stream_descartados(stream), {
+            **campos, 'id_mensaje': id_mensaje, 'grupo': self.grupo, 'entregas': str(entregas),
+        })
+        self.backend.confirmar(stream, self.grupo, [id_mensaje])
+        PROCESADOS.inc(tipo=tipo, resultado='descartado')
+        logger.error(f"Evento {tipo} ({campos.get('id')}) descartado después de {entregas} entregas.")
+
+    def procesar_pendientes(self):
+        """!
+        @brief Reclama los eventos pendientes inactivos: los reintenta o, si agotaron los reintentos, los descarta.
+        @return int: Eventos tomados.
+        """
+        total = 0
+        for stream in self.streams:
+            entregas = dict(self.backend.pendientes(stream, self.grupo, self.inactivo_ms, self.lote))
+            if not entregas:
+                continue
+            for id_mensaje, campos in self.backend.reclamar(stream, self.grupo, self.nombre, self.inactivo_ms, list(entregas)):
+                total += 1
+                if entregas[id_mensaje] >= self.reintentos:
+                    self.descartar(stream, id_mensaje, campos, entregas[id_mensaje])
+                else:
+                    self.procesar(stream, id_mensaje, campos)
+        return total
+
+    def procesar_nuevos(self, bloqueo_ms=None):
+        """!
+        @brief Lee y procesa hasta `lote` eventos nuevos, esperando hasta `bloqueo_ms` si no hay.
+        @return int: Eventos leídos.
+        """
+        mensajes = self.backend.leer(
+            self.grupo, self.nombre, list(self.streams), self.lote,
+            self.bloqueo_ms if bloqueo_ms is None else bloqueo_ms,
+        )
+        for stream, id_mensaje, campos in mensajes:
+            self.procesar(stream, id_mensaje, campos)
+        return len(mensajes)
+
+    def ejecutar_una_vez(self, bloqueo_ms=None):
+        return self.procesar_pendientes() + self.procesar_nuevos(bloqueo_ms)
+
+    def ejecutar(self, detener=None):
+        """!
+        @brief Procesa eventos hasta que se active `detener` (threading.Event).
+        """
+        detener = detener or threading.Event()
+        self.preparar()
+        while not detener.is_set():
+            # Como en cada solicitud del servidor web: descarta las conexiones caídas o vencidas
+            close_old_connections()
+            try:
+                self.ejecutar_una_vez()
+            except Exception:
+                logger.exception('Error al leer eventos del bus; se reintenta en unos segundos.')
+                detener.wait(self.bloqueo_ms / 1000)
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def verificar_base():
+    """!
+    @brief Ejecuta `SELECT 1` en la base de datos por defecto.
+    @return str | None: None si respondió, o el error.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        return None
+    except Exception as e:
+        # Se descarta la conexión para que el próximo chequeo reconecte
+        connection.close()
+        return str(e)
+
+
+def verificar_redis():
+    """!
+    @brief Hace PING a los hosts de Redis de la capa de channels.
+    @details
+        Se conecta directo a Redis en lugar de enviar mensajes por la capa de
+        channels, así el chequeo no deja mensajes sin consumir. Con la capa en
+        memoria no hay nada que verificar.
+    @return str | None: None si respondió (o no se usa Redis), o el error.
+    """
+    capa = getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {})
+    if 'redis' not in capa.get('BACKEND', '').lower():
+        return None
+
+    import redis
+
+    timeout = getattr(settings, 'HEALTH_TIMEOUT', 2.0)
+    for host in capa.get('CONFIG', {}).get('hosts', []):
+        try:
+            if isinstance(host, str):
+                cliente = redis.Redis.from_url(host, socket_timeout=timeout, socket_connect_timeout=timeout)
+            elif isinstance(host, dict):
+                cliente = redis.Redis(socket_timeout=timeout, socket_connect_timeout=timeout, **host)
+            else:
+                cliente = redis.Redis(host=host[0], port=host[1], socket_timeout=timeout, socket_connect_timeout=timeout)
+            try:
+                cliente.ping()
+            finally:
+                cliente.close()
+        except Exception as e:
+            return str(e)
+    return None
+
+
+## Chequeos que corre la sonda: nombre -> función que devuelve None o el error.
+CHEQUEOS = {
+    'db': verificar_base,
+    'redis': verificar_redis,
+}
+
+
+class SondaSalud:
+    """!
+    @brief Corre los chequeos de dependencias en segundo plano y guarda el último resultado.
+    @details
+        Un hilo daemon ejecuta `CHEQUEOS` cada `intervalo` segundos. Las vistas
+        de salud sólo leen el resultado guardado, así un sondeo del orquestador
+        no abre conexiones ni genera tráfico. El hilo arranca con la primera
+        consulta (no al importar el módulo), para no correr en comandos de manage.py.
+
+        Si el último resultado tiene más de `3 * intervalo` segundos se considera
+        vencido (el hilo se colgó) y el servicio se reporta como no listo.
+    """
+
+    def __init__(self, chequeos=None, intervalo=None):
+        self.chequeos = chequeos if chequeos is not None else CHEQUEOS
+        self.intervalo = intervalo if intervalo is not None else getattr(settings, 'HEALTH_INTERVALO', 5.0)
+        self._resultado = None
+        self._lock = threading.Lock()
+        self._listo = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def ejecutar_chequeos(self):
+        """!
+        @brief Corre todos los chequeos una vez y guarda el resultado.
+        """
+        dependencias = {}
+        for nombre, chequeo in self.chequeos.items():
+            inicio = time.perf_counter()
+            error = chequeo()
+            dependencias[nombre] = {
+                'ok': error is None,
+                'latencia_ms': round((time.perf_counter() - inicio) * 1000, 2),
+            }
+            if error is not None:
+                dependencias[nombre]['error'] = error
+        with self._lock:
+            self._resultado = {'dependencias': dependencias, 'verificado': time.time()}
+        self._listo.set()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.ejecutar_chequeos()
+            except Exception:
+                logger.exception('Error inesperado en la sonda de salud')
+            finally:
+                connection.close()
+            self._detener.wait(self.intervalo)
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name='sonda-salud', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def estado(self, espera=None):
+        """!
+        @brief Último resultado de los chequeos.
+        @param espera: Segundos a esperar el primer resultado si todavía no hay.
+        @return dict: {'listo': bool, 'dependencias': {...}, 'antiguedad_s': float}
+        """
+        self.iniciar()
+        if espera is None:
+            espera = getattr(settings, 'HEALTH_TIMEOUT', 2.0)
+        self._listo.wait(espera)
+        with self._lock:
+            resultado = self._resultado
+        if resultado is None:
+            return {'listo': False, 'dependencias': {}, 'detalle': 'Sin chequeos todavía'}
+
+        antiguedad = time.time() - resultado['verificado']
+        vencido = antiguedad > 3 * self.intervalo
+        estado = {
+            'listo': not vencido and all(d['ok'] for d in resultado['dependencias'].values()),
+            'dependencias': resultado['dependencias'],
+            'antiguedad_s': round(antiguedad, 3),
+        }
+        if vencido:
+            estado['detalle'] = 'El último chequeo está vencido'
+        return estado
+
+
+## Sonda única del proceso.
+SONDA = SondaSalud()
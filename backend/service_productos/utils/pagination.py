@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPaginacionOpcional(CursorPagination):
+    """!
+    @brief Paginación por cursor (keyset) que se activa sólo si el cliente la pide.
+    @details
+        Los listados devuelven la lista completa, como siempre, salvo que la
+        solicitud incluya `?cursor=` o `?limite=`. En ese caso la respuesta pasa a
+        ser `{"next": ..., "previous": ..., "results": [...]}` y cada página se pide
+        a partir de la última posición vista, sin OFFSET, por lo que su costo no
+        crece con el número de página.
+
+        El orden usado es el `ordering` de la vista si ésta usa `OrderingFilter`,
+        o `id` en caso contrario.
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'limite'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """!
+        @brief Pagina el queryset sólo si la solicitud trae `cursor` o `limite`.
+        @return list | None: La página pedida, o None para devolver el listado completo.
+        """
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,87 @@
+import re
+
+from django.db import connection
+
+_RECORRIDO_SQLITE = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?$')
+
+
+def plan_consulta(sql, params=None):
+    """!
+    @brief Plan de ejecución de una consulta, como lista de dicts (una fila por paso).
+    @details
+        Usa `EXPLAIN QUERY PLAN` en SQLite y `EXPLAIN` en MySQL. Sólo para
+        pruebas y diagnóstico: la consulta pasa por el cursor de Django.
+    """
+    prefijo = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefijo + sql, params)
+        columnas = [columna[0] for columna in cursor.description]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+
+def recorridos_completos(plan):
+    """!
+    @brief Tablas que el plan lee completas, sin usar ningún índice.
+    @details
+        En SQLite son los pasos `SCAN <tabla>` (un `SCAN <tabla> USING INDEX` recorre
+        el índice en orden y no cuenta); en MySQL, las filas con `type = ALL`.
+    """
+    tablas = set()
+    for paso in plan:
+        if 'detail' in paso:
+            coincidencia = _RECORRIDO_SQLITE.match(paso['detail'])
+            if coincidencia:
+                tablas.add(coincidencia.group(1))
+        elif paso.get('type') == 'ALL':
+            tablas.add(paso.get('table'))
+    return tablas
+
+
+class PlanConsultasTestMixin:
+    """!
+    @brief Asserts sobre los planes de las consultas que ejecuta una vista.
+    @details
+        Se usa junto a un TestCase con `self.client`. Se hace la solicitud, se
+        capturan sus SELECT y se pide el plan de cada uno, así una vista que
+        deja de usar un índice (por un filtro nuevo, un cambio de orden o un
+        índice borrado) rompe la prueba en lugar de volverse lenta en producción.
+
+        Con tablas chicas MySQL puede preferir leer la tabla entera aunque haya
+        índice; estas pruebas están pensadas para la base de pruebas (SQLite).
+
+    @example
+        self.assertUsaIndices(reverse('pedidos') + '?fecha=2026-10-19', ['pedido_fecha_numero_idx'])
+    """
+
+    def planes_de(self, url, metodo='get', **kwargs):
+        """!
+        @return list: (sql, plan) de cada SELECT ejecutado por la solicitud.
+        """
+        consultas = []
+
+        def capturar(execute, sql, params, many, context):
+            if sql.lstrip().lower().startswith('select'):
+                consultas.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capturar):
+            response = getattr(self.client, metodo)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f"{metodo.upper()} {url} respondió {response.status_code}")
+        return [(sql, plan_consulta(sql, params)) for sql, params in consultas]
+
+    def assertUsaIndices(self, url, indices, metodo='get', **kwargs):
+        """!
+        @brief Falla si alguno de `indices` no aparece en los planes de la solicitud.
+        """
+        planes = self.planes_de(url, metodo, **kwargs)
+        texto = '\n'.join(f"{sql}\n  {plan}" for sql, plan in planes)
+        for indice in indices:
+            self.assertIn(indice, texto, f"Ninguna consulta de {url} usa {indice}:\n{texto}")
+
+    def assertSinRecorridosCompletos(self, url, tablas, metodo='get', **kwargs):
+        """!
+        @brief Falla si alguna consulta de la solicitud lee completa alguna de `tablas`.
+        """
+        for sql, plan in self.planes_de(url, metodo, **kwargs):
+            recorridas = recorridos_completos(plan) & set(tablas)
+            self.assertFalse(recorridas, f"Recorrido completo de {sorted(recorridas)} en:\n{sql}\n  {plan}")
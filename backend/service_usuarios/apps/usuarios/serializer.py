@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from .models import Usuario, Rol
 from django.contrib.auth import authenticate
+from utils.sparse_fields import CamposDinamicosSerializerMixin
 #----- Los serializers transforman las clases de django en json y validan datos-------##
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """!
     @brief Serializador para el modelo Usuario.
     @details
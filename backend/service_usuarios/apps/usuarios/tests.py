@@ -3,6 +3,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from apps.roles.models import Rol
 from apps.usuarios.models import Usuario
+from utils.query_budget import QueryBudgetTestMixin
 
 
 class UsuarioAPITestCase(APITestCase):
@@ -60,6 +61,17 @@ class UsuarioAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 4)
 
+    def test_listar_usuarios_paginado_con_campos(self):
+        self.client.force_authenticate(self.admin_user)
+        url = reverse('usuario_listar')
+        response = self.client.get(url, {'limite': 2, 'fields': 'id,email,rol'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(set(response.data['results'][0].keys()), {'id', 'email', 'rol'})
+        self.assertEqual(response.data['results'][0]['rol'], 'Administrador')
+        self.assertIsNotNone(response.data['next'])
+
     def test_listar_usuarios_no_admin(self):
         for user in [self.recepcionista_user, self.cocinero_user, self.normal_user]:
             self.client.force_authenticate(user)
@@ -173,3 +185,28 @@ class UsuarioAPITestCase(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data['detail'], "Usuario no encontrado.")
+
+
+class UsuarioPresupuestoConsultasTestCase(QueryBudgetTestMixin, APITestCase):
+    """El listado de usuarios no debe consultar el rol de cada usuario."""
+
+    def setUp(self):
+        self.admin_user = Usuario.objects.create_user(
+            email='admin@test.com',
+            nombre='Admin',
+            password='admin123',
+            rol=Rol.objects.create(nombre='Administrador')
+        )
+        self.client.force_authenticate(self.admin_user)
+
+    def generar_usuarios(self, n):
+        for i in range(Usuario.objects.count(), n):
+            Usuario.objects.create_user(
+                email=f'usuario{i}@test.com',
+                nombre=f'Usuario {i}',
+                password='user123',
+                rol=Rol.objects.create(nombre=f'Rol {i}')
+            )
+
+    def test_listar_con_consultas_constantes(self):
+        self.assertConsultasConstantes(reverse('usuario_listar'), self.generar_usuarios)
@@ -7,6 +7,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import AdminOnly
+from rest_framework.generics import ListAPIView
+from utils.pagination import CursorPaginacionOpcional
+from utils.sparse_fields import CamposDinamicosViewMixin
 
 class UserLoginView(APIView):
     """!
@@ -199,10 +202,20 @@ class UserTokenRefreshView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
 
-class UsuarioListarView(APIView):
+class UsuarioListarView(CamposDinamicosViewMixin, ListAPIView):
+    """!
+    @brief Vista para listar usuarios (o consultar uno con `?id=`).
+    @details
+        El listado admite paginación por cursor (`?limite=` / `?cursor=`) y
+        limitar los campos devueltos con `?fields=id,email`.
+    """
+    queryset = Usuario.objects.select_related('rol')
+    serializer_class = UsuarioSerializer
+    pagination_class = CursorPaginacionOpcional
     permission_classes = [IsAuthenticated, AdminOnly]
+    query_budget = 5
 
-    def get(self, request):
+    def get(self, request, *args, **kwargs):
         user_id = request.query_params.get("id")
 
         if user_id:
@@ -212,8 +225,7 @@ class UsuarioListarView(APIView):
             except Usuario.DoesNotExist:
                 return Response({"detail": "Usuario no encontrado"}, status=404)
 
-        users = Usuario.objects.all()
-        return Response(UsuarioSerializer(users, many=True).data)
+        return self.list(request, *args, **kwargs)
 
 class UsuarioCrearView(APIView):
     permission_classes = [IsAuthenticated, AdminOnly]
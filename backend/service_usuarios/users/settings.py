@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import timedelta
 from decouple import config 
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,6 +19,9 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
 CORS_ALLOW_ALL_ORIGINS = True
+# El frontend envía X-Request-ID para correlacionar las llamadas de un mismo pedido
+CORS_ALLOW_HEADERS = (*default_headers, 'x-request-id')
+CORS_EXPOSE_HEADERS = ['X-Request-ID']
 
 # Application definition
 INSTALLED_APPS = [
@@ -50,6 +54,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',
+    'utils.tracing.TracingMiddleware',
+    'utils.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,16 +91,26 @@ WSGI_APPLICATION = 'users.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': config('USUARIOS_DB_NAME'),
-        'USER': config('USUARIOS_DB_USER'),
-        'PASSWORD': config('USUARIOS_DB_PASSWORD'),
-        'HOST': config('USUARIOS_DB_HOST'),
-        'PORT': config('USUARIOS_DB_PORT', cast=int),
+# USE_SQLITE=True permite levantar el servicio sin MySQL (pruebas de carga locales)
+if config('USE_SQLITE', default=False, cast=bool):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': config('USUARIOS_DB_NAME'),
+            'USER': config('USUARIOS_DB_USER'),
+            'PASSWORD': config('USUARIOS_DB_PASSWORD'),
+            'HOST': config('USUARIOS_DB_HOST'),
+            'PORT': config('USUARIOS_DB_PORT', cast=int),
+        }
     }
-}
 
 
 # Password validation
@@ -140,11 +157,39 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 ASGI_APPLICATION = 'users.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("redis", 6379)],
+# CHANNEL_LAYER=memory usa la capa en memoria (un solo proceso, sin Redis)
+if config('CHANNEL_LAYER', default='redis') == 'memory':
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [(config('REDIS_HOST', default='redis'), config('REDIS_PORT', default=6379, cast=int))],
+            },
+        },
+    }
+
+# Presupuesto de consultas SQL por solicitud (ver utils/query_budget.py).
+# Las vistas pueden declarar el suyo con el atributo `query_budget`.
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=50, cast=int)
+# True: superar el presupuesto lanza una excepción en lugar de sólo registrarlo
+QUERY_BUDGET_ESTRICTO = config('QUERY_BUDGET_ESTRICTO', default=False, cast=bool)
+
+# Si se define, /metrics exige el encabezado "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Sonda de salud en segundo plano (ver utils/health.py): cada cuántos segundos
+# verifica la base y Redis, y cuánto espera cada chequeo
+HEALTH_INTERVALO = config('HEALTH_INTERVALO', default=5.0, cast=float)
+HEALTH_TIMEOUT = config('HEALTH_TIMEOUT', default=2.0, cast=float)
+
+# Trazas por solicitud (ver utils/tracing.py y el endpoint trazas/)
+TRACING_SERVICIO = 'usuarios'
+TRACING_ARCHIVO = config('TRACING_ARCHIVO', default='')
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=5000, cast=int)
+TRACING_CONSULTAS = config('TRACING_CONSULTAS', default=False, cast=bool)
@@ -1,6 +1,16 @@
 from django.urls import path, include
+from utils.metrics import metrics_view
+from utils.tracing import trazas_view
+from apps.healthcheck.views import HealthCheckView, LivenessView
 
 urlpatterns = [
+    #Métricas en formato Prometheus
+    path('metrics', metrics_view, name='metrics'),
+    path('trazas/', trazas_view, name='trazas'),
+    path('healthcheck/', HealthCheckView.as_view(), name='healthcheck'),
+    path('healthz/', LivenessView.as_view(), name='healthz'),
+    path('readyz/', HealthCheckView.as_view(), name='readyz'),
+
     #Rutas de usuarios
     path('api/usuarios/', include('apps.usuarios.urls')),
 
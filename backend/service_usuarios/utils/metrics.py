@@ -0,0 +1,252 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+## Límites (en segundos) de los histogramas de latencia.
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+## Límites de los histogramas de consultas SQL por solicitud.
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    """!
+    @brief Base de las métricas: nombre, ayuda, etiquetas y un lock propio.
+    @details
+        Cada combinación de valores de etiquetas es una serie. Las series se
+        guardan en un dict indexado por la tupla de valores; registrar una
+        observación es un acceso al dict y una suma bajo el lock.
+    """
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        return tuple(str(etiquetas.get(nombre, '')) for nombre in self.etiquetas)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        with self._lock:
+            series = sorted(self._series.items())
+            lineas += self._lineas(series)
+        return lineas
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas):
+        return self._series.get(self._clave(etiquetas), 0)
+
+    def _lineas(self, series):
+        return [
+            f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}'
+            for clave, valor in series
+        ]
+
+
+class Medidor(Contador):
+    """!
+    @brief Valor que sube y baja (por ejemplo conexiones abiertas).
+    """
+    tipo = 'gauge'
+
+    def dec(self, cantidad=1, **etiquetas):
+        self.inc(-cantidad, **etiquetas)
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # [conteo por bucket (el último es +Inf), suma]
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def conteo(self, **etiquetas):
+        serie = self._series.get(self._clave(etiquetas))
+        return sum(serie[0]) if serie else 0
+
+    def _lineas(self, series):
+        lineas = []
+        for clave, (conteos, suma) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                le = f'le="{_formatear_numero(float(limite))}"'
+                lineas.append(f'{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, clave, le)} {acumulado}')
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_formatear_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+
+class Registro:
+    """!
+    @brief Conjunto de métricas del proceso que se exponen en `/metrics`.
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            if nombre not in self._metricas:
+                self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            return self._metricas[nombre]
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma, nombre, ayuda, etiquetas, buckets=buckets)
+
+    def exponer(self):
+        """!
+        @brief Devuelve todas las métricas en el formato de texto de Prometheus (0.0.4).
+        """
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            lineas += metrica.exponer()
+        return '\n'.join(lineas) + '\n'
+
+
+## Registro único del proceso.
+REGISTRO = Registro()
+
+SOLICITUDES = REGISTRO.contador(
+    'http_requests_total', 'Solicitudes HTTP atendidas por vista, método y código de estado.',
+    ('view', 'method', 'status'),
+)
+LATENCIA = REGISTRO.histograma(
+    'http_request_duration_seconds', 'Duración de las solicitudes HTTP por vista y método.',
+    ('view', 'method'),
+)
+CONSULTAS_DB = REGISTRO.histograma(
+    'db_queries_per_request', 'Consultas SQL ejecutadas por solicitud.',
+    ('view',), buckets=BUCKETS_CONSULTAS,
+)
+TIEMPO_DB = REGISTRO.contador(
+    'db_query_duration_seconds_total', 'Tiempo total en la base de datos por vista.',
+    ('view',),
+)
+
+
+def nombre_vista(request):
+    """!
+    @brief Nombre de la vista que atendió la solicitud, para usar como etiqueta.
+    @details
+        Para las vistas de clase es el nombre de la clase; para los ViewSets se
+        agrega la acción (`CobroViewSet.create`). Las rutas inexistentes se
+        agrupan en `sin_ruta` para no crear una serie por URL.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_ruta'
+    funcion = match.func
+    vista = getattr(funcion, 'view_class', None)
+    if vista is not None:
+        return vista.__name__
+    viewset = getattr(funcion, 'cls', None)
+    if viewset is not None:
+        accion = (getattr(funcion, 'actions', None) or {}).get(request.method.lower())
+        return f'{viewset.__name__}.{accion}' if accion else viewset.__name__
+    return getattr(funcion, '__name__', 'desconocida')
+
+
+class MetricsMiddleware:
+    """!
+    @brief Registra cantidad, latencia y consultas SQL de cada solicitud por vista.
+    @details
+        Debe ir primero en MIDDLEWARE para medir la solicitud completa. Las
+        consultas y el tiempo en la base los toma del contador que deja
+        `QueryBudgetMiddleware` en la solicitud, así cada consulta se intercepta
+        una sola vez.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        vista = nombre_vista(request)
+        if vista == 'metrics_view':
+            return response
+
+        SOLICITUDES.inc(view=vista, method=request.method, status=response.status_code)
+        LATENCIA.observar(duracion, view=vista, method=request.method)
+        contador = getattr(request, 'consultas_db', None)
+        if contador is not None:
+            CONSULTAS_DB.observar(contador.cantidad, view=vista)
+            TIEMPO_DB.inc(contador.tiempo, view=vista)
+        return response
+
+
+def autorizado(request):
+    """!
+    @brief Verifica el acceso a los endpoints de observabilidad.
+    @details
+        Si `settings.METRICS_TOKEN` está definido se exige el encabezado
+        `Authorization: Bearer <token>`; si no, el acceso es libre.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return not token or request.headers.get('Authorization') == f'Bearer {token}'
+
+
+def metrics_view(request):
+    """!
+    @brief Expone las métricas del proceso en formato Prometheus.
+    """
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRO.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,129 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger(__name__)
+
+
+class ContadorConsultas:
+    """!
+    @brief `execute_wrapper` que cuenta las consultas SQL y el tiempo total en la base.
+    """
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.cantidad += 1
+            self.tiempo += time.perf_counter() - inicio
+
+
+class PresupuestoConsultasExcedido(Exception):
+    """!
+    @brief Se lanza en modo estricto cuando una vista supera su presupuesto de consultas.
+    """
+
+
+def presupuesto_de_vista(request):
+    """!
+    @brief Devuelve el presupuesto de consultas declarado por la vista que atendió la solicitud.
+    @details
+        Las vistas lo declaran con el atributo de clase `query_budget`. Si no lo
+        declaran se usa `settings.QUERY_BUDGET_DEFAULT` (None desactiva el control).
+    """
+    default = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return default
+    vista = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+    return getattr(vista, 'query_budget', default)
+
+
+class QueryBudgetMiddleware:
+    """!
+    @brief Middleware que mide consultas y tiempo de base de datos por solicitud.
+    @details
+        Agrega a cada respuesta los encabezados `X-DB-Queries` y `X-DB-Time-ms`.
+        Si la vista declara un `query_budget` y la solicitud lo supera:
+        - registra una advertencia con la ruta, la vista y los valores medidos;
+        - marca la respuesta con `X-Query-Budget-Exceeded`;
+        - con `settings.QUERY_BUDGET_ESTRICTO = True` (pensado para tests y
+          desarrollo) lanza `PresupuestoConsultasExcedido`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = ContadorConsultas()
+        # MetricsMiddleware lo lee para no volver a interceptar las consultas
+        request.consultas_db = contador
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+
+        response['X-DB-Queries'] = str(contador.cantidad)
+        response['X-DB-Time-ms'] = f"{contador.tiempo * 1000:.2f}"
+
+        presupuesto = presupuesto_de_vista(request)
+        if presupuesto is not None and contador.cantidad > presupuesto:
+            mensaje = (
+                f"Presupuesto de consultas excedido en {request.method} {request.path}: "
+                f"{contador.cantidad} consultas (presupuesto {presupuesto}), "
+                f"{contador.tiempo * 1000:.2f} ms en la base"
+            )
+            logger.warning(mensaje)
+            response['X-Query-Budget-Exceeded'] = f"{contador.cantidad}/{presupuesto}"
+            if getattr(settings, 'QUERY_BUDGET_ESTRICTO', False):
+                raise PresupuestoConsultasExcedido(mensaje)
+        return response
+
+
+class QueryBudgetTestMixin:
+    """!
+    @brief Mixin para TestCase que detecta consultas N+1.
+    @details
+        `assertConsultasConstantes` genera datos de dos tamaños distintos, llama al
+        endpoint en cada caso y falla si la cantidad de consultas cambia con el
+        tamaño de los datos.
+
+    @example
+        def generar(n):
+            for i in range(n):
+                Producto.objects.create(...)
+
+        self.assertConsultasConstantes(reverse('producto_listar'), generar)
+    """
+    tamanios_consultas = (2, 8)
+
+    def contar_consultas(self, url, metodo='get', **kwargs):
+        with CaptureQueriesContext(connection) as consultas:
+            response = getattr(self.client, metodo)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f"{url} respondió {response.status_code}")
+        return len(consultas), response
+
+    def assertConsultasConstantes(self, url, generar, metodo='get', **kwargs):
+        """!
+        @brief Falla si las consultas de `url` crecen con la cantidad de datos.
+        @param url: URL a llamar (str) o función sin argumentos que la devuelve.
+        @param generar: Función que recibe n y crea datos hasta tener n elementos.
+        @return tuple: Cantidad de consultas en cada tamaño.
+        """
+        conteos = []
+        for tamanio in self.tamanios_consultas:
+            generar(tamanio)
+            destino = url() if callable(url) else url
+            cantidad, _ = self.contar_consultas(destino, metodo, **kwargs)
+            conteos.append(cantidad)
+        self.assertEqual(
+            len(set(conteos)), 1,
+            f"La cantidad de consultas de {url} crece con los datos: {dict(zip(self.tamanios_consultas, conteos))}"
+        )
+        return tuple(conteos)
@@ -0,0 +1,201 @@
+import contextvars
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+
+from utils.metrics import nombre_vista, autorizado
+
+## Encabezado con el que se recibe y se propaga el id de la solicitud.
+ENCABEZADO = 'X-Request-ID'
+_ID_VALIDO = re.compile(r'^[A-Za-z0-9._\-]{1,128}$')
+
+id_solicitud = contextvars.ContextVar('id_solicitud', default=None)
+span_padre = contextvars.ContextVar('span_padre', default=None)
+
+
+def request_id_actual():
+    """!
+    @brief Id de la solicitud que se está atendiendo, o None fuera de una solicitud.
+    """
+    return id_solicitud.get()
+
+
+def encabezados_propagacion():
+    """!
+    @brief Encabezados a agregar en las llamadas salientes para propagar el id.
+    """
+    request_id = id_solicitud.get()
+    return {ENCABEZADO: request_id} if request_id else {}
+
+
+class RecolectorSpans:
+    """!
+    @brief Guarda los últimos spans del proceso y, opcionalmente, los agrega a un archivo JSON lines.
+    """
+
+    def __init__(self, maximo=5000, archivo=''):
+        self._spans = deque(maxlen=maximo)
+        self._lock = threading.Lock()
+        self.archivo = archivo
+        self._salida = None
+
+    def registrar(self, span):
+        with self._lock:
+            self._spans.append(span)
+            if self.archivo:
+                if self._salida is None:
+                    self._salida = open(self.archivo, 'a', encoding='utf-8')
+                self._salida.write(json.dumps(span, ensure_ascii=False, default=str) + '\n')
+                self._salida.flush()
+
+    def buscar(self, request_id=None, limite=None):
+        """!
+        @brief Spans guardados, ordenados por inicio.
+        @param request_id: Si se indica, sólo los de esa solicitud.
+        @param limite: Cantidad máxima de spans (los más recientes).
+        """
+        with self._lock:
+            spans = list(self._spans)
+        if request_id:
+            spans = [s for s in spans if s['request_id'] == request_id]
+        if limite:
+            spans = spans[-limite:]
+        return sorted(spans, key=lambda s: s['inicio'])
+
+
+_recolector = None
+_recolector_lock = threading.Lock()
+
+
+def obtener_recolector():
+    """!
+    @brief Recolector del proceso, configurado con `TRACING_MAX_SPANS` y `TRACING_ARCHIVO`.
+    """
+    global _recolector
+    if _recolector is None:
+        with _recolector_lock:
+            if _recolector is None:
+                _recolector = RecolectorSpans(
+                    maximo=getattr(settings, 'TRACING_MAX_SPANS', 5000),
+                    archivo=getattr(settings, 'TRACING_ARCHIVO', ''),
+                )
+    return _recolector
+
+
+@contextmanager
+def span(tipo, nombre, **atributos):
+    """!
+    @brief Mide un tramo de la solicitud actual y lo registra en el recolector.
+    @details
+        Los spans anidados quedan vinculados a su padre. Fuera de una solicitud
+        (sin id) no se registra nada.
+    @param tipo: 'vista', 'db', 'http', 'channel' o 'evento'.
+    @param nombre: Descripción del tramo.
+
+    @example
+        with span('http', 'impresora POST /imprimir_comanda') as s:
+            respuesta = ...
+            s['atributos']['status'] = respuesta.status_code
+    """
+    request_id = id_solicitud.get()
+    datos = {'nombre': nombre, 'atributos': dict(atributos)}
+    if request_id is None:
+        yield datos
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    padre = span_padre.get()
+    token = span_padre.set(span_id)
+    inicio = time.time()
+    medicion = time.perf_counter()
+    try:
+        yield datos
+    except Exception as e:
+        datos['atributos']['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duracion = time.perf_counter() - medicion
+        span_padre.reset(token)
+        obtener_recolector().registrar({
+            'request_id': request_id,
+            'span_id': span_id,
+            'padre': padre,
+            'servicio': getattr(settings, 'TRACING_SERVICIO', ''),
+            'tipo': tipo,
+            'nombre': datos['nombre'],
+            'inicio': inicio,
+            'duracion_ms': round(duracion * 1000, 3),
+            'atributos': datos['atributos'],
+        })
+
+
+def _span_consulta(execute, sql, params, many, context):
+    with span('db', sql[:200]):
+        return execute(sql, params, many, context)
+
+
+class TracingMiddleware:
+    """!
+    @brief Asigna un id a cada solicitud y registra el span de la vista.
+    @details
+        Toma el id de `X-Request-ID` si viene en la solicitud (y es válido) o
+        genera uno nuevo, y lo devuelve en la respuesta. El span de la vista lleva
+        la cantidad y el tiempo de las consultas SQL (del contador de
+        `QueryBudgetMiddleware`). Con `TRACING_CONSULTAS = True` además se
+        registra un span por consulta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.por_consulta = getattr(settings, 'TRACING_CONSULTAS', False)
+
+    def __call__(self, request):
+        request_id = request.headers.get(ENCABEZADO, '')
+        if not _ID_VALIDO.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        token = id_solicitud.set(request_id)
+        try:
+            with span('vista', f'{request.method} {request.path}') as datos:
+                if self.por_consulta:
+                    with connection.execute_wrapper(_span_consulta):
+                        response = self.get_response(request)
+                else:
+                    response = self.get_response(request)
+                datos['nombre'] = f'{request.method} {nombre_vista(request)}'
+                datos['atributos']['status'] = response.status_code
+                contador = getattr(request, 'consultas_db', None)
+                if contador is not None:
+                    datos['atributos']['db_consultas'] = contador.cantidad
+                    datos['atributos']['db_ms'] = round(contador.tiempo * 1000, 3)
+        finally:
+            id_solicitud.reset(token)
+
+        response[ENCABEZADO] = request_id
+        return response
+
+
+def trazas_view(request):
+    """!
+    @brief Devuelve los spans guardados en este proceso.
+    @details
+        `?request_id=` filtra por solicitud y `?limite=` limita la cantidad.
+        Se protege igual que `/metrics` (ver `METRICS_TOKEN`).
+    """
+    if not autorizado(request):
+        return JsonResponse({'detail': 'No autorizado'}, status=403)
+    limite = request.GET.get('limite', '')
+    spans = obtener_recolector().buscar(
+        request_id=request.GET.get('request_id'),
+        limite=int(limite) if limite.isdigit() else 500,
+    )
+    return JsonResponse(spans, safe=False)